@@ -0,0 +1,206 @@
+"""API HTTP/JSON de pontuação ROBINS-I V2.
+
+Recebe as respostas de uma avaliação (ou uma lista delas) e devolve os riscos
+por domínio e o julgamento global no mesmo formato do `report_data` da
+interface:
+
+    POST /api/v1/score
+    {"study_id": "Silva 2020", "outcome": "Mortalidade", "numeric_result": "RR 1.5",
+     "b1": "N", "b2": "N", "b3": "N", "c4": "A",
+     "answers": {"1.1": "Y", "1.2": "N", ...}}
+
+    -> {"study_id": ..., "variant": "A",
+        "domains": {"Domínio 1": {"risk": ..., "reason": ...}, ...},
+        "algo_risk": ..., "errors": []}
+
+Uma lista de avaliações (até MAX_BATCH) devolve uma lista de resultados, na
+mesma ordem. As respostas também podem vir como colunas da planilha do
+batch.py ("q1_1", ...) no próprio objeto. Valores inválidos e perguntas
+desconhecidas (ex.: "1.10") não derrubam a requisição: são listados em
+"errors", como no batch.
+
+A pontuação é feita pelas tabelas de decisão (decision_table.py), montadas na
+subida de cada worker, e roda direto no laço de eventos: leva dezenas de
+microssegundos, menos que despachar para uma thread. O paralelismo vem dos
+processos do uvicorn (--workers), e as conexões são keep-alive (HTTP/1.1)
+com TCP_NODELAY.
+
+    python api.py --port 8000 --workers 4
+
+Para servir junto com a interface, no mesmo processo, veja serve.py.
+"""
+import argparse
+import contextlib
+import json
+import os
+import re
+import socket
+import sys
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from uvicorn.protocols.http.auto import AutoHTTPProtocol
+
+import decision_table
+from batch import ANSWER_COLUMNS, TRIAGE_COLUMNS, canonical_header, score_row_errors
+from engine import DOMAIN_NAMES, DOMAINS
+
+MAX_BATCH = 1000
+# Corpo máximo aceito (bytes); uma avaliação completa tem ~1 KB
+MAX_BODY = 4 * 1024 * 1024
+
+_FIELDS = ("study_id", "outcome", "numeric_result", "b1", "b2", "b3", "c4")
+_ANSWER_COLUMNS = frozenset(ANSWER_COLUMNS)
+# Cabeçalho canônico de uma coluna de pergunta ("1.1", "q1_1" -> "q1_1")
+_QUESTION_COLUMN = re.compile(r"^q\d+_\d+$")
+
+
+class UnicodeJSONResponse(JSONResponse):
+    """JSON compacto e sem escapar acentos ("Domínio 1")."""
+
+    def render(self, content):
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _error(status, message):
+    return UnicodeJSONResponse({"error": message}, status_code=status)
+
+
+def _row(payload):
+    """Converte o payload da API numa linha no formato da planilha do batch.py.
+
+    Retorna (linha, erros): chaves de pergunta (no formato "1.1"/"q1_1") que
+    não correspondem a nenhuma coluna conhecida (ex.: "1.10") são erros, não
+    respostas em branco; outras chaves (ex.: "quality") são ignoradas.
+    """
+    row = {k: payload[k] for k in _FIELDS if k in payload}
+    errors = []
+    for key, value in payload.items():
+        header = canonical_header(key)
+        if _QUESTION_COLUMN.match(header):
+            if header in _ANSWER_COLUMNS:
+                row[header] = value
+            else:
+                errors.append(f"{key}: pergunta desconhecida")
+    answers = payload.get("answers") or {}
+    if not isinstance(answers, dict):
+        raise ValueError('"answers" deve ser um objeto {"1.1": "Y", ...}')
+    for qid, value in answers.items():
+        header = canonical_header(qid)
+        if header in _ANSWER_COLUMNS or header in TRIAGE_COLUMNS:
+            row[header] = value
+        else:
+            errors.append(f"answers.{qid}: pergunta desconhecida")
+    return row, errors
+
+
+def score_payload(payload):
+    """Pontua uma avaliação (dict da API) e devolve o resultado no formato report_data."""
+    if not isinstance(payload, dict):
+        raise ValueError("Cada avaliação deve ser um objeto JSON")
+    row, unknown = _row(payload)
+    result, errors = score_row_errors(row)
+    errors = unknown + errors
+    domains = {}
+    for d in DOMAINS:
+        risk = result.get(f"{d.lower()}_risk")
+        if risk is not None:
+            domains[DOMAIN_NAMES[d]] = {"risk": risk, "reason": result[f"{d.lower()}_reason"]}
+    return {
+        "study_id": result["study_id"],
+        "outcome": result["outcome"],
+        "numeric_result": result["numeric_result"],
+        "variant": result["variant"],
+        "domains": domains,
+        "algo_risk": result.get("algo_risk", ""),
+        "errors": errors,
+    }
+
+
+async def score(request):
+    try:
+        length = int(request.headers.get("content-length") or 0)
+    except ValueError:
+        return _error(400, "Content-Length inválido")
+    if length > MAX_BODY:
+        return _error(413, f"Corpo maior que {MAX_BODY} bytes")
+    body = await request.body()
+    if len(body) > MAX_BODY:
+        return _error(413, f"Corpo maior que {MAX_BODY} bytes")
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return _error(400, "JSON inválido")
+
+    try:
+        if isinstance(payload, list):
+            if len(payload) > MAX_BATCH:
+                return _error(413, f"Lote com {len(payload)} avaliações (máximo {MAX_BATCH})")
+            return UnicodeJSONResponse([score_payload(p) for p in payload])
+        return UnicodeJSONResponse(score_payload(payload))
+    except ValueError as e:
+        return _error(400, str(e))
+
+
+async def health(request):
+    return Response("ok", media_type="text/plain")
+
+
+routes = [
+    Route("/api/v1/score", score, methods=["POST"]),
+    Route("/api/v1/health", health, methods=["GET"]),
+]
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # Cada worker monta as tabelas antes de aceitar conexões
+    decision_table.build_all()
+    yield
+
+
+app = Starlette(routes=routes, lifespan=lifespan)
+
+
+class NoDelayHTTPProtocol(AutoHTTPProtocol):
+    """Protocolo HTTP do uvicorn com TCP_NODELAY em cada conexão.
+
+    Com --workers o uvicorn cria o socket de escuta sem o protocolo TCP
+    explícito e o asyncio deixa de ligar o TCP_NODELAY. Como cabeçalhos e
+    corpo da resposta saem em duas escritas, o algoritmo de Nagle segurava o
+    corpo até o ACK atrasado do cliente: ~40 ms por requisição em conexões
+    keep-alive.
+    """
+
+    def connection_made(self, transport):
+        sock = transport.get_extra_info("socket")
+        if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        super().connection_made(transport)
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="API HTTP de pontuação ROBINS-I V2.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processos do servidor")
+    parser.add_argument("--keep-alive", type=int, default=30, help="Segundos de conexão ociosa mantida aberta")
+    args = parser.parse_args(argv)
+
+    uvicorn.run(
+        "api:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        http="api:NoDelayHTTPProtocol",
+        timeout_keep_alive=args.keep_alive,
+        access_log=False,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
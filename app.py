@@ -1,8 +1,21 @@
+import json
+import secrets
+import sqlite3
+
 import streamlit as st
-from docx import Document
-from docx.shared import Pt, RGBColor
-from fpdf import FPDF
-import io
+
+import assets
+import catalog
+import reports
+import sensitivity
+import telemetry
+from engine import (
+    C4_OPTIONS, DOMAIN_NAMES, DOMAINS, PENDING, RISK_LEVELS, RiskTally, d3_partial_risks, normalize_answers,
+    question_ids, score_overall, triage_blocks, variant_from_c4, visible_questions,
+)
+from palette import get_risk_color
+from store import default_store
+from workspace import STUDY_DOMAINS, StudyWorkspace, score_cached
 
 # --- CONFIGURAÇÃO DA PÁGINA ---
 st.set_page_config(
@@ -11,109 +24,49 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# --- FUNÇÕES DE RELATÓRIO (PDF e WORD) ---
-def generate_docx(data):
-    doc = Document()
-    style = doc.styles['Normal']
-    style.font.name = 'Arial'
-    style.font.size = Pt(11)
-
-    doc.add_heading(f"Relatório ROBINS-I V2: {data['study_id']}", 0)
-    doc.add_paragraph(f"Desfecho: {data['outcome']}")
-    doc.add_paragraph(f"Resultado Numérico: {data['numeric_result']}")
-    
-    # Risco Geral
-    doc.add_heading("Julgamento Geral de Risco", level=1)
-    p = doc.add_paragraph()
-    runner = p.add_run(f"Sugestão do Algoritmo: {data['algo_risk']}")
-    runner.bold = True
-    
-    doc.add_paragraph(f"Decisão Final do Pesquisador: {data['manual_risk']}")
-    doc.add_paragraph(f"Justificativa Final: {data['manual_justification']}")
-
-    # Detalhes por Domínio
-    doc.add_heading("Detalhamento por Domínio", level=1)
-    
-    for domain, details in data['domains'].items():
-        doc.add_heading(domain, level=2)
-        doc.add_paragraph(f"Risco Calculado: {details['risk']}")
-        doc.add_paragraph(f"Justificativa do Algoritmo: {details['reason']}")
-        doc.add_paragraph("Respostas Selecionadas:")
-        for q, a in details['answers'].items():
-            doc.add_paragraph(f"  - {q}: {a}", style='List Bullet')
-
-    # Salvar em memória
-    bio = io.BytesIO()
-    doc.save(bio)
-    return bio
-
-def generate_pdf(data):
-    class PDF(FPDF):
-        def header(self):
-            self.set_font('Arial', 'B', 15)
-            self.cell(0, 10, f"Relatorio ROBINS-I V2: {data['study_id']}", 0, 1, 'C')
-            self.ln(10)
-
-    pdf = PDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
-
-    def clean_text(text):
-        return str(text).encode('latin-1', 'replace').decode('latin-1')
-
-    # Cabeçalho Info
-    pdf.set_font("Arial", 'B', 12)
-    pdf.cell(0, 10, clean_text(f"Desfecho: {data['outcome']}"), 0, 1)
-    pdf.cell(0, 10, clean_text(f"Resultado: {data['numeric_result']}"), 0, 1)
-    pdf.ln(5)
-
-    # Risco Geral
-    pdf.set_font("Arial", 'B', 14)
-    pdf.cell(0, 10, clean_text("Julgamento Geral"), 0, 1)
-    pdf.set_font("Arial", '', 12)
-    pdf.multi_cell(0, 10, clean_text(f"Algoritmo: {data['algo_risk']}"))
-    pdf.multi_cell(0, 10, clean_text(f"Decisao Pesquisador: {data['manual_risk']}"))
-    pdf.multi_cell(0, 10, clean_text(f"Justificativa: {data['manual_justification']}"))
-    pdf.ln(5)
-
-    # Domínios
-    pdf.set_font("Arial", 'B', 14)
-    pdf.cell(0, 10, clean_text("Detalhamento por Dominio"), 0, 1)
-    
-    pdf.set_font("Arial", '', 11)
-    for domain, details in data['domains'].items():
-        pdf.set_font("Arial", 'B', 12)
-        pdf.cell(0, 10, clean_text(domain), 0, 1)
-        pdf.set_font("Arial", '', 11)
-        pdf.cell(0, 8, clean_text(f"Risco: {details['risk']}"), 0, 1)
-        pdf.multi_cell(0, 8, clean_text(f"Motivo: {details['reason']}"))
-        pdf.ln(2)
-
-    return pdf.output(dest="S").encode("latin-1")
+# Tempo de cada execução completa do script (telemetry.py)
+page_timer = telemetry.Timer("page")
 
 # --- FUNÇÕES AUXILIARES DE UI ---
-def get_risk_color(risk, domain_name=""):
-    r = str(risk).upper()
-    d = str(domain_name).upper()
-    
-    # 1. Checagem de Baixo Risco
-    if "LOW" in r or "BAIXO RISCO" in r:
-        # REGRA ESPECIAL: Domínio 1 é sempre Amarelo (exceto preocupações)
-        if "DOMÍNIO 1" in d:
-            return "#D4AC0D"  # Amarelo Escuro
-        # REGRA PADRÃO: Outros domínios (2, 3, etc) são Verdes
-        return "#27AE60"      # Verde Esmeralda
-        
-    # 2. Outros Níveis de Risco
-    elif "MODERATE" in r or "MODERADO" in r: 
-        return "#E67E22"  # Laranja
-    elif "SERIOUS" in r or "SÉRIO" in r or "SERIO" in r: 
-        return "#C0392B"  # Vermelho
-    elif "CRITICAL" in r or "CRÍTICO" in r or "CRITICO" in r: 
-        return "#000000"  # Preto
-        
-    # 3. Padrão (Pendente ou erro)
-    return "gray"
+@st.cache_resource
+def question_catalog():
+    # Enunciados, opções e ajudas montados uma vez por processo (catalog.py)
+    return catalog.load()
+
+def question_key(question):
+    return f"q{question.qid}_{question.variant}" if question.variant else f"q{question.qid}"
+
+def ask(qid, variant=None):
+    # Selectbox de uma pergunta do catálogo. Com "Ajuda sob demanda", o texto
+    # de ajuda só é enviado ao navegador quando o usuário abre a ajuda.
+    question = question_catalog()[catalog.key(qid, variant)]
+    widget_key = question_key(question)
+    if question.help is None or not st.session_state.get("lazy_help"):
+        return st.selectbox(question.label, question.options, help=question.help, key=widget_key)
+    answer = st.selectbox(question.label, question.options, key=widget_key)
+    if st.toggle("ℹ️ Ajuda", key=f"help_{widget_key}"):
+        st.caption(question.help)
+    return answer
+
+def reset_dev_panel():
+    # Só a visualização: o registro é do processo e alimenta o /metrics
+    st.session_state["telemetry_mark"] = telemetry.REGISTRY.mark()
+
+def render_dev_panel():
+    # Medições de todas as sessões deste processo, até a execução anterior
+    # (desde o último "Zerar medições" deste painel)
+    rows = telemetry.REGISTRY.snapshot(since=st.session_state.get("telemetry_mark"))
+    if rows:
+        st.dataframe(rows, hide_index=True)
+    else:
+        st.caption("Nenhuma medição ainda.")
+    st.download_button(
+        "Métricas (Prometheus)", telemetry.REGISTRY.prometheus(), file_name="metrics.txt", mime="text/plain"
+    )
+    st.button(
+        "Zerar medições", on_click=reset_dev_panel,
+        help="Zera só a visualização deste painel; o /metrics e as outras sessões continuam acumulando."
+    )
 
 def display_risk_card(domain, risk, justification):
     # O SEGREDO ESTÁ AQUI: Passamos 'domain' para get_risk_color saber se aplica a regra do Amarelo ou Verde
@@ -126,1527 +79,1032 @@ def display_risk_card(domain, risk, justification):
     </div>
     """, unsafe_allow_html=True)
 
+def render_sensitivity(domain, answers):
+    # Trocas de uma resposta que mudam o risco do domínio (sensitivity.py)
+    # Domínios ainda não pontuados nesta sessão contam como pendentes
+    tally = st.session_state["risk_tally"].risks
+    risks = {d: tally.get(d, PENDING) for d in DOMAINS}
+    overall = score_overall(risks.values())
+    rows = [
+        {
+            "Pergunta": alt.question, "Resposta": alt.current, "Se fosse": alt.option,
+            "Risco do domínio": f"{risks[domain]} → {alt.risk}",
+            "Global": f"{overall} → {new_overall}" if new_overall != overall else "—",
+        }
+        for alt, new_overall in sensitivity.effects(
+            domain, st.session_state["assessment_context"]["variant"], answers, risks
+        )
+    ]
+    changes_overall = sum(row["Global"] != "—" for row in rows)
+    with st.expander(f"🔍 E se? {len(rows)} trocas de resposta mudam o domínio ({changes_overall} mudam o global)"):
+        if rows:
+            st.dataframe(rows, hide_index=True)
+        else:
+            st.caption("Nenhuma troca de uma única resposta muda o risco deste domínio.")
+        st.caption("Trocas que exibem perguntas ainda sem resposta não entram na lista.")
+
+def save_domain_result(domain, risk, reason, answers):
+    # Cada domínio é um fragmento: mudar uma resposta reexecuta só o domínio.
+    # O resultado fica em session_state e o restante da página só é refeito
+    # quando o risco global muda.
+    results = st.session_state.setdefault("domain_results", {})
+    results[domain] = {"risk": risk, "reason": reason, "answers": answers}
+    context = st.session_state["assessment_context"]
+    study_workspace().set_domain(context["outcome"], domain, context["variant"], answers)
+    display_risk_card(DOMAIN_NAMES[domain], risk, reason)
+
+    tally = st.session_state.setdefault("risk_tally", RiskTally())
+    changed = tally.set(domain, risk)
+    if not st.session_state.get("rendering_page"):
+        # Com a sensibilidade ligada, o global das trocas dos outros domínios depende deste risco
+        if changed and (tally.overall != st.session_state.get("overall_risk") or st.session_state.get("sensitivity")):
+            st.rerun(scope="app")
+        save_assessment()
+    if st.session_state.get("sensitivity"):
+        render_sensitivity(domain, answers)
+
+# --- PERSISTÊNCIA (SQLite) ---
+def current_report_data():
+    context = st.session_state["assessment_context"]
+    results = st.session_state["domain_results"]
+    return {
+        "study_id": context["study_id"],
+        "outcome": context["outcome"],
+        "numeric_result": context["numeric_result"],
+        "domains": {DOMAIN_NAMES[d]: results[d] for d in DOMAINS},
+        "algo_risk": st.session_state["risk_tally"].overall,
+        "manual_risk": context.get("manual_risk", ""),
+        "manual_justification": context.get("manual_justification", ""),
+    }
+
+def outcome_report_data(outcome):
+    # Avaliação de um desfecho que não está aberto, montada a partir do
+    # workspace; os domínios herdados saem do cache de pontuação
+    ws = study_workspace()
+    variant = ws.context["variant"]
+    scores = ws.score(outcome, variant)
+    algo_risk = score_overall(risk for risk, _ in scores.values())
+    details = ws.details.get(outcome, {})
+    decided_for, decision = details.get("manual") or (None, None)
+    manual_risk = decision if decided_for == algo_risk else algo_risk
+    return {
+        "study_id": ws.context["study_id"],
+        "outcome": outcome,
+        "numeric_result": details.get("numeric_result", ""),
+        "domains": {
+            DOMAIN_NAMES[d]: {
+                "risk": risk, "reason": reason,
+                "answers": normalize_answers(d, variant, ws.domain_answers(outcome, d, variant)),
+            }
+            for d, (risk, reason) in scores.items()
+        },
+        "algo_risk": algo_risk,
+        # Desfecho PENDENTE sem decisão do pesquisador: nenhuma decisão salva
+        "manual_risk": manual_risk if manual_risk in RISK_LEVELS else "",
+        "manual_justification": details.get("manual_justification", ""),
+    }
+
+def store_assessment(report_data, context):
+    answers = {k: context[k] for k in ("b1", "b2", "b3", "c4")}
+    for d in DOMAINS:
+        answers.update(report_data["domains"][DOMAIN_NAMES[d]]["answers"])
+    default_store().save(
+        report_data, answers, reviewer=context["reviewer"], variant=context["variant"],
+        template_id=context.get("template_id"),
+    )
+
+def can_save(context):
+    # A chave da avaliação (estudo + desfecho + revisor) precisa ter sido
+    # informada pelo usuário: o estudo de exemplo e o revisor em branco não contam
+    return bool(context) and context["study_id"] not in ("", SIDEBAR_DEFAULTS["study_id"]) and bool(context["reviewer"])
+
+def save_assessment():
+    # Chamada a cada mudança; o store ignora gravações sem alteração de conteúdo
+    checkpoint_session()
+    context = st.session_state.get("assessment_context")
+    if not can_save(context):
+        return None
+    # Os outros desfechos do estudo afetados pela mudança (respostas herdadas)
+    ws = study_workspace()
+    pending = [o for o in ws.pop_dirty() if o != context["outcome"]]
+    try:
+        while pending:
+            store_assessment(outcome_report_data(pending[0]), ws.context)
+            pending.pop(0)
+        store_assessment(current_report_data(), context)
+    except sqlite3.Error as e:
+        ws.dirty.update(pending)
+        return f"Não foi possível salvar a avaliação: {e}"
+    return None
+
+# --- RETOMADA DA SESSÃO (checkpoint pelo token da URL) ---
+# Se a conexão cai, o Streamlit abre uma sessão nova com os valores padrão. O
+# estado dos widgets e os resultados dos domínios são gravados a cada mudança
+# sob o token ?s= da URL, e a sessão nova os restaura antes do primeiro widget.
+SIDEBAR_DEFAULTS = {
+    "study_id": "Estudo Exemplo", "outcome": "Mortalidade", "numeric_result": "RR 1.5", "reviewer": "",
+}
+
+def checkpoint_state():
+    state = {k: st.session_state[k] for k in (*SIDEBAR_DEFAULTS, "lazy_help", "sensitivity", "c4") if k in st.session_state}
+    state["questions"] = {
+        key: st.session_state[key]
+        for key in map(question_key, question_catalog().values()) if key in st.session_state
+    }
+    context = st.session_state.get("assessment_context") or {}
+    state["manual"] = [st.session_state.get("overall_risk"), context.get("manual_risk")]
+    state["manual_justification"] = st.session_state.get("manual_justification", "")
+    state["domain_results"] = st.session_state.get("domain_results", {})
+    if "workspace" in st.session_state:
+        state["workspace"] = st.session_state["workspace"].to_dict()
+    state["template_id"] = st.session_state.get("template_id")
+    return state
+
+def checkpoint_session():
+    # Só grava quando algo mudou desde o último checkpoint desta sessão
+    token = st.session_state.get("checkpoint_token")
+    if not token:
+        return
+    data = json.dumps(checkpoint_state(), ensure_ascii=False, sort_keys=True)
+    if data == st.session_state.get("checkpoint_data"):
+        return
+    try:
+        default_store().save_checkpoint(token, json.loads(data))
+    except sqlite3.Error:
+        return
+    st.session_state["checkpoint_data"] = data
+
+def restore_session():
+    # Uma vez por sessão: lê o token da URL (ou cria um) e restaura o checkpoint
+    if "checkpoint_token" in st.session_state:
+        return
+    token = st.query_params.get("s")
+    state = default_store().load_checkpoint(token) if token else None
+    if not token:
+        token = secrets.token_urlsafe(12)
+        st.query_params["s"] = token
+    st.session_state["checkpoint_token"] = token
+    for key, value in SIDEBAR_DEFAULTS.items():
+        st.session_state.setdefault(key, value)
+    if not state:
+        return
+
+    for key in (*SIDEBAR_DEFAULTS, "lazy_help", "sensitivity"):
+        if key in state:
+            st.session_state[key] = state[key]
+    if state.get("c4") in C4_OPTIONS:
+        st.session_state["c4"] = state["c4"]
+    if state.get("template_id") is not None:
+        st.session_state["template_id"] = state["template_id"]
+    ws = StudyWorkspace.from_dict(state.get("workspace") or {})
+    if st.session_state["outcome"] in ws.outcomes:
+        st.session_state["workspace"] = ws
+        for domain in STUDY_DOMAINS:
+            st.session_state[f"override_{domain}"] = domain in ws.overrides[st.session_state["outcome"]]
+    questions = state.get("questions", {})
+    for question in question_catalog().values():
+        key = question_key(question)
+        if questions.get(key) in question.options:
+            st.session_state[key] = questions[key]
+    st.session_state["manual_justification"] = state.get("manual_justification", "")
+    algo_risk, manual_risk = state.get("manual") or (None, None)
+    if manual_risk in RISK_LEVELS:
+        # Decisão do pesquisador para o risco do algoritmo em que foi tomada
+        st.session_state["restored_manual_risk"] = {algo_risk: manual_risk}
+    results = state.get("domain_results") or {}
+    if all(d in results for d in DOMAINS):
+        st.session_state["domain_results"] = results
+        st.session_state["risk_tally"] = RiskTally({d: results[d]["risk"] for d in DOMAINS})
+        st.session_state["overall_risk"] = st.session_state["risk_tally"].overall
+    st.session_state["checkpoint_data"] = json.dumps(state, ensure_ascii=False, sort_keys=True)
+
+# --- DESFECHOS DO ESTUDO (workspace.py) ---
+# O mesmo estudo pode ser avaliado para vários desfechos. Triagem, C4 e os
+# domínios 1-3 são do estudo e herdados por todos os desfechos (cada desfecho
+# pode ter respostas próprias num desses domínios); os domínios 4-6 são de
+# cada desfecho. Os widgets mostram o desfecho aberto: trocar de desfecho
+# carrega as respostas dele nos widgets antes do rerun.
+def study_workspace():
+    if "workspace" not in st.session_state:
+        st.session_state["workspace"] = StudyWorkspace([st.session_state["outcome"]])
+    return st.session_state["workspace"]
+
+def load_domain(domain, variant, answers):
+    # Respostas de um domínio nos widgets; perguntas que ficariam ocultas são limpas
+    questions = question_catalog()
+    answers = normalize_answers(domain, variant, answers)
+    visible = set(visible_questions(domain, variant, answers))
+    for qid, value in answers.items():
+        key = question_key(questions[catalog.key(qid, variant)])
+        if qid in visible:
+            st.session_state[key] = value
+        else:
+            st.session_state.pop(key, None)
+
+def load_outcome(outcome):
+    ws = study_workspace()
+    variant = variant_from_c4(st.session_state.get("c4", C4_OPTIONS[0]))
+    for domain in DOMAINS:
+        load_domain(domain, variant, ws.domain_answers(outcome, domain, variant))
+    for domain in STUDY_DOMAINS:
+        st.session_state[f"override_{domain}"] = domain in ws.overrides[outcome]
+    details = ws.details.get(outcome, {})
+    st.session_state["numeric_result"] = details.get("numeric_result", "")
+    st.session_state["manual_justification"] = details.get("manual_justification", "")
+    algo_risk, manual_risk = details.get("manual") or (None, None)
+    st.session_state["restored_manual_risk"] = {algo_risk: manual_risk} if manual_risk in RISK_LEVELS else {}
+
+def switch_outcome():
+    load_outcome(st.session_state["outcome"])
+
+def add_outcome():
+    try:
+        outcome = study_workspace().add_outcome(st.session_state["new_outcome"])
+    except ValueError as e:
+        st.session_state["workspace_error"] = str(e)
+        return
+    st.session_state["new_outcome"] = ""
+    st.session_state["outcome"] = outcome
+    load_outcome(outcome)
+
+# Renomear o estudo ou um desfecho muda a chave da avaliação salva (em vez de
+# deixar a antiga para trás); remover um desfecho apaga a dele
+def move_saved(moves):
+    # moves: [(desfecho, novo estudo, novo desfecho)], do estudo e revisor atuais
+    context = st.session_state.get("assessment_context")
+    if not can_save(context):
+        return
+    try:
+        for outcome, new_study_id, new_outcome in moves:
+            default_store().move(
+                (context["study_id"], outcome, context["reviewer"]),
+                (new_study_id, new_outcome, context["reviewer"]),
+            )
+    except sqlite3.Error as e:
+        st.session_state["workspace_error"] = f"Não foi possível renomear a avaliação salva: {e}"
+
+def rename_study():
+    study_id = st.session_state["study_id"]
+    if study_id in ("", SIDEBAR_DEFAULTS["study_id"]):
+        return
+    move_saved([(o, study_id, o) for o in study_workspace().outcomes])
+
+def rename_outcome():
+    old = st.session_state["outcome"]
+    try:
+        outcome = study_workspace().rename_outcome(old, st.session_state["new_outcome"])
+    except ValueError as e:
+        st.session_state["workspace_error"] = str(e)
+        return
+    move_saved([(old, st.session_state["assessment_context"]["study_id"], outcome)])
+    st.session_state["new_outcome"] = ""
+    st.session_state["outcome"] = outcome
+
+def remove_outcome():
+    ws = study_workspace()
+    outcome = st.session_state["outcome"]
+    ws.remove_outcome(outcome)
+    context = st.session_state.get("assessment_context")
+    if can_save(context):
+        try:
+            record = default_store().load(context["study_id"], outcome, context["reviewer"])
+            if record is not None:
+                default_store().delete(record["id"])
+        except sqlite3.Error as e:
+            st.session_state["workspace_error"] = f"Não foi possível apagar a avaliação salva: {e}"
+    st.session_state["outcome"] = ws.outcomes[0]
+    load_outcome(ws.outcomes[0])
+
+def toggle_override(domain):
+    outcome = st.session_state["outcome"]
+    study_workspace().set_override(outcome, domain, st.session_state[f"override_{domain}"])
+    load_outcome(outcome)
+
+# --- MODELOS (store.py) ---
+# Aplicar um modelo preenche a triagem, a C4 e os domínios com as respostas
+# dele; a avaliação passa a ser salva como clone (só as diferenças).
+def load_triage(answers):
+    # Triagem e C4 nos widgets
+    questions = question_catalog()
+    for qid in ("b1", "b2", "b3"):
+        if answers.get(qid) in questions[catalog.key(qid)].options:
+            st.session_state[question_key(questions[catalog.key(qid)])] = answers[qid]
+    if answers.get("c4") in C4_OPTIONS:
+        st.session_state["c4"] = answers["c4"]
+
+def apply_template():
+    template = default_store().get_template(st.session_state["template_choice"])
+    answers = template["answers"]
+    load_triage(answers)
+    variant = template["variant"] or variant_from_c4(st.session_state.get("c4", C4_OPTIONS[0]))
+    for domain in DOMAINS:
+        load_domain(domain, variant, answers)
+    st.session_state["template_id"] = template["id"]
+
+# --- ABRIR UMA AVALIAÇÃO SALVA (página Avaliações Salvas) ---
+# A página grava o id em session_state["load_assessment"] e volta para cá; a
+# avaliação vira um estudo novo no formulário, só com o desfecho dela.
+def load_assessment(assessment_id):
+    record = default_store().get(assessment_id)
+    if record is None:
+        return
+    answers = record["answers"]
+    for key in SIDEBAR_DEFAULTS:
+        st.session_state[key] = record[key]
+    load_triage(answers)
+    variant = record["variant"] or variant_from_c4(st.session_state.get("c4", C4_OPTIONS[0]))
+    outcome = record["outcome"]
+    ws = StudyWorkspace([outcome])
+    for domain in DOMAINS:
+        ws.set_domain(outcome, domain, variant, {q: answers[q] for q in question_ids(domain, variant) if q in answers})
+    ws.set_details(
+        outcome, numeric_result=record["numeric_result"], manual=[record["algo_risk"], record["manual_risk"]],
+        manual_justification=record["manual_justification"],
+    )
+    ws.pop_dirty()
+    st.session_state["workspace"] = ws
+    load_outcome(outcome)
+    if record["template_id"] is not None:
+        st.session_state["template_id"] = record["template_id"]
+    else:
+        st.session_state.pop("template_id", None)
+
+def inheritance_toggle(domain):
+    # Só aparece com mais de um desfecho no estudo
+    ws = study_workspace()
+    if len(ws.outcomes) < 2:
+        return
+    own = st.toggle(
+        "Respostas próprias deste desfecho", key=f"override_{domain}",
+        on_change=toggle_override, args=(domain,),
+        help="Desligado: as respostas deste domínio são do estudo e valem para todos os desfechos que as herdam."
+    )
+    if not own:
+        st.caption(f"Respostas do estudo, herdadas por {len(ws.inheritors(domain))} de {len(ws.outcomes)} desfechos.")
+
+restore_session()
+if "load_assessment" in st.session_state:
+    load_assessment(st.session_state.pop("load_assessment"))
+
 # --- BARRA LATERAL ---
-with st.sidebar:
+with telemetry.section("sidebar"), st.sidebar:
     st.header("Dados do Estudo")
-    study_id = st.text_input("ID do Estudo / Autor", value="Estudo Exemplo")
-    outcome = st.text_input("Desfecho Avaliado", value="Mortalidade")
-    numeric_result = st.text_input("Resultado Numérico", value="RR 1.5")
+    # Valores iniciais em SIDEBAR_DEFAULTS (restore_session)
+    study_id = st.text_input("ID do Estudo / Autor", key="study_id", on_change=rename_study)
+    ws = study_workspace()
+    outcome = st.selectbox(
+        "Desfecho Avaliado", ws.outcomes, key="outcome", on_change=switch_outcome,
+        help="Triagem, C4 e os domínios 1-3 são do estudo; os domínios 4-6 são de cada desfecho."
+    )
+    with st.expander(f"Desfechos do estudo ({len(ws.outcomes)})"):
+        st.text_input("Nome", key="new_outcome", placeholder="Ex.: Readmissão")
+        col_add, col_rename = st.columns(2)
+        col_add.button("Adicionar", on_click=add_outcome)
+        col_rename.button("Renomear atual", on_click=rename_outcome)
+        if len(ws.outcomes) > 1:
+            st.button(
+                f"Remover '{outcome}'", on_click=remove_outcome,
+                help="Apaga também a avaliação salva deste desfecho."
+            )
+        if "workspace_error" in st.session_state:
+            st.warning(st.session_state.pop("workspace_error"))
+    templates = {t["id"]: t for t in default_store().templates()}
+    if templates:
+        with st.expander("Modelos"):
+            st.selectbox("Modelo", list(templates), key="template_choice", format_func=lambda i: templates[i]["name"])
+            st.button(
+                "Aplicar ao formulário", on_click=apply_template,
+                help="Preenche a triagem, a C4 e os domínios com as respostas do modelo. "
+                     "A avaliação é salva como clone: só as diferenças em relação ao modelo."
+            )
+            if st.session_state.get("template_id") in templates:
+                st.caption(f"Clone do modelo **{templates[st.session_state['template_id']]['name']}**.")
+    numeric_result = st.text_input("Resultado Numérico", key="numeric_result")
+    reviewer = st.text_input(
+        "Revisor", key="reviewer",
+        help="Cada revisor tem a sua avaliação salva separadamente; compare-as na página Consenso."
+    )
+    st.toggle(
+        "Ajuda sob demanda", key="lazy_help",
+        help="Envia o texto de ajuda de cada pergunta só quando ele é aberto (conexões lentas)."
+    )
+    st.toggle(
+        "Sensibilidade (e se?)", key="sensitivity",
+        help="Mostra, em cada domínio, quais trocas de uma única resposta mudariam o risco do domínio e o global."
+    )
     st.divider()
     st.info("Ferramenta baseada no ROBINS-I V2 (Nov 2025).")
+    if telemetry.dev_panel_enabled(st.query_params):
+        with st.expander("⏱️ Desempenho (desenvolvedor)"):
+            render_dev_panel()
 
 # --- CABEÇALHO COM LOGO ---
-col_logo, col_titulo = st.columns([1, 5]) # Cria duas colunas: 1 parte para logo, 5 para texto
-
-with col_logo:
-    # IMPORTANTE: Você precisa ter um arquivo de imagem na mesma pasta do script
-    # Se não tiver imagem ainda, comente a linha abaixo para não dar erro
-    try:
-        st.image("sua_logo.png", width=120) 
-    except:
-        st.warning("Imagem 'sua_logo.png' não encontrada.")
+with telemetry.section("header"):
+    col_logo, col_titulo = st.columns([1, 5]) # Cria duas colunas: 1 parte para logo, 5 para texto
+
+    with col_logo:
+        # O logo (sua_logo.png, na mesma pasta do script) é lido e reduzido uma vez
+        # por processo; os mesmos bytes a cada rerun mantêm a imagem no cache do navegador
+        logo_png = assets.logo("ui")
+        if logo_png:
+            st.image(logo_png, width=120)
+        else:
+            st.warning("Imagem 'sua_logo.png' não encontrada.")
 
-with col_titulo:
-    st.title("ROBINS-I V2: Avaliação de Risco de Viés")
-    st.markdown("**Ferramenta de Apoio à Decisão**")
+    with col_titulo:
+        st.title("ROBINS-I V2: Avaliação de Risco de Viés")
+        st.markdown("**Ferramenta de Apoio à Decisão**")
 
-st.divider() # Linha visual para separar o cabeçalho do resto
-if study_id:
-    st.subheader(f"Avaliando: {study_id}")
+    st.divider() # Linha visual para separar o cabeçalho do resto
+    if study_id:
+        st.subheader(f"Avaliando: {study_id}")
 
 # --- 1. TRIAGEM E CONTEXTO ---
-st.header("1. Considerações Preliminares (Triagem)")
-col_b1, col_b2, col_b3 = st.columns(3)
-with col_b1: b1 = st.selectbox("B1. Os autores fizeram alguma tentativa de controlar fatores de confusão no resultado avaliado?", ["Selecione...", "Y", "PY", "PN", "N"])
-with col_b2: b2 = st.selectbox("B2. Se N/PN para B1: Existe potencial suficiente para fatores de confusão que impeçam a consideração deste resultado posteriormente?", ["Selecione...", "N", "PN", "Y", "PY"])
-with col_b3: b3 = st.selectbox("B3. O método de medição do resultado foi inadequado?", ["Selecione...", "N", "PN", "Y", "PY"])
-
-# TRAVA DE SEGURANÇA
-if b2 in ["Y", "PY"] or b3 in ["Y", "PY"]:
-    st.error("🚨 RISCO CRÍTICO DETECTADO NA TRIAGEM (B2 ou B3). Pare a avaliação aqui.")
-    st.stop()
-st.divider()
+with telemetry.section("triage"):
+    st.header("1. Considerações Preliminares (Triagem)")
+    col_b1, col_b2, col_b3 = st.columns(3)
+    with col_b1: b1 = ask("b1")
+    with col_b2: b2 = ask("b2")
+    with col_b3: b3 = ask("b3")
+
+    # TRAVA DE SEGURANÇA
+    if triage_blocks(b2, b3):
+        st.error("🚨 RISCO CRÍTICO DETECTADO NA TRIAGEM (B2 ou B3). Pare a avaliação aqui.")
+        checkpoint_session()
+        page_timer.stop()
+        st.stop()
+    st.divider()
 
 # SELEÇÃO DE VARIANTE (C4)
-st.markdown("### Contexto da Análise")
-c4 = st.radio(
-    "C4. A análise levou em consideração as mudanças entre as estratégias de intervenção comparadas durante o acompanhamento, ou outros desvios de protocolo durante o acompanhamento?", 
-    ["Não (Intention-to-treat / Atribuição)", "Sim (Per-protocol / Adesão)"]
-)
-is_variant_a = "Não" in c4
-
-# Inicialização de variáveis globais
-report_data = {
-    "study_id": study_id,
-    "outcome": outcome,
-    "numeric_result": numeric_result,
-    "domains": {}
+with telemetry.section("c4"):
+    st.markdown("### Contexto da Análise")
+    c4 = st.radio(
+        "C4. A análise levou em consideração as mudanças entre as estratégias de intervenção comparadas durante o acompanhamento, ou outros desvios de protocolo durante o acompanhamento?", 
+        C4_OPTIONS, key="c4"
+    )
+    is_variant_a = "Não" in c4
+
+# Contexto da avaliação (usado para salvar também nas execuções dos fragmentos)
+st.session_state["assessment_context"] = {
+    "study_id": study_id, "outcome": outcome, "numeric_result": numeric_result, "reviewer": reviewer,
+    "b1": b1, "b2": b2, "b3": b3, "c4": c4, "variant": "A" if is_variant_a else "B",
+    "template_id": st.session_state.get("template_id"),
 }
-risks = {}
-reasons = {}
+study_workspace().set_context(**{
+    k: v for k, v in st.session_state["assessment_context"].items() if k not in ("outcome", "numeric_result")
+})
 
 # --- DOMÍNIO 1: CONFUSÃO ---
-st.header("Domínio 1: Viés devido a Confusão")
-
-if is_variant_a:
-    st.caption("Variante A (Intention-to-treat): Foco na atribuição da intervenção.")
-    c1, c2 = st.columns(2)
-
-    # COLUNA 1
-    with c1:
-        help_1_1 = """
-        CONTEXTO: Fatores da avaliação preliminar.
-        - Y / PY: Todos fatores importantes foram controlados adequadamente.
-        - WN (Não, não substancial): A maioria foi controlada. Viés residual provável é pequeno.
-        - SN (Não, substancial): Fator importante NÃO controlado com provável impacto no resultado.
-        """
-        q1_1 = st.selectbox(
-            "1.1 Os autores controlaram todos os importantes fatores de confusão que isso se mostrou necessário?", 
-            ["Selecione...", "Y", "PY", "WN", "SN", "NI"], 
-            help=help_1_1
-        )
-        
-        # 1.4 SEMPRE visível
-        help_1_4 = """
-        CONTEXTO: Controles Negativos.
-        - Y / PY (Alerta): Controle negativo mostrou associação (viés).
-        - N / PN (Neutro): Sem problemas detectados.
-        - NA: Não foram usados controles negativos.
-        """
-        q1_4 = st.selectbox(
-            "1.4 O uso de controles negativos sugeriu a presença de fatores de confusão não controlados?", 
-            ["Selecione...", "Y", "PY", "N", "PN", "NA"],
-            help=help_1_4
-        )
+@st.fragment
+@telemetry.timed("d1")
+def render_d1(is_variant_a):
+    st.header("Domínio 1: Viés devido a Confusão")
+    inheritance_toggle("D1")
 
-    # COLUNA 2
-    with c2:
-        # Visibilidade dinâmica: 1.2 e 1.3 só aparecem se houve tentativa de controle
-        enable_details = q1_1 in ["Y", "PY", "WN"]
-        
-        if enable_details:
-            help_1_2 = """
-            CONTEXTO: Validade das medidas usadas.
-            - Y / PY: Medidas válidas/confiáveis usadas.
-            - WN / SN: Medidas com problemas de validade ou confiabilidade.
-            - NA: Se não havia fatores de confusão.
-            """
-            q1_2 = st.selectbox(
-                "1.2 Os fatores de confusão que foram controlados foram medidos de forma válida e confiável?", 
-                ["Selecione...", "Y", "PY", "WN", "SN", "NI", "NA"],
-                help=help_1_2
-            )
-            
-            help_1_3 = """
-            CONTEXTO: Ajuste Excessivo (Over-adjustment).
-            - Y / PY (Risco): Controlaram mediadores ou colisores.
-            - N / PN (Ideal): Não controlaram variáveis indevidas.
-            """
-            q1_3 = st.selectbox(
-                "1.3 Os autores controlaram alguma variável pós-intervenção que poderia ter sido afetada pela intervenção?", 
-                ["Selecione...", "Y", "PY", "N", "PN", "NI", "NA"],
-                help=help_1_3
-            )
-        else:
-            q1_2 = "NA"
-            q1_3 = "NA"
+    if is_variant_a:
+        st.caption("Variante A (Intention-to-treat): Foco na atribuição da intervenção.")
+        c1, c2 = st.columns(2)
 
-    d1_risk = "PENDENTE"
-    d1_reason = "Aguardando respostas..."
-    
-    # --- ALGORITMO OTIMIZADO DOMÍNIO 1 (Early Exit) ---
-    # Prioridade para riscos CRÍTICOS e SÉRIOS sem exigir preenchimento total se não necessário.
+        # COLUNA 1
+        with c1:
+            q1_1 = ask("1.1", "A")
 
-    # 1. ATALHO CRÍTICO A: Falha Controle (SN/NI) + Viés Confirmado (1.4 Y/PY)
-    if (q1_1 in ["SN", "NI"]) and (q1_4 in ["Y", "PY"]):
-        d1_risk = "CRITICAL"
-        d1_reason = "Determinante: Falha no controle (1.1) confirmada por controles negativos (1.4)."
+            # 1.4 SEMPRE visível
+            q1_4 = ask("1.4", "A")
 
-    # 2. ATALHO CRÍTICO B: Ajuste Excessivo (1.3 Y/PY) + Viés Confirmado (1.4 Y/PY)
-    elif (q1_1 in ["Y", "PY", "WN"]) and (q1_3 in ["Y", "PY"]) and (q1_4 in ["Y", "PY"]):
-        d1_risk = "CRITICAL"
-        d1_reason = "Determinante: Ajuste excessivo (1.3) confirmado por controles negativos (1.4)."
+        # COLUNA 2
+        with c2:
+            # Visibilidade dinâmica: 1.2 e 1.3 só aparecem se houve tentativa de controle
+            enable_details = q1_1 in ["Y", "PY", "WN"]
 
-    # 3. ATALHO SÉRIO: Erro de Medição Grave (Sem Ajuste Excessivo)
-    elif (q1_1 in ["Y", "PY", "WN"]) and (q1_3 in ["N", "PN", "NI", "NA"]) and (q1_2 in ["SN", "NI"]):
-        d1_risk = "SERIOUS"
-        d1_reason = "Determinante: Erro substancial na medição dos fatores (1.2)."
+            if enable_details:
+                q1_2 = ask("1.2", "A")
 
-    # 4. CÁLCULO DETALHADO (Se não caiu nos atalhos)
-    else:
-        can_calculate = False
-        
-        # Se Falha Controle: Precisa de 1.4
-        if q1_1 in ["SN", "NI"] and q1_4 != "Selecione...":
-            can_calculate = True
-            
-        # Se Controle OK: Precisa de 1.2, 1.3 e 1.4
-        elif q1_1 in ["Y", "PY", "WN"] and (q1_2 != "Selecione...") and (q1_3 != "Selecione...") and (q1_4 != "Selecione..."):
-            can_calculate = True
-
-        if can_calculate:
-            # CAMINHO A: FALHA NO CONTROLE (1.1 = SN/NI)
-            if q1_1 in ["SN", "NI"]:
-                # Se não caiu no Atalho Crítico A, 1.4 é N/PN/NA -> Sério
-                d1_risk = "SERIOUS"
-                d1_reason = "Falha substancial no controle (1.1). Controles negativos não agravaram para crítico."
-
-            # CAMINHO B: CONTROLE TENTADO (1.1 = Y/PY/WN)
+                q1_3 = ask("1.3", "A")
             else:
-                is_critical = False
-                is_serious = False
-
-                # --- ANÁLISE DE AJUSTE EXCESSIVO (1.3 = Y/PY) ---
-                if q1_3 in ["Y", "PY"]:
-                    # Já testamos 1.4=Y/PY no Atalho Crítico B.
-                    # Resta testar Medição Ruim.
-                    if q1_2 in ["SN", "WN", "NI"]:
-                        d1_risk = "CRITICAL"
-                        d1_reason = "Ajuste excessivo (1.3) agravado por medição insuficiente (1.2)."
-                        is_critical = True
-                    else:
-                        d1_risk = "SERIOUS"
-                        d1_reason = "Ajuste excessivo de variáveis (1.3), mitigado por boa medição."
-                        is_serious = True
-                
-                # --- SEM AJUSTE EXCESSIVO (1.3 = N/PN/NA) ---
-                else:
-                    # Controles Negativos Apitando
-                    if q1_4 in ["Y", "PY"]:
-                        d1_risk, d1_reason = "SERIOUS", "Controles negativos sugerem viés, apesar do bom controle inicial."
-                        is_serious = True
-                    
-                    # Erro de Medição Grave (Já tratado no Atalho 3, mas reforço lógica aqui)
-                    elif q1_2 in ["SN", "NI"]:
-                        d1_risk, d1_reason = "SERIOUS", "Erro substancial na medição dos fatores (1.2)."
-                        is_serious = True
-                
-                if not is_critical and not is_serious:
-                    if q1_2 == "WN" or q1_1 == "WN":
-                        d1_risk = "MODERATE"
-                        d1_reason = "Preocupações menores com confusão residual ou erro de medição."
-                    else:
-                        d1_risk = "LOW"
-                        d1_reason = "Baixo risco de viés devido a confusão."
-
-    # --- TRADUÇÃO DO RESULTADO (SÓ PARA DOMÍNIO 1) ---
-    if d1_risk == "LOW":
-        d1_risk = "Baixo risco, exceto por preocupações com confusão"
-
-    risks["D1"] = d1_risk
-    reasons["D1"] = d1_reason
-    
-    # Observe que aqui listamos EXATAMENTE as variáveis da Variante A
-    report_data["domains"]["Domínio 1"] = {
-        "risk": d1_risk, 
-        "reason": d1_reason, 
-        "answers": {"1.1": q1_1, "1.2": q1_2, "1.3": q1_3, "1.4": q1_4}
-    }
-    
-    display_risk_card("Domínio 1", d1_risk, d1_reason)
+                q1_2 = "NA"
+                q1_3 = "NA"
 
-else:
-    # --- VARIANTE B (Quando C4 = Sim / Per-protocol) ---
-    st.caption("Variante B (Efeito da adesão à intervenção): Foco em confusão variável no tempo.")
-    
-    c1, c2 = st.columns(2)
-
-    with c1:
-        # PERGUNTA 1.1
-        help_1_1 = """
-        Métodos apropriados para controlar fatores de confusão variáveis no tempo ('métodos g') incluem aqueles baseados na ponderação por probabilidade inversa. 
-        Modelos de regressão padrão que incluem fatores de confusão variáveis no tempo podem ser problemáticos quando esses fatores são afetados por intervenções anteriores.
-        """
-        q1_1 = st.selectbox(
-            "1.1 Os autores utilizaram um método de análise apropriado para controlar os fatores de confusão variáveis ao longo do tempo, bem como os fatores de confusão basais?", 
-            ["Selecione...", "Y", "PY", "PN", "N", "NI"], 
-            help=help_1_1
-        )
+        d1_risk, d1_reason = score_cached("D1", "A", {"1.1": q1_1, "1.2": q1_2, "1.3": q1_3, "1.4": q1_4})
 
-        # PERGUNTA 1.5 (Sempre visível, pois é crucial para a maioria dos caminhos)
-        help_1_5 = """
-        A utilização de um "controle negativo" pode sugerir fatores de confusão não controlados.
-        - N: Não houve sinal de viés (ou não foi feito).
-        - Y/PY: Controles negativos indicaram viés.
-        """
-        q1_5 = st.selectbox(
-            "1.5 O uso de controles negativos, ou outras considerações, sugeriu a presença de fatores de confusão não controlados significativos?", 
-            ["Selecione...", "Y", "PY", "PN", "N"], 
-            help=help_1_5
-        )
-
-    with c2:
-        # VISIBILIDADE DINÂMICA
-        q1_2 = "NA"
-        q1_3 = "NA"
-        q1_4 = "NA"
-
-        # Caminho Método Adequado (Y/PY)
-        if q1_1 in ["Y", "PY"]:
-            help_1_2 = """
-            - Y/PY: Todos fatores importantes (basais e variáveis no tempo) controlados.
-            - WN: Maioria controlada, viés residual provável é pequeno.
-            - SN: Fator importante não controlado.
-            """
-            q1_2 = st.selectbox(
-                "1.2 Os autores controlaram todos os importantes fatores de confusão basais e variáveis ao longo do tempo para os quais isso era necessário?",
-                ["Selecione...", "NA", "Y", "PY", "WN", "SN", "NI"],
-                help=help_1_2
-            )
+        save_domain_result("D1", d1_risk, d1_reason, {"1.1": q1_1, "1.2": q1_2, "1.3": q1_3, "1.4": q1_4})
 
-            # 1.3 só aparece se 1.2 não foi uma falha total
-            if q1_2 in ["Y", "PY", "WN"]:
-                q1_3 = st.selectbox(
-                    "1.3 Os fatores de confusão que foram controlados foram medidos de forma válida e confiável?",
-                    ["Selecione...", "NA", "Y", "PY", "WN", "SN", "NI"],
-                    help="Se a validade/confiabilidade não for citada, avalie a subjetividade."
-                )
-        
-        # Caminho Método Inadequado (N/PN/NI)
-        elif q1_1 in ["N", "PN", "NI"]:
-            help_1_4 = """
-            Verificação de Viés de Colisor.
-            - Y/PY: Controlaram variáveis pós-intervenção em método padrão (CRÍTICO).
-            - N/PN: Não controlaram (Sério, mas evita colisor).
-            """
-            q1_4 = st.selectbox(
-                "1.4 Os autores controlaram fatores que variam ao longo do tempo ou outras variáveis medidas após o início da intervenção?",
-                ["Selecione...", "NA", "Y", "PY", "PN", "N", "NI"],
-                help=help_1_4
-            )
+    else:
+        # --- VARIANTE B (Quando C4 = Sim / Per-protocol) ---
+        st.caption("Variante B (Efeito da adesão à intervenção): Foco em confusão variável no tempo.")
 
-    d1_risk = "PENDENTE"
-    d1_reason = "Aguardando respostas..."
+        c1, c2 = st.columns(2)
 
-    # --- ALGORITMO INTELIGENTE (VARIANTE B) ---
-    
-    # 1. ATALHO DE RISCO CRÍTICO (Independente de 1.5)
-    # Viés de Colisor: Método Ruim + Controle de Pós-intervenção
-    if q1_1 in ["N", "PN", "NI"] and q1_4 in ["Y", "PY"]:
-        d1_risk = "CRITICAL"
-        d1_reason = "Determinante: Método inadequado com ajuste por variáveis pós-intervenção (Viés de Colisor)."
-    
-    # 2. CÁLCULO PARA OS DEMAIS CASOS (Requer 1.5 preenchido)
-    elif q1_5 != "Selecione...":
-        
-        # --- CAMINHO A: MÉTODO INADEQUADO (1.1 N/PN/NI) ---
-        if q1_1 in ["N", "PN", "NI"]:
-            # Se chegou aqui, 1.4 não é Y/PY (pois cairia no atalho acima)
-            if q1_4 != "Selecione...":
-                if q1_5 in ["Y", "PY"]:
-                    d1_risk = "CRITICAL"
-                    d1_reason = "Método inadequado e controles negativos indicam confusão não controlada."
-                else:
-                    d1_risk = "SERIOUS"
-                    d1_reason = "Método de análise inadequado para adesão (falha em ajustar confusão variável no tempo)."
-
-        # --- CAMINHO B: MÉTODO ADEQUADO (1.1 Y/PY) ---
-        elif q1_1 in ["Y", "PY"]:
-            
-            # Precisamos verificar se temos dados suficientes de 1.2 e 1.3
-            can_calc_b = False
-            if q1_2 in ["SN", "NI"]: can_calc_b = True # Falha controle já define
-            elif q1_2 in ["Y", "PY", "WN"] and q1_3 != "Selecione...": can_calc_b = True
-
-            if can_calc_b:
-                is_critical = False
-                is_serious = False
-
-                # 1. Checagem de CRÍTICO (Falhas Graves + Viés Confirmado)
-                if q1_5 in ["Y", "PY"]:
-                    if q1_2 in ["SN", "NI"]:
-                        d1_risk, d1_reason = "CRITICAL", "Falha substancial no controle confirmada por controles negativos."
-                        is_critical = True
-                    elif q1_3 in ["SN", "NI"]:
-                        d1_risk, d1_reason = "CRITICAL", "Medição inválida confirmada por viés em controles negativos."
-                        is_critical = True
-
-                if not is_critical:
-                    # 2. Checagem de SÉRIO
-                    
-                    # Grupo B: Falhas Substanciais (Sem confirmação externa de viés)
-                    if q1_2 in ["SN", "NI"]:
-                        d1_risk, d1_reason = "SERIOUS", "Falha substancial no controle de fatores de confusão."
-                        is_serious = True
-                    elif q1_3 in ["SN", "NI"]:
-                        d1_risk, d1_reason = "SERIOUS", "Falha substancial na medição dos fatores de confusão."
-                        is_serious = True
-                    
-                    # Grupo C: Viés Confirmado (Agravante para estudos Bons/Moderados)
-                    elif q1_5 in ["Y", "PY"]:
-                        d1_risk = "SERIOUS"
-                        d1_reason = "Controles negativos sugerem viés, apesar da metodologia aparentemente adequada."
-                        is_serious = True
-                    
-                    if not is_serious:
-                        # 3. MODERADO
-                        # Ressalvas em Controle (1.2 WN) ou Medição (1.3 WN)
-                        if q1_2 == "WN" or q1_3 == "WN":
-                            d1_risk = "MODERATE"
-                            d1_reason = "Ressalvas menores no controle ou medição dos fatores de confusão."
-                        
-                        # 4. BAIXO
-                        else:
-                            d1_risk = "LOW"
-                            d1_reason = "Baixo risco de viés (G-methods aplicados corretamente)."
-
-# --- AJUSTE DE TEXTO (TRADUÇÃO) ---
-    # Garante que o texto exibido seja o padrão do ROBINS-I para Domínio 1
-    if d1_risk == "LOW":
-        d1_risk = "Baixo risco, exceto por preocupações com confusão"
+        with c1:
+            # PERGUNTA 1.1
+            q1_1 = ask("1.1", "B")
 
-    # Salva nos dados globais
-    risks["D1"] = d1_risk
-    reasons["D1"] = d1_reason
-    
-    # CORREÇÃO AQUI: Listamos explicitamente todas as variáveis da Variante B
-    report_data["domains"]["Domínio 1"] = {
-        "risk": d1_risk, 
-        "reason": d1_reason, 
-        "answers": {"1.1": q1_1, "1.2": q1_2, "1.3": q1_3, "1.4": q1_4, "1.5": q1_5}
-    }
-    
-    display_risk_card("Domínio 1", d1_risk, d1_reason)
+            # PERGUNTA 1.5 (Sempre visível, pois é crucial para a maioria dos caminhos)
+            q1_5 = ask("1.5", "B")
 
-st.divider()
+        with c2:
+            # VISIBILIDADE DINÂMICA
+            q1_2 = "NA"
+            q1_3 = "NA"
+            q1_4 = "NA"
 
-# --- DOMÍNIO 2: CLASSIFICAÇÃO ---
-st.header("Domínio 2: Viés na Classificação das Intervenções")
+            # Caminho Método Adequado (Y/PY)
+            if q1_1 in ["Y", "PY"]:
+                q1_2 = ask("1.2", "B")
 
-# Layout: 2.1 (Tempo Imortal) e condicionais na esquerda; 2.4 e 2.5 (Influência/Erro) na direita.
-c1_d2, c2_d2 = st.columns(2)
+                # 1.3 só aparece se 1.2 não foi uma falha total
+                if q1_2 in ["Y", "PY", "WN"]:
+                    q1_3 = ask("1.3", "B")
 
-with c1_d2:
-    # --- BLOCO TEMPO IMORTAL (2.1, 2.2, 2.3) ---
-    st.markdown("###### Definição da Intervenção")
-    
-    # 2.1 (Sempre visível)
-    help_2_1 = """
-    No ensaio alvo, o acompanhamento começa na elegibilidade. Em estudos não randomizados, algumas estratégias não são distinguíveis no início (ex: "operar em 6 meses" vs "esperar"). 
-    Classificar participantes baseando-se em eventos futuros gera "viés de tempo imortal".
-    """
-    q2_1 = st.selectbox(
-        "2.1 As estratégias de intervenção eram distinguíveis no momento em que o acompanhamento teria começado?", 
-        ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-        help=help_2_1
-    )
+            # Caminho Método Inadequado (N/PN/NI)
+            elif q1_1 in ["N", "PN", "NI"]:
+                q1_4 = ask("1.4", "B")
 
-    # Lógica de Visibilidade em Cascata (2.2 e 2.3)
-    q2_2 = "NA"
-    q2_3 = "NA"
-
-    # 2.2 só aparece se 2.1 for problemático
-    if q2_1 in ["N", "PN", "NI"]:
-        help_2_2 = """
-        Se o período de indistinção for curto em relação ao acompanhamento total, poucos eventos ocorrerão nele, limitando o risco de viés.
-        """
-        q2_2 = st.selectbox(
-            "2.2 Todos ou quase todos os eventos ocorreram após a intervenção ser distinguível?",
-            ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-            help=help_2_2
+        d1_risk, d1_reason = score_cached(
+            "D1", "B", {"1.1": q1_1, "1.2": q1_2, "1.3": q1_3, "1.4": q1_4, "1.5": q1_5}
         )
-        
-        # 2.3 só aparece se 2.2 TAMBÉM for problemático
-        if q2_2 in ["N", "PN", "NI"]:
-            help_2_3 = """
-            Métodos estatísticos avançados (ponderação por censura clonal, g-formula) podem corrigir problemas de estratégias indistinguíveis.
-            - SY: Sim, totalmente.
-            - WY: Sim, parcialmente.
-            """
-            q2_3 = st.selectbox(
-                "2.3 A análise evitou problemas decorrentes de estratégias indistinguíveis?",
-                ["Selecione...", "SY", "WY", "PN", "N", "NI"],
-                help=help_2_3
-            )
 
-with c2_d2:
-    # --- BLOCO CLASSIFICAÇÃO (2.4, 2.5) - SEMPRE VISÍVEIS ---
-    st.markdown("###### Validade da Classificação")
-
-    # 2.4 (Sempre visível)
-    help_2_4 = """
-    A classificação da intervenção foi influenciada pelo conhecimento do desfecho?
-    (Comum em estudos retrospectivos onde o avaliador sabe quem morreu/sobreviveu ao classificar o tratamento).
-    - SY: Sim, totalmente (Risco Alto).
-    - WY: Sim, parcialmente.
-    """
-    q2_4 = st.selectbox(
-        "2.4 A classificação da intervenção foi influenciada pelo conhecimento do desfecho?", 
-        ["Selecione...", "SY", "WY", "PN", "N", "NI"], 
-        help=help_2_4
-    )
+        # Salva nos dados globais
+        save_domain_result("D1", d1_risk, d1_reason, {"1.1": q1_1, "1.2": q1_2, "1.3": q1_3, "1.4": q1_4, "1.5": q1_5})
 
-    # 2.5 (Sempre visível)
-    help_2_5 = """
-    Houve erros na classificação do status da intervenção?
-    (Critérios ambíguos ou registros incompletos. Se o erro for aleatório, tende a viés para o nulo).
-    """
-    q2_5 = st.selectbox(
-        "2.5 Houve erros na classificação do status da intervenção?",
-        ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-        help=help_2_5
-    )
 
-d2_risk = "PENDENTE"
-d2_reason = "Aguardando respostas..."
+# --- DOMÍNIO 2: CLASSIFICAÇÃO ---
+@st.fragment
+@telemetry.timed("d2")
+def render_d2():
+    st.header("Domínio 2: Viés na Classificação das Intervenções")
+    inheritance_toggle("D2")
 
-# --- ALGORITMO INTELIGENTE DOMÍNIO 2 ---
+    # Layout: 2.1 (Tempo Imortal) e condicionais na esquerda; 2.4 e 2.5 (Influência/Erro) na direita.
+    c1_d2, c2_d2 = st.columns(2)
 
-# Passo 1: Determinar o "Contexto de Entrada" (Status do Tempo Imortal)
-# SAFE: Problema resolvido ou inexistente.
-# PARTIAL: Problema parcialmente resolvido (2.3 WY/NI).
-# BAD: Problema não resolvido (2.3 N/PN).
+    with c1_d2:
+        # --- BLOCO TEMPO IMORTAL (2.1, 2.2, 2.3) ---
+        st.markdown("###### Definição da Intervenção")
 
-entry_context = "PENDING"
+        # 2.1 (Sempre visível)
+        q2_1 = ask("2.1")
 
-if q2_1 in ["Y", "PY"]: entry_context = "SAFE"
-elif q2_1 in ["N", "PN", "NI"]:
-    if q2_2 in ["Y", "PY"]: entry_context = "SAFE"
-    elif q2_2 in ["N", "PN", "NI"]:
-        if q2_3 == "SY": entry_context = "SAFE"
-        elif q2_3 in ["WY", "NI"]: entry_context = "PARTIAL"
-        elif q2_3 in ["N", "PN"]: entry_context = "BAD"
-        # Se 2.3 for Selecione..., continua PENDING
+        # Lógica de Visibilidade em Cascata (2.2 e 2.3)
+        q2_2 = "NA"
+        q2_3 = "NA"
 
-# Se 2.4 ou 2.5 não foram respondidos, marcamos como pendente para cálculo final,
-# MAS tentaremos calcular riscos críticos imediatos abaixo.
-inputs_missing = (q2_4 == "Selecione...") or (q2_5 == "Selecione...")
+        # 2.2 só aparece se 2.1 for problemático
+        if q2_1 in ["N", "PN", "NI"]:
+            q2_2 = ask("2.2")
 
-# Passo 2: Cálculo de Risco
-# A lógica tenta encontrar o pior cenário possível com os dados disponíveis.
+            # 2.3 só aparece se 2.2 TAMBÉM for problemático
+            if q2_2 in ["N", "PN", "NI"]:
+                q2_3 = ask("2.3")
 
-calculated = False
+    with c2_d2:
+        # --- BLOCO CLASSIFICAÇÃO (2.4, 2.5) - SEMPRE VISÍVEIS ---
+        st.markdown("###### Validade da Classificação")
 
-# --- VERIFICAÇÃO DE RISCO CRÍTICO (Prioridade Máxima) ---
-# 1. Influência Total do Desfecho + Erro de Classificação (Independe da Entrada)
-if q2_4 == "SY" and q2_5 in ["Y", "PY", "NI"]:
-    d2_risk, d2_reason = "CRITICAL", "Determinante: Classificação totalmente influenciada pelo desfecho com erros adicionais."
-    calculated = True
+        # 2.4 (Sempre visível)
+        q2_4 = ask("2.4")
 
-# 2. Entrada Ruim/Parcial + Influência do Desfecho (Independe de 2.5)
-elif entry_context in ["BAD", "PARTIAL"] and q2_4 in ["SY", "WY", "NI"]:
-    d2_risk, d2_reason = "CRITICAL", "Determinante: Problema de tempo imortal não resolvido somado à influência do desfecho."
-    calculated = True
+        # 2.5 (Sempre visível)
+        q2_5 = ask("2.5")
 
-# 3. Entrada Ruim + Erro de Classificação (Se 2.4 for ok ou pendente)
-elif entry_context == "BAD" and q2_5 in ["Y", "PY", "NI"]:
-    d2_risk, d2_reason = "CRITICAL", "Determinante: Problema de tempo imortal não resolvido com erros de classificação."
-    calculated = True
+    # --- ALGORITMO DOMÍNIO 2 (engine.score_d2) ---
+    d2_risk, d2_reason = score_cached("D2", None, {"2.1": q2_1, "2.2": q2_2, "2.3": q2_3, "2.4": q2_4, "2.5": q2_5})
 
+    save_domain_result("D2", d2_risk, d2_reason, {"2.1": q2_1, "2.2": q2_2, "2.3": q2_3, "2.4": q2_4, "2.5": q2_5})
 
-if not calculated and not inputs_missing:
-    # --- VERIFICAÇÃO DE RISCO SÉRIO ---
-    is_serious = False
-    
-    # 4. Entrada Segura + Incerteza Desfecho + Erro Classificação
-    if entry_context == "SAFE" and q2_4 in ["WY", "NI"] and q2_5 in ["Y", "PY", "NI"]:
-        d2_risk, d2_reason = "SERIOUS", "Combinação de possível influência do desfecho e erros de classificação."
-        is_serious = True
-        
-    # 5. Entrada Segura + Influência Total (Sem erro 2.5)
-    elif entry_context == "SAFE" and q2_4 == "SY":
-        d2_risk, d2_reason = "SERIOUS", "Classificação influenciada pelo desfecho (viés diferencial)."
-        is_serious = True
-        
-    # 6. Entrada Parcial + Erro de Classificação
-    elif entry_context == "PARTIAL" and q2_5 in ["Y", "PY", "NI"]:
-        d2_risk, d2_reason = "SERIOUS", "Correção apenas parcial do tempo imortal com erros de classificação."
-        is_serious = True
-        
-    # 7. Entrada Ruim (Pura)
-    elif entry_context == "BAD":
-        d2_risk, d2_reason = "SERIOUS", "Problema de tempo imortal (intervenções indistinguíveis) não corrigido."
-        is_serious = True
-
-    if not is_serious:
-        # --- VERIFICAÇÃO DE RISCO MODERADO ---
-        is_moderate = False
-        
-        # 8. Entrada Segura + Erro de Classificação (Puro)
-        if entry_context == "SAFE" and q2_5 in ["Y", "PY", "NI"]:
-            d2_risk, d2_reason = "MODERATE", "Erros de classificação não-diferenciais (provável viés para o nulo)."
-            is_moderate = True
-            
-        # 9. Entrada Segura + Incerteza Influência
-        elif entry_context == "SAFE" and q2_4 in ["WY", "NI"]:
-            d2_risk, d2_reason = "MODERATE", "Dúvida leve sobre influência do desfecho."
-            is_moderate = True
-            
-        # 10. Entrada Parcial (Pura)
-        elif entry_context == "PARTIAL":
-             d2_risk, d2_reason = "MODERATE", "Correção do tempo imortal foi apenas parcial (WY/NI em 2.3)."
-             is_moderate = True
-        
-        if not is_moderate:
-            # --- BAIXO RISCO ---
-            if entry_context == "SAFE" and q2_4 in ["N", "PN"] and q2_5 in ["N", "PN"]:
-                d2_risk, d2_reason = "LOW", "Intervenção bem definida e classificada sem viés."
-            else:
-                # Fallback caso a lógica de entrada falhe (ex: entry_context ainda PENDING)
-                d2_risk = "PENDENTE"
 
-risks["D2"] = d2_risk
-reasons["D2"] = d2_reason
+# --- DOMÍNIO 3: SELEÇÃO DOS PARTICIPANTES ---
+@st.fragment
+@telemetry.timed("d3")
+def render_d3():
+    st.header("Domínio 3: Viés devido à Seleção dos Participantes")
+    inheritance_toggle("D3")
 
-report_data["domains"]["Domínio 2"] = {
-    "risk": d2_risk, 
-    "reason": d2_reason, 
-    "answers": {"2.1": q2_1, "2.2": q2_2, "2.3": q2_3, "2.4": q2_4, "2.5": q2_5}
-}
-display_risk_card("Domínio 2", d2_risk, d2_reason)
+    st.markdown("""
+    Este domínio avalia se a exclusão de participantes ou o tempo de acompanhamento introduz viés. 
+    O Bloco C (Correção) só será ativado se forem detectados problemas sérios nas partes A ou B.
+    """)
 
-st.divider()
+    # Layout Bipartido: Coluna A (Início) e Coluna B (Pós-Início)
+    c1_d3, c2_d3 = st.columns(2)
 
-# --- DOMÍNIO 3: SELEÇÃO DOS PARTICIPANTES ---
-st.header("Domínio 3: Viés devido à Seleção dos Participantes")
+    # --- PARTE A: Início do Acompanhamento ---
+    with c1_d3:
+        st.subheader("A. Início do Acompanhamento")
 
-st.markdown("""
-Este domínio avalia se a exclusão de participantes ou o tempo de acompanhamento introduz viés. 
-O Bloco C (Correção) só será ativado se forem detectados problemas sérios nas partes A ou B.
-""")
+        q3_1 = ask("3.1")
 
-# Layout Bipartido: Coluna A (Início) e Coluna B (Pós-Início)
-c1_d3, c2_d3 = st.columns(2)
+        q3_2 = "NA"
+        if q3_1 in ["Y", "PY"]:
+            q3_2 = ask("3.2")
 
-# --- PARTE A: Início do Acompanhamento ---
-with c1_d3:
-    st.subheader("A. Início do Acompanhamento")
-    
-    help_3_1 = """
-    O acompanhamento coincidiu com o início da intervenção?
-    - Y/PY: Sim (Ideal).
-    - WN: Não, lacuna irrelevante.
-    - SY: Início muito tardio (Risco Sério).
-    """
-    q3_1 = st.selectbox(
-        "3.1 Os participantes foram acompanhados desde o início da intervenção?",
-        ["Selecione...", "Y", "PY", "WN", "SY", "NI"],
-        help=help_3_1
-    )
+    # --- PARTE B: Seleção Pós-Início ---
+    with c2_d3:
+        st.subheader("B. Seleção Pós-Início")
 
-    q3_2 = "NA"
-    if q3_1 in ["Y", "PY"]:
-        help_3_2 = """
-        Eventos precoces foram excluídos?
-        - N/PN: Não (Bom).
-        - Y/PY: Sim (Risco Moderado).
-        """
-        q3_2 = st.selectbox(
-            "3.2 Os eventos de desfecho precoces foram excluídos da análise?",
-            ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-            help=help_3_2
-        )
+        q3_3 = ask("3.3")
 
-# --- PARTE B: Seleção Pós-Início ---
-with c2_d3:
-    st.subheader("B. Seleção Pós-Início")
-    
-    help_3_3 = """
-    A inclusão foi baseada em características medidas APÓS o início da intervenção?
-    - N/PN: Não (Ideal).
-    - Y/PY: Sim (Potencial Viés).
-    """
-    q3_3 = st.selectbox(
-        "3.3 A seleção foi baseada em características pós-intervenção?",
-        ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-        help=help_3_3
-    )
+        q3_4 = "NA"
+        q3_5 = "NA"
 
-    q3_4 = "NA"
-    q3_5 = "NA"
-    
-    if q3_3 in ["Y", "PY"]:
-        help_3_4 = """
-        Essas características estão associadas à intervenção?
-        - N/PN: Não (Risco Baixo).
-        - Y/PY: Sim.
-        - NI: Sem informação (Risco Moderado).
-        """
-        q3_4 = st.selectbox(
-            "3.4 As variáveis de seleção estão associadas à intervenção?",
-            ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-            help=help_3_4
-        )
-        
-        if q3_4 in ["Y", "PY", "NI"]:
-            help_3_5 = """
-            Essas variáveis são influenciadas pelo desfecho?
-            - Y/PY: Sim (Risco Sério).
-            - N/PN/NI: Não ou Sem Info (Risco Moderado).
-            """
-            q3_5 = st.selectbox(
-                "3.5 As variáveis de seleção são influenciadas pelo desfecho?",
-                ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-                help=help_3_5
-            )
+        if q3_3 in ["Y", "PY"]:
+            q3_4 = ask("3.4")
 
-# --- CÁLCULO PROVISÓRIO (Para decidir se mostra o Bloco C) ---
-temp_risk_a = "PENDING"
-temp_risk_b = "PENDING"
-
-# Lógica Risco A
-if q3_1 == "SY": temp_risk_a = "SERIOUS"
-elif q3_1 in ["WN", "NI"]: temp_risk_a = "MODERATE"
-elif q3_1 in ["Y", "PY"]:
-    if q3_2 in ["Y", "PY"]: temp_risk_a = "MODERATE"
-    elif q3_2 in ["N", "PN", "NI"]: temp_risk_a = "LOW"
-
-# Lógica Risco B
-if q3_3 in ["N", "PN", "NI"]: temp_risk_b = "LOW"
-elif q3_3 in ["Y", "PY"]:
-    if q3_4 in ["N", "PN"]: temp_risk_b = "LOW"
-    elif q3_4 in ["NI"]: temp_risk_b = "MODERATE"
-    elif q3_4 in ["Y", "PY"]:
-        if q3_5 in ["Y", "PY"]: temp_risk_b = "SERIOUS"
-        elif q3_5 in ["N", "PN", "NI"]: temp_risk_b = "MODERATE"
-
-# Combinação Provisória
-is_provisional_serious = (temp_risk_a == "SERIOUS") or (temp_risk_b == "SERIOUS")
-
-# --- BLOCO C: CORREÇÃO (Condicional) ---
-q3_6 = "NA"
-q3_7 = "NA"
-q3_8 = "NA"
-
-if is_provisional_serious:
-    st.divider()
-    st.markdown("###### C. Análise e Correção (Ativado: Risco Sério Detectado)")
-    st.caption("Problemas sérios identificados. Responda abaixo para verificar correção.")
-
-    help_3_6 = "A análise usou métodos (ex: IPW, ajuste) para corrigir o viés de seleção?"
-    q3_6 = st.selectbox(
-        "3.6 A análise corrigiu o viés de seleção?",
-        ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-        help=help_3_6
-    )
+            if q3_4 in ["Y", "PY", "NI"]:
+                q3_5 = ask("3.5")
 
-    if q3_6 in ["N", "PN", "NI"]:
-        q3_7 = st.selectbox(
-            "3.7 Análises de sensibilidade demonstram impacto mínimo do viés?",
-            ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-            help="Se Sim (Y/PY), o risco cai para Moderado."
-        )
-        
-        if q3_7 in ["N", "PN", "NI"]:
-            q3_8 = st.selectbox(
-                "3.8 O viés de seleção é provável de ser severo?",
-                ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-                help="Se Sim (Y/PY), o risco se torna CRÍTICO."
-            )
+    # --- CÁLCULO PROVISÓRIO (Para decidir se mostra o Bloco C) ---
+    temp_risk_a, temp_risk_b = d3_partial_risks({"3.1": q3_1, "3.2": q3_2, "3.3": q3_3, "3.4": q3_4, "3.5": q3_5})
+    is_provisional_serious = (temp_risk_a == "SERIOUS") or (temp_risk_b == "SERIOUS")
 
-# --- ALGORITMO FINAL DOMÍNIO 3 ---
-d3_risk = "PENDENTE"
-d3_reason = "Aguardando respostas..."
+    # --- BLOCO C: CORREÇÃO (Condicional) ---
+    q3_6 = "NA"
+    q3_7 = "NA"
+    q3_8 = "NA"
 
-# Verifica se o fluxo foi completado
-flow_complete = False
-if temp_risk_a != "PENDING" and temp_risk_b != "PENDING":
-    if not is_provisional_serious:
-        flow_complete = True
-    else:
-        # Se for sério, precisa ter respondido até onde o fluxo de correção leva
-        if q3_6 in ["Y", "PY"]: flow_complete = True
-        elif q3_6 in ["N", "PN", "NI"] and q3_7 in ["Y", "PY"]: flow_complete = True
-        elif q3_6 in ["N", "PN", "NI"] and q3_7 in ["N", "PN", "NI"] and q3_8 != "Selecione...": flow_complete = True
-
-if flow_complete:
-    # 1. Baseado na combinação inicial (Se não for sério, é o pior entre A e B)
-    if not is_provisional_serious:
-        if temp_risk_a == "MODERATE" or temp_risk_b == "MODERATE":
-            d3_risk = "MODERATE"
-            d3_reason = f"Risco Moderado em A ({temp_risk_a}) ou B ({temp_risk_b})."
-        else:
-            d3_risk = "LOW"
-            d3_reason = "Baixo risco de viés de seleção."
-            
-    # 2. Se entrou no fluxo de correção (Serious)
-    else:
-        base_reason = f"Viés Sério identificado (A: {temp_risk_a}, B: {temp_risk_b})."
-        
-        if q3_6 in ["Y", "PY"]:
-            d3_risk = "MODERATE"
-            d3_reason = base_reason + " Corrigido pela análise (3.6)."
-        elif q3_7 in ["Y", "PY"]:
-            d3_risk = "MODERATE"
-            d3_reason = base_reason + " Mitigado por análise de sensibilidade (3.7)."
-        elif q3_8 in ["Y", "PY"]:
-            d3_risk = "CRITICAL"
-            d3_reason = base_reason + " Viés severo confirmado e não corrigido."
-        else:
-            d3_risk = "SERIOUS"
-            d3_reason = base_reason + " Não corrigido, mas não considerado severo/crítico."
+    if is_provisional_serious:
+        st.divider()
+        st.markdown("###### C. Análise e Correção (Ativado: Risco Sério Detectado)")
+        st.caption("Problemas sérios identificados. Responda abaixo para verificar correção.")
 
-# Salva resultado
-risks["D3"] = d3_risk
-reasons["D3"] = d3_reason
+        q3_6 = ask("3.6")
 
-report_data["domains"]["Domínio 3"] = {
-    "risk": d3_risk, 
-    "reason": d3_reason, 
-    "answers": {"3.1": q3_1, "3.2": q3_2, "3.3": q3_3, "3.4": q3_4, "3.5": q3_5, "3.6": q3_6, "3.7": q3_7, "3.8": q3_8}
-}
+        if q3_6 in ["N", "PN", "NI"]:
+            q3_7 = ask("3.7")
+
+            if q3_7 in ["N", "PN", "NI"]:
+                q3_8 = ask("3.8")
+
+    # --- ALGORITMO FINAL DOMÍNIO 3 (engine.score_d3) ---
+    d3_answers = {"3.1": q3_1, "3.2": q3_2, "3.3": q3_3, "3.4": q3_4, "3.5": q3_5, "3.6": q3_6, "3.7": q3_7, "3.8": q3_8}
+    d3_risk, d3_reason = score_cached("D3", None, d3_answers)
+
+    # Salva resultado
+    save_domain_result("D3", d3_risk, d3_reason, d3_answers)
 
-display_risk_card("Domínio 3", d3_risk, d3_reason)
-st.divider()
 
 # --- DOMÍNIO 4: DADOS FALTANTES (Textos Atualizados) ---
-st.header("Domínio 4: Viés devido a Dados Faltantes")
-
-st.markdown("""
-Este domínio avalia a integridade dos dados e a robustez da estratégia de análise.
-**As perguntas aparecerão sequencialmente conforme suas respostas.**
-""")
-
-# Inicialização de variáveis para garantir que o algoritmo funcione mesmo sem exibição
-q4_1, q4_2, q4_3 = "Selecione...", "Selecione...", "Selecione..."
-q4_4, q4_5, q4_6 = "NA", "NA", "NA"
-q4_7, q4_8, q4_9, q4_10 = "NA", "NA", "NA", "NA"
-q4_11 = "NA"
-
-# --- PASSO 1: TRIAGEM (4.1 a 4.3) ---
-# Sempre visíveis
-c1_d4, c2_d4 = st.columns(2)
-with c1_d4:
-    help_4_1 = """A expressão “quase todos” deve ser interpretada como significando que o número de participantes excluídos da análise devido à falta de dados é tão pequeno que eles não teriam feito nenhuma diferença importante no efeito estimado da intervenção.
-Responda "NI" somente se o relatório do estudo não fornecer informações sobre a extensão dos dados faltantes. Essa situação geralmente leva à conclusão de que há um alto risco de viés devido à falta de dados.
-Note que esta questão se refere a dados efetivamente registrados no estudo. Dados imputados (ver questão 4.7) devem ser considerados dados faltantes no contexto desta questão."""
-    
-    q4_1 = st.selectbox(
-        "4.1 Os dados sobre o estado da intervenção estavam completos para todos, ou quase todos, os participantes?", 
-        ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-        help=help_4_1
-    )
+@st.fragment
+@telemetry.timed("d4")
+def render_d4():
+    st.header("Domínio 4: Viés devido a Dados Faltantes")
 
-    help_4_3 = """A expressão “quase todos” deve ser interpretada como significando que o número de participantes excluídos da análise devido à falta de dados é tão pequeno que eles não teriam feito nenhuma diferença importante no efeito estimado da intervenção.
-Responda "NI" somente se o relatório do estudo não fornecer informações sobre a extensão dos dados faltantes. Essa situação geralmente leva à conclusão de que há um alto risco de viés devido à falta de dados.
-Note que esta questão se refere a dados efetivamente registrados no estudo. Dados imputados devem ser considerados dados faltantes no contexto desta questão."""
-    
-    q4_3 = st.selectbox(
-        "4.3 Os dados completos sobre variáveis de confusão importantes estavam disponíveis para todos, ou quase todos, os participantes?", 
-        ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-        help=help_4_3
-    )
+    st.markdown("""
+    Este domínio avalia a integridade dos dados e a robustez da estratégia de análise.
+    **As perguntas aparecerão sequencialmente conforme suas respostas.**
+    """)
 
-with c2_d4:
-    help_4_2 = """A expressão “quase todos” deve ser interpretada como significando que o número de participantes excluídos da análise devido à falta de dados é tão pequeno que eles não teriam feito nenhuma diferença importante no efeito estimado da intervenção.
-Para desfechos contínuos, dados completos de 95% (ou possivelmente 90%) dos participantes geralmente seriam suficientes. Para desfechos dicotômicos, a proporção necessária está diretamente ligada ao risco do evento de desfecho. Se o número observado de eventos de desfecho for muito maior do que o número de participantes com dados faltantes, o viés será necessariamente pequeno.
-Responda "NI" somente se o relatório do estudo não fornecer informações sobre a extensão dos dados faltantes. Essa situação geralmente leva à conclusão de que há um alto risco de viés devido à falta de dados.
-Note que esta questão se refere a dados efetivamente registrados no estudo. Dados imputados devem ser considerados dados faltantes no contexto desta questão."""
-    
-    q4_2 = st.selectbox(
-        "4.2 Os dados completos sobre o resultado estavam disponíveis para todos, ou quase todos, os participantes?", 
-        ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-        help=help_4_2
-    )
+    # Inicialização de variáveis para garantir que o algoritmo funcione mesmo sem exibição
+    q4_1, q4_2, q4_3 = "Selecione...", "Selecione...", "Selecione..."
+    q4_4, q4_5, q4_6 = "NA", "NA", "NA"
+    q4_7, q4_8, q4_9, q4_10 = "NA", "NA", "NA", "NA"
+    q4_11 = "NA"
 
-# Verifica integridade (Lógica mantida)
-missing_data = False
-triagem_complete = False
+    # --- PASSO 1: TRIAGEM (4.1 a 4.3) ---
+    # Sempre visíveis
+    c1_d4, c2_d4 = st.columns(2)
+    with c1_d4:
 
-if "Selecione..." not in [q4_1, q4_2, q4_3]:
-    triagem_complete = True
-    if q4_1 in ["PN", "N", "NI"] or q4_2 in ["PN", "N", "NI"] or q4_3 in ["PN", "N", "NI"]:
-        missing_data = True
+        q4_1 = ask("4.1")
 
-# --- PASSO 2: ESTRATÉGIA DE ANÁLISE (4.4) ---
-# Aparece somente se triagem completa e houver dados faltantes
-analysis_type = "NONE"
 
-if triagem_complete and missing_data:
-    st.divider()
-    help_4_4 = """A forma como o risco de viés é avaliado depende de ter sido realizada uma análise de casos completos. Uma análise de casos completos é aquela que se restringe aos participantes com dados completos sobre todas as variáveis de intervenção, desfecho e fatores de confusão."""
-    
-    q4_4 = st.selectbox(
-        "4.4 O resultado é baseado em uma análise completa do caso?",
-        ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-        help=help_4_4
-    )
+        q4_3 = ask("4.3")
 
-    if q4_4 in ["Y", "PY", "NI"]:
-        analysis_type = "COMPLETE_CASE"
-    elif q4_4 in ["N", "PN"]:
-        analysis_type = "IMPUTATION_OR_OTHER"
+    with c2_d4:
 
-# --- PASSO 3: RAMIFICAÇÃO SEQUENCIAL ---
+        q4_2 = ask("4.2")
 
-# >>> RAMO A: CASOS COMPLETOS <<<
-if analysis_type == "COMPLETE_CASE":
-    st.markdown("**Caminho: Análise de Casos Completos**")
-    
-    help_4_5 = """Esta questão visa identificar situações em que uma análise de "casos completos" estará sujeita a viés devido a dados faltantes. Uma análise de casos completos é aquela que inclui todos os participantes que fornecem dados completos para as variáveis envolvidas na análise.
-Uma análise de casos completos pode ser enviesada se a ausência de dados (na intervenção, no desfecho ou nos fatores de confusão) estiver relacionada ao desfecho. Por exemplo, se for provável que participantes com problemas de saúde subjacentes tenham faltado a uma consulta na qual o status da intervenção na linha de base ou os fatores de confusão deveriam ter sido medidos, sua consequente exclusão da análise pode estar relacionada ao seu desfecho final.
-Quatro razões para responder ' S ' ou ' PY ' são:
-(1) Existem diferenças entre os grupos de intervenção ou grupos/níveis de fatores de confusão nas proporções de participantes excluídos da análise devido à falta de dados de desfecho. Para dados de tempo até o evento, a analogia é que as taxas de censura (perda de seguimento) dependem do grupo de intervenção.
-(2) Existem diferenças entre os grupos/níveis de desfecho nas proporções de participantes excluídos da análise devido à falta de dados sobre intervenção/fatores de confusão.
-(3) Os motivos relatados para a ausência de dados sobre os resultados fornecem evidências de que a falta de dados depende do resultado real ou de uma causa para o resultado;
-(4) É razoável supor que as circunstâncias do estudo tornam provável que a ausência de dados no desfecho dependa do seu valor real. Por exemplo, se o desfecho for depressão grave, é provável que os participantes que apresentarem esse desfecho faltem a consultas nas quais ele teria sido registrado.
-Responda ' N ' ou ' PN ' se houver dados faltantes, perda de seguimento ou desistência por motivos documentados e não relacionados ao desfecho, caso em que o risco de viés devido a dados faltantes será baixo."""
-    
-    q4_5 = st.selectbox(
-        "4.5 A exclusão da análise devido a dados faltantes (na intervenção, nos fatores de confusão ou no desfecho) provavelmente estava relacionada ao valor verdadeiro do desfecho?",
-        ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-        help=help_4_5
-    )
-    
-    # Lógica Sequencial mantida
-    if q4_5 in ["Y", "PY", "NI"]:
-        help_4_6 = """Se todas as variáveis que plausivelmente explicam a relação entre o desfecho e a ausência de dados (na intervenção, nos fatores de confusão ou no próprio desfecho) forem incluídas na análise de casos completos, o risco de viés será baixo. Por exemplo, em uma regressão da pressão arterial aos 55 anos (desfecho) sobre a redução da ingestão de sal (intervenção), ajustada para os fatores de confusão sexo, nível de escolaridade e pressão arterial medida aos 25 anos, se as mulheres tivessem maior probabilidade de ter a pressão arterial medida aos 25 anos e se o sexo fosse a única variável plausivelmente relacionada à ausência de dados, isso não causaria viés, pois o sexo já está ajustado no modelo de análise. Portanto, a pressão arterial aos 55 anos não está relacionada à ausência de dados na pressão arterial aos 25 anos, após o ajuste para o sexo.
-Nota técnica: Se um mediador (uma variável na via causal da intervenção ao desfecho) afetar a ausência de dados, o ajuste para essa variável seria apropriado para evitar viés devido a dados faltantes em uma análise de casos completos, mas alteraria o efeito da intervenção estimado. Na presença de tais variáveis, a imputação múltipla (ver questão 4.7) deve ser usada para lidar com o viés devido a dados faltantes. O ajuste para um mediador aumentará o risco de viés devido a fatores de confusão (domínio 1)."""
-        
-        q4_6 = st.selectbox(
-            "4.6 É provável que a relação entre o resultado e a ausência de dados seja explicada pelas variáveis no modelo de análise?",
-            ["Selecione...", "Y", "PY", "WN", "NI", "SN"],
-            help=help_4_6
-        )
-        
-        # Lógica Sequencial mantida
-        if q4_6 != "Selecione...":
-            help_4_11 = """A evidência de que o resultado não foi enviesado por dados faltantes pode vir de:
-(1) métodos de análise que não seriam tendenciosos sob relações plausíveis entre os valores ausentes e a probabilidade de que os dados estejam ausentes; ou
-(2) Análises de sensibilidade mostram que os resultados sofrem poucas alterações sob uma série de suposições plausíveis sobre os valores ausentes.
-Note que a imputação múltipla baseada apenas em informações sobre desfecho, intervenção e fatores de confusão não deve ser considerada suficiente para corrigir o viés devido a dados faltantes, portanto, a similaridade entre os resultados com e sem essa imputação não deve ser interpretada como garantia ao responder a esta questão. Da mesma forma, não se deve presumir que uma análise ponderada corrija o viés devido a dados faltantes sem uma análise mais aprofundada dos itens (1) e (2) acima, ou sem análises de sensibilidade."""
-            
-            q4_11 = st.selectbox(
-                "4.11 Há evidências de que o resultado não foi enviesado por dados faltantes?",
-                ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-                help=help_4_11
-            )
+    # Verifica integridade (Lógica mantida)
+    missing_data = False
+    triagem_complete = False
+
+    if "Selecione..." not in [q4_1, q4_2, q4_3]:
+        triagem_complete = True
+        if q4_1 in ["PN", "N", "NI"] or q4_2 in ["PN", "N", "NI"] or q4_3 in ["PN", "N", "NI"]:
+            missing_data = True
+
+    # --- PASSO 2: ESTRATÉGIA DE ANÁLISE (4.4) ---
+    # Aparece somente se triagem completa e houver dados faltantes
+    analysis_type = "NONE"
+
+    if triagem_complete and missing_data:
+        st.divider()
+
+        q4_4 = ask("4.4")
+
+        if q4_4 in ["Y", "PY", "NI"]:
+            analysis_type = "COMPLETE_CASE"
+        elif q4_4 in ["N", "PN"]:
+            analysis_type = "IMPUTATION_OR_OTHER"
+
+    # --- PASSO 3: RAMIFICAÇÃO SEQUENCIAL ---
+
+    # >>> RAMO A: CASOS COMPLETOS <<<
+    if analysis_type == "COMPLETE_CASE":
+        st.markdown("**Caminho: Análise de Casos Completos**")
+
+
+        q4_5 = ask("4.5")
 
-# >>> RAMO B: IMPUTAÇÃO / OUTROS <<<
-elif analysis_type == "IMPUTATION_OR_OTHER":
-    st.markdown("**Caminho: Imputação ou Outros Métodos**")
-    
-    help_4_7 = """A imputação de valores ausentes é o processo de atribuir valores estimados ou presumidos a esses valores para uso na análise principal.
-Responda 'S' ou 'PP' se a análise foi baseada em imputação simples ou múltipla."""
-    
-    q4_7 = st.selectbox(
-        "4.7 A análise foi baseada na imputação de valores ausentes?",
-        ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-        help=help_4_7
-    )
-    
-    # Sub-Ramo B1: Imputação
-    if q4_7 in ["Y", "PY"]:
-        help_4_8 = """Em seu livro Análise estatística com dados faltantes (Wiley 2002), Little e Rubin propuseram categorizações comumente usadas para dados faltantes. Estas foram resumidas por Sterne et al (BMJ 2009; 338 : b2393) da seguinte forma:
-Dados faltantes completamente ao acaso (MCAR): Não há diferenças sistemáticas entre os valores faltantes e os valores observados. Por exemplo, as medições da pressão arterial podem estar faltando devido à falha de um esfigmomanômetro automático.
-Dados faltantes aleatoriamente (MAR): qualquer diferença sistemática entre os valores faltantes e os valores observados pode ser explicada por diferenças nos dados observados. Por exemplo, as medições de pressão arterial faltantes podem ser menores do que as medições realizadas, mas apenas porque pessoas mais jovens podem ter maior probabilidade de apresentar medições de pressão arterial faltantes.
-Dados faltantes não aleatórios (MNAR): Mesmo após a consideração dos dados observados , diferenças sistemáticas permanecem entre os valores faltantes e os valores observados. Por exemplo, pessoas com pressão alta podem ter maior probabilidade de faltar a consultas médicas por terem dores de cabeça.
-Análises baseadas em imputação múltipla podem evitar viés devido a dados faltantes, desde que as variáveis incompletas para as quais os dados são imputados sejam MAR ou MCAR, mas não se os dados forem MNAR.
-Responda ' N ' ou ' PN ' se houver motivo para acreditar que os dados estão faltando de forma não aleatória (MNAR). Caso contrário, responda ' Y ' ou ' PY '."""
-        
-        q4_8 = st.selectbox(
-            "4.8 É razoável assumir que os dados estavam 'faltando aleatoriamente' (MAR) ou 'faltando completamente aleatoriamente' (MCAR) ?",
-            ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-            help=help_4_8
-        )
-        
         # Lógica Sequencial mantida
-        if q4_8 in ["Y", "PY"]:
-            help_4_9 = """Responda ' SN ' ou ' WN ' se forem utilizados métodos de imputação simples, como a última observação levada adiante ou a imputação da média. O grau de viés que isso provavelmente introduzirá dependerá da proporção de participantes com dados faltantes.
-Responda ' S ' ou ' PP ' se a imputação múltipla foi usada e (i) todos os preditores de dados faltantes em qualquer variável foram incluídos nos modelos de imputação; e (ii) todas as variáveis no modelo usado para a análise principal foram incluídas nos modelos de imputação."""
-            
-            q4_9 = st.selectbox(
-                "4.9 A imputação foi realizada adequadamente?",
-                ["Selecione...", "Y", "PY", "WN", "NI", "SN"],
-                help=help_4_9
-            )
-            
+        if q4_5 in ["Y", "PY", "NI"]:
+
+            q4_6 = ask("4.6")
+
             # Lógica Sequencial mantida
-            if q4_9 in ["WN", "NI", "SN"]:
-                # Reutilizando help_4_11 pois é o mesmo texto para todos os casos
-                help_4_11 = """A evidência de que o resultado não foi enviesado por dados faltantes pode vir de:
-(1) métodos de análise que não seriam tendenciosos sob relações plausíveis entre os valores ausentes e a probabilidade de que os dados estejam ausentes; ou
-(2) Análises de sensibilidade mostram que os resultados sofrem poucas alterações sob uma série de suposições plausíveis sobre os valores ausentes.
-Note que a imputação múltipla baseada apenas em informações sobre desfecho, intervenção e fatores de confusão não deve ser considerada suficiente para corrigir o viés devido a dados faltantes, portanto, a similaridade entre os resultados com e sem essa imputação não deve ser interpretada como garantia ao responder a esta questão. Da mesma forma, não se deve presumir que uma análise ponderada corrija o viés devido a dados faltantes sem uma análise mais aprofundada dos itens (1) e (2) acima, ou sem análises de sensibilidade."""
-                
-                q4_11 = st.selectbox(
-                    "4.11 Há evidências de que o resultado não foi enviesado por dados faltantes?",
-                    ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-                    help=help_4_11
-                )
-
-    # Sub-Ramo B2: Outros Métodos
-    elif q4_7 in ["N", "PN", "NI"]:
-        help_4_10 = """Esta questão de sinalização abrange situações em que a análise não foi uma análise de casos completos nem se baseou na imputação de valores ausentes. Exemplos de tais análises incluem ponderação por probabilidade inversa e máxima verossimilhança com informação completa. Se for utilizada ponderação, a sua validade depende da especificação correta do modelo de ponderação (ver Seaman e White, Stat Methods Med Res 2013; 22: 278-95).
-Nessas situações, o avaliador do ROBINS-I (possivelmente em conjunto com um estatístico com conhecimento em métodos para lidar com dados faltantes) deve tentar determinar se a análise foi apropriada para corrigir quaisquer vieses."""
-        
-        q4_10 = st.selectbox(
-            "4.10 Foi utilizado um método alternativo apropriado para corrigir o viés devido a dados faltantes?",
-            ["Selecione...", "Y", "PY", "WN", "NI", "SN"],
-            help=help_4_10
-        )
-        
-        # Lógica Sequencial mantida
-        if q4_10 in ["WN", "NI", "SN"]:
-            help_4_11 = """A evidência de que o resultado não foi enviesado por dados faltantes pode vir de:
-(1) métodos de análise que não seriam tendenciosos sob relações plausíveis entre os valores ausentes e a probabilidade de que os dados estejam ausentes; ou
-(2) Análises de sensibilidade mostram que os resultados sofrem poucas alterações sob uma série de suposições plausíveis sobre os valores ausentes.
-Note que a imputação múltipla baseada apenas em informações sobre desfecho, intervenção e fatores de confusão não deve ser considerada suficiente para corrigir o viés devido a dados faltantes, portanto, a similaridade entre os resultados com e sem essa imputação não deve ser interpretada como garantia ao responder a esta questão. Da mesma forma, não se deve presumir que uma análise ponderada corrija o viés devido a dados faltantes sem uma análise mais aprofundada dos itens (1) e (2) acima, ou sem análises de sensibilidade."""
-            
-            q4_11 = st.selectbox(
-                "4.11 Há evidências de que o resultado não foi enviesado por dados faltantes?",
-                ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-                help=help_4_11
-            )
+            if q4_6 != "Selecione...":
 
+                q4_11 = ask("4.11")
 
-# --- ALGORITMO DE DECISÃO (LÓGICA INTACTA) ---
-d4_risk = "PENDENTE"
-d4_reason = "Responda as perguntas sequenciais..."
-
-# Verificação se o fluxo está completo para cálculo
-ready_to_calc = False
-if not missing_data and triagem_complete:
-    ready_to_calc = True
-elif analysis_type == "COMPLETE_CASE":
-    if q4_5 in ["N", "PN"]: ready_to_calc = True
-    elif q4_5 in ["Y", "PY", "NI"] and q4_6 != "Selecione..." and q4_11 != "Selecione...": ready_to_calc = True
-elif analysis_type == "IMPUTATION_OR_OTHER":
-    if q4_7 in ["Y", "PY"]: # Imputação
-        if q4_8 in ["N", "PN", "NI"]: ready_to_calc = True # Hard Stop
-        elif q4_8 in ["Y", "PY"]:
-            if q4_9 in ["Y", "PY"]: ready_to_calc = True
-            elif q4_9 in ["WN", "NI", "SN"] and q4_11 != "Selecione...": ready_to_calc = True
-    elif q4_7 in ["N", "PN", "NI"]: # Outros
-        if q4_10 in ["Y", "PY"]: ready_to_calc = True
-        elif q4_10 in ["WN", "NI", "SN"] and q4_11 != "Selecione...": ready_to_calc = True
-
-
-if ready_to_calc:
-    # ---------------------------------------------------------
-    # 1. RISCO BAIXO
-    # ---------------------------------------------------------
-    if not missing_data:
-        d4_risk = "LOW"
-        d4_reason = "Dados completos (4.1-4.3)."
-    
-    # Caminho Casos Completos (Sucesso 1)
-    elif analysis_type == "COMPLETE_CASE" and q4_5 in ["N", "PN"]:
-        d4_risk = "LOW"
-        d4_reason = "Exclusão não relacionada ao desfecho."
-        
-    # Caminho Casos Completos (Sucesso 2: Explicado + Evidência)
-    elif analysis_type == "COMPLETE_CASE" and q4_6 in ["Y", "PY"] and q4_11 in ["Y", "PY"]:
-        d4_risk = "LOW"
-        d4_reason = "Perda explicada pelo modelo e confirmada por evidência."
-        
-    # Caminho Imputação (Sucesso)
-    elif q4_7 in ["Y", "PY"] and q4_8 in ["Y", "PY"] and q4_9 in ["Y", "PY"]:
-        d4_risk = "LOW"
-        d4_reason = "Imputação apropriada com premissas válidas."
-        
-    # Caminho Outros Métodos (Sucesso)
-    elif q4_7 in ["N", "PN", "NI"] and q4_10 in ["Y", "PY"]:
-        d4_risk = "LOW"
-        d4_reason = "Método alternativo apropriado."
-
-    # ---------------------------------------------------------
-    # 2. RISCO MODERADO
-    # ---------------------------------------------------------
-    # Casos Completos: Modelo explica (Y/PY) mas 4.11 falha (N/PN)
-    elif analysis_type == "COMPLETE_CASE" and q4_6 in ["Y", "PY"] and q4_11 in ["N", "PN"]:
-        d4_risk = "MODERATE"
-        d4_reason = "Modelo explica a perda, mas sem evidência adicional de isenção de viés."
-        
-    # Casos Completos: Modelo duvidoso (WN/NI) mas 4.11 salva (Y/PY)
-    elif analysis_type == "COMPLETE_CASE" and q4_6 in ["WN", "NI"] and q4_11 in ["Y", "PY"]:
-        d4_risk = "MODERATE"
-        d4_reason = "Explicação duvidosa mitigada por evidência de não-viés."
-        
-    # Outros Métodos: Duvidoso (WN/NI) mas 4.11 salva (Y/PY)
-    elif q4_7 in ["N", "PN", "NI"] and q4_10 in ["WN", "NI"] and q4_11 in ["Y", "PY"]:
-        d4_risk = "MODERATE"
-        d4_reason = "Método alternativo duvidoso mitigado por evidência."
-        
-    # Imputação: Duvidosa (WN/NI) mas 4.11 salva (Y/PY)
-    elif q4_7 in ["Y", "PY"] and q4_9 in ["WN", "NI"] and q4_11 in ["Y", "PY"]:
-        d4_risk = "MODERATE"
-        d4_reason = "Imputação duvidosa mitigada por evidência."
-
-    # ---------------------------------------------------------
-    # 3. RISCO SÉRIO
-    # ---------------------------------------------------------
-    # Casos Completos: Duvidoso (WN/NI) e 4.11 não salva (N/PN)
-    elif analysis_type == "COMPLETE_CASE" and q4_6 in ["WN", "NI"] and q4_11 in ["N", "PN"]:
-        d4_risk = "SERIOUS"
-        d4_reason = "Perda não explicada satisfatoriamente e sem mitigação."
-        
-    # Casos Completos: Falha Grave (SN) mas 4.11 salva (Y/PY)
-    elif analysis_type == "COMPLETE_CASE" and q4_6 == "SN" and q4_11 in ["Y", "PY"]:
-        d4_risk = "SERIOUS"
-        d4_reason = "Falha grave no modelo mitigada parcialmente."
-        
-    # Imputação: Premissas Ruins (Hard Stop em 4.8)
-    elif q4_7 in ["Y", "PY"] and q4_8 in ["N", "PN", "NI"]:
-        d4_risk = "SERIOUS"
-        d4_reason = "Premissas MAR/MCAR não razoáveis."
-        
-    # Imputação: Duvidosa (WN/NI) e 4.11 não salva (N/PN)
-    elif q4_7 in ["Y", "PY"] and q4_9 in ["WN", "NI"] and q4_11 in ["N", "PN"]:
-        d4_risk = "SERIOUS"
-        d4_reason = "Imputação duvidosa não mitigada."
-        
-    # Imputação: Falha Grave (SN) mas 4.11 salva (Y/PY)
-    elif q4_7 in ["Y", "PY"] and q4_9 == "SN" and q4_11 in ["Y", "PY"]:
-        d4_risk = "SERIOUS"
-        d4_reason = "Imputação inválida mitigada parcialmente."
-        
-    # Outros Métodos: Duvidoso (WN/NI) e 4.11 não salva (N/PN)
-    elif q4_7 in ["N", "PN", "NI"] and q4_10 in ["WN", "NI"] and q4_11 in ["N", "PN"]:
-        d4_risk = "SERIOUS"
-        d4_reason = "Método duvidoso não mitigado."
-        
-    # Outros Métodos: Falha Grave (SN) mas 4.11 salva (Y/PY)
-    elif q4_7 in ["N", "PN", "NI"] and q4_10 == "SN" and q4_11 in ["Y", "PY"]:
-        d4_risk = "SERIOUS"
-        d4_reason = "Método inválido mitigado parcialmente."
-
-    # ---------------------------------------------------------
-    # 4. RISCO CRÍTICO
-    # ---------------------------------------------------------
-    # Casos Completos: Falha Grave (SN) confirmada (N/PN)
-    elif analysis_type == "COMPLETE_CASE" and q4_6 == "SN" and q4_11 in ["N", "PN"]:
-        d4_risk = "CRITICAL"
-        d4_reason = "Falha grave no modelo sem mitigação."
-        
-    # Imputação: Falha Grave (SN) confirmada (N/PN)
-    elif q4_7 in ["Y", "PY"] and q4_9 == "SN" and q4_11 in ["N", "PN"]:
-        d4_risk = "CRITICAL"
-        d4_reason = "Imputação inválida sem mitigação."
-        
-    # Outros Métodos: Falha Grave (SN) confirmada (N/PN)
-    elif q4_7 in ["N", "PN", "NI"] and q4_10 == "SN" and q4_11 in ["N", "PN"]:
-        d4_risk = "CRITICAL"
-        d4_reason = "Método inválido sem mitigação."
-
-    # ---------------------------------------------------------
-    # FALLBACK (Caso alguma combinação exótica escape, define padrão)
-    # ---------------------------------------------------------
-    if d4_risk == "PENDENTE":
-        d4_risk = "SERIOUS" # Padrão conservador para combinações não mapeadas
-        d4_reason = "Combinação de respostas não mapeada (Risco padrão)."
-
-risks["D4"] = d4_risk
-reasons["D4"] = d4_reason
-
-report_data["domains"]["Domínio 4"] = {
-    "risk": d4_risk, 
-    "reason": d4_reason, 
-    "answers": {k: v for k, v in locals().items() if k.startswith('q4_') and isinstance(v, str)}
-}
+    # >>> RAMO B: IMPUTAÇÃO / OUTROS <<<
+    elif analysis_type == "IMPUTATION_OR_OTHER":
+        st.markdown("**Caminho: Imputação ou Outros Métodos**")
 
-display_risk_card("Domínio 4", d4_risk, d4_reason)
-st.divider()
 
-# --- DOMÍNIO 5: MENSURAÇÃO DO DESFECHO (Opções Estritas em 5.3) ---
-st.header("Domínio 5: Viés na Mensuração do Desfecho")
+        q4_7 = ask("4.7")
 
-st.markdown("""
-Este domínio avalia se a forma como os desfechos foram medidos ou verificados introduziu viés.
-**As perguntas aparecerão sequencialmente.**
-""")
+        # Sub-Ramo B1: Imputação
+        if q4_7 in ["Y", "PY"]:
 
-# Inicialização de variáveis
-q5_1, q5_2, q5_3 = "Selecione...", "Selecione...", "Selecione..."
-d5_risk = "PENDENTE"
-d5_reason = "Aguardando respostas..."
+            q4_8 = ask("4.8")
 
-# --- 5.1 (Sempre visível) ---
-help_5_1 = """Métodos comparáveis de mensuração de desfechos (coleta de dados) envolvem os mesmos métodos e limiares de mensuração, utilizados em momentos comparáveis. Diferenças entre os grupos de intervenção podem surgir devido ao " viés de detecção diagnóstica" no contexto da coleta passiva de dados de desfecho, ou se uma intervenção envolver visitas adicionais a um profissional de saúde, levando a oportunidades adicionais para a identificação de eventos de desfecho."""
+            # Lógica Sequencial mantida
+            if q4_8 in ["Y", "PY"]:
 
-q5_1 = st.selectbox(
-    "5.1 A medição ou a verificação do resultado poderiam ter diferido entre os grupos de intervenção?",
-    ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-    help=help_5_1
-)
+                q4_9 = ask("4.9")
 
-# Lógica Sequencial: 5.2 só aparece se 5.1 não for risco imediato (Y/PY) e tiver sido respondido
-show_5_2 = False
-if q5_1 in ["N", "PN", "NI"]:
-    show_5_2 = True
-elif q5_1 in ["Y", "PY"]:
-    # Hard Stop: Risco Sério imediato
-    d5_risk = "SERIOUS"
-    d5_reason = "Métodos de medição diferentes entre grupos (5.1 Y/PY)."
-
-# --- 5.2 ---
-if show_5_2:
-    help_5_2 = """Responda ' N ' se os avaliadores de desfecho desconheciam o status da intervenção. Em outras situações, os avaliadores de desfecho podem desconhecer as intervenções recebidas pelos participantes, mesmo que não haja cegamento ativo por parte dos investigadores do estudo; a resposta a esta pergunta também seria ' N '. Em estudos em que os participantes relatam seus próprios desfechos, por exemplo, em um questionário, o avaliador de desfecho é o próprio participante do estudo. Em um estudo observacional, a resposta a esta pergunta geralmente será ' S ' quando os participantes relatam seus próprios desfechos."""
-    
-    q5_2 = st.selectbox(
-        "5.2 Os avaliadores de resultados estavam cientes da intervenção recebida pelos participantes do estudo?",
-        ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-        help=help_5_2
-    )
+                # Lógica Sequencial mantida
+                if q4_9 in ["WN", "NI", "SN"]:
 
-# Lógica Sequencial: 5.3 só aparece se 5.2 for Y/PY/NI
-show_5_3 = False
-if show_5_2 and q5_2 in ["Y", "PY", "NI"]:
-    show_5_3 = True
+                    q4_11 = ask("4.11")
 
-# --- 5.3 (Opções Estritas: SY/WY/PN/N/NI) ---
-if show_5_3:
-    help_5_3 = """O conhecimento da intervenção atribuída pode influenciar os resultados relatados pelos participantes (como o nível de dor), os resultados relatados pelos observadores que envolvem algum julgamento e os resultados das decisões do profissional responsável pela intervenção.
-o conhecimento da intervenção atribuída influencie os resultados relatados pelos observadores que não envolvam julgamento, como, por exemplo, a mortalidade por todas as causas ou as medições laboratoriais dos níveis de substâncias no sangue.
-As opções de resposta distinguem entre situações em que (i) o conhecimento do estado da intervenção poderia ter influenciado a avaliação do resultado, mas não há razão para acreditar que o tenha feito, e situações em que (ii) o conhecimento do estado da intervenção provavelmente influenciou a avaliação do resultado. Quando há fortes níveis de crença ou preferência por efeitos benéficos ou prejudiciais da intervenção, é mais provável que o resultado tenha sido influenciado pelo conhecimento da intervenção recebida. Exemplos que justificam a resposta ' SY ' podem incluir sintomas relatados por pacientes em estudos de homeopatia ou avaliações da recuperação da função por um fisioterapeuta."""
-    
-    q5_3 = st.selectbox(
-        "5.3 A avaliação do resultado poderia ter sido influenciada pelo conhecimento da intervenção recebida?",
-        ["Selecione...", "SY", "WY", "PN", "N", "NI"], # Opções estritas solicitadas
-        help=help_5_3
-    )
+        # Sub-Ramo B2: Outros Métodos
+        elif q4_7 in ["N", "PN", "NI"]:
 
-# --- CÁLCULO DE RISCO ---
+            q4_10 = ask("4.10")
 
-# Verifica se podemos calcular (Fluxo completo ou Hard Stop)
-ready_to_calc = False
+            # Lógica Sequencial mantida
+            if q4_10 in ["WN", "NI", "SN"]:
 
-if d5_risk == "SERIOUS": # Já definido pelo Hard Stop de 5.1
-    ready_to_calc = False 
+                q4_11 = ask("4.11")
 
-elif q5_1 != "Selecione...":
-    # Caminho sem 5.3 (5.2 foi N/PN)
-    if q5_2 in ["N", "PN"]:
-        ready_to_calc = True
-    # Caminho com 5.3 (5.2 foi Y/PY/NI)
-    elif q5_2 in ["Y", "PY", "NI"] and q5_3 != "Selecione...":
-        ready_to_calc = True
 
+    # --- ALGORITMO DE DECISÃO (engine.score_d4) ---
+    d4_answers = {
+        "4.1": q4_1, "4.2": q4_2, "4.3": q4_3, "4.4": q4_4, "4.5": q4_5, "4.6": q4_6,
+        "4.7": q4_7, "4.8": q4_8, "4.9": q4_9, "4.10": q4_10, "4.11": q4_11,
+    }
+    d4_risk, d4_reason = score_cached("D4", None, d4_answers)
 
-if ready_to_calc:
-    
-    # --- BAIXO RISCO (Verde) ---
-    # 5.1 N/PN --> 5.2 N/PN
-    if q5_1 in ["N", "PN"] and q5_2 in ["N", "PN"]:
-        d5_risk = "LOW"
-        d5_reason = "Medição comparável e avaliadores cegos/não influenciados."
-        
-    # 5.1 N/PN --> 5.2 Y/PY/NI --> 5.3 N/PN
-    elif q5_1 in ["N", "PN"] and q5_2 in ["Y", "PY", "NI"] and q5_3 in ["N", "PN"]:
-        d5_risk = "LOW"
-        d5_reason = "Avaliadores cientes, mas avaliação não influenciada."
-
-    # --- RISCO MODERADO ---
-    # Regra: 5.3 WY/NI
-    elif q5_1 in ["N", "PN"] and q5_2 in ["Y", "PY", "NI"] and q5_3 in ["WY", "NI"]:
-        d5_risk = "MODERATE"
-        d5_reason = "Possível influência do conhecimento da intervenção na avaliação (WY/NI)."
-
-    # Regra: 5.1 NI --> 5.2 N/PN
-    elif q5_1 == "NI" and q5_2 in ["N", "PN"]:
-        d5_risk = "MODERATE"
-        d5_reason = "Sem informação sobre comparabilidade da medição (5.1 NI)."
-
-    # Regra: 5.1 NI --> 5.2 Y/PY/NI --> 5.3 WY/N/PN/NI
-    elif q5_1 == "NI" and q5_2 in ["Y", "PY", "NI"] and q5_3 in ["WY", "N", "PN", "NI"]:
-        d5_risk = "MODERATE"
-        d5_reason = "Sem informação sobre comparabilidade (5.1 NI) e possível influência."
-
-    # --- RISCO SÉRIO ---
-    # 5.1 Y/PY
-    elif q5_1 in ["Y", "PY"]:
-        d5_risk = "SERIOUS"
-        d5_reason = "Métodos de medição diferem entre os grupos."
-
-    # Regra: 5.3 SY
-    elif q5_1 in ["N", "PN", "NI"] and q5_2 in ["Y", "PY", "NI"] and q5_3 == "SY":
-        d5_risk = "SERIOUS"
-        d5_reason = "Avaliação do desfecho fortemente influenciada (SY) pelo conhecimento da intervenção."
-
-# Salva nos dados globais
-risks["D5"] = d5_risk
-reasons["D5"] = d5_reason
-
-report_data["domains"]["Domínio 5"] = {
-    "risk": d5_risk, 
-    "reason": d5_reason, 
-    "answers": {"5.1": q5_1, "5.2": q5_2, "5.3": q5_3}
-}
+    save_domain_result("D4", d4_risk, d4_reason, d4_answers)
+
+
+# --- DOMÍNIO 5: MENSURAÇÃO DO DESFECHO (Opções Estritas em 5.3) ---
+@st.fragment
+@telemetry.timed("d5")
+def render_d5():
+    st.header("Domínio 5: Viés na Mensuração do Desfecho")
+
+    st.markdown("""
+    Este domínio avalia se a forma como os desfechos foram medidos ou verificados introduziu viés.
+    **As perguntas aparecerão sequencialmente.**
+    """)
+
+    # Inicialização de variáveis
+    q5_1, q5_2, q5_3 = "Selecione...", "Selecione...", "Selecione..."
+
+    # --- 5.1 (Sempre visível) ---
+
+    q5_1 = ask("5.1")
+
+    # Lógica Sequencial: 5.2 só aparece se 5.1 não for risco imediato (Y/PY) e tiver sido respondido
+    # (5.1 Y/PY é um Hard Stop: Risco Sério imediato)
+    show_5_2 = q5_1 in ["N", "PN", "NI"]
+
+    # --- 5.2 ---
+    if show_5_2:
+
+        q5_2 = ask("5.2")
+
+    # Lógica Sequencial: 5.3 só aparece se 5.2 for Y/PY/NI
+    show_5_3 = False
+    if show_5_2 and q5_2 in ["Y", "PY", "NI"]:
+        show_5_3 = True
+
+    # --- 5.3 (Opções Estritas: SY/WY/PN/N/NI) ---
+    if show_5_3:
+
+        q5_3 = ask("5.3")
+
+    # --- CÁLCULO DE RISCO (engine.score_d5) ---
+    d5_risk, d5_reason = score_cached("D5", None, {"5.1": q5_1, "5.2": q5_2, "5.3": q5_3})
+
+    # Salva nos dados globais
+    save_domain_result("D5", d5_risk, d5_reason, {"5.1": q5_1, "5.2": q5_2, "5.3": q5_3})
 
-display_risk_card("Domínio 5", d5_risk, d5_reason)
-st.divider()
 
 # --- DOMÍNIO 6: SELEÇÃO DO RESULTADO RELATADO ---
-st.header("Domínio 6: Viés na seleção do resultado relatado")
-
-st.markdown("""
-Este domínio avalia se o resultado relatado foi selecionado de forma enviesada a partir de múltiplas análises ou medidas possíveis.
-**As perguntas aparecerão sequencialmente conforme necessário.**
-""")
-
-# Inicialização de variáveis
-q6_1 = "Selecione..."
-q6_2, q6_3, q6_4 = "Selecione...", "Selecione...", "Selecione..."
-d6_risk = "PENDENTE"
-d6_reason = "Aguardando respostas..."
-
-# --- 6.1 (Sempre visível) ---
-help_6_1 = """Se as intenções pré-especificadas pelos pesquisadores estiverem disponíveis com detalhes suficientes, as medições e análises de desfecho planejadas poderão ser comparadas com aquelas apresentadas no(s) relatório(s) publicado(s). Para evitar a possibilidade de seleção do resultado relatado, a finalização das intenções da análise deve preceder a disponibilização dos dados de desfecho não cegados aos autores do estudo.
-Esses planos de análise raramente são disponibilizados publicamente para estudos não randomizados, portanto é improvável que um estudo seja avaliado como tendo baixo risco de viés nesse domínio."""
-
-q6_1 = st.selectbox(
-    "6.1 O resultado foi relatado de acordo com um plano de análise disponível e predeterminado?",
-    ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-    help=help_6_1
-)
+@st.fragment
+@telemetry.timed("d6")
+def render_d6():
+    st.header("Domínio 6: Viés na seleção do resultado relatado")
 
-# Lógica Sequencial: Se 6.1 for Y/PY, o risco é Baixo imediatamente.
-# Se for N/PN/NI, abrimos as questões 6.2, 6.3 e 6.4.
-show_details = False
+    st.markdown("""
+    Este domínio avalia se o resultado relatado foi selecionado de forma enviesada a partir de múltiplas análises ou medidas possíveis.
+    **As perguntas aparecerão sequencialmente conforme necessário.**
+    """)
 
-if q6_1 in ["Y", "PY"]:
-    # Caminho direto para Baixo Risco
-    d6_risk = "LOW"
-    d6_reason = "Resultado relatado conforme plano pré-determinado (6.1 Y/PY)."
-    
-elif q6_1 in ["N", "PN", "NI"]:
-    show_details = True
+    # Inicialização de variáveis
+    q6_1 = "Selecione..."
+    q6_2, q6_3, q6_4 = "Selecione...", "Selecione...", "Selecione..."
 
-# --- QUESTÕES DETALHADAS (6.2, 6.3, 6.4) ---
-if show_details:
-    st.divider()
-    st.markdown("**Avaliação de Múltiplas Medidas e Análises**")
-    
-    # 6.2
-    help_6_2 = """Um domínio de resultado específico (ou seja, um estado real ou ponto final de interesse) pode ser medido de múltiplas maneiras. Por exemplo, o domínio dor pode ser medido usando múltiplas escalas (como uma escala visual analógica e o Questionário de Dor de McGill), cada uma em múltiplos momentos (como 3, 6 e 12 semanas após o tratamento). Se múltiplas medições forem realizadas, mas apenas uma ou um subconjunto for relatado com base nos resultados (como significância estatística), há um alto risco de viés no resultado totalmente relatado.
-Responda ' S ' ou ' PY ' se :
-Há evidências claras (geralmente obtidas por meio da análise de um protocolo de estudo ou plano de análise estatística) de que um domínio foi mensurado de múltiplas maneiras, mas os dados de apenas uma ou um subconjunto dessas medidas são relatados integralmente (sem justificativa), e o resultado relatado integralmente provavelmente foi selecionado com base nesses resultados. A seleção com base nos resultados surge do desejo de que as descobertas sejam noticiáveis, suficientemente relevantes para merecerem publicação, ou para confirmar uma hipótese prévia. Por exemplo, analistas que têm uma ideia preconcebida, ou interesse pessoal em demonstrar, que uma intervenção é benéfica podem estar inclinados a relatar seletivamente medidas de desfecho que sejam favoráveis à intervenção.
-Responda ' N ' ou ' PN ' se:
-Há evidências claras (geralmente obtidas por meio da análise de um protocolo de estudo ou plano de análise estatística) de que todos os resultados relatados para o domínio de desfecho correspondem a todas as medidas de desfecho pretendidas.
-ou
-Só existe uma forma possível de medir o domínio de resultados (portanto, não há oportunidade de selecionar entre múltiplas medidas).
-ou
-As medições dos resultados são inconsistentes em diferentes relatórios sobre o mesmo estudo, mas os analistas apresentaram a razão para a inconsistência , que não está relacionada à natureza dos resultados.
-Responda 'NI' se:
-As intenções de análise não estão disponíveis, ou não foram relatadas com detalhes suficientes para permitir uma avaliação, e há mais de uma maneira pela qual o domínio de resultados poderia ter sido medido."""
-    
-    q6_2 = st.selectbox(
-        "6.2 Múltiplas medidas de desfecho (por exemplo, escalas, definições, pontos de tempo) dentro do domínio do desfecho?",
-        ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-        help=help_6_2
-    )
+    # --- 6.1 (Sempre visível) ---
 
-    # 6.3
-    help_6_3 = """Devido às limitações do uso de dados de estudos não randomizados para análises de eficácia (necessidade de controlar fatores de confusão, quantidade substancial de dados faltantes, etc. ), os analistas podem implementar diferentes métodos analíticos para lidar com essas limitações. Exemplos incluem modelos não ajustados e ajustados; uso do valor final versus mudança em relação ao valor basal versus análise de covariância; exploração de diferentes maneiras de definir os grupos de intervenção e controle; transformações de variáveis; conversão de um desfecho em escala contínua para dados categóricos com diferentes pontos de corte; diferentes conjuntos de covariáveis para ajuste; e diferentes estratégias para lidar com dados faltantes. A aplicação de múltiplos métodos gera múltiplas estimativas de efeito para um domínio de desfecho específico. Se múltiplas estimativas forem geradas, mas apenas uma ou um subconjunto for relatado, há o risco de relato seletivo com base nos resultados (por exemplo, significância estatística).
-Responda ' S ' ou ' PY ' se : 
-Há evidências claras (geralmente obtidas por meio da análise de um protocolo de estudo ou plano de análise estatística) de que um domínio foi analisado de múltiplas maneiras, mas os dados de apenas uma ou um subconjunto dessas análises são relatados integralmente (sem justificativa), e o resultado relatado integralmente provavelmente foi selecionado com base nesses resultados. A seleção com base nos resultados surge do desejo de que as descobertas sejam noticiáveis, suficientemente relevantes para merecerem publicação, ou para confirmar uma hipótese prévia. Por exemplo, analistas que têm uma ideia preconcebida ou interesse pessoal em demonstrar que uma intervenção é benéfica podem estar inclinados a relatar seletivamente análises que sejam favoráveis à intervenção. Responda ' N ' ou ' PN ' se :
-Há evidências claras (geralmente obtidas por meio da análise de um protocolo de estudo ou plano de análise estatística) de que todos os resultados relatados para o domínio de desfecho correspondem a todas as análises planejadas.
-ou
-Só existe uma forma possível de analisar o domínio de resultados (portanto, não há oportunidade de selecionar entre múltiplas análises).
-ou
-As análises são inconsistentes entre diferentes relatórios sobre o mesmo estudo, mas os analistas apresentaram uma justificativa para a inconsistência , que não está relacionada à natureza dos resultados.
-Responda 'NI' se :
-As intenções de análise não estão disponíveis, ou não foram relatadas com detalhes suficientes para permitir uma avaliação, e há mais de uma maneira pela qual o domínio de resultados poderia ter sido analisado."""
-
-    q6_3 = st.selectbox(
-        "6.3 Múltiplas análises dos dados?",
-        ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-        help=help_6_3
-    )
+    q6_1 = ask("6.1")
 
-    # 6.4
-    help_6_4 = """Particularmente com grandes coortes frequentemente disponíveis em fontes de dados coletados rotineiramente, é possível gerar múltiplas estimativas de efeito para diferentes subgrupos ou simplesmente omitir proporções variáveis da coorte original. Se múltiplas estimativas forem geradas, mas apenas uma ou um subconjunto delas for relatado, existe o risco de relato seletivo com base nos resultados (por exemplo, significância estatística).
-Responda ' S ' ou ' PY ' se :
-Há evidências claras (geralmente obtidas por meio da análise do protocolo do estudo ou do plano de análise estatística) de que diferentes subgrupos foram analisados, mas os dados de apenas uma ou parte das análises são relatados integralmente (sem justificativa), e o resultado relatado integralmente provavelmente foi selecionado com base nesses resultados. A seleção com base nos resultados surge do desejo de que as descobertas sejam noticiáveis, suficientemente relevantes para merecerem publicação ou para confirmar uma hipótese prévia. Por exemplo, analistas que têm uma ideia preconcebida ou um interesse pessoal em demonstrar que uma intervenção é benéfica podem estar inclinados a relatar resultados seletivamente para subgrupos que sejam favoráveis à intervenção. Responda ' N ' ou ' PN ' se :
-Há evidências claras (geralmente obtidas por meio da análise de um protocolo de estudo ou plano de análise estatística com data anterior ao acesso do analista aos dados coletados ) de que todos os resultados relatados para os subgrupos correspondem a todas as análises planejadas.
-ou
-As análises são inconsistentes entre diferentes relatórios sobre o mesmo estudo, mas os analistas apresentaram uma justificativa para a inconsistência , que não está relacionada à natureza dos resultados.
-Responda 'NI' se :
-As intenções de análise não estão disponíveis, ou não foram relatadas com detalhes suficientes para permitir uma avaliação, e há mais de uma maneira pela qual os subgrupos poderiam ter sido analisados."""
-
-    q6_4 = st.selectbox(
-        "6.4 Múltiplos subgrupos ?",
-        ["Selecione...", "Y", "PY", "PN", "N", "NI"],
-        help=help_6_4
-    )
+    # Lógica Sequencial: Se 6.1 for Y/PY, o risco é Baixo imediatamente.
+    # Se for N/PN/NI, abrimos as questões 6.2, 6.3 e 6.4.
+    show_details = q6_1 in ["N", "PN", "NI"]
 
+    # --- QUESTÕES DETALHADAS (6.2, 6.3, 6.4) ---
+    if show_details:
+        st.divider()
+        st.markdown("**Avaliação de Múltiplas Medidas e Análises**")
 
-# --- CÁLCULO DE RISCO (ALGORITMO) ---
+        # 6.2
 
-# Verifica se podemos calcular (Fluxo completo)
-ready_to_calc = False
+        q6_2 = ask("6.2")
 
-if d6_risk == "LOW" and q6_1 in ["Y", "PY"]:
-    # Já calculado no passo 1
-    ready_to_calc = False 
-elif show_details and "Selecione..." not in [q6_2, q6_3, q6_4]:
-    ready_to_calc = True
+        # 6.3
 
-if ready_to_calc:
-    # Agrupa respostas das sub-questões
-    sub_answers = [q6_2, q6_3, q6_4]
-    
-    # Contadores
-    count_ypy = sum(1 for a in sub_answers if a in ["Y", "PY"])
-    count_ni = sum(1 for a in sub_answers if a == "NI")
-    count_npn = sum(1 for a in sub_answers if a in ["N", "PN"])
-    
-    # --- Lógica de Decisão (Baseada no Algoritmo Fornecido) ---
-    
-    # 1. RISCO CRÍTICO (Precedência mais alta: Two or more Y/PY)
-    # Regra: 6.1 N/PN/NI --> 6.2, 6.3, 6.4 Two or more Y/PY --> risco crítico
-    if count_ypy >= 2:
-        d6_risk = "CRITICAL"
-        d6_reason = "Evidência forte de seleção de resultados em múltiplos aspectos (>=2 Y/PY)."
-
-    # 2. RISCO SÉRIO
-    # Regra: 6.1 N/PN/NI --> 6.2, 6.3, 6.4 One Y/PY or all NI --> risco serio
-    elif count_ypy == 1 or count_ni == 3:
-        d6_risk = "SERIOUS"
-        if count_ni == 3:
-            d6_reason = "Ausência total de informações sobre intenções de análise (Todos NI)."
-        else:
-            d6_reason = "Evidência de seleção de resultado em um aspecto (1 Y/PY)."
+        q6_3 = ask("6.3")
 
-    # 3. RISCO BAIXO
-    # Regra: 6.1 N/PN/NI --> 6.2, 6.3, 6.4 All N/PN --> baixo risco
-    elif count_npn == 3: # (Implica count_ypy == 0 e count_ni == 0)
-        d6_risk = "LOW"
-        d6_reason = "Sem evidência de seleção de resultados (Todos N/PN)."
+        # 6.4
 
-    # 4. RISCO MODERADO
-    # Regra: 6.1 N/PN/NI --> 6.2, 6.3, 6.4 At least one NI but none Y/PY --> risco moderado
-    elif count_ypy == 0 and count_ni >= 1:
-        d6_risk = "MODERATE"
-        d6_reason = "Falta de informação em pelo menos um aspecto (NI), sem evidência clara de seleção (Sem Y/PY)."
+        q6_4 = ask("6.4")
 
-    # Fallback de segurança
-    else:
-        d6_risk = "MODERATE"
-        d6_reason = "Combinação de respostas inconclusiva (Risco Moderado por padrão)."
 
-# Salva nos dados globais
-risks["D6"] = d6_risk
-reasons["D6"] = d6_reason
+    # --- CÁLCULO DE RISCO (engine.score_d6) ---
+    d6_risk, d6_reason = score_cached("D6", None, {"6.1": q6_1, "6.2": q6_2, "6.3": q6_3, "6.4": q6_4})
+
+    # Salva nos dados globais
+    save_domain_result("D6", d6_risk, d6_reason, {"6.1": q6_1, "6.2": q6_2, "6.3": q6_3, "6.4": q6_4})
 
-report_data["domains"]["Domínio 6"] = {
-    "risk": d6_risk, 
-    "reason": d6_reason, 
-    "answers": {"6.1": q6_1, "6.2": q6_2, "6.3": q6_3, "6.4": q6_4}
-}
 
-display_risk_card("Domínio 6", d6_risk, d6_reason)
-st.divider()
+# Execução completa da página: os domínios não precisam pedir outro rerun.
+# O finally desliga a marca mesmo se a execução for interrompida (exceção,
+# st.stop); ligada, os reruns só de um fragmento não salvariam nada.
+st.session_state["rendering_page"] = True
+try:
+    render_d1(is_variant_a)
+    st.divider()
+    render_d2()
+    st.divider()
+    render_d3()
+    st.divider()
+    render_d4()
+    st.divider()
+    render_d5()
+    st.divider()
+    render_d6()
+    st.divider()
+finally:
+    st.session_state["rendering_page"] = False
 
 # --- CÁLCULO GERAL ALGORITMO (COM TEXTOS INTEGRAIS) ---
-st.header("Julgamento de Risco (Overall)")
-all_risks = list(risks.values())
-algo_risk = "PENDENTE"
-
-# Dicionário com os textos integrais (Baseado na imagem fornecida)
-risk_descriptions = {
-    "LOW": {
-        "julgamento": "Baixo risco de viés, exceto por preocupações com fatores de confusão não controlados.",
-        "interpretacao": "Existe a possibilidade de fatores de confusão não controlados que não foram considerados (dada a natureza observacional do estudo), mas, fora isso, há pouca ou nenhuma preocupação com viés nos resultados."
-    },
-    "MODERATE": {
-        "julgamento": "Risco moderado de viés",
-        "interpretacao": "Existe alguma preocupação com relação ao viés nos resultados, embora não esteja claro se há um risco significativo de viés."
-    },
-    "SERIOUS": {
-        "julgamento": "Risco grave de viés",
-        "interpretacao": "O estudo apresenta alguns problemas importantes: as características do estudo acarretam um sério risco de viés nos resultados."
-    },
-    "CRITICAL": {
-        "julgamento": "Risco crítico de viés",
-        "interpretacao": "O estudo é muito problemático: as características do estudo levantam uma crítica de viés no resultado, de modo que o resultado deve, em geral, ser excluído das sínteses de evidências."
+with telemetry.section("overall"):
+    st.header("Julgamento de Risco (Overall)")
+    algo_risk = st.session_state["risk_tally"].overall
+    st.session_state["overall_risk"] = algo_risk
+
+    # Dicionário com os textos integrais (Baseado na imagem fornecida)
+    risk_descriptions = {
+        "LOW": {
+            "julgamento": "Baixo risco de viés, exceto por preocupações com fatores de confusão não controlados.",
+            "interpretacao": "Existe a possibilidade de fatores de confusão não controlados que não foram considerados (dada a natureza observacional do estudo), mas, fora isso, há pouca ou nenhuma preocupação com viés nos resultados."
+        },
+        "MODERATE": {
+            "julgamento": "Risco moderado de viés",
+            "interpretacao": "Existe alguma preocupação com relação ao viés nos resultados, embora não esteja claro se há um risco significativo de viés."
+        },
+        "SERIOUS": {
+            "julgamento": "Risco grave de viés",
+            "interpretacao": "O estudo apresenta alguns problemas importantes: as características do estudo acarretam um sério risco de viés nos resultados."
+        },
+        "CRITICAL": {
+            "julgamento": "Risco crítico de viés",
+            "interpretacao": "O estudo é muito problemático: as características do estudo levantam uma crítica de viés no resultado, de modo que o resultado deve, em geral, ser excluído das sínteses de evidências."
+        }
     }
-}
 
-# Cores para o layout
-risk_colors = {
-    "LOW": "#28a745",      # Verde
-    "MODERATE": "#ffc107", # Amarelo/Laranja (Texto escuro para contraste)
-    "SERIOUS": "#dc3545",  # Vermelho
-    "CRITICAL": "#343a40", # Preto/Cinza Escuro
-    "PENDENTE": "#6c757d"  # Cinza
-}
+    # Cores para o layout
+    risk_colors = {
+        "LOW": "#28a745",      # Verde
+        "MODERATE": "#ffc107", # Amarelo/Laranja (Texto escuro para contraste)
+        "SERIOUS": "#dc3545",  # Vermelho
+        "CRITICAL": "#343a40", # Preto/Cinza Escuro
+        "PENDENTE": "#6c757d"  # Cinza
+    }
 
-# Lógica de Cálculo
-if "PENDENTE" in all_risks:
-    st.warning("Responda todos os domínios para ver o cálculo e a interpretação final.")
-else:
-    # Filtra domínios que possam estar como N/A
-    valid_risks = [r for r in all_risks if r != "N/A"]
-    
-    # 1. Risco CRÍTICO
-    if "CRITICAL" in valid_risks:
-        algo_risk = "CRITICAL"
-    elif valid_risks.count("SERIOUS") >= 2:
-        algo_risk = "CRITICAL"
-        
-    # 2. Risco SÉRIO
-    elif "SERIOUS" in valid_risks:
-        algo_risk = "SERIOUS"
-    elif valid_risks.count("MODERATE") >= 3:
-        algo_risk = "SERIOUS"
-        
-    # 3. Risco MODERADO
-    elif "MODERATE" in valid_risks:
-        algo_risk = "MODERATE"
-        
-    # 4. BAIXO
+    # Lógica de Cálculo (engine.RiskTally)
+    if algo_risk == PENDING:
+        st.warning("Responda todos os domínios para ver o cálculo e a interpretação final.")
     else:
-        algo_risk = "LOW"
-    
-    # Recupera os textos baseados no risco calculado
-    texts = risk_descriptions.get(algo_risk, {"julgamento": "Erro", "interpretacao": "Erro"})
-    bg_color = risk_colors.get(algo_risk, "gray")
-    text_color = "black" if algo_risk == "MODERATE" else "white" # Ajuste de contraste para o amarelo
-
-    # Exibe o Card Final
-    st.markdown(f"""
-    <div style="padding: 20px; background-color: {bg_color}; color: {text_color}; border-radius: 10px; margin-top: 10px; box-shadow: 0 4px 6px rgba(0,0,0,0.1);">
-        <h2 style="text-align: center; margin-top: 0; border-bottom: 1px solid {text_color}; padding-bottom: 10px;">RISCO GLOBAL: {algo_risk}</h2>
-        <div style="margin-top: 15px;">
-            <p><strong>⚖️ Julgamento:</strong><br>{texts['julgamento']}</p>
-            <p><strong>📖 Interpretação:</strong><br>{texts['interpretacao']}</p>
+        # Recupera os textos baseados no risco calculado
+        texts = risk_descriptions.get(algo_risk, {"julgamento": "Erro", "interpretacao": "Erro"})
+        bg_color = risk_colors.get(algo_risk, "gray")
+        text_color = "black" if algo_risk == "MODERATE" else "white" # Ajuste de contraste para o amarelo
+
+        # Exibe o Card Final
+        st.markdown(f"""
+        <div style="padding: 20px; background-color: {bg_color}; color: {text_color}; border-radius: 10px; margin-top: 10px; box-shadow: 0 4px 6px rgba(0,0,0,0.1);">
+            <h2 style="text-align: center; margin-top: 0; border-bottom: 1px solid {text_color}; padding-bottom: 10px;">RISCO GLOBAL: {algo_risk}</h2>
+            <div style="margin-top: 15px;">
+                <p><strong>⚖️ Julgamento:</strong><br>{texts['julgamento']}</p>
+                <p><strong>📖 Interpretação:</strong><br>{texts['interpretacao']}</p>
+            </div>
         </div>
-    </div>
-    """, unsafe_allow_html=True)
+        """, unsafe_allow_html=True)
+
+    # Resumo de todos os desfechos do estudo (domínios herdados pontuados uma vez)
+    if len(study_workspace().outcomes) > 1:
+        st.markdown("###### Desfechos do estudo")
+        st.dataframe(study_workspace().summary(st.session_state["assessment_context"]["variant"]), hide_index=True)
 
 # --- JULGAMENTO DO PESQUISADOR ---
-st.markdown("### Validação pelo Pesquisador")
-st.caption("O algoritmo oferece uma sugestão padrão. O pesquisador pode alterar o julgamento final se houver justificativa (Guidance Note 17).")
-
-col_final1, col_final2 = st.columns([1, 2])
-with col_final1:
-    manual_risk = st.selectbox(
-        "Decisão Final de Risco Global",
-        ["LOW", "MODERATE", "SERIOUS", "CRITICAL"],
-        index=["LOW", "MODERATE", "SERIOUS", "CRITICAL"].index(algo_risk) if algo_risk != "PENDENTE" else 0
-    )
-with col_final2:
-    manual_justification = st.text_area(
-        "Justificativa do Pesquisador (Obrigatório para Override)",
-        placeholder="Explique se concordou com o algoritmo ou por que alterou o risco..."
+with telemetry.section("judgement"):
+    st.markdown("### Validação pelo Pesquisador")
+    st.caption("O algoritmo oferece uma sugestão padrão. O pesquisador pode alterar o julgamento final se houver justificativa (Guidance Note 17).")
+
+    col_final1, col_final2 = st.columns([1, 2])
+    with col_final1:
+        # Padrão: a sugestão do algoritmo, ou a decisão restaurada do checkpoint;
+        # com o algoritmo PENDENTE fica sem decisão até o pesquisador escolher
+        default_risk = st.session_state.get("restored_manual_risk", {}).get(algo_risk, algo_risk)
+        manual_risk = st.selectbox(
+            "Decisão Final de Risco Global",
+            RISK_LEVELS,
+            index=RISK_LEVELS.index(default_risk) if default_risk in RISK_LEVELS else None,
+            placeholder="Aguardando o algoritmo...",
+        ) or ""
+    with col_final2:
+        manual_justification = st.text_area(
+            "Justificativa do Pesquisador (Obrigatório para Override)",
+            placeholder="Explique se concordou com o algoritmo ou por que alterou o risco...",
+            key="manual_justification"
+        )
+
+    # Salva a avaliação (estudo + desfecho + revisor) no banco local
+    st.session_state["assessment_context"].update(manual_risk=manual_risk, manual_justification=manual_justification)
+    study_workspace().set_details(
+        outcome, numeric_result=numeric_result, manual=[algo_risk, manual_risk],
+        manual_justification=manual_justification,
     )
+    save_error = save_assessment()
+    if save_error:
+        st.warning(save_error)
+    elif can_save(st.session_state["assessment_context"]):
+        st.caption("💾 Avaliação salva automaticamente.")
+    else:
+        st.caption("Informe o ID do estudo e o revisor na barra lateral para salvar a avaliação automaticamente.")
 
 # --- ÁREA DE DOWNLOAD ---
-st.divider()
-st.subheader("📄 Exportar Relatório")
-
-if st.button("Gerar Arquivos para Download"):
-    # Atualiza dados finais
-    report_data["algo_risk"] = algo_risk
-    report_data["manual_risk"] = manual_risk
-    report_data["manual_justification"] = manual_justification
-    
-    # Gera arquivos
-    try:
-        docx_file = generate_docx(report_data)
-        pdf_file = generate_pdf(report_data)
-        
+with telemetry.section("export"):
+    st.divider()
+    st.subheader("📄 Exportar Relatório")
+
+    # Geração em segundo plano; o resultado fica em cache pelo conteúdo da avaliação,
+    # então uma avaliação inalterada não é gerada de novo
+    report_data = current_report_data()
+    report_future = reports.cached(reports.report_key(report_data))
+
+    if st.button("Gerar Arquivos para Download"):
+        report_future = reports.submit(report_data)
+
+    @st.fragment(run_every=1)
+    def wait_for_report(future):
+        if future.done():
+            st.rerun(scope="app")
+        st.info("⏳ Gerando relatórios em segundo plano...")
+
+    if report_future is None:
+        pass
+    elif not report_future.done():
+        wait_for_report(report_future)
+    elif report_future.exception() is not None:
+        st.error(f"Erro ao gerar arquivos: {report_future.exception()}")
+    else:
+        docx_file, pdf_file = report_future.result()
         col_d1, col_d2 = st.columns(2)
-        
+
         with col_d1:
             st.download_button(
                 label="📥 Baixar Relatório WORD (.docx)",
-                data=docx_file.getvalue(),
+                data=docx_file,
                 file_name=f"ROBINS_I_{study_id}.docx",
                 mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
             )
-        
+
         with col_d2:
             st.download_button(
                 label="📥 Baixar Relatório PDF (.pdf)",
@@ -1654,5 +1112,5 @@ if st.button("Gerar Arquivos para Download"):
                 file_name=f"ROBINS_I_{study_id}.pdf",
                 mime="application/pdf"
             )
-    except Exception as e:
-        st.error(f"Erro ao gerar arquivos: {e}")
\ No newline at end of file
+
+page_timer.stop()
@@ -0,0 +1,60 @@
+"""Arquivos estáticos (logo) carregados uma vez e mantidos em memória.
+
+O PNG original tem 1024x1024 px (~1,3 MB), mas é exibido com 120 px. Ele é
+lido e reduzido uma única vez por processo; como os bytes entregues ao
+Streamlit são sempre os mesmos, o hash do conteúdo (que identifica o arquivo
+de mídia) não muda entre reruns e o navegador reaproveita a imagem em cache
+em vez de baixá-la de novo.
+"""
+import functools
+import hashlib
+import io
+import os
+import tempfile
+
+LOGO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sua_logo.png")
+
+# Largura em px de cada variante: tela e cabeçalho dos relatórios PDF/DOCX
+LOGO_WIDTHS = {"ui": 120, "report": 240}
+
+
+@functools.lru_cache(maxsize=None)
+def logo(variant="ui"):
+    """PNG do logo já redimensionado, ou None se o arquivo não existir."""
+    if not os.path.exists(LOGO_PATH):
+        return None
+
+    from PIL import Image
+
+    width = LOGO_WIDTHS[variant]
+    with Image.open(LOGO_PATH) as im:
+        height = round(im.height * width / im.width)
+        im = im.convert("RGBA" if "A" in im.getbands() else "RGB")
+        im = im.resize((width, height), Image.LANCZOS)
+        out = io.BytesIO()
+        im.save(out, "PNG", optimize=True)
+    return out.getvalue()
+
+
+def etag(data):
+    """Identificador estável do conteúdo (mesmos bytes, mesmo valor)."""
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+@functools.lru_cache(maxsize=None)
+def logo_path(variant="report"):
+    """Caminho de uma cópia em disco da variante (para bibliotecas que só leem arquivos).
+
+    O nome inclui o hash do conteúdo, então a cópia é escrita uma vez e
+    reaproveitada enquanto o logo não mudar.
+    """
+    data = logo(variant)
+    if data is None:
+        return None
+    path = os.path.join(tempfile.gettempdir(), f"robins_i_logo_{variant}_{etag(data)}.png")
+    if not os.path.exists(path):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    return path
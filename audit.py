@@ -0,0 +1,322 @@
+"""Histórico das alterações das avaliações (somente acréscimo).
+
+Cada gravação que muda uma avaliação (store.AssessmentStore.save) gera
+eventos:
+
+- ANSWER: resposta alterada (b1 ... 6.4, c4);
+- RISK: risco de um domínio ou o global do algoritmo alterado;
+- MANUAL: decisão do pesquisador (manual_risk) ou a justificativa alterada.
+
+Os eventos ficam num buffer em memória e são gravados em lotes por uma
+thread em segundo plano (a cada FLUSH_INTERVAL segundos, ou antes se o
+buffer passar de FLUSH_EVENTS), então os reruns não esperam disco. Cada lote
+é uma linha da tabela `audit_log`: colunas compactadas (array de inteiros por
+campo e uma tabela de strings do lote, comprimidas com zlib). A tabela
+`audit_keys` indexa os lotes por avaliação (estudo, desfecho, revisor), então
+o histórico de uma avaliação só descompacta os lotes que a contêm. Triggers do
+SQLite impedem UPDATE e DELETE nas duas tabelas.
+
+replay() reconstrói o estado de uma avaliação em qualquer momento:
+
+    log = default_store().audit
+    log.history("Silva 2021", "Mortalidade", "AB")           # eventos em ordem
+    log.state_at("Silva 2021", "Mortalidade", "AB", until=ts) # estado naquele instante
+
+`python audit.py "Silva 2021" Mortalidade --reviewer AB` imprime o histórico.
+"""
+import argparse
+import array
+import atexit
+import collections
+import datetime
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import zlib
+
+ANSWER, RISK, MANUAL = 1, 2, 3
+KIND_NAMES = {ANSWER: "resposta", RISK: "risco", MANUAL: "pesquisador"}
+OVERALL = "Global"
+
+# Lote gravado a cada FLUSH_INTERVAL segundos, ou quando o buffer chega a FLUSH_EVENTS
+FLUSH_INTERVAL = 2.0
+FLUSH_EVENTS = 2000
+# Espera máxima entre tentativas depois de uma gravação que falhou
+FLUSH_MAX_BACKOFF = 60.0
+
+_MAGIC = b"RBA1"
+_NONE = 0xFFFFFFFF  # índice de string ausente (valor anterior inexistente)
+_HEADER = struct.Struct("<4sII")
+
+Event = collections.namedtuple("Event", "ts study_id outcome reviewer kind item old new")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_log (
+    id INTEGER PRIMARY KEY,
+    first_ts INTEGER NOT NULL,
+    last_ts INTEGER NOT NULL,
+    events INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS audit_log_no_update BEFORE UPDATE ON audit_log
+BEGIN SELECT RAISE(ABORT, 'audit_log é somente acréscimo'); END;
+CREATE TRIGGER IF NOT EXISTS audit_log_no_delete BEFORE DELETE ON audit_log
+BEGIN SELECT RAISE(ABORT, 'audit_log é somente acréscimo'); END;
+CREATE TABLE IF NOT EXISTS audit_keys (
+    study_id TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    reviewer TEXT NOT NULL,
+    batch_id INTEGER NOT NULL REFERENCES audit_log (id),
+    PRIMARY KEY (study_id, outcome, reviewer, batch_id)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS audit_keys_no_update BEFORE UPDATE ON audit_keys
+BEGIN SELECT RAISE(ABORT, 'audit_keys é somente acréscimo'); END;
+CREATE TRIGGER IF NOT EXISTS audit_keys_no_delete BEFORE DELETE ON audit_keys
+BEGIN SELECT RAISE(ABORT, 'audit_keys é somente acréscimo'); END;
+"""
+
+
+def now_ms():
+    return time.time_ns() // 1_000_000
+
+
+def changes(old, report_data, answers):
+    """Eventos (tipo, item, antes, depois) entre a versão salva (`old`, ou None) e a nova."""
+    events = []
+    old_answers = old["answers"] if old else {}
+    for q in list(answers) + [q for q in old_answers if q not in answers]:
+        if old_answers.get(q) != answers.get(q):
+            events.append((ANSWER, q, old_answers.get(q), answers.get(q)))
+
+    old_report = old["report_data"] if old else {}
+    old_domains = old_report.get("domains", {})
+    for name, result in report_data.get("domains", {}).items():
+        before = old_domains.get(name, {}).get("risk")
+        if before != result.get("risk"):
+            events.append((RISK, name, before, result.get("risk")))
+    if old_report.get("algo_risk") != report_data.get("algo_risk"):
+        events.append((RISK, OVERALL, old_report.get("algo_risk"), report_data.get("algo_risk")))
+    for field in ("manual_risk", "manual_justification"):
+        before, after = old_report.get(field) or "", report_data.get(field) or ""
+        if before != after:
+            events.append((MANUAL, field, before, after))
+    return events
+
+
+# --- FORMATO DO LOTE ---
+def encode(events):
+    """Lote de eventos (Event) em bytes: colunas de inteiros + tabela de strings, com zlib."""
+    strings = {}
+
+    def index(value):
+        if value is None:
+            return _NONE
+        return strings.setdefault(str(value), len(strings))
+
+    ts = array.array("q", (e.ts for e in events))
+    keys = array.array("I", (index("\x1f".join((e.study_id, e.outcome, e.reviewer))) for e in events))
+    kinds = array.array("B", (e.kind for e in events))
+    items = array.array("I", (index(e.item) for e in events))
+    old = array.array("I", (index(e.old) for e in events))
+    new = array.array("I", (index(e.new) for e in events))
+    table = b"".join(struct.pack("<I", len(b)) + b for b in (s.encode("utf-8") for s in strings))
+    body = b"".join(col.tobytes() for col in (ts, keys, kinds, items, old, new))
+    return zlib.compress(_HEADER.pack(_MAGIC, len(events), len(strings)) + body + table)
+
+
+def decode(data, key=None):
+    """Eventos de um lote; com `key` (estudo, desfecho, revisor), só os dessa avaliação."""
+    raw = zlib.decompress(data)
+    magic, n, n_strings = _HEADER.unpack_from(raw)
+    if magic != _MAGIC:
+        raise ValueError("Lote de auditoria em formato desconhecido.")
+    offset = _HEADER.size
+    columns = []
+    for typecode in ("q", "I", "B", "I", "I", "I"):
+        col = array.array(typecode)
+        size = col.itemsize * n
+        col.frombytes(raw[offset:offset + size])
+        offset += size
+        columns.append(col)
+    strings = []
+    for _ in range(n_strings):
+        (length,) = struct.unpack_from("<I", raw, offset)
+        offset += 4
+        strings.append(raw[offset:offset + length].decode("utf-8"))
+        offset += length
+
+    ts, keys, kinds, items, old, new = columns
+    wanted = None
+    if key is not None:
+        joined = "\x1f".join(key)
+        if joined not in strings:
+            return []
+        wanted = strings.index(joined)
+    value = lambda i: None if i == _NONE else strings[i]
+    return [
+        Event(ts[i], *strings[keys[i]].split("\x1f"), kinds[i], strings[items[i]], value(old[i]), value(new[i]))
+        for i in range(n) if wanted is None or keys[i] == wanted
+    ]
+
+
+def replay(events, until=None):
+    """Estado reconstruído a partir dos eventos (em ordem) até o instante `until` (ms)."""
+    state = {"answers": {}, "risks": {}, "manual": {}}
+    target = {ANSWER: state["answers"], RISK: state["risks"], MANUAL: state["manual"]}
+    for e in events:
+        if until is not None and e.ts > until:
+            break
+        if e.new is None:
+            target[e.kind].pop(e.item, None)
+        else:
+            target[e.kind][e.item] = e.new
+    return state
+
+
+class AuditLog:
+    """Buffer de eventos de um store, gravado em lotes na tabela audit_log."""
+
+    def __init__(self, conn, lock):
+        self._conn = conn
+        self._lock = lock  # o lock da conexão do store
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._atexit = False
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+            self._index_batches()
+
+    def _index_batches(self):
+        # Migração: indexa os lotes gravados antes de existir audit_keys (cada
+        # lote novo é indexado na mesma transação em que é gravado)
+        rows = self._conn.execute(
+            "SELECT id, data FROM audit_log WHERE id > (SELECT COALESCE(MAX(batch_id), 0) FROM audit_keys) ORDER BY id"
+        ).fetchall()
+        for batch_id, data in rows:
+            self._insert_keys(batch_id, decode(data))
+
+    def _insert_keys(self, batch_id, events):
+        keys = {(e.study_id, e.outcome, e.reviewer) for e in events}
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO audit_keys (study_id, outcome, reviewer, batch_id) VALUES (?, ?, ?, ?)",
+            [(*key, batch_id) for key in sorted(keys)],
+        )
+
+    def record(self, study_id, outcome, reviewer, events, ts=None):
+        """Acrescenta eventos (tipo, item, antes, depois) ao buffer; não faz I/O."""
+        if not events:
+            return
+        ts = now_ms() if ts is None else ts
+        with self._buffer_lock:
+            self._buffer.extend(Event(ts, study_id, outcome, reviewer, *e) for e in events)
+            size = len(self._buffer)
+            if not self._stop.is_set() and (self._thread is None or not self._thread.is_alive()):
+                self._thread = threading.Thread(target=self._run, name="audit-flush", daemon=True)
+                self._thread.start()
+                if not self._atexit:
+                    atexit.register(self.flush)
+                    self._atexit = True
+        if size >= FLUSH_EVENTS:
+            self._wake.set()
+
+    def _run(self):
+        delay = FLUSH_INTERVAL
+        while not self._stop.is_set():
+            self._wake.wait(delay)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.flush()
+                delay = FLUSH_INTERVAL
+            except sqlite3.ProgrammingError:
+                # Conexão fechada: os eventos continuam no buffer
+                return
+            except Exception:
+                # Ex.: "database is locked"; os eventos voltaram ao buffer e a
+                # próxima tentativa espera o dobro
+                delay = min(delay * 2, FLUSH_MAX_BACKOFF)
+
+    def close(self):
+        """Para a thread de gravação e grava o que restou no buffer."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def flush(self):
+        """Grava o buffer como um lote; retorna quantos eventos foram gravados."""
+        with self._buffer_lock:
+            events, self._buffer = self._buffer, []
+        if not events:
+            return 0
+        try:
+            with self._lock, self._conn:
+                cursor = self._conn.execute(
+                    "INSERT INTO audit_log (first_ts, last_ts, events, data) VALUES (?, ?, ?, ?)",
+                    (events[0].ts, events[-1].ts, len(events), encode(events)),
+                )
+                self._insert_keys(cursor.lastrowid, events)
+        except Exception:
+            with self._buffer_lock:
+                self._buffer[:0] = events
+            raise
+        return len(events)
+
+    def history(self, study_id, outcome="", reviewer="", until=None):
+        """Eventos de uma avaliação em ordem cronológica (até `until`, em ms)."""
+        self.flush()
+        key = (str(study_id or ""), str(outcome or ""), str(reviewer or ""))
+        # Só os lotes que contêm eventos da avaliação (índice audit_keys)
+        sql = (
+            "SELECT data FROM audit_log WHERE id IN (SELECT batch_id FROM audit_keys "
+            "WHERE study_id = ? AND outcome = ? AND reviewer = ?)"
+        )
+        params = list(key)
+        if until is not None:
+            sql += " AND first_ts <= ?"
+            params.append(int(until))
+        with self._lock:
+            batches = [row[0] for row in self._conn.execute(sql + " ORDER BY id", params)]
+        # Processos diferentes gravam lotes intercalados: a ordem vale pelo ts
+        # (sorted é estável, então a ordem dentro de um lote é mantida)
+        events = sorted((e for data in batches for e in decode(data, key)), key=lambda e: e.ts)
+        if until is not None:
+            events = [e for e in events if e.ts <= until]
+        return events
+
+    def state_at(self, study_id, outcome="", reviewer="", until=None):
+        """Respostas, riscos e decisão do pesquisador no instante `until` (ms; None = agora)."""
+        return replay(self.history(study_id, outcome, reviewer, until))
+
+
+def format_ts(ts):
+    return datetime.datetime.fromtimestamp(ts / 1000, datetime.timezone.utc).isoformat(timespec="seconds")
+
+
+def main(argv=None):
+    from store import default_store
+
+    parser = argparse.ArgumentParser(description="Histórico de alterações de uma avaliação ROBINS-I.")
+    parser.add_argument("study_id")
+    parser.add_argument("outcome", nargs="?", default="")
+    parser.add_argument("--reviewer", default="")
+    args = parser.parse_args(argv)
+
+    events = default_store().audit.history(args.study_id, args.outcome, args.reviewer)
+    if not events:
+        print("Nenhuma alteração registrada.", file=sys.stderr)
+        return 1
+    for e in events:
+        print(f"{format_ts(e.ts)}  {KIND_NAMES[e.kind]:11} {e.item:20} {e.old or '—'} -> {e.new or '—'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""Pontuação em lote de avaliações ROBINS-I V2 (CSV ou Excel).
+
+Cada linha da planilha é um par estudo/desfecho com as respostas da triagem
+(b1-b3), o contexto da análise (c4) e as colunas q1_1 ... q6_4. As linhas são
+lidas e escritas uma a uma, então a memória usada não depende do tamanho da
+revisão.
+
+Uso:
+    python batch.py avaliacoes.csv -o resultados.csv
+    python batch.py avaliacoes.xlsx -o resultados.xlsx
+"""
+import argparse
+import csv
+import io
+import re
+import sys
+import time
+
+from decision_table import score_normalized
+from engine import (
+    CRITICAL, DOMAINS, SELECT, TRIAGE_OPTIONS, RiskTally,
+    normalize_answers, question_ids, question_options,
+    triage_blocks, visible_questions,
+)
+
+ID_COLUMNS = ["study_id", "outcome", "numeric_result"]
+TRIAGE_COLUMNS = ["b1", "b2", "b3", "c4"]
+
+
+def column_name(qid):
+    return "q" + qid.replace(".", "_")
+
+
+# Todas as perguntas das duas variantes, na ordem do formulário
+QUESTION_IDS = list(dict.fromkeys(
+    qid for d in DOMAINS for v in ("A", "B") for qid in question_ids(d, v)
+))
+ANSWER_COLUMNS = [column_name(qid) for qid in QUESTION_IDS]
+INPUT_COLUMNS = ID_COLUMNS + TRIAGE_COLUMNS + ANSWER_COLUMNS
+
+RESULT_COLUMNS = ["study_id", "outcome", "numeric_result", "variant"]
+for _d in DOMAINS:
+    RESULT_COLUMNS += [f"{_d.lower()}_risk", f"{_d.lower()}_reason"]
+RESULT_COLUMNS += ["algo_risk", "errors"]
+
+# Aceita "q1_1", "Q1.1", "1.1" ou "1_1" como cabeçalho de pergunta
+_QUESTION_HEADER = re.compile(r"^q?(\d)[._](\d+)$")
+
+
+def canonical_header(name):
+    h = str(name or "").strip().lower()
+    m = _QUESTION_HEADER.match(h)
+    return f"q{m.group(1)}_{m.group(2)}" if m else h
+
+
+def parse_variant(value):
+    """Converte o C4 da planilha em "A" (ITT) ou "B" (per-protocol)."""
+    v = str(value or "").strip().upper()
+    if v in ("A", "N", "NÃO", "NAO", "ITT") or v.startswith(("NÃO", "NAO")):
+        return "A"
+    if v in ("B", "Y", "S", "SIM", "PP") or v.startswith("SIM"):
+        return "B"
+    return None
+
+
+def _cell(row, col):
+    value = row.get(col)
+    return "" if value is None else str(value).strip()
+
+
+def _code(value):
+    return "" if value == SELECT else value.upper()
+
+
+def score_row(row):
+    """Pontua uma linha da planilha e devolve a linha de resultado."""
+    result, errors = score_row_errors(row)
+    result["errors"] = "; ".join(errors)
+    return result
+
+
+def score_row_errors(row):
+    """Como score_row, mas devolve (resultado, lista de erros) sem a coluna "errors"."""
+    errors = []
+    result = {col: _cell(row, col) for col in ID_COLUMNS}
+
+    variant = parse_variant(_cell(row, "c4"))
+    if variant is None:
+        errors.append(f"c4: valor inválido '{_cell(row, 'c4')}' (use A/Não ou B/Sim)")
+    result["variant"] = variant or ""
+
+    triage = {}
+    for col in ("b1", "b2", "b3"):
+        value = _code(_cell(row, col))
+        if value and value not in TRIAGE_OPTIONS[col.upper()]:
+            errors.append(f"{col}: valor inválido '{value}'")
+        triage[col] = value
+
+    if triage_blocks(triage["b2"], triage["b3"]):
+        # Mesmo comportamento da interface: a avaliação para na triagem
+        result["algo_risk"] = CRITICAL
+        errors.append("Triagem: risco crítico em B2/B3, domínios não avaliados")
+        return result, errors
+
+    if variant is None:
+        return result, errors
+
+    raw = {qid: _code(_cell(row, column_name(qid))) for qid in QUESTION_IDS}
+    tally = RiskTally()
+    for domain in DOMAINS:
+        _score_domain(result, tally, domain, variant, raw, errors)
+
+    result["algo_risk"] = tally.overall
+    return result, errors
+
+
+def _score_domain(result, tally, domain, variant, raw, errors):
+    answers = normalize_answers(domain, variant, raw)
+    options = question_options(domain, variant)
+    for qid in visible_questions(domain, variant, answers):
+        value = answers[qid]
+        if value != SELECT and value not in options[qid]:
+            errors.append(f"{column_name(qid)}: valor inválido '{value}'")
+            answers[qid] = SELECT
+    risk, reason = score_normalized(domain, variant, answers)
+    result[f"{domain.lower()}_risk"] = risk
+    result[f"{domain.lower()}_reason"] = reason
+    tally.set(domain, risk)
+
+
+def rescore_domain(result, domain, answers, tally=None):
+    """Repontua um único domínio de uma linha já pontuada (ex.: após edição do revisor).
+
+    `answers` mapeia "1.1", "4.10", ... às respostas do domínio. Passe o mesmo
+    `tally` entre edições da mesma linha para não recontar os demais domínios.
+    Retorna o RiskTally atualizado; `result` recebe o novo risco global.
+    """
+    if not result.get("variant") or "d1_risk" not in result:
+        raise ValueError("Linha sem domínios pontuados (C4 inválido ou parada na triagem).")
+    if tally is None:
+        tally = RiskTally({d: result[f"{d.lower()}_risk"] for d in DOMAINS})
+    errors = []
+    raw = {qid: _code(str(value or "").strip()) for qid, value in answers.items()}
+    _score_domain(result, tally, domain, result["variant"], raw, errors)
+    result["algo_risk"] = tally.overall
+    if errors:
+        result["errors"] = "; ".join(filter(None, [result.get("errors"), *errors]))
+    return tally
+
+
+# --- LEITURA ---
+def _csv_rows(stream):
+    owned = not hasattr(stream, "read")
+    if owned:
+        stream = open(stream, "rb")
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        sample = text.read(8192)
+        text.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(text, dialect)
+        header = [canonical_header(h) for h in next(reader, [])]
+        for values in reader:
+            if any(values):
+                yield dict(zip(header, values))
+    finally:
+        text.detach()
+        if owned:
+            stream.close()
+
+
+def _xlsx_rows(stream):
+    try:
+        from openpyxl import load_workbook
+    except ImportError as e:
+        raise RuntimeError("Leitura de Excel requer o pacote 'openpyxl'.") from e
+
+    wb = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [canonical_header(h) for h in next(rows, ())]
+        for values in rows:
+            if any(v not in (None, "") for v in values):
+                yield dict(zip(header, values))
+    finally:
+        wb.close()
+
+
+def read_rows(source, fmt=None):
+    """Itera as linhas de um arquivo CSV/XLSX (caminho ou arquivo binário)."""
+    name = str(getattr(source, "name", source))
+    fmt = fmt or ("xlsx" if name.lower().endswith((".xlsx", ".xlsm")) else "csv")
+    return _xlsx_rows(source) if fmt == "xlsx" else _csv_rows(source)
+
+
+def score_rows(rows):
+    for row in rows:
+        yield score_row(row)
+
+
+# --- ESCRITA ---
+def write_csv(results, out):
+    """Escreve os resultados em `out` (texto) à medida que são gerados."""
+    writer = csv.DictWriter(out, fieldnames=RESULT_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    count = 0
+    for result in results:
+        writer.writerow(result)
+        count += 1
+    return count
+
+
+def write_xlsx(results, path):
+    try:
+        from openpyxl import Workbook
+    except ImportError as e:
+        raise RuntimeError("Escrita de Excel requer o pacote 'openpyxl'.") from e
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("ROBINS-I")
+    ws.append(RESULT_COLUMNS)
+    count = 0
+    for result in results:
+        ws.append([result.get(col, "") for col in RESULT_COLUMNS])
+        count += 1
+    wb.save(path)
+    return count
+
+
+def template_csv():
+    """Cabeçalho modelo para preenchimento da planilha de entrada."""
+    return ",".join(INPUT_COLUMNS) + "\r\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pontuação ROBINS-I V2 em lote (CSV/Excel).")
+    parser.add_argument("input", help="Planilha de entrada (.csv ou .xlsx)")
+    parser.add_argument("-o", "--output", default="-", help="Arquivo de saída (.csv ou .xlsx); padrão: stdout")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = score_rows(read_rows(args.input))
+    if args.output.lower().endswith(".xlsx"):
+        count = write_xlsx(results, args.output)
+    elif args.output == "-":
+        count = write_csv(results, sys.stdout)
+    else:
+        with open(args.output, "w", encoding="utf-8-sig", newline="") as out:
+            count = write_csv(results, out)
+    elapsed = time.perf_counter() - start
+    print(f"{count} linhas pontuadas em {elapsed:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
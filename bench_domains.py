@@ -0,0 +1,261 @@
+"""Verificação exaustiva e benchmark dos algoritmos dos domínios.
+
+Enumera todas as combinações de respostas alcançáveis pelo formulário em cada
+domínio (e variante, no Domínio 1) e registra:
+
+- quantas combinações caem em cada resultado (ramo) e nos fallbacks do
+  Domínio 4 ("Combinação de respostas não mapeada") e do Domínio 6;
+- se os atalhos ("ATALHO") do Domínio 1 concordam com o cálculo detalhado;
+- linhas dos algoritmos nunca executadas;
+- equivalência entre as tabelas de decisão e a implementação de referência;
+- tempo por avaliação de cada domínio.
+
+O resultado é uma matriz de cobertura em JSON, que pode ser comparada com uma
+execução anterior para detectar mudanças de comportamento ou de desempenho:
+
+    python bench_domains.py -o cobertura.json
+    python bench_domains.py --baseline cobertura.json
+    python bench_domains.py --input avaliacoes.csv   # frequências em dados reais
+"""
+import argparse
+import datetime
+import inspect
+import json
+import platform
+import sys
+import time
+import timeit
+from collections import Counter
+
+import decision_table
+import engine
+from engine import DOMAINS, PENDING, RISK_LEVELS
+
+FALLBACKS = {"D4": engine.D4_FALLBACK_REASON, "D6": engine.D6_FALLBACK_REASON}
+
+# Funções que implementam cada domínio (para a cobertura de linhas)
+FUNCTIONS = {
+    ("D1", "A"): [engine._d1_a_shortcut, engine._d1_a_detailed, engine.score_d1],
+    ("D1", "B"): [engine._d1_b_shortcut, engine._d1_b_detailed, engine.score_d1],
+    "D2": [engine.d2_entry_context, engine.score_d2],
+    "D3": [engine.d3_partial_risks, engine.score_d3],
+    "D4": [engine._d4_missing, engine._d4_analysis_type, engine._d4_ready, engine.score_d4],
+    "D5": [engine.score_d5],
+    "D6": [engine.score_d6],
+}
+
+
+def _label(key):
+    return f"{key[0]}{key[1]}" if isinstance(key, tuple) else key
+
+
+def _split(key):
+    return key if isinstance(key, tuple) else (key, "A")
+
+
+def _risk_level(risk):
+    return engine.LOW if risk == engine.D1_LOW else risk
+
+
+def _line_hits(key, states):
+    """Conta as linhas de engine.py executadas ao pontuar `states`."""
+    domain, variant = _split(key)
+    hits = Counter()
+    filename = engine.__file__
+
+    def local(frame, event, arg):
+        if event == "line":
+            hits[frame.f_lineno] += 1
+        return local
+
+    def tracer(frame, event, arg):
+        return local if frame.f_code.co_filename == filename else None
+
+    sys.settrace(tracer)
+    try:
+        for a in states:
+            engine.score_normalized(domain, variant, a)
+    finally:
+        sys.settrace(None)
+    return hits
+
+
+def _uncovered_lines(key, hits):
+    source = inspect.getsource(engine).splitlines()
+    missed = []
+    for func in FUNCTIONS[key]:
+        code = func.__code__
+        lines = {line for _, _, line in code.co_lines() if line and line != code.co_firstlineno}
+        for line in sorted(lines - set(hits)):
+            text = source[line - 1].strip()
+            if text and not text.startswith(("#", '"""')):
+                missed.append({"function": func.__name__, "line": line, "source": text})
+    return missed
+
+
+def _shortcut_agreement(key, states):
+    """Compara cada atalho do Domínio 1 com o cálculo detalhado."""
+    domain, variant = _split(key)
+    report = {}
+    for a in states:
+        shortcut = engine.d1_shortcut(variant, a)
+        if shortcut is None:
+            continue
+        detailed_risk, _ = engine.d1_detailed(variant, a)
+        entry = report.setdefault(shortcut[1], {
+            "risk": shortcut[0], "count": 0, "agree": 0, "early_exit": 0, "disagree": Counter(),
+        })
+        entry["count"] += 1
+        if detailed_risk == PENDING:
+            # Atalho decidiu antes de o cálculo detalhado ter respostas suficientes
+            entry["early_exit"] += 1
+        elif _risk_level(detailed_risk) == shortcut[0]:
+            entry["agree"] += 1
+        else:
+            entry["disagree"][_risk_level(detailed_risk)] += 1
+    return [{"reason": reason, **entry, "disagree": dict(entry["disagree"])} for reason, entry in report.items()]
+
+
+def _time_per_call(func, states, budget=0.2):
+    timer = timeit.Timer(lambda: [func(a) for a in states])
+    loops, elapsed = timer.autorange()
+    if elapsed < budget:
+        loops = max(1, int(loops * budget / elapsed))
+        elapsed = timer.timeit(loops)
+    return elapsed / (loops * len(states)) * 1e6
+
+
+def analyse(key):
+    domain, variant = _split(key)
+    start = time.perf_counter()
+    decision_table.rebuild()
+    table = decision_table.table(domain, variant)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    states = [table.unpack(idx) for idx in table.index]
+    outcomes = Counter(engine.score_normalized(domain, variant, a) for a in states)
+    total = len(states)
+
+    mismatches = sum(
+        1 for a in states
+        if decision_table.score_table(domain, variant, a) != engine.score_normalized(domain, variant, a)
+    )
+
+    risk_counts = Counter()
+    for (risk, _), count in outcomes.items():
+        risk_counts[_risk_level(risk)] += count
+
+    result = {
+        "states": total,
+        "risk_counts": {r: risk_counts.get(r, 0) for r in RISK_LEVELS + (PENDING,)},
+        "outcomes": [
+            {"risk": risk, "reason": reason, "count": count, "share": round(count / total, 6)}
+            for (risk, reason), count in sorted(outcomes.items(), key=lambda kv: (-kv[1], kv[0]))
+        ],
+        "uncovered_lines": _uncovered_lines(key, _line_hits(key, states)),
+        "table_mismatches": mismatches,
+        "timing": {
+            "reference_us": round(_time_per_call(lambda a: engine.score_normalized(domain, variant, a), states), 3),
+            "table_us": round(_time_per_call(lambda a: decision_table.score_table(domain, variant, a), states), 3),
+            "table_build_ms": round(build_ms, 1),
+        },
+    }
+
+    fallback = FALLBACKS.get(domain)
+    if fallback:
+        count = sum(c for (_, reason), c in outcomes.items() if reason == fallback)
+        result["fallback"] = {"reason": fallback, "count": count, "share": round(count / total, 6)}
+    if domain == "D1":
+        result["shortcuts"] = _shortcut_agreement(key, states)
+    return result
+
+
+def observed(path):
+    """Frequência de cada resultado numa planilha real (formato do batch.py)."""
+    import batch
+
+    counts = {_label(k): Counter() for k in FUNCTIONS}
+    for row in batch.read_rows(path):
+        variant = batch.parse_variant(batch._cell(row, "c4"))
+        if variant is None:
+            continue
+        raw = {qid: batch._code(batch._cell(row, batch.column_name(qid))) for qid in batch.QUESTION_IDS}
+        for domain in DOMAINS:
+            key = engine._key(domain, variant)
+            risk, reason = engine.score_domain(domain, variant, raw)
+            counts[_label(key)][f"{risk} | {reason}"] += 1
+    return {label: dict(c.most_common()) for label, c in counts.items() if c}
+
+
+def compare(baseline, current, max_slowdown):
+    """Lista mudanças de comportamento e de desempenho entre duas execuções."""
+    behaviour, speed = [], []
+    for label, cur in current["domains"].items():
+        old = baseline.get("domains", {}).get(label)
+        if old is None:
+            behaviour.append(f"{label}: domínio novo")
+            continue
+        old_out = {(o["risk"], o["reason"]): o["count"] for o in old["outcomes"]}
+        cur_out = {(o["risk"], o["reason"]): o["count"] for o in cur["outcomes"]}
+        for outcome in sorted(set(old_out) | set(cur_out)):
+            before, after = old_out.get(outcome, 0), cur_out.get(outcome, 0)
+            if before != after:
+                behaviour.append(f"{label}: {outcome[0]} '{outcome[1]}' {before} -> {after}")
+        for metric in ("reference_us", "table_us"):
+            before, after = old["timing"][metric], cur["timing"][metric]
+            if before and after / before > max_slowdown:
+                speed.append(f"{label}: {metric} {before:.2f} -> {after:.2f} µs ({after / before:.1f}x)")
+    return behaviour, speed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cobertura e benchmark dos algoritmos ROBINS-I.")
+    parser.add_argument("-o", "--output", default="-", help="Arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparação")
+    parser.add_argument("--max-slowdown", type=float, default=1.5,
+                        help="Razão de tempo acima da qual a comparação falha (padrão: 1.5)")
+    parser.add_argument("--input", help="Planilha real (CSV/XLSX do batch.py) para frequências observadas")
+    args = parser.parse_args(argv)
+
+    report = {
+        "generated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "domains": {},
+    }
+    for key in FUNCTIONS:
+        report["domains"][_label(key)] = analyse(key)
+        summary = report["domains"][_label(key)]
+        print(
+            f"{_label(key):4} {summary['states']:7d} combinações  "
+            f"ref {summary['timing']['reference_us']:6.2f} µs  tabela {summary['timing']['table_us']:6.2f} µs  "
+            f"linhas não cobertas: {len(summary['uncovered_lines'])}",
+            file=sys.stderr,
+        )
+    if args.input:
+        report["observed"] = observed(args.input)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    status = 0
+    if any(d["table_mismatches"] for d in report["domains"].values()):
+        print("ERRO: tabela de decisão diverge da referência.", file=sys.stderr)
+        status = 1
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            behaviour, speed = compare(json.load(f), report, args.max_slowdown)
+        for line in behaviour:
+            print(f"COMPORTAMENTO {line}", file=sys.stderr)
+        for line in speed:
+            print(f"DESEMPENHO {line}", file=sys.stderr)
+        if behaviour or speed:
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""Exportação em lote das avaliações salvas (store.py).
+
+Formatos, escolhidos pela extensão do arquivo de saída:
+
+- .docx: um único Word com a tabela-resumo e um capítulo por estudo;
+- .pdf: o mesmo conteúdo num único PDF;
+- .zip: um .docx e um .pdf por estudo;
+- .parquet / .arrow: uma tabela colunar para meta-análise (ver columnar.py).
+
+As avaliações são lidas do banco uma de cada vez e o resultado é escrito
+direto no arquivo de destino. No ZIP cada relatório é gerado, gravado e
+descartado, então a memória não cresce com o número de estudos; o PDF
+consolidado é gravado página a página (pdfstream.py) e no Word só a
+estrutura do próprio documento fica em memória (nenhum BytesIO por estudo).
+
+Uso:
+    python bulk_export.py -o revisao.zip
+    python bulk_export.py -o revisao.pdf --reviewer AB --risk SERIOUS
+    python bulk_export.py -o revisao.parquet
+"""
+import argparse
+import re
+import sys
+import time
+import zipfile
+
+from docx.enum.text import WD_BREAK
+
+import columnar
+from reports import ReportPDF, generate_docx, generate_pdf, new_docx, write_docx_study, write_pdf_study
+
+FORMATS = ("docx", "pdf", "zip", "parquet", "arrow")
+
+SUMMARY_HEADERS = ["Estudo", "Desfecho", "Revisor", "Algoritmo", "Decisão Final"]
+SUMMARY_FIELDS = ["study_id", "outcome", "reviewer", "algo_risk", "manual_risk"]
+# Larguras (mm) das colunas da tabela-resumo no PDF
+PDF_WIDTHS = [50, 45, 25, 35, 35]
+
+
+def _safe_name(text):
+    return re.sub(r"[^\w.-]+", "_", str(text), flags=re.UNICODE).strip("_") or "estudo"
+
+
+def export_docx(summaries, records, path):
+    doc = new_docx()
+    doc.add_heading("Relatório ROBINS-I V2: Resumo da Revisão", 0)
+    doc.add_paragraph(f"{len(summaries)} avaliações.")
+
+    table = doc.add_table(rows=1, cols=len(SUMMARY_HEADERS))
+    table.style = "Table Grid"
+    for cell, header in zip(table.rows[0].cells, SUMMARY_HEADERS):
+        cell.text = header
+        cell.paragraphs[0].runs[0].bold = True
+    for summary in summaries:
+        for cell, field in zip(table.add_row().cells, SUMMARY_FIELDS):
+            cell.text = str(summary[field])
+
+    count = 0
+    for record in records:
+        doc.add_paragraph().add_run().add_break(WD_BREAK.PAGE)
+        write_docx_study(doc, record["report_data"])
+        count += 1
+    doc.save(path)
+    return count
+
+
+def export_pdf(summaries, records, path):
+    # Páginas gravadas em `path` à medida que são montadas
+    pdf = ReportPDF(path)
+    pdf.title_text = "Relatório ROBINS-I V2: Resumo da Revisão"
+    pdf.add_page()
+
+    pdf.set_font("Arial", 'B', 10)
+    for header, width in zip(SUMMARY_HEADERS, PDF_WIDTHS):
+        pdf.cell(width, 8, header, 1, 0)
+    pdf.ln()
+    pdf.set_font("Arial", '', 9)
+    for summary in summaries:
+        for field, width in zip(SUMMARY_FIELDS, PDF_WIDTHS):
+            # Corta o texto para caber na célula
+            text = str(summary[field])
+            while text and pdf.get_string_width(text) > width - 2:
+                text = text[:-1]
+            pdf.cell(width, 7, text, 1, 0)
+        pdf.ln()
+
+    count = 0
+    for record in records:
+        write_pdf_study(pdf, record["report_data"])
+        count += 1
+    pdf.close()
+    return count
+
+
+def export_zip(summaries, records, path):
+    used = set()
+    count = 0
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for record in records:
+            name = _safe_name(f"{record['study_id']}_{record['outcome']}_{record['reviewer']}")
+            if name in used:
+                name = f"{name}_{record['id']}"
+            used.add(name)
+            data = record["report_data"]
+            # O .docx já é um zip comprimido: guardado sem recomprimir
+            zf.writestr(f"{name}.docx", generate_docx(data).getvalue(), zipfile.ZIP_STORED)
+            with zf.open(f"{name}.pdf", "w") as f:
+                generate_pdf(data, f)
+            count += 1
+    return count
+
+
+def export_parquet(summaries, records, path):
+    return columnar.write_parquet(records, path)
+
+
+def export_arrow(summaries, records, path):
+    return columnar.write_arrow(records, path)
+
+
+EXPORTERS = {
+    "docx": export_docx, "pdf": export_pdf, "zip": export_zip,
+    "parquet": export_parquet, "arrow": export_arrow,
+}
+
+
+def export(store, ids, path, fmt=None):
+    """Exporta as avaliações `ids` do `store` para `path`; retorna quantas foram escritas."""
+    fmt = fmt or path.rsplit(".", 1)[-1].lower()
+    if fmt not in EXPORTERS:
+        raise ValueError(f"Formato não suportado: {fmt} (use {', '.join(FORMATS)})")
+    # Resumo (leve) primeiro; os registros completos são lidos um a um
+    summaries = store.query(ids=ids)
+    return EXPORTERS[fmt](summaries, store.iter_records(s["id"] for s in summaries), path)
+
+
+def main(argv=None):
+    from store import DEFAULT_PATH, AssessmentStore
+
+    parser = argparse.ArgumentParser(description="Exportação em lote das avaliações ROBINS-I salvas.")
+    parser.add_argument("-o", "--output", required=True, help="Arquivo de saída (.docx, .pdf, .zip, .parquet ou .arrow)")
+    parser.add_argument("--db", default=DEFAULT_PATH, help="Banco SQLite das avaliações")
+    parser.add_argument("--study", help="Filtra por estudo")
+    parser.add_argument("--outcome", help="Filtra por desfecho")
+    parser.add_argument("--reviewer", help="Filtra por revisor")
+    parser.add_argument("--risk", help="Filtra pelo risco final (LOW, MODERATE, SERIOUS, CRITICAL)")
+    args = parser.parse_args(argv)
+
+    store = AssessmentStore(args.db)
+    ids = [r["id"] for r in store.query(args.study, args.outcome, args.reviewer, args.risk)]
+    start = time.perf_counter()
+    count = export(store, ids, args.output)
+    print(f"{count} avaliações exportadas em {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+"""Catálogo das perguntas do formulário: enunciado, opções e texto de ajuda.
+
+Os textos ficam aqui uma única vez (a ajuda da 4.11, repetida em três ramos
+do Domínio 4, e os trechos comuns da 4.1-4.3 são compartilhados); as opções
+vêm de engine.OPTIONS. load() monta uma estrutura imutável, que o app.py
+guarda com st.cache_resource: os reruns reaproveitam as mesmas strings em vez
+de recriar os literais a cada execução.
+
+    catalog = load()
+    catalog[key("1.1", "A")].label
+"""
+import collections
+from types import MappingProxyType
+
+from engine import OPTIONS, SELECT, TRIAGE_OPTIONS
+
+Question = collections.namedtuple("Question", "qid variant label options help")
+
+
+def key(qid, variant=None):
+    """Chave de uma pergunta no catálogo; a variante só distingue o Domínio 1."""
+    return (qid, variant if qid.startswith("1.") else None)
+
+
+# --- TEXTOS DE AJUDA ---
+HELP_1_1_A = """
+CONTEXTO: Fatores da avaliação preliminar.
+- Y / PY: Todos fatores importantes foram controlados adequadamente.
+- WN (Não, não substancial): A maioria foi controlada. Viés residual provável é pequeno.
+- SN (Não, substancial): Fator importante NÃO controlado com provável impacto no resultado.
+"""
+
+HELP_1_4_A = """
+CONTEXTO: Controles Negativos.
+- Y / PY (Alerta): Controle negativo mostrou associação (viés).
+- N / PN (Neutro): Sem problemas detectados.
+- NA: Não foram usados controles negativos.
+"""
+
+HELP_1_2_A = """
+CONTEXTO: Validade das medidas usadas.
+- Y / PY: Medidas válidas/confiáveis usadas.
+- WN / SN: Medidas com problemas de validade ou confiabilidade.
+- NA: Se não havia fatores de confusão.
+"""
+
+HELP_1_3_A = """
+CONTEXTO: Ajuste Excessivo (Over-adjustment).
+- Y / PY (Risco): Controlaram mediadores ou colisores.
+- N / PN (Ideal): Não controlaram variáveis indevidas.
+"""
+
+HELP_1_1_B = """
+Métodos apropriados para controlar fatores de confusão variáveis no tempo ('métodos g') incluem aqueles baseados na ponderação por probabilidade inversa. 
+Modelos de regressão padrão que incluem fatores de confusão variáveis no tempo podem ser problemáticos quando esses fatores são afetados por intervenções anteriores.
+"""
+
+HELP_1_5_B = """
+A utilização de um "controle negativo" pode sugerir fatores de confusão não controlados.
+- N: Não houve sinal de viés (ou não foi feito).
+- Y/PY: Controles negativos indicaram viés.
+"""
+
+HELP_1_2_B = """
+- Y/PY: Todos fatores importantes (basais e variáveis no tempo) controlados.
+- WN: Maioria controlada, viés residual provável é pequeno.
+- SN: Fator importante não controlado.
+"""
+
+HELP_1_3_B = """Se a validade/confiabilidade não for citada, avalie a subjetividade."""
+
+HELP_1_4_B = """
+Verificação de Viés de Colisor.
+- Y/PY: Controlaram variáveis pós-intervenção em método padrão (CRÍTICO).
+- N/PN: Não controlaram (Sério, mas evita colisor).
+"""
+
+HELP_2_1 = """
+No ensaio alvo, o acompanhamento começa na elegibilidade. Em estudos não randomizados, algumas estratégias não são distinguíveis no início (ex: "operar em 6 meses" vs "esperar"). 
+Classificar participantes baseando-se em eventos futuros gera "viés de tempo imortal".
+"""
+
+HELP_2_2 = """
+Se o período de indistinção for curto em relação ao acompanhamento total, poucos eventos ocorrerão nele, limitando o risco de viés.
+"""
+
+HELP_2_3 = """
+Métodos estatísticos avançados (ponderação por censura clonal, g-formula) podem corrigir problemas de estratégias indistinguíveis.
+- SY: Sim, totalmente.
+- WY: Sim, parcialmente.
+"""
+
+HELP_2_4 = """
+A classificação da intervenção foi influenciada pelo conhecimento do desfecho?
+(Comum em estudos retrospectivos onde o avaliador sabe quem morreu/sobreviveu ao classificar o tratamento).
+- SY: Sim, totalmente (Risco Alto).
+- WY: Sim, parcialmente.
+"""
+
+HELP_2_5 = """
+Houve erros na classificação do status da intervenção?
+(Critérios ambíguos ou registros incompletos. Se o erro for aleatório, tende a viés para o nulo).
+"""
+
+HELP_3_1 = """
+O acompanhamento coincidiu com o início da intervenção?
+- Y/PY: Sim (Ideal).
+- WN: Não, lacuna irrelevante.
+- SY: Início muito tardio (Risco Sério).
+"""
+
+HELP_3_2 = """
+Eventos precoces foram excluídos?
+- N/PN: Não (Bom).
+- Y/PY: Sim (Risco Moderado).
+"""
+
+HELP_3_3 = """
+A inclusão foi baseada em características medidas APÓS o início da intervenção?
+- N/PN: Não (Ideal).
+- Y/PY: Sim (Potencial Viés).
+"""
+
+HELP_3_4 = """
+Essas características estão associadas à intervenção?
+- N/PN: Não (Risco Baixo).
+- Y/PY: Sim.
+- NI: Sem informação (Risco Moderado).
+"""
+
+HELP_3_5 = """
+Essas variáveis são influenciadas pelo desfecho?
+- Y/PY: Sim (Risco Sério).
+- N/PN/NI: Não ou Sem Info (Risco Moderado).
+"""
+
+HELP_3_6 = """A análise usou métodos (ex: IPW, ajuste) para corrigir o viés de seleção?"""
+
+HELP_3_7 = """Se Sim (Y/PY), o risco cai para Moderado."""
+
+HELP_3_8 = """Se Sim (Y/PY), o risco se torna CRÍTICO."""
+
+# 4.1, 4.2 e 4.3 compartilham quase todo o texto: cada trecho existe uma vez
+_D4_NEARLY_ALL = "A expressão “quase todos” deve ser interpretada como significando que o número de participantes excluídos da análise devido à falta de dados é tão pequeno que eles não teriam feito nenhuma diferença importante no efeito estimado da intervenção."
+_D4_CONTINUOUS = "Para desfechos contínuos, dados completos de 95% (ou possivelmente 90%) dos participantes geralmente seriam suficientes. Para desfechos dicotômicos, a proporção necessária está diretamente ligada ao risco do evento de desfecho. Se o número observado de eventos de desfecho for muito maior do que o número de participantes com dados faltantes, o viés será necessariamente pequeno."
+_D4_NI = 'Responda "NI" somente se o relatório do estudo não fornecer informações sobre a extensão dos dados faltantes. Essa situação geralmente leva à conclusão de que há um alto risco de viés devido à falta de dados.'
+_D4_IMPUTED = "Note que esta questão se refere a dados efetivamente registrados no estudo. Dados imputados{} devem ser considerados dados faltantes no contexto desta questão."
+
+HELP_4_1 = "\n    ".join([_D4_NEARLY_ALL, _D4_NI, _D4_IMPUTED.format(" (ver questão 4.7)")])
+HELP_4_2 = "\n    ".join([_D4_NEARLY_ALL, _D4_CONTINUOUS, _D4_NI, _D4_IMPUTED.format("")])
+HELP_4_3 = "\n    ".join([_D4_NEARLY_ALL, _D4_NI, _D4_IMPUTED.format("")])
+
+HELP_4_4 = """A forma como o risco de viés é avaliado depende de ter sido realizada uma análise de casos completos. Uma análise de casos completos é aquela que se restringe aos participantes com dados completos sobre todas as variáveis de intervenção, desfecho e fatores de confusão."""
+
+HELP_4_5 = """Esta questão visa identificar situações em que uma análise de "casos completos" estará sujeita a viés devido a dados faltantes. Uma análise de casos completos é aquela que inclui todos os participantes que fornecem dados completos para as variáveis envolvidas na análise.
+    Uma análise de casos completos pode ser enviesada se a ausência de dados (na intervenção, no desfecho ou nos fatores de confusão) estiver relacionada ao desfecho. Por exemplo, se for provável que participantes com problemas de saúde subjacentes tenham faltado a uma consulta na qual o status da intervenção na linha de base ou os fatores de confusão deveriam ter sido medidos, sua consequente exclusão da análise pode estar relacionada ao seu desfecho final.
+    Quatro razões para responder ' S ' ou ' PY ' são:
+    (1) Existem diferenças entre os grupos de intervenção ou grupos/níveis de fatores de confusão nas proporções de participantes excluídos da análise devido à falta de dados de desfecho. Para dados de tempo até o evento, a analogia é que as taxas de censura (perda de seguimento) dependem do grupo de intervenção.
+    (2) Existem diferenças entre os grupos/níveis de desfecho nas proporções de participantes excluídos da análise devido à falta de dados sobre intervenção/fatores de confusão.
+    (3) Os motivos relatados para a ausência de dados sobre os resultados fornecem evidências de que a falta de dados depende do resultado real ou de uma causa para o resultado;
+    (4) É razoável supor que as circunstâncias do estudo tornam provável que a ausência de dados no desfecho dependa do seu valor real. Por exemplo, se o desfecho for depressão grave, é provável que os participantes que apresentarem esse desfecho faltem a consultas nas quais ele teria sido registrado.
+    Responda ' N ' ou ' PN ' se houver dados faltantes, perda de seguimento ou desistência por motivos documentados e não relacionados ao desfecho, caso em que o risco de viés devido a dados faltantes será baixo."""
+
+HELP_4_6 = """Se todas as variáveis que plausivelmente explicam a relação entre o desfecho e a ausência de dados (na intervenção, nos fatores de confusão ou no próprio desfecho) forem incluídas na análise de casos completos, o risco de viés será baixo. Por exemplo, em uma regressão da pressão arterial aos 55 anos (desfecho) sobre a redução da ingestão de sal (intervenção), ajustada para os fatores de confusão sexo, nível de escolaridade e pressão arterial medida aos 25 anos, se as mulheres tivessem maior probabilidade de ter a pressão arterial medida aos 25 anos e se o sexo fosse a única variável plausivelmente relacionada à ausência de dados, isso não causaria viés, pois o sexo já está ajustado no modelo de análise. Portanto, a pressão arterial aos 55 anos não está relacionada à ausência de dados na pressão arterial aos 25 anos, após o ajuste para o sexo.
+    Nota técnica: Se um mediador (uma variável na via causal da intervenção ao desfecho) afetar a ausência de dados, o ajuste para essa variável seria apropriado para evitar viés devido a dados faltantes em uma análise de casos completos, mas alteraria o efeito da intervenção estimado. Na presença de tais variáveis, a imputação múltipla (ver questão 4.7) deve ser usada para lidar com o viés devido a dados faltantes. O ajuste para um mediador aumentará o risco de viés devido a fatores de confusão (domínio 1)."""
+
+HELP_4_11 = """A evidência de que o resultado não foi enviesado por dados faltantes pode vir de:
+    (1) métodos de análise que não seriam tendenciosos sob relações plausíveis entre os valores ausentes e a probabilidade de que os dados estejam ausentes; ou
+    (2) Análises de sensibilidade mostram que os resultados sofrem poucas alterações sob uma série de suposições plausíveis sobre os valores ausentes.
+    Note que a imputação múltipla baseada apenas em informações sobre desfecho, intervenção e fatores de confusão não deve ser considerada suficiente para corrigir o viés devido a dados faltantes, portanto, a similaridade entre os resultados com e sem essa imputação não deve ser interpretada como garantia ao responder a esta questão. Da mesma forma, não se deve presumir que uma análise ponderada corrija o viés devido a dados faltantes sem uma análise mais aprofundada dos itens (1) e (2) acima, ou sem análises de sensibilidade."""
+
+HELP_4_7 = """A imputação de valores ausentes é o processo de atribuir valores estimados ou presumidos a esses valores para uso na análise principal.
+    Responda 'S' ou 'PP' se a análise foi baseada em imputação simples ou múltipla."""
+
+HELP_4_8 = """Em seu livro Análise estatística com dados faltantes (Wiley 2002), Little e Rubin propuseram categorizações comumente usadas para dados faltantes. Estas foram resumidas por Sterne et al (BMJ 2009; 338 : b2393) da seguinte forma:
+    Dados faltantes completamente ao acaso (MCAR): Não há diferenças sistemáticas entre os valores faltantes e os valores observados. Por exemplo, as medições da pressão arterial podem estar faltando devido à falha de um esfigmomanômetro automático.
+    Dados faltantes aleatoriamente (MAR): qualquer diferença sistemática entre os valores faltantes e os valores observados pode ser explicada por diferenças nos dados observados. Por exemplo, as medições de pressão arterial faltantes podem ser menores do que as medições realizadas, mas apenas porque pessoas mais jovens podem ter maior probabilidade de apresentar medições de pressão arterial faltantes.
+    Dados faltantes não aleatórios (MNAR): Mesmo após a consideração dos dados observados , diferenças sistemáticas permanecem entre os valores faltantes e os valores observados. Por exemplo, pessoas com pressão alta podem ter maior probabilidade de faltar a consultas médicas por terem dores de cabeça.
+    Análises baseadas em imputação múltipla podem evitar viés devido a dados faltantes, desde que as variáveis incompletas para as quais os dados são imputados sejam MAR ou MCAR, mas não se os dados forem MNAR.
+    Responda ' N ' ou ' PN ' se houver motivo para acreditar que os dados estão faltando de forma não aleatória (MNAR). Caso contrário, responda ' Y ' ou ' PY '."""
+
+HELP_4_9 = """Responda ' SN ' ou ' WN ' se forem utilizados métodos de imputação simples, como a última observação levada adiante ou a imputação da média. O grau de viés que isso provavelmente introduzirá dependerá da proporção de participantes com dados faltantes.
+    Responda ' S ' ou ' PP ' se a imputação múltipla foi usada e (i) todos os preditores de dados faltantes em qualquer variável foram incluídos nos modelos de imputação; e (ii) todas as variáveis no modelo usado para a análise principal foram incluídas nos modelos de imputação."""
+
+HELP_4_10 = """Esta questão de sinalização abrange situações em que a análise não foi uma análise de casos completos nem se baseou na imputação de valores ausentes. Exemplos de tais análises incluem ponderação por probabilidade inversa e máxima verossimilhança com informação completa. Se for utilizada ponderação, a sua validade depende da especificação correta do modelo de ponderação (ver Seaman e White, Stat Methods Med Res 2013; 22: 278-95).
+    Nessas situações, o avaliador do ROBINS-I (possivelmente em conjunto com um estatístico com conhecimento em métodos para lidar com dados faltantes) deve tentar determinar se a análise foi apropriada para corrigir quaisquer vieses."""
+
+HELP_5_1 = """Métodos comparáveis de mensuração de desfechos (coleta de dados) envolvem os mesmos métodos e limiares de mensuração, utilizados em momentos comparáveis. Diferenças entre os grupos de intervenção podem surgir devido ao " viés de detecção diagnóstica" no contexto da coleta passiva de dados de desfecho, ou se uma intervenção envolver visitas adicionais a um profissional de saúde, levando a oportunidades adicionais para a identificação de eventos de desfecho."""
+
+HELP_5_2 = """Responda ' N ' se os avaliadores de desfecho desconheciam o status da intervenção. Em outras situações, os avaliadores de desfecho podem desconhecer as intervenções recebidas pelos participantes, mesmo que não haja cegamento ativo por parte dos investigadores do estudo; a resposta a esta pergunta também seria ' N '. Em estudos em que os participantes relatam seus próprios desfechos, por exemplo, em um questionário, o avaliador de desfecho é o próprio participante do estudo. Em um estudo observacional, a resposta a esta pergunta geralmente será ' S ' quando os participantes relatam seus próprios desfechos."""
+
+HELP_5_3 = """O conhecimento da intervenção atribuída pode influenciar os resultados relatados pelos participantes (como o nível de dor), os resultados relatados pelos observadores que envolvem algum julgamento e os resultados das decisões do profissional responsável pela intervenção.
+    o conhecimento da intervenção atribuída influencie os resultados relatados pelos observadores que não envolvam julgamento, como, por exemplo, a mortalidade por todas as causas ou as medições laboratoriais dos níveis de substâncias no sangue.
+    As opções de resposta distinguem entre situações em que (i) o conhecimento do estado da intervenção poderia ter influenciado a avaliação do resultado, mas não há razão para acreditar que o tenha feito, e situações em que (ii) o conhecimento do estado da intervenção provavelmente influenciou a avaliação do resultado. Quando há fortes níveis de crença ou preferência por efeitos benéficos ou prejudiciais da intervenção, é mais provável que o resultado tenha sido influenciado pelo conhecimento da intervenção recebida. Exemplos que justificam a resposta ' SY ' podem incluir sintomas relatados por pacientes em estudos de homeopatia ou avaliações da recuperação da função por um fisioterapeuta."""
+
+HELP_6_1 = """Se as intenções pré-especificadas pelos pesquisadores estiverem disponíveis com detalhes suficientes, as medições e análises de desfecho planejadas poderão ser comparadas com aquelas apresentadas no(s) relatório(s) publicado(s). Para evitar a possibilidade de seleção do resultado relatado, a finalização das intenções da análise deve preceder a disponibilização dos dados de desfecho não cegados aos autores do estudo.
+    Esses planos de análise raramente são disponibilizados publicamente para estudos não randomizados, portanto é improvável que um estudo seja avaliado como tendo baixo risco de viés nesse domínio."""
+
+HELP_6_2 = """Um domínio de resultado específico (ou seja, um estado real ou ponto final de interesse) pode ser medido de múltiplas maneiras. Por exemplo, o domínio dor pode ser medido usando múltiplas escalas (como uma escala visual analógica e o Questionário de Dor de McGill), cada uma em múltiplos momentos (como 3, 6 e 12 semanas após o tratamento). Se múltiplas medições forem realizadas, mas apenas uma ou um subconjunto for relatado com base nos resultados (como significância estatística), há um alto risco de viés no resultado totalmente relatado.
+    Responda ' S ' ou ' PY ' se :
+    Há evidências claras (geralmente obtidas por meio da análise de um protocolo de estudo ou plano de análise estatística) de que um domínio foi mensurado de múltiplas maneiras, mas os dados de apenas uma ou um subconjunto dessas medidas são relatados integralmente (sem justificativa), e o resultado relatado integralmente provavelmente foi selecionado com base nesses resultados. A seleção com base nos resultados surge do desejo de que as descobertas sejam noticiáveis, suficientemente relevantes para merecerem publicação, ou para confirmar uma hipótese prévia. Por exemplo, analistas que têm uma ideia preconcebida, ou interesse pessoal em demonstrar, que uma intervenção é benéfica podem estar inclinados a relatar seletivamente medidas de desfecho que sejam favoráveis à intervenção.
+    Responda ' N ' ou ' PN ' se:
+    Há evidências claras (geralmente obtidas por meio da análise de um protocolo de estudo ou plano de análise estatística) de que todos os resultados relatados para o domínio de desfecho correspondem a todas as medidas de desfecho pretendidas.
+    ou
+    Só existe uma forma possível de medir o domínio de resultados (portanto, não há oportunidade de selecionar entre múltiplas medidas).
+    ou
+    As medições dos resultados são inconsistentes em diferentes relatórios sobre o mesmo estudo, mas os analistas apresentaram a razão para a inconsistência , que não está relacionada à natureza dos resultados.
+    Responda 'NI' se:
+    As intenções de análise não estão disponíveis, ou não foram relatadas com detalhes suficientes para permitir uma avaliação, e há mais de uma maneira pela qual o domínio de resultados poderia ter sido medido."""
+
+HELP_6_3 = """Devido às limitações do uso de dados de estudos não randomizados para análises de eficácia (necessidade de controlar fatores de confusão, quantidade substancial de dados faltantes, etc. ), os analistas podem implementar diferentes métodos analíticos para lidar com essas limitações. Exemplos incluem modelos não ajustados e ajustados; uso do valor final versus mudança em relação ao valor basal versus análise de covariância; exploração de diferentes maneiras de definir os grupos de intervenção e controle; transformações de variáveis; conversão de um desfecho em escala contínua para dados categóricos com diferentes pontos de corte; diferentes conjuntos de covariáveis para ajuste; e diferentes estratégias para lidar com dados faltantes. A aplicação de múltiplos métodos gera múltiplas estimativas de efeito para um domínio de desfecho específico. Se múltiplas estimativas forem geradas, mas apenas uma ou um subconjunto for relatado, há o risco de relato seletivo com base nos resultados (por exemplo, significância estatística).
+    Responda ' S ' ou ' PY ' se : 
+    Há evidências claras (geralmente obtidas por meio da análise de um protocolo de estudo ou plano de análise estatística) de que um domínio foi analisado de múltiplas maneiras, mas os dados de apenas uma ou um subconjunto dessas análises são relatados integralmente (sem justificativa), e o resultado relatado integralmente provavelmente foi selecionado com base nesses resultados. A seleção com base nos resultados surge do desejo de que as descobertas sejam noticiáveis, suficientemente relevantes para merecerem publicação, ou para confirmar uma hipótese prévia. Por exemplo, analistas que têm uma ideia preconcebida ou interesse pessoal em demonstrar que uma intervenção é benéfica podem estar inclinados a relatar seletivamente análises que sejam favoráveis à intervenção. Responda ' N ' ou ' PN ' se :
+    Há evidências claras (geralmente obtidas por meio da análise de um protocolo de estudo ou plano de análise estatística) de que todos os resultados relatados para o domínio de desfecho correspondem a todas as análises planejadas.
+    ou
+    Só existe uma forma possível de analisar o domínio de resultados (portanto, não há oportunidade de selecionar entre múltiplas análises).
+    ou
+    As análises são inconsistentes entre diferentes relatórios sobre o mesmo estudo, mas os analistas apresentaram uma justificativa para a inconsistência , que não está relacionada à natureza dos resultados.
+    Responda 'NI' se :
+    As intenções de análise não estão disponíveis, ou não foram relatadas com detalhes suficientes para permitir uma avaliação, e há mais de uma maneira pela qual o domínio de resultados poderia ter sido analisado."""
+
+HELP_6_4 = """Particularmente com grandes coortes frequentemente disponíveis em fontes de dados coletados rotineiramente, é possível gerar múltiplas estimativas de efeito para diferentes subgrupos ou simplesmente omitir proporções variáveis da coorte original. Se múltiplas estimativas forem geradas, mas apenas uma ou um subconjunto delas for relatado, existe o risco de relato seletivo com base nos resultados (por exemplo, significância estatística).
+    Responda ' S ' ou ' PY ' se :
+    Há evidências claras (geralmente obtidas por meio da análise do protocolo do estudo ou do plano de análise estatística) de que diferentes subgrupos foram analisados, mas os dados de apenas uma ou parte das análises são relatados integralmente (sem justificativa), e o resultado relatado integralmente provavelmente foi selecionado com base nesses resultados. A seleção com base nos resultados surge do desejo de que as descobertas sejam noticiáveis, suficientemente relevantes para merecerem publicação ou para confirmar uma hipótese prévia. Por exemplo, analistas que têm uma ideia preconcebida ou um interesse pessoal em demonstrar que uma intervenção é benéfica podem estar inclinados a relatar resultados seletivamente para subgrupos que sejam favoráveis à intervenção. Responda ' N ' ou ' PN ' se :
+    Há evidências claras (geralmente obtidas por meio da análise de um protocolo de estudo ou plano de análise estatística com data anterior ao acesso do analista aos dados coletados ) de que todos os resultados relatados para os subgrupos correspondem a todas as análises planejadas.
+    ou
+    As análises são inconsistentes entre diferentes relatórios sobre o mesmo estudo, mas os analistas apresentaram uma justificativa para a inconsistência , que não está relacionada à natureza dos resultados.
+    Responda 'NI' se :
+    As intenções de análise não estão disponíveis, ou não foram relatadas com detalhes suficientes para permitir uma avaliação, e há mais de uma maneira pela qual os subgrupos poderiam ter sido analisados."""
+
+
+# --- ENUNCIADOS ---
+TRIAGE_LABELS = {
+    "b1": "B1. Os autores fizeram alguma tentativa de controlar fatores de confusão no resultado avaliado?",
+    "b2": "B2. Se N/PN para B1: Existe potencial suficiente para fatores de confusão que impeçam a consideração deste resultado posteriormente?",
+    "b3": "B3. O método de medição do resultado foi inadequado?",
+}
+
+# (pergunta, variante) -> (enunciado, ajuda)
+QUESTION_TEXTS = {
+    # D1 variante A
+    ("1.1", "A"): ("1.1 Os autores controlaram todos os importantes fatores de confusão que isso se mostrou necessário?", HELP_1_1_A),
+    ("1.2", "A"): ("1.2 Os fatores de confusão que foram controlados foram medidos de forma válida e confiável?", HELP_1_2_A),
+    ("1.3", "A"): ("1.3 Os autores controlaram alguma variável pós-intervenção que poderia ter sido afetada pela intervenção?", HELP_1_3_A),
+    ("1.4", "A"): ("1.4 O uso de controles negativos sugeriu a presença de fatores de confusão não controlados?", HELP_1_4_A),
+    # D1 variante B
+    ("1.1", "B"): ("1.1 Os autores utilizaram um método de análise apropriado para controlar os fatores de confusão variáveis ao longo do tempo, bem como os fatores de confusão basais?", HELP_1_1_B),
+    ("1.2", "B"): ("1.2 Os autores controlaram todos os importantes fatores de confusão basais e variáveis ao longo do tempo para os quais isso era necessário?", HELP_1_2_B),
+    ("1.3", "B"): ("1.3 Os fatores de confusão que foram controlados foram medidos de forma válida e confiável?", HELP_1_3_B),
+    ("1.4", "B"): ("1.4 Os autores controlaram fatores que variam ao longo do tempo ou outras variáveis medidas após o início da intervenção?", HELP_1_4_B),
+    ("1.5", "B"): ("1.5 O uso de controles negativos, ou outras considerações, sugeriu a presença de fatores de confusão não controlados significativos?", HELP_1_5_B),
+    # D2
+    ("2.1", None): ("2.1 As estratégias de intervenção eram distinguíveis no momento em que o acompanhamento teria começado?", HELP_2_1),
+    ("2.2", None): ("2.2 Todos ou quase todos os eventos ocorreram após a intervenção ser distinguível?", HELP_2_2),
+    ("2.3", None): ("2.3 A análise evitou problemas decorrentes de estratégias indistinguíveis?", HELP_2_3),
+    ("2.4", None): ("2.4 A classificação da intervenção foi influenciada pelo conhecimento do desfecho?", HELP_2_4),
+    ("2.5", None): ("2.5 Houve erros na classificação do status da intervenção?", HELP_2_5),
+    # D3
+    ("3.1", None): ("3.1 Os participantes foram acompanhados desde o início da intervenção?", HELP_3_1),
+    ("3.2", None): ("3.2 Os eventos de desfecho precoces foram excluídos da análise?", HELP_3_2),
+    ("3.3", None): ("3.3 A seleção foi baseada em características pós-intervenção?", HELP_3_3),
+    ("3.4", None): ("3.4 As variáveis de seleção estão associadas à intervenção?", HELP_3_4),
+    ("3.5", None): ("3.5 As variáveis de seleção são influenciadas pelo desfecho?", HELP_3_5),
+    ("3.6", None): ("3.6 A análise corrigiu o viés de seleção?", HELP_3_6),
+    ("3.7", None): ("3.7 Análises de sensibilidade demonstram impacto mínimo do viés?", HELP_3_7),
+    ("3.8", None): ("3.8 O viés de seleção é provável de ser severo?", HELP_3_8),
+    # D4
+    ("4.1", None): ("4.1 Os dados sobre o estado da intervenção estavam completos para todos, ou quase todos, os participantes?", HELP_4_1),
+    ("4.2", None): ("4.2 Os dados completos sobre o resultado estavam disponíveis para todos, ou quase todos, os participantes?", HELP_4_2),
+    ("4.3", None): ("4.3 Os dados completos sobre variáveis de confusão importantes estavam disponíveis para todos, ou quase todos, os participantes?", HELP_4_3),
+    ("4.4", None): ("4.4 O resultado é baseado em uma análise completa do caso?", HELP_4_4),
+    ("4.5", None): ("4.5 A exclusão da análise devido a dados faltantes (na intervenção, nos fatores de confusão ou no desfecho) provavelmente estava relacionada ao valor verdadeiro do desfecho?", HELP_4_5),
+    ("4.6", None): ("4.6 É provável que a relação entre o resultado e a ausência de dados seja explicada pelas variáveis no modelo de análise?", HELP_4_6),
+    ("4.7", None): ("4.7 A análise foi baseada na imputação de valores ausentes?", HELP_4_7),
+    ("4.8", None): ("4.8 É razoável assumir que os dados estavam 'faltando aleatoriamente' (MAR) ou 'faltando completamente aleatoriamente' (MCAR) ?", HELP_4_8),
+    ("4.9", None): ("4.9 A imputação foi realizada adequadamente?", HELP_4_9),
+    ("4.10", None): ("4.10 Foi utilizado um método alternativo apropriado para corrigir o viés devido a dados faltantes?", HELP_4_10),
+    ("4.11", None): ("4.11 Há evidências de que o resultado não foi enviesado por dados faltantes?", HELP_4_11),
+    # D5
+    ("5.1", None): ("5.1 A medição ou a verificação do resultado poderiam ter diferido entre os grupos de intervenção?", HELP_5_1),
+    ("5.2", None): ("5.2 Os avaliadores de resultados estavam cientes da intervenção recebida pelos participantes do estudo?", HELP_5_2),
+    ("5.3", None): ("5.3 A avaliação do resultado poderia ter sido influenciada pelo conhecimento da intervenção recebida?", HELP_5_3),
+    # D6
+    ("6.1", None): ("6.1 O resultado foi relatado de acordo com um plano de análise disponível e predeterminado?", HELP_6_1),
+    ("6.2", None): ("6.2 Múltiplas medidas de desfecho (por exemplo, escalas, definições, pontos de tempo) dentro do domínio do desfecho?", HELP_6_2),
+    ("6.3", None): ("6.3 Múltiplas análises dos dados?", HELP_6_3),
+    ("6.4", None): ("6.4 Múltiplos subgrupos ?", HELP_6_4),
+}
+
+
+def _options(qid, variant):
+    domain = "D" + qid[0]
+    return (SELECT,) + OPTIONS[(domain, variant) if domain == "D1" else domain][qid]
+
+
+def load():
+    """Catálogo imutável {key(qid, variante): Question}, com a triagem (b1-b3)."""
+    questions = {
+        (qid, None): Question(qid, None, label, (SELECT,) + TRIAGE_OPTIONS[qid.upper()], None)
+        for qid, label in TRIAGE_LABELS.items()
+    }
+    for (qid, variant), (label, help_text) in QUESTION_TEXTS.items():
+        questions[(qid, variant)] = Question(qid, variant, label, _options(qid, variant), help_text)
+    return MappingProxyType(questions)
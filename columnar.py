@@ -0,0 +1,204 @@
+"""Exportação colunar (Parquet / Arrow) das avaliações salvas, para meta-análise.
+
+Uma linha por avaliação (estudo, desfecho e revisor) com:
+
+- identificação, variante e data da última alteração;
+- o risco de cada domínio (d1_risk ... d6_risk), do algoritmo, do
+  pesquisador e o final (pesquisador, ou algoritmo sem decisão), em colunas
+  de dicionário com o mesmo dicionário fixo em todos os lotes;
+- o resultado numérico como texto e já interpretado: medida de efeito
+  ("RR", "OR", "HR", "MD", ...), valor e intervalo de confiança;
+- as respostas, uma coluna de dicionário por pergunta (b1 ... q6_4; vazia
+  quando não respondida), e o código compacto de schema.py.
+
+Os registros são lidos e escritos em lotes, então a memória não cresce com o
+tamanho da revisão. O .parquet sai comprimido (zstd); o .arrow (formato IPC
+de arquivo, o mesmo do Feather v2) sai sem compressão, para leitura
+zero-copy com memória mapeada:
+
+    import pyarrow as pa
+    table = pa.ipc.open_file(pa.memory_map("revisao.arrow")).read_all()
+    table.filter(pa.compute.field("final_risk") != "CRITICAL")
+"""
+import datetime
+import functools
+import re
+
+from batch import QUESTION_IDS, column_name
+from engine import CRITICAL, D1_LOW, DOMAIN_NAMES, DOMAINS, LOW, MODERATE, PENDING, SELECT, SERIOUS
+from schema import AssessmentAnswers, InvalidAnswers
+
+BATCH_SIZE = 1024
+
+RISK_VALUES = (LOW, D1_LOW, MODERATE, SERIOUS, CRITICAL, PENDING, "N/A")
+ANSWER_VALUES = ("Y", "PY", "PN", "N", "NI", "SY", "WY", "WN", "SN", "NA")
+ANSWER_COLUMNS = ["b1", "b2", "b3"] + [column_name(qid) for qid in QUESTION_IDS]
+RISK_COLUMNS = [f"{d.lower()}_risk" for d in DOMAINS] + ["algo_risk", "manual_risk", "final_risk"]
+
+VARIANT_VALUES = ("A", "B")
+# Dicionário fixo de cada coluna de dicionário: todos os lotes compartilham os
+# mesmos códigos (o formato IPC de arquivo não aceita dicionários diferentes)
+DICTIONARIES = {"variant": VARIANT_VALUES}
+DICTIONARIES.update({c: RISK_VALUES for c in RISK_COLUMNS})
+DICTIONARIES.update({c: ANSWER_VALUES for c in ANSWER_COLUMNS})
+
+_CODES = {c: {v: i for i, v in enumerate(values)} for c, values in DICTIONARIES.items()}
+_ANSWER_KEYS = ["b1", "b2", "b3"] + QUESTION_IDS
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise RuntimeError("Exportação Parquet/Arrow requer o pacote 'pyarrow'.") from e
+    return pa
+
+
+# --- RESULTADO NUMÉRICO ---
+# Com expoente opcional: "1e-3", "2,5E-4"
+_NUMBER = r"(?:(?<![\d.,])[-−–])?\d+(?:[.,]\d+)?(?:[eE][-−–+]?\d+)?"
+_NUMBER_RE = re.compile(_NUMBER)
+# "IC 95%", "95% CI", "IC95%": o 95 não é um valor do efeito
+_CI_LABEL_RE = re.compile(r"\b(?:IC|CI)\s*\d{2}\s*%|\b\d{2}\s*%\s*(?:IC|CI)\b", re.IGNORECASE)
+# "p=0,03", "p < .001", "p-valor = 0,04", "p value 0.2": nem efeito nem limite do IC
+_P_VALUE_RE = re.compile(
+    r"\bp(?:\s*[-\s]\s*val(?:or|ue))?\s*(?:[=<>≤≥]\s*|(?<=[re])\s+)[\d.,]*\d(?:[eE][-−–+]?\d+)?",
+    re.IGNORECASE,
+)
+_MEASURE_RE = re.compile(r"^\s*([A-Za-z]{1,6})\b")
+EFFECT_MEASURES = {
+    "RR", "OR", "HR", "RD", "MD", "SMD", "WMD", "IRR", "ARR", "RRR", "NNT", "ROM", "GMR",
+    "AOR", "AHR",
+}
+
+
+def _number(text):
+    return float(text.replace(",", ".").replace("−", "-").replace("–", "-"))
+
+
+def parse_effect(text):
+    """(medida, valor, limite inferior, limite superior) de um texto como "RR 1,5 (IC 95% 1,1-2,0)".
+
+    Partes ausentes voltam como None. Valores de p ("p=0,03") são ignorados:
+    um texto só com o valor de p não tem efeito.
+    """
+    text = _P_VALUE_RE.sub(" ", str(text or ""))
+    match = _MEASURE_RE.match(text)
+    measure = match.group(1).upper() if match else None
+    if measure not in EFFECT_MEASURES:
+        measure = None
+    numbers = [_number(n) for n in _NUMBER_RE.findall(_CI_LABEL_RE.sub(" ", text[match.end() if match else 0:]))]
+    numbers += [None] * 3
+    return measure, numbers[0], numbers[1], numbers[2]
+
+
+# --- ESQUEMA ---
+@functools.lru_cache(maxsize=None)
+def arrow_schema():
+    pa = _pyarrow()
+    category = pa.dictionary(pa.int8(), pa.string())
+    fields = [
+        pa.field("id", pa.int64(), nullable=False),
+        pa.field("study_id", pa.string(), nullable=False),
+        pa.field("outcome", pa.string(), nullable=False),
+        pa.field("reviewer", pa.string(), nullable=False),
+        pa.field("variant", category),
+        pa.field("numeric_result", pa.string()),
+        pa.field("effect_measure", pa.string()),
+        pa.field("effect_value", pa.float64()),
+        pa.field("ci_lower", pa.float64()),
+        pa.field("ci_upper", pa.float64()),
+    ]
+    fields += [pa.field(c, category) for c in RISK_COLUMNS]
+    fields += [pa.field("manual_justification", pa.string()), pa.field("updated_at", pa.timestamp("ms", tz="UTC"))]
+    fields += [pa.field(c, category) for c in ANSWER_COLUMNS]
+    fields.append(pa.field("answers_code", pa.binary(AssessmentAnswers.size())))
+    return pa.schema(fields)
+
+
+def _answers_code(record):
+    try:
+        return AssessmentAnswers.encode(record["variant"], record["answers"]).to_bytes()
+    except InvalidAnswers:
+        return None
+
+
+def _columns(records):
+    """Colunas (listas Python; códigos nas colunas de dicionário) de um lote."""
+    cols = {name: [] for name in arrow_schema().names}
+    for r in records:
+        data = r["report_data"]
+        domains = data.get("domains", {})
+        answers = r["answers"]
+        cols["id"].append(r["id"])
+        for key in ("study_id", "outcome", "reviewer", "numeric_result", "manual_justification"):
+            cols[key].append(r[key])
+        cols["variant"].append(_CODES["variant"].get(r["variant"]))
+        measure, value, lower, upper = parse_effect(r["numeric_result"])
+        cols["effect_measure"].append(measure)
+        cols["effect_value"].append(value)
+        cols["ci_lower"].append(lower)
+        cols["ci_upper"].append(upper)
+
+        risks = [domains.get(DOMAIN_NAMES[d], {}).get("risk") for d in DOMAINS]
+        risks += [r["algo_risk"], r["manual_risk"], r["manual_risk"] or r["algo_risk"]]
+        for name, risk in zip(RISK_COLUMNS, risks):
+            cols[name].append(_CODES[name].get(risk))
+        cols["updated_at"].append(datetime.datetime.fromisoformat(r["updated_at"]))
+        for name, key in zip(ANSWER_COLUMNS, _ANSWER_KEYS):
+            value = answers.get(key)
+            cols[name].append(None if value in (None, "", SELECT) else _CODES[name].get(value))
+        cols["answers_code"].append(_answers_code(r))
+    return cols
+
+
+def record_batches(records, batch_size=BATCH_SIZE):
+    """Gera RecordBatches de até `batch_size` avaliações (registros do store.py)."""
+    pa = _pyarrow()
+    schema = arrow_schema()
+    dictionaries = {name: pa.array(values) for name, values in DICTIONARIES.items()}
+
+    def build(batch):
+        cols = _columns(batch)
+        arrays = []
+        for field in schema:
+            values = cols[field.name]
+            if field.name in dictionaries:
+                arrays.append(pa.DictionaryArray.from_arrays(
+                    pa.array(values, pa.int8()), dictionaries[field.name]
+                ))
+            else:
+                arrays.append(pa.array(values, field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == batch_size:
+            yield build(batch)
+            batch = []
+    if batch:
+        yield build(batch)
+
+
+def write_parquet(records, path):
+    """Escreve as avaliações num .parquet; retorna quantas foram escritas."""
+    import pyarrow.parquet as pq
+
+    count = 0
+    with pq.ParquetWriter(path, arrow_schema(), compression="zstd") as writer:
+        for batch in record_batches(records):
+            writer.write_batch(batch)
+            count += batch.num_rows
+    return count
+
+
+def write_arrow(records, path):
+    """Escreve as avaliações num .arrow (IPC de arquivo); retorna quantas foram escritas."""
+    pa = _pyarrow()
+    count = 0
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, arrow_schema()) as writer:
+        for batch in record_batches(records):
+            writer.write_batch(batch)
+            count += batch.num_rows
+    return count
@@ -0,0 +1,239 @@
+"""Consenso entre dois revisores: divergências e concordância (kappa de Cohen).
+
+Cada revisor salva a sua avaliação separadamente (o store.py identifica a
+avaliação por estudo, desfecho e revisor). Aqui as avaliações de dois
+revisores são pareadas por estudo e desfecho e viram matrizes de códigos
+(estudos x perguntas e estudos x domínios), então comparar uma revisão com
+milhares de estudos é uma operação sobre arrays:
+
+- divergências por pergunta (resposta) e por domínio (risco), em cada par;
+- concordância percentual e kappa de Cohen por pergunta, por domínio e no
+  conjunto da revisão.
+
+    comparison = compare(store, "AB", "CD")
+    comparison.agreement()          # uma linha por item
+    comparison.disagreements()      # uma linha por estudo/desfecho
+    comparison.differences(0)       # itens divergentes do primeiro par
+
+`python consensus.py AB CD` imprime a concordância das duas revisões.
+"""
+import argparse
+import functools
+import sys
+
+import numpy as np
+
+from batch import QUESTION_IDS
+from columnar import ANSWER_VALUES, RISK_VALUES
+from engine import DOMAIN_NAMES, DOMAINS, PENDING, SELECT, normalize_answers, question_ids, visible_questions
+from store import default_store
+
+TRIAGE = ("b1", "b2", "b3")
+ANSWER_ITEMS = TRIAGE + tuple(QUESTION_IDS)
+RISK_ITEMS = DOMAINS + ("Global",)
+# Perguntas do Domínio 1: o enunciado depende da variante
+_D1_COLUMNS = np.array([q.startswith("1.") for q in ANSWER_ITEMS])
+
+# Código -1: em branco (sem resposta, pergunta oculta, ou domínio ainda pendente)
+BLANK = -1
+_ANSWER_CODES = {v: i for i, v in enumerate(ANSWER_VALUES)}
+_RISK_CODES = {v: i for i, v in enumerate(RISK_VALUES)}
+_RISK_CODES[PENDING] = BLANK
+
+
+def _answer_code(value):
+    return BLANK if value in (None, "", SELECT) else _ANSWER_CODES.get(value, BLANK)
+
+
+@functools.lru_cache(maxsize=4096)
+def _visible(domain, variant, items):
+    a = normalize_answers(domain, variant, dict(items))
+    return frozenset(visible_questions(domain, variant, a))
+
+
+def _visible_items(variant, answers):
+    """Triagem e perguntas que a interface exibe para essas respostas."""
+    visible = set(TRIAGE)
+    for domain in DOMAINS:
+        items = tuple((q, answers.get(q)) for q in question_ids(domain, variant))
+        visible |= _visible(domain, variant, items)
+    return visible
+
+
+def reviewer_matrix(records):
+    """Matrizes de códigos das avaliações de um revisor.
+
+    Retorna {(estudo, desfecho): i} e os arrays ids (n), variantes (n),
+    respostas (n x perguntas, índice em ANSWER_VALUES) e riscos (n x 7,
+    índice em RISK_VALUES; o global é a decisão do pesquisador, ou a do
+    algoritmo). Perguntas ocultas pelas respostas do revisor ficam em
+    branco: o valor salvo delas é o padrão de ocultação, não uma resposta.
+    """
+    index, ids, variants, answers, risks = {}, [], [], [], []
+    for r in records:
+        index[(r["study_id"], r["outcome"])] = len(ids)
+        ids.append(r["id"])
+        variants.append(r["variant"])
+        a = r["answers"]
+        visible = _visible_items(r["variant"] or "A", a)
+        answers.append([_answer_code(a.get(q)) if q in visible else BLANK for q in ANSWER_ITEMS])
+        domains = r["report_data"].get("domains", {})
+        row = [domains.get(DOMAIN_NAMES[d], {}).get("risk") for d in DOMAINS]
+        row.append(r["manual_risk"] or r["algo_risk"])
+        risks.append([_RISK_CODES.get(risk, BLANK) for risk in row])
+    return (
+        index,
+        np.array(ids, dtype=np.int64),
+        np.array(variants, dtype=object),
+        np.array(answers, dtype=np.int8).reshape(-1, len(ANSWER_ITEMS)),
+        np.array(risks, dtype=np.int8).reshape(-1, len(RISK_ITEMS)),
+    )
+
+
+def cohen_kappa(a, b, categories):
+    """(n, concordância, kappa) de cada coluna de duas matrizes de códigos.
+
+    Só entram as linhas em que os dois revisores responderam (código >= 0).
+    Colunas sem pares, ou em que o acaso explica toda a concordância, têm
+    kappa NaN.
+    """
+    both = (a >= 0) & (b >= 0)
+    n = both.sum(axis=0)
+    columns = np.broadcast_to(np.arange(a.shape[1]), a.shape)[both]
+
+    def marginals(codes):
+        counts = np.bincount(columns * categories + codes[both], minlength=a.shape[1] * categories)
+        return counts.reshape(a.shape[1], categories)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        observed = ((a == b) & both).sum(axis=0) / n
+        expected = (marginals(a) * marginals(b)).sum(axis=1) / n.astype(float) ** 2
+        kappa = (observed - expected) / (1 - expected)
+    return n, observed, kappa
+
+
+class Comparison:
+    """Avaliações de dois revisores pareadas por estudo e desfecho."""
+
+    def __init__(self, reviewer_a, reviewer_b, records_a, records_b):
+        self.reviewers = (reviewer_a, reviewer_b)
+        index_a, ids_a, variants_a, answers_a, risks_a = reviewer_matrix(records_a)
+        index_b, ids_b, variants_b, answers_b, risks_b = reviewer_matrix(records_b)
+        self.keys = sorted(index_a.keys() & index_b.keys())
+        rows_a = np.array([index_a[k] for k in self.keys], dtype=np.intp)
+        rows_b = np.array([index_b[k] for k in self.keys], dtype=np.intp)
+        self.ids = (ids_a[rows_a], ids_b[rows_b])
+        self.variants = (variants_a[rows_a], variants_b[rows_b])
+        self.answers = (answers_a[rows_a], answers_b[rows_b])
+        self.risks = (risks_a[rows_a], risks_b[rows_b])
+        self.only = (len(index_a) - len(self.keys), len(index_b) - len(self.keys))
+
+        # Respostas do Domínio 1 em variantes diferentes não são comparáveis
+        self.same_variant = self.variants[0] == self.variants[1]
+        self.comparable = np.ones(self.answers[0].shape, dtype=bool)
+        self.comparable[np.ix_(~self.same_variant, _D1_COLUMNS)] = False
+        self.answer_diff = (self.answers[0] != self.answers[1]) & self.comparable
+        self.risk_diff = self.risks[0] != self.risks[1]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def agreement(self):
+        """Concordância por item: pergunta, domínio e os totais da revisão."""
+        a, b = (np.where(self.comparable, m, BLANK) for m in self.answers)
+        rows = []
+        for kind, items, x, y, categories in (
+            ("Pergunta", ANSWER_ITEMS, a, b, len(ANSWER_VALUES)),
+            ("Risco", RISK_ITEMS, *self.risks, len(RISK_VALUES)),
+        ):
+            n, observed, kappa = cohen_kappa(x, y, categories)
+            for item, count, po, k in zip(items, n, observed, kappa):
+                if count:
+                    rows.append(_agreement_row(kind, item, count, po, k))
+            total = cohen_kappa(x.reshape(-1, 1), y.reshape(-1, 1), categories)
+            label = "Todas as perguntas" if kind == "Pergunta" else "Todos os domínios"
+            rows.append(_agreement_row(kind, label, *(v[0] for v in total)))
+        return rows
+
+    def disagreements(self):
+        """Uma linha por estudo/desfecho, com a contagem de divergências."""
+        answer_counts = self.answer_diff.sum(axis=1)
+        domain_diff = self.risk_diff[:, :len(DOMAINS)]
+        rows = []
+        for i, (study_id, outcome) in enumerate(self.keys):
+            rows.append({
+                "study_id": study_id,
+                "outcome": outcome,
+                "variantes": "" if self.same_variant[i] else f"{self.variants[0][i]} x {self.variants[1][i]}",
+                "perguntas divergentes": int(answer_counts[i]),
+                "domínios divergentes": ", ".join(d for d, diff in zip(DOMAINS, domain_diff[i]) if diff),
+                f"global ({self.reviewers[0]})": _risk(self.risks[0][i, -1]),
+                f"global ({self.reviewers[1]})": _risk(self.risks[1][i, -1]),
+            })
+        return rows
+
+    def disagreeing(self):
+        """Posições dos pares com alguma divergência (resposta, risco ou variante)."""
+        return np.flatnonzero(
+            self.answer_diff.any(axis=1) | self.risk_diff.any(axis=1) | ~self.same_variant
+        )
+
+    def differences(self, i):
+        """Itens divergentes do par `i`: (tipo, item, valor de A, valor de B)."""
+        out = []
+        if not self.same_variant[i]:
+            out.append(("Variante", "c4", self.variants[0][i], self.variants[1][i]))
+        for j in np.flatnonzero(self.answer_diff[i]):
+            out.append(("Pergunta", ANSWER_ITEMS[j], _answer(self.answers[0][i, j]), _answer(self.answers[1][i, j])))
+        for j in np.flatnonzero(self.risk_diff[i]):
+            out.append(("Risco", RISK_ITEMS[j], _risk(self.risks[0][i, j]), _risk(self.risks[1][i, j])))
+        return out
+
+
+def _answer(code):
+    return "" if code == BLANK else ANSWER_VALUES[code]
+
+
+def _risk(code):
+    return PENDING if code == BLANK else RISK_VALUES[code]
+
+
+def _agreement_row(kind, item, n, observed, kappa):
+    return {
+        "tipo": kind,
+        "item": item,
+        "pares": int(n),
+        "concordância (%)": round(100 * float(observed), 1) if n else None,
+        "kappa": None if np.isnan(kappa) else round(float(kappa), 3),
+    }
+
+
+def compare(store, reviewer_a, reviewer_b, outcome=None):
+    """Compara as avaliações de dois revisores (opcionalmente de um desfecho)."""
+    return Comparison(
+        reviewer_a, reviewer_b,
+        store.records(reviewer=reviewer_a, outcome=outcome),
+        store.records(reviewer=reviewer_b, outcome=outcome),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concordância entre dois revisores ROBINS-I V2.")
+    parser.add_argument("reviewer_a")
+    parser.add_argument("reviewer_b")
+    parser.add_argument("--outcome", default=None, help="Compara só um desfecho")
+    args = parser.parse_args(argv)
+
+    comparison = compare(default_store(), args.reviewer_a, args.reviewer_b, args.outcome)
+    print(f"{len(comparison)} estudos/desfechos avaliados pelos dois revisores; "
+          f"{len(comparison.disagreeing())} com divergências.")
+    for row in comparison.agreement():
+        if not row["pares"]:
+            continue
+        kappa = "—" if row["kappa"] is None else f"{row['kappa']:.3f}"
+        print(f"{row['tipo']:9} {row['item']:20} {row['pares']:7d} {row['concordância (%)']:6.1f}%  κ {kappa}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
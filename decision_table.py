@@ -0,0 +1,237 @@
+"""Tabelas de decisão pré-computadas para os algoritmos dos domínios.
+
+Cada domínio (e variante, no Domínio 1) tem um espaço de respostas pequeno.
+Aqui enumeramos todas as combinações alcançáveis pela interface, pontuamos
+cada uma com a implementação de referência (engine.py) e guardamos o
+resultado num índice inteiro: os códigos das respostas são empacotados em
+base mista num único número, e a pontuação vira uma consulta O(1).
+
+As tabelas são montadas na primeira consulta de cada domínio e ficam em
+memória. score_normalized() só usa a tabela nos domínios de TABLE_DOMAINS,
+em que ela é mais rápida que a referência (ver bench_domains.py); nos
+outros, a referência é uma cadeia curta de comparações e ganha da consulta.
+`verify()` reconstrói e confere tudo contra a referência:
+
+    python decision_table.py
+"""
+import operator
+import sys
+import time
+
+import engine
+from engine import DOMAINS, OPTIONS, QUESTIONS, SELECT, VISIBILITY, normalize_answers
+
+# Domínios pontuados pela tabela. Em bench_domains.py (µs por avaliação,
+# referência -> tabela): D4 3,3-4,0 -> 1,2-1,8 e D6 1,4-1,9 -> 0,8-1,0; em
+# D1, D2, D3 e D5 a diferença fica dentro do ruído ou a tabela perde.
+TABLE_DOMAINS = ("D4", "D6")
+
+
+class DecisionTable:
+    __slots__ = ("key", "questions", "alphabets", "codes", "weights", "terms", "_values",
+                 "index", "results")
+
+    def __init__(self, key):
+        self.key = key
+        self.questions = tuple(QUESTIONS[key])
+        # Alfabeto de cada pergunta: "Selecione...", opções e o valor oculto
+        self.alphabets = []
+        for q in self.questions:
+            alphabet = (SELECT,) + OPTIONS[key][q]
+            hidden = QUESTIONS[key][q]
+            if hidden not in alphabet:
+                alphabet += (hidden,)
+            self.alphabets.append(alphabet)
+        self.codes = [{v: i for i, v in enumerate(alphabet)} for alphabet in self.alphabets]
+        self.weights = []
+        weight = 1
+        for codes in reversed(self.codes):
+            self.weights.append(weight)
+            weight *= len(codes)
+        self.weights.reverse()
+        # Código já multiplicado pelo peso: o índice é a soma dos termos
+        self.terms = [{v: c * w for v, c in codes.items()} for codes, w in zip(self.codes, self.weights)]
+        self._values = operator.itemgetter(*self.questions)
+        self.index = {}
+        self.results = []
+
+    def pack(self, a):
+        """Índice inteiro de respostas normalizadas (None se houver código inválido)."""
+        try:
+            return sum(map(operator.getitem, self.terms, self._values(a)))
+        except KeyError:
+            return None
+
+    def unpack(self, idx):
+        return {
+            q: alphabet[idx // weight % len(alphabet)]
+            for q, alphabet, weight in zip(self.questions, self.alphabets, self.weights)
+        }
+
+    def lookup(self, a):
+        """(risco, justificativa) de respostas normalizadas, ou None se fora da tabela."""
+        result = self.index.get(self.pack(a))
+        return None if result is None else self.results[result]
+
+    def __len__(self):
+        return len(self.index)
+
+
+def _walk(table):
+    """Percorre as combinações alcançáveis, gerando (índice, respostas).
+
+    O dicionário de respostas é reaproveitado entre as iterações.
+    """
+    key = table.key
+    questions = table.questions
+    rules = VISIBILITY[key]
+    a = {}
+
+    def walk(i, idx):
+        if i == len(questions):
+            yield idx, a
+            return
+        q = questions[i]
+        rule = rules.get(q)
+        values = (SELECT,) + OPTIONS[key][q] if rule is None or rule(a) else (QUESTIONS[key][q],)
+        codes, weight = table.codes[i], table.weights[i]
+        for value in values:
+            a[q] = value
+            yield from walk(i + 1, idx + codes[value] * weight)
+        del a[q]
+
+    return walk(0, 0)
+
+
+def reachable_answers(key):
+    """Enumera todas as combinações de respostas que a interface pode produzir."""
+    return (dict(a) for _, a in _walk(DecisionTable(key)))
+
+
+def _reference(key, a):
+    domain, variant = key if isinstance(key, tuple) else (key, None)
+    return engine.score_normalized(domain, variant, a)
+
+
+def build_table(key):
+    table = DecisionTable(key)
+    result_ids = {}
+    results = []
+    index = table.index
+    for idx, a in _walk(table):
+        result = _reference(key, a)
+        rid = result_ids.get(result)
+        if rid is None:
+            rid = result_ids[result] = len(results)
+            results.append(result)
+        index[idx] = rid
+    table.results = tuple(results)
+    return table
+
+
+_TABLES = {}
+
+
+def table(domain, variant="A"):
+    key = engine._key(domain, variant)
+    t = _TABLES.get(key)
+    if t is None:
+        t = _TABLES[key] = build_table(key)
+    return t
+
+
+def build_all():
+    """Monta todas as tabelas de uma vez (ex.: na subida de um servidor)."""
+    for key in _keys():
+        domain, variant = key if isinstance(key, tuple) else (key, "A")
+        table(domain, variant)
+
+
+def rebuild():
+    """Descarta as tabelas em memória; a próxima consulta as regenera."""
+    _TABLES.clear()
+
+
+def score_table(domain, variant, a):
+    """Mesma interface de engine.score_normalized, resolvida pela tabela.
+
+    Combinações fora da tabela (códigos inválidos) caem na implementação de
+    referência.
+    """
+    t = _TABLES.get((domain, variant) if domain == "D1" else domain) or table(domain, variant)
+    try:
+        return t.results[t.index[sum(map(operator.getitem, t.terms, t._values(a)))]]
+    except KeyError:
+        return engine.score_normalized(domain, variant, a)
+
+
+def score_normalized(domain, variant, a):
+    """Mesma interface de engine.score_normalized: tabela nos domínios de TABLE_DOMAINS."""
+    if domain in TABLE_DOMAINS:
+        return score_table(domain, variant, a)
+    return engine.score_normalized(domain, variant, a)
+
+
+def score_domain(domain, variant, answers):
+    return score_normalized(domain, variant, normalize_answers(domain, variant, answers))
+
+
+def _keys():
+    return [engine._key(d, v) for d in DOMAINS for v in (("A", "B") if d == "D1" else ("A",))]
+
+
+def verify():
+    """Regenera as tabelas e confere o caminho de pontuação contra a referência.
+
+    As combinações são enumeradas de novo (sem usar o índice das tabelas) e
+    pontuadas por score_table, o caminho de score_normalized nos domínios de
+    TABLE_DOMAINS: confere pack/terms/index e os resultados. Também confere
+    que cada combinação alcançável está na tabela e que códigos inválidos
+    caem na referência.
+
+    Retorna a lista de divergências [(chave, respostas, tabela, referência)].
+    """
+    rebuild()
+    mismatches = []
+    for key in _keys():
+        domain, variant = key if isinstance(key, tuple) else (key, "A")
+        t = table(domain, variant)
+        sample = None
+        for _, a in _walk(DecisionTable(key)):
+            expected = _reference(key, a)
+            if t.lookup(a) is None:
+                mismatches.append((key, dict(a), "fora da tabela", expected))
+                continue
+            got = score_table(domain, variant, a)
+            if got != expected:
+                mismatches.append((key, dict(a), got, expected))
+            if sample is None:
+                sample = dict(a)
+        # Código inválido em cada pergunta: fora da tabela, pontuado pela referência
+        for q in t.questions:
+            invalid = {**sample, q: "código inválido"}
+            got, expected = score_table(domain, variant, invalid), _reference(key, invalid)
+            if got != expected:
+                mismatches.append((key, invalid, got, expected))
+    return mismatches
+
+
+def main():
+    rebuild()
+    for key in _keys():
+        domain, variant = key if isinstance(key, tuple) else (key, "A")
+        start = time.perf_counter()
+        t = table(domain, variant)
+        elapsed = time.perf_counter() - start
+        label = f"{domain}{variant}" if domain == "D1" else domain
+        print(f"{label:4} {len(t):7d} combinações  {len(t.results):3d} resultados  {elapsed * 1000:7.1f} ms")
+
+    mismatches = verify()
+    for key, a, got, expected in mismatches[:20]:
+        print(f"DIVERGÊNCIA {key}: {a} -> {got} (referência: {expected})")
+    print("OK: tabelas conferem com a referência." if not mismatches else f"{len(mismatches)} divergências.")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,688 @@
+"""Motor de pontuação ROBINS-I V2, sem dependência do Streamlit.
+
+Reúne os algoritmos dos seis domínios e a regra do julgamento global usados
+pelo app.py, para que possam ser importados por lotes, workers e serviços.
+"""
+from collections import Counter
+
+# --- CONSTANTES ---
+SELECT = "Selecione..."
+NA = "NA"
+PENDING = "PENDENTE"
+WAITING = "Aguardando respostas..."
+
+LOW, MODERATE, SERIOUS, CRITICAL = "LOW", "MODERATE", "SERIOUS", "CRITICAL"
+RISK_LEVELS = (LOW, MODERATE, SERIOUS, CRITICAL)
+
+# Texto padrão do ROBINS-I para o Baixo Risco do Domínio 1
+D1_LOW = "Baixo risco, exceto por preocupações com confusão"
+
+DOMAINS = ("D1", "D2", "D3", "D4", "D5", "D6")
+DOMAIN_NAMES = {d: f"Domínio {d[1]}" for d in DOMAINS}
+
+C4_OPTIONS = ["Não (Intention-to-treat / Atribuição)", "Sim (Per-protocol / Adesão)"]
+
+YES = ("Y", "PY")
+NO = ("N", "PN")
+
+
+# --- ESTRUTURA DAS PERGUNTAS ---
+# Para cada domínio (e variante, no Domínio 1): ordem das perguntas e o valor
+# assumido quando a pergunta fica oculta na interface.
+QUESTIONS = {
+    ("D1", "A"): {"1.1": SELECT, "1.2": NA, "1.3": NA, "1.4": SELECT},
+    ("D1", "B"): {"1.1": SELECT, "1.2": NA, "1.3": NA, "1.4": NA, "1.5": SELECT},
+    "D2": {"2.1": SELECT, "2.2": NA, "2.3": NA, "2.4": SELECT, "2.5": SELECT},
+    "D3": {"3.1": SELECT, "3.2": NA, "3.3": SELECT, "3.4": NA, "3.5": NA,
+           "3.6": NA, "3.7": NA, "3.8": NA},
+    "D4": {"4.1": SELECT, "4.2": SELECT, "4.3": SELECT, "4.4": NA, "4.5": NA,
+           "4.6": NA, "4.7": NA, "4.8": NA, "4.9": NA, "4.10": NA, "4.11": NA},
+    "D5": {"5.1": SELECT, "5.2": SELECT, "5.3": SELECT},
+    "D6": {"6.1": SELECT, "6.2": SELECT, "6.3": SELECT, "6.4": SELECT},
+}
+
+
+# Opções de resposta de cada pergunta, na ordem exibida (sem "Selecione...")
+_YN = ("Y", "PY", "PN", "N", "NI")
+_SW = ("SY", "WY", "PN", "N", "NI")
+_YW = ("Y", "PY", "WN", "NI", "SN")
+
+TRIAGE_OPTIONS = {
+    "B1": ("Y", "PY", "PN", "N"),
+    "B2": ("N", "PN", "Y", "PY"),
+    "B3": ("N", "PN", "Y", "PY"),
+}
+
+OPTIONS = {
+    ("D1", "A"): {
+        "1.1": ("Y", "PY", "WN", "SN", "NI"),
+        "1.2": ("Y", "PY", "WN", "SN", "NI", "NA"),
+        "1.3": ("Y", "PY", "N", "PN", "NI", "NA"),
+        "1.4": ("Y", "PY", "N", "PN", "NA"),
+    },
+    ("D1", "B"): {
+        "1.1": _YN,
+        "1.2": ("NA", "Y", "PY", "WN", "SN", "NI"),
+        "1.3": ("NA", "Y", "PY", "WN", "SN", "NI"),
+        "1.4": ("NA", "Y", "PY", "PN", "N", "NI"),
+        "1.5": ("Y", "PY", "PN", "N"),
+    },
+    "D2": {"2.1": _YN, "2.2": _YN, "2.3": _SW, "2.4": _SW, "2.5": _YN},
+    "D3": {"3.1": ("Y", "PY", "WN", "SY", "NI"), "3.2": _YN, "3.3": _YN, "3.4": _YN,
+           "3.5": _YN, "3.6": _YN, "3.7": _YN, "3.8": _YN},
+    "D4": {"4.1": _YN, "4.2": _YN, "4.3": _YN, "4.4": _YN, "4.5": _YN, "4.6": _YW,
+           "4.7": _YN, "4.8": _YN, "4.9": _YW, "4.10": _YW, "4.11": _YN},
+    "D5": {"5.1": _YN, "5.2": _YN, "5.3": _SW},
+    "D6": {"6.1": _YN, "6.2": _YN, "6.3": _YN, "6.4": _YN},
+}
+
+
+def _d4_missing(a):
+    triage = (a["4.1"], a["4.2"], a["4.3"])
+    return SELECT not in triage and any(v in ("PN", "N", "NI") for v in triage)
+
+
+def _d4_analysis_type(a):
+    if a["4.4"] in ("Y", "PY", "NI"):
+        return "COMPLETE_CASE"
+    if a["4.4"] in NO:
+        return "IMPUTATION_OR_OTHER"
+    return "NONE"
+
+
+def _d4_show_4_11(a):
+    analysis_type = _d4_analysis_type(a)
+    if analysis_type == "COMPLETE_CASE":
+        return a["4.6"] not in (SELECT, NA)
+    if analysis_type == "IMPUTATION_OR_OTHER":
+        return a["4.9"] in ("WN", "NI", "SN") or a["4.10"] in ("WN", "NI", "SN")
+    return False
+
+
+# Condições de visibilidade (mesma cascata da interface). Perguntas sem
+# condição estão sempre visíveis. Avaliadas em ordem, sobre respostas já
+# normalizadas das perguntas anteriores.
+VISIBILITY = {
+    ("D1", "A"): {
+        "1.2": lambda a: a["1.1"] in ("Y", "PY", "WN"),
+        "1.3": lambda a: a["1.1"] in ("Y", "PY", "WN"),
+    },
+    ("D1", "B"): {
+        "1.2": lambda a: a["1.1"] in YES,
+        "1.3": lambda a: a["1.1"] in YES and a["1.2"] in ("Y", "PY", "WN"),
+        "1.4": lambda a: a["1.1"] in ("N", "PN", "NI"),
+    },
+    "D2": {
+        "2.2": lambda a: a["2.1"] in ("N", "PN", "NI"),
+        "2.3": lambda a: a["2.2"] in ("N", "PN", "NI"),
+    },
+    "D3": {
+        "3.2": lambda a: a["3.1"] in YES,
+        "3.4": lambda a: a["3.3"] in YES,
+        "3.5": lambda a: a["3.4"] in ("Y", "PY", "NI"),
+        "3.6": lambda a: SERIOUS in d3_partial_risks(a),
+        "3.7": lambda a: a["3.6"] in ("N", "PN", "NI"),
+        "3.8": lambda a: a["3.7"] in ("N", "PN", "NI"),
+    },
+    "D4": {
+        "4.4": _d4_missing,
+        "4.5": lambda a: _d4_analysis_type(a) == "COMPLETE_CASE",
+        "4.6": lambda a: a["4.5"] in ("Y", "PY", "NI"),
+        "4.7": lambda a: _d4_analysis_type(a) == "IMPUTATION_OR_OTHER",
+        "4.8": lambda a: a["4.7"] in YES,
+        "4.9": lambda a: a["4.8"] in YES,
+        "4.10": lambda a: a["4.7"] in ("N", "PN", "NI"),
+        "4.11": _d4_show_4_11,
+    },
+    "D5": {
+        "5.2": lambda a: a["5.1"] in ("N", "PN", "NI"),
+        "5.3": lambda a: a["5.2"] in ("Y", "PY", "NI"),
+    },
+    "D6": {
+        "6.2": lambda a: a["6.1"] in ("N", "PN", "NI"),
+        "6.3": lambda a: a["6.1"] in ("N", "PN", "NI"),
+        "6.4": lambda a: a["6.1"] in ("N", "PN", "NI"),
+    },
+}
+
+
+def _key(domain, variant):
+    return (domain, variant) if domain == "D1" else domain
+
+
+def question_ids(domain, variant="A"):
+    return list(QUESTIONS[_key(domain, variant)])
+
+
+def question_options(domain, variant="A"):
+    return OPTIONS[_key(domain, variant)]
+
+
+def normalize_answers(domain, variant, answers):
+    """Completa as respostas do domínio como a interface as entregaria.
+
+    Perguntas ausentes viram "Selecione..." e perguntas que ficariam ocultas
+    recebem o valor padrão de ocultação, independentemente do que foi enviado.
+    """
+    key = _key(domain, variant)
+    rules = VISIBILITY[key]
+    a = {}
+    for q, hidden in QUESTIONS[key].items():
+        rule = rules.get(q)
+        if rule is None or rule(a):
+            a[q] = answers.get(q) or SELECT
+        else:
+            a[q] = hidden
+    return a
+
+
+def visible_questions(domain, variant, a):
+    """Perguntas que a interface exibe para respostas já normalizadas."""
+    rules = VISIBILITY[_key(domain, variant)]
+    return [q for q in a if q not in rules or rules[q](a)]
+
+
+# --- DOMÍNIO 1: CONFUSÃO ---
+# Cada variante tem atalhos ("ATALHO", early exit) que definem o risco sem
+# exigir todas as respostas, e o cálculo detalhado usado quando nenhum
+# atalho se aplica.
+def _d1_a_shortcut(a):
+    q1_1, q1_2, q1_3, q1_4 = a["1.1"], a["1.2"], a["1.3"], a["1.4"]
+
+    # 1. ATALHO CRÍTICO A: Falha Controle (SN/NI) + Viés Confirmado (1.4 Y/PY)
+    if q1_1 in ("SN", "NI") and q1_4 in YES:
+        return CRITICAL, "Determinante: Falha no controle (1.1) confirmada por controles negativos (1.4)."
+
+    # 2. ATALHO CRÍTICO B: Ajuste Excessivo (1.3 Y/PY) + Viés Confirmado (1.4 Y/PY)
+    if q1_1 in ("Y", "PY", "WN") and q1_3 in YES and q1_4 in YES:
+        return CRITICAL, "Determinante: Ajuste excessivo (1.3) confirmado por controles negativos (1.4)."
+
+    # 3. ATALHO SÉRIO: Erro de Medição Grave (Sem Ajuste Excessivo)
+    if q1_1 in ("Y", "PY", "WN") and q1_3 in ("N", "PN", "NI", "NA") and q1_2 in ("SN", "NI"):
+        return SERIOUS, "Determinante: Erro substancial na medição dos fatores (1.2)."
+
+    return None
+
+
+def _d1_a_detailed(a):
+    q1_1, q1_2, q1_3, q1_4 = a["1.1"], a["1.2"], a["1.3"], a["1.4"]
+
+    can_calculate = False
+    if q1_1 in ("SN", "NI") and q1_4 != SELECT:
+        can_calculate = True
+    elif q1_1 in ("Y", "PY", "WN") and SELECT not in (q1_2, q1_3, q1_4):
+        can_calculate = True
+
+    if not can_calculate:
+        return PENDING, WAITING
+
+    # CAMINHO A: FALHA NO CONTROLE (1.1 = SN/NI)
+    if q1_1 in ("SN", "NI"):
+        return SERIOUS, "Falha substancial no controle (1.1). Controles negativos não agravaram para crítico."
+
+    # CAMINHO B: CONTROLE TENTADO (1.1 = Y/PY/WN)
+    if q1_3 in YES:
+        if q1_2 in ("SN", "WN", "NI"):
+            return CRITICAL, "Ajuste excessivo (1.3) agravado por medição insuficiente (1.2)."
+        return SERIOUS, "Ajuste excessivo de variáveis (1.3), mitigado por boa medição."
+    if q1_4 in YES:
+        return SERIOUS, "Controles negativos sugerem viés, apesar do bom controle inicial."
+    if q1_2 in ("SN", "NI"):
+        return SERIOUS, "Erro substancial na medição dos fatores (1.2)."
+
+    if q1_2 == "WN" or q1_1 == "WN":
+        return MODERATE, "Preocupações menores com confusão residual ou erro de medição."
+    return LOW, "Baixo risco de viés devido a confusão."
+
+
+def _d1_b_shortcut(a):
+    # ATALHO DE RISCO CRÍTICO (Independente de 1.5): Viés de Colisor
+    if a["1.1"] in ("N", "PN", "NI") and a["1.4"] in YES:
+        return CRITICAL, "Determinante: Método inadequado com ajuste por variáveis pós-intervenção (Viés de Colisor)."
+    return None
+
+
+def _d1_b_detailed(a):
+    q1_1, q1_2, q1_3, q1_4, q1_5 = a["1.1"], a["1.2"], a["1.3"], a["1.4"], a["1.5"]
+
+    # Requer 1.5 preenchido
+    if q1_5 == SELECT:
+        return PENDING, WAITING
+
+    # --- CAMINHO A: MÉTODO INADEQUADO (1.1 N/PN/NI) ---
+    if q1_1 in ("N", "PN", "NI"):
+        if q1_4 == SELECT:
+            return PENDING, WAITING
+        if q1_5 in YES:
+            return CRITICAL, "Método inadequado e controles negativos indicam confusão não controlada."
+        return SERIOUS, "Método de análise inadequado para adesão (falha em ajustar confusão variável no tempo)."
+
+    # --- CAMINHO B: MÉTODO ADEQUADO (1.1 Y/PY) ---
+    if q1_1 not in YES:
+        return PENDING, WAITING
+    can_calc_b = q1_2 in ("SN", "NI") or (q1_2 in ("Y", "PY", "WN") and q1_3 != SELECT)
+    if not can_calc_b:
+        return PENDING, WAITING
+
+    # 1. CRÍTICO: Falhas Graves + Viés Confirmado
+    if q1_5 in YES and q1_2 in ("SN", "NI"):
+        return CRITICAL, "Falha substancial no controle confirmada por controles negativos."
+    if q1_5 in YES and q1_3 in ("SN", "NI"):
+        return CRITICAL, "Medição inválida confirmada por viés em controles negativos."
+
+    # 2. SÉRIO: Falhas Substanciais ou Viés Confirmado
+    if q1_2 in ("SN", "NI"):
+        return SERIOUS, "Falha substancial no controle de fatores de confusão."
+    if q1_3 in ("SN", "NI"):
+        return SERIOUS, "Falha substancial na medição dos fatores de confusão."
+    if q1_5 in YES:
+        return SERIOUS, "Controles negativos sugerem viés, apesar da metodologia aparentemente adequada."
+
+    # 3. MODERADO: Ressalvas em Controle (1.2 WN) ou Medição (1.3 WN)
+    if q1_2 == "WN" or q1_3 == "WN":
+        return MODERATE, "Ressalvas menores no controle ou medição dos fatores de confusão."
+
+    # 4. BAIXO
+    return LOW, "Baixo risco de viés (G-methods aplicados corretamente)."
+
+
+def d1_shortcut(variant, a):
+    """Resultado de um atalho do Domínio 1, ou None se nenhum se aplica."""
+    return _d1_a_shortcut(a) if variant == "A" else _d1_b_shortcut(a)
+
+
+def d1_detailed(variant, a):
+    """Cálculo detalhado do Domínio 1, ignorando os atalhos."""
+    return _d1_a_detailed(a) if variant == "A" else _d1_b_detailed(a)
+
+
+def score_d1(variant, a):
+    d1_risk, d1_reason = d1_shortcut(variant, a) or d1_detailed(variant, a)
+    # Garante que o texto exibido seja o padrão do ROBINS-I para Domínio 1
+    if d1_risk == LOW:
+        d1_risk = D1_LOW
+    return d1_risk, d1_reason
+
+
+# --- DOMÍNIO 2: CLASSIFICAÇÃO ---
+def d2_entry_context(a):
+    # SAFE: Problema resolvido ou inexistente.
+    # PARTIAL: Problema parcialmente resolvido (2.3 WY/NI).
+    # BAD: Problema não resolvido (2.3 N/PN).
+    q2_1, q2_2, q2_3 = a["2.1"], a["2.2"], a["2.3"]
+    if q2_1 in YES:
+        return "SAFE"
+    if q2_1 in ("N", "PN", "NI"):
+        if q2_2 in YES:
+            return "SAFE"
+        if q2_2 in ("N", "PN", "NI"):
+            if q2_3 == "SY":
+                return "SAFE"
+            if q2_3 in ("WY", "NI"):
+                return "PARTIAL"
+            if q2_3 in NO:
+                return "BAD"
+    return "PENDING"
+
+
+def score_d2(a):
+    q2_4, q2_5 = a["2.4"], a["2.5"]
+    entry_context = d2_entry_context(a)
+    inputs_missing = q2_4 == SELECT or q2_5 == SELECT
+    class_error = q2_5 in ("Y", "PY", "NI")
+
+    # --- VERIFICAÇÃO DE RISCO CRÍTICO (Prioridade Máxima) ---
+    if q2_4 == "SY" and class_error:
+        return CRITICAL, "Determinante: Classificação totalmente influenciada pelo desfecho com erros adicionais."
+    if entry_context in ("BAD", "PARTIAL") and q2_4 in ("SY", "WY", "NI"):
+        return CRITICAL, "Determinante: Problema de tempo imortal não resolvido somado à influência do desfecho."
+    if entry_context == "BAD" and class_error:
+        return CRITICAL, "Determinante: Problema de tempo imortal não resolvido com erros de classificação."
+
+    if inputs_missing:
+        return PENDING, WAITING
+
+    # --- VERIFICAÇÃO DE RISCO SÉRIO ---
+    if entry_context == "SAFE" and q2_4 in ("WY", "NI") and class_error:
+        return SERIOUS, "Combinação de possível influência do desfecho e erros de classificação."
+    if entry_context == "SAFE" and q2_4 == "SY":
+        return SERIOUS, "Classificação influenciada pelo desfecho (viés diferencial)."
+    if entry_context == "PARTIAL" and class_error:
+        return SERIOUS, "Correção apenas parcial do tempo imortal com erros de classificação."
+    if entry_context == "BAD":
+        return SERIOUS, "Problema de tempo imortal (intervenções indistinguíveis) não corrigido."
+
+    # --- VERIFICAÇÃO DE RISCO MODERADO ---
+    if entry_context == "SAFE" and class_error:
+        return MODERATE, "Erros de classificação não-diferenciais (provável viés para o nulo)."
+    if entry_context == "SAFE" and q2_4 in ("WY", "NI"):
+        return MODERATE, "Dúvida leve sobre influência do desfecho."
+    if entry_context == "PARTIAL":
+        return MODERATE, "Correção do tempo imortal foi apenas parcial (WY/NI em 2.3)."
+
+    # --- BAIXO RISCO ---
+    if entry_context == "SAFE" and q2_4 in NO and q2_5 in NO:
+        return LOW, "Intervenção bem definida e classificada sem viés."
+
+    # Fallback caso a lógica de entrada falhe (ex: entry_context ainda PENDING)
+    return PENDING, WAITING
+
+
+# --- DOMÍNIO 3: SELEÇÃO DOS PARTICIPANTES ---
+def d3_partial_risks(a):
+    """Riscos provisórios das partes A e B (decidem se o Bloco C é exibido)."""
+    q3_1, q3_2, q3_3, q3_4, q3_5 = a["3.1"], a["3.2"], a["3.3"], a["3.4"], a["3.5"]
+    temp_risk_a = "PENDING"
+    temp_risk_b = "PENDING"
+
+    if q3_1 == "SY": temp_risk_a = SERIOUS
+    elif q3_1 in ("WN", "NI"): temp_risk_a = MODERATE
+    elif q3_1 in YES:
+        if q3_2 in YES: temp_risk_a = MODERATE
+        elif q3_2 in ("N", "PN", "NI"): temp_risk_a = LOW
+
+    if q3_3 in ("N", "PN", "NI"): temp_risk_b = LOW
+    elif q3_3 in YES:
+        if q3_4 in NO: temp_risk_b = LOW
+        elif q3_4 == "NI": temp_risk_b = MODERATE
+        elif q3_4 in YES:
+            if q3_5 in YES: temp_risk_b = SERIOUS
+            elif q3_5 in ("N", "PN", "NI"): temp_risk_b = MODERATE
+
+    return temp_risk_a, temp_risk_b
+
+
+def score_d3(a):
+    q3_6, q3_7, q3_8 = a["3.6"], a["3.7"], a["3.8"]
+    temp_risk_a, temp_risk_b = d3_partial_risks(a)
+    is_provisional_serious = SERIOUS in (temp_risk_a, temp_risk_b)
+
+    # Verifica se o fluxo foi completado
+    flow_complete = False
+    if "PENDING" not in (temp_risk_a, temp_risk_b):
+        if not is_provisional_serious:
+            flow_complete = True
+        elif q3_6 in YES:
+            flow_complete = True
+        elif q3_6 in ("N", "PN", "NI") and q3_7 in YES:
+            flow_complete = True
+        elif q3_6 in ("N", "PN", "NI") and q3_7 in ("N", "PN", "NI") and q3_8 != SELECT:
+            flow_complete = True
+
+    if not flow_complete:
+        return PENDING, WAITING
+
+    # 1. Sem risco sério provisório: o pior entre A e B
+    if not is_provisional_serious:
+        if MODERATE in (temp_risk_a, temp_risk_b):
+            return MODERATE, f"Risco Moderado em A ({temp_risk_a}) ou B ({temp_risk_b})."
+        return LOW, "Baixo risco de viés de seleção."
+
+    # 2. Fluxo de correção (Serious)
+    base_reason = f"Viés Sério identificado (A: {temp_risk_a}, B: {temp_risk_b})."
+    if q3_6 in YES:
+        return MODERATE, base_reason + " Corrigido pela análise (3.6)."
+    if q3_7 in YES:
+        return MODERATE, base_reason + " Mitigado por análise de sensibilidade (3.7)."
+    if q3_8 in YES:
+        return CRITICAL, base_reason + " Viés severo confirmado e não corrigido."
+    return SERIOUS, base_reason + " Não corrigido, mas não considerado severo/crítico."
+
+
+# --- DOMÍNIO 4: DADOS FALTANTES ---
+D4_FALLBACK_REASON = "Combinação de respostas não mapeada (Risco padrão)."
+
+
+def _d4_ready(a):
+    q4_5, q4_6, q4_7, q4_8, q4_9, q4_10, q4_11 = (
+        a["4.5"], a["4.6"], a["4.7"], a["4.8"], a["4.9"], a["4.10"], a["4.11"])
+    triagem_complete = SELECT not in (a["4.1"], a["4.2"], a["4.3"])
+    analysis_type = _d4_analysis_type(a) if _d4_missing(a) else "NONE"
+
+    if triagem_complete and not _d4_missing(a):
+        return True
+    if analysis_type == "COMPLETE_CASE":
+        if q4_5 in NO:
+            return True
+        return q4_5 in ("Y", "PY", "NI") and q4_6 != SELECT and q4_11 != SELECT
+    if analysis_type == "IMPUTATION_OR_OTHER":
+        if q4_7 in YES:
+            if q4_8 in ("N", "PN", "NI"):
+                return True
+            if q4_8 in YES:
+                return q4_9 in YES or (q4_9 in ("WN", "NI", "SN") and q4_11 != SELECT)
+        elif q4_7 in ("N", "PN", "NI"):
+            return q4_10 in YES or (q4_10 in ("WN", "NI", "SN") and q4_11 != SELECT)
+    return False
+
+
+def score_d4(a):
+    if not _d4_ready(a):
+        return PENDING, "Responda as perguntas sequenciais..."
+
+    q4_5, q4_6, q4_7, q4_8, q4_9, q4_10, q4_11 = (
+        a["4.5"], a["4.6"], a["4.7"], a["4.8"], a["4.9"], a["4.10"], a["4.11"])
+    cc = _d4_analysis_type(a) == "COMPLETE_CASE"
+    imput = q4_7 in YES
+    other = q4_7 in ("N", "PN", "NI")
+    saved = q4_11 in YES
+    unsaved = q4_11 in NO
+
+    # 1. RISCO BAIXO
+    if not _d4_missing(a):
+        return LOW, "Dados completos (4.1-4.3)."
+    if cc and q4_5 in NO:
+        return LOW, "Exclusão não relacionada ao desfecho."
+    if cc and q4_6 in YES and saved:
+        return LOW, "Perda explicada pelo modelo e confirmada por evidência."
+    if imput and q4_8 in YES and q4_9 in YES:
+        return LOW, "Imputação apropriada com premissas válidas."
+    if other and q4_10 in YES:
+        return LOW, "Método alternativo apropriado."
+
+    # 2. RISCO MODERADO
+    if cc and q4_6 in YES and unsaved:
+        return MODERATE, "Modelo explica a perda, mas sem evidência adicional de isenção de viés."
+    if cc and q4_6 in ("WN", "NI") and saved:
+        return MODERATE, "Explicação duvidosa mitigada por evidência de não-viés."
+    if other and q4_10 in ("WN", "NI") and saved:
+        return MODERATE, "Método alternativo duvidoso mitigado por evidência."
+    if imput and q4_9 in ("WN", "NI") and saved:
+        return MODERATE, "Imputação duvidosa mitigada por evidência."
+
+    # 3. RISCO SÉRIO
+    if cc and q4_6 in ("WN", "NI") and unsaved:
+        return SERIOUS, "Perda não explicada satisfatoriamente e sem mitigação."
+    if cc and q4_6 == "SN" and saved:
+        return SERIOUS, "Falha grave no modelo mitigada parcialmente."
+    if imput and q4_8 in ("N", "PN", "NI"):
+        return SERIOUS, "Premissas MAR/MCAR não razoáveis."
+    if imput and q4_9 in ("WN", "NI") and unsaved:
+        return SERIOUS, "Imputação duvidosa não mitigada."
+    if imput and q4_9 == "SN" and saved:
+        return SERIOUS, "Imputação inválida mitigada parcialmente."
+    if other and q4_10 in ("WN", "NI") and unsaved:
+        return SERIOUS, "Método duvidoso não mitigado."
+    if other and q4_10 == "SN" and saved:
+        return SERIOUS, "Método inválido mitigado parcialmente."
+
+    # 4. RISCO CRÍTICO
+    if cc and q4_6 == "SN" and unsaved:
+        return CRITICAL, "Falha grave no modelo sem mitigação."
+    if imput and q4_9 == "SN" and unsaved:
+        return CRITICAL, "Imputação inválida sem mitigação."
+    if other and q4_10 == "SN" and unsaved:
+        return CRITICAL, "Método inválido sem mitigação."
+
+    # FALLBACK: padrão conservador para combinações não mapeadas
+    return SERIOUS, D4_FALLBACK_REASON
+
+
+# --- DOMÍNIO 5: MENSURAÇÃO DO DESFECHO ---
+def score_d5(a):
+    q5_1, q5_2, q5_3 = a["5.1"], a["5.2"], a["5.3"]
+
+    # Hard Stop: Risco Sério imediato
+    if q5_1 in YES:
+        return SERIOUS, "Métodos de medição diferentes entre grupos (5.1 Y/PY)."
+
+    ready_to_calc = q5_1 != SELECT and (
+        q5_2 in NO or (q5_2 in ("Y", "PY", "NI") and q5_3 != SELECT))
+    if not ready_to_calc:
+        return PENDING, WAITING
+
+    aware = q5_2 in ("Y", "PY", "NI")
+
+    # --- BAIXO RISCO ---
+    if q5_1 in NO and q5_2 in NO:
+        return LOW, "Medição comparável e avaliadores cegos/não influenciados."
+    if q5_1 in NO and aware and q5_3 in NO:
+        return LOW, "Avaliadores cientes, mas avaliação não influenciada."
+
+    # --- RISCO MODERADO ---
+    if q5_1 in NO and aware and q5_3 in ("WY", "NI"):
+        return MODERATE, "Possível influência do conhecimento da intervenção na avaliação (WY/NI)."
+    if q5_1 == "NI" and q5_2 in NO:
+        return MODERATE, "Sem informação sobre comparabilidade da medição (5.1 NI)."
+    if q5_1 == "NI" and aware and q5_3 in ("WY", "N", "PN", "NI"):
+        return MODERATE, "Sem informação sobre comparabilidade (5.1 NI) e possível influência."
+
+    # --- RISCO SÉRIO ---
+    if q5_1 in ("N", "PN", "NI") and aware and q5_3 == "SY":
+        return SERIOUS, "Avaliação do desfecho fortemente influenciada (SY) pelo conhecimento da intervenção."
+
+    return PENDING, WAITING
+
+
+# --- DOMÍNIO 6: SELEÇÃO DO RESULTADO RELATADO ---
+D6_FALLBACK_REASON = "Combinação de respostas inconclusiva (Risco Moderado por padrão)."
+
+
+def score_d6(a):
+    q6_1 = a["6.1"]
+    sub_answers = (a["6.2"], a["6.3"], a["6.4"])
+
+    # Caminho direto para Baixo Risco
+    if q6_1 in YES:
+        return LOW, "Resultado relatado conforme plano pré-determinado (6.1 Y/PY)."
+    if q6_1 not in ("N", "PN", "NI") or SELECT in sub_answers:
+        return PENDING, WAITING
+
+    count_ypy = sum(1 for v in sub_answers if v in YES)
+    count_ni = sum(1 for v in sub_answers if v == "NI")
+    count_npn = sum(1 for v in sub_answers if v in NO)
+
+    if count_ypy >= 2:
+        return CRITICAL, "Evidência forte de seleção de resultados em múltiplos aspectos (>=2 Y/PY)."
+    if count_ni == 3:
+        return SERIOUS, "Ausência total de informações sobre intenções de análise (Todos NI)."
+    if count_ypy == 1:
+        return SERIOUS, "Evidência de seleção de resultado em um aspecto (1 Y/PY)."
+    if count_npn == 3:
+        return LOW, "Sem evidência de seleção de resultados (Todos N/PN)."
+    if count_ni >= 1:
+        return MODERATE, "Falta de informação em pelo menos um aspecto (NI), sem evidência clara de seleção (Sem Y/PY)."
+
+    # Fallback de segurança
+    return MODERATE, D6_FALLBACK_REASON
+
+
+_SCORERS = {
+    "D2": score_d2,
+    "D3": score_d3,
+    "D4": score_d4,
+    "D5": score_d5,
+    "D6": score_d6,
+}
+
+
+def score_normalized(domain, variant, a):
+    """Pontua respostas já normalizadas (ver normalize_answers)."""
+    if domain == "D1":
+        return score_d1(variant, a)
+    return _SCORERS[domain](a)
+
+
+def score_domain(domain, variant, answers):
+    """Retorna (risco, justificativa) de um domínio.
+
+    `domain` é "D1".."D6", `variant` é "A" ou "B" (só afeta o Domínio 1) e
+    `answers` mapeia o número da pergunta ("1.1", "4.10", ...) à resposta.
+    """
+    return score_normalized(domain, variant, normalize_answers(domain, variant, answers))
+
+
+def _overall_from_counts(counts):
+    # Domínios "N/A" não entram em nenhuma regra
+    if counts[PENDING]:
+        return PENDING
+    if counts[CRITICAL] or counts[SERIOUS] >= 2:
+        return CRITICAL
+    if counts[SERIOUS] or counts[MODERATE] >= 3:
+        return SERIOUS
+    if counts[MODERATE]:
+        return MODERATE
+    return LOW
+
+
+def score_overall(risks):
+    """Julgamento global a partir dos riscos dos domínios."""
+    return _overall_from_counts(Counter(risks))
+
+
+class RiskTally:
+    """Risco de cada domínio e contagem por nível, para o julgamento global incremental.
+
+    `set()` só altera as contagens quando o risco do domínio muda e marca o
+    domínio como alterado; `overall` é recalculado (em tempo constante) apenas
+    se houver domínio alterado desde a última consulta.
+    """
+    __slots__ = ("risks", "counts", "dirty", "_overall")
+
+    def __init__(self, risks=None):
+        self.risks = {}
+        self.counts = Counter()
+        self.dirty = set()
+        self._overall = None
+        for domain, risk in (risks or {}).items():
+            self.set(domain, risk)
+
+    def set(self, domain, risk):
+        """Atualiza o risco do domínio; retorna True se ele mudou."""
+        if domain in self.risks:
+            old = self.risks[domain]
+            if old == risk:
+                return False
+            self.counts[old] -= 1
+        self.risks[domain] = risk
+        self.counts[risk] += 1
+        self.dirty.add(domain)
+        return True
+
+    @property
+    def overall(self):
+        if self.dirty or self._overall is None:
+            self._overall = _overall_from_counts(self.counts)
+            self.dirty.clear()
+        return self._overall
+
+
+def triage_blocks(b2, b3):
+    """B2 ou B3 Y/PY: risco crítico na triagem, a avaliação para aqui."""
+    return b2 in YES or b3 in YES
+
+
+def variant_from_c4(c4):
+    return "A" if "Não" in c4 else "B"
+
+
+def score_assessment(variant, answers):
+    """Pontua os seis domínios e o julgamento global de uma avaliação.
+
+    Retorna {"domains": {"D1": (risco, justificativa), ...}, "algo_risk": ...}.
+    """
+    domains = {d: score_domain(d, variant, answers) for d in DOMAINS}
+    return {
+        "domains": domains,
+        "algo_risk": score_overall(risk for risk, _ in domains.values()),
+    }
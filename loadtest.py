@@ -0,0 +1,390 @@
+"""Teste de carga do app.py com vários revisores simultâneos.
+
+Cada revisor simulado é uma sessão do Streamlit (streamlit.testing.AppTest)
+que preenche a avaliação como um revisor: uma interação (e um rerun) por
+resposta, na ordem do formulário, passando pela triagem (B1-B3), C4 e os seis
+domínios, respondendo só às perguntas visíveis em cada momento. Os roteiros
+cobrem:
+
+- variante A;
+- variante B pelo caminho do método adequado (1.1 = Y: 1.2 e 1.3) e do
+  inadequado (1.1 = N: 1.4);
+- o Bloco C do Domínio 3 (3.1 = SY: correção 3.6-3.8);
+- a trava da triagem (B2 = PY: a página para na triagem).
+
+As demais respostas são sorteadas com semente fixa por revisor, então duas
+execuções com os mesmos parâmetros fazem as mesmas interações.
+
+As sessões são divididas entre processos (--workers, como réplicas do
+servidor). Cada processo mantém todas as suas sessões abertas e as avança em
+rodízio, uma interação de cada vez, como o servidor intercala os reruns de
+sessões simultâneas. (O AppTest não pode rodar em várias threads do mesmo
+processo: ele troca o Runtime global do Streamlit a cada rerun.) O relatório
+(JSON) traz:
+
+- latência de cada rerun por etapa (média, p50, p95, p99, máximo);
+- CPU por interação (tempo de CPU dos processos / interações);
+- memória por sessão (RSS de cada processo com as suas sessões abertas,
+  menos o RSS antes delas, dividido pelo número de sessões);
+- o tempo de cada seção do app.py (telemetry.py), somado em todas as sessões.
+
+O AppTest recompila o script e o reexecuta inteiro a cada interação (não só
+o fragmento do domínio), e guarda a árvore de elementos de cada sessão:
+latência, CPU e memória são um limite superior do que o servidor gasta. Os
+números servem para comparar versões (--baseline) e para a proporção entre
+sessões e réplicas, não como medida absoluta.
+
+    python loadtest.py --sessions 50 --workers 4 -o carga.json
+    python loadtest.py --sessions 50 --workers 4 --baseline carga.json
+"""
+import argparse
+import concurrent.futures
+import datetime
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from engine import PENDING, SELECT
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+C4_A, C4_B = "Não (Intention-to-treat / Atribuição)", "Sim (Per-protocol / Adesão)"
+
+# Roteiros: variante e respostas fixas (as demais são sorteadas)
+TRIAGE_OK = {"b1": "Y", "b2": "N", "b3": "PN"}
+SCENARIOS = {
+    "variante_a": {"c4": C4_A, "answers": TRIAGE_OK},
+    "variante_b_metodo": {"c4": C4_B, "answers": {**TRIAGE_OK, "1.1": "Y", "1.2": "PY"}},
+    "variante_b_inadequado": {"c4": C4_B, "answers": {**TRIAGE_OK, "1.1": "N"}},
+    "d3_correcao": {"c4": C4_A, "answers": {**TRIAGE_OK, "3.1": "SY", "3.6": "N", "3.7": "PN"}},
+    "triagem_critica": {"c4": C4_A, "answers": {"b1": "Y", "b2": "PY"}},
+}
+# Proporção de cada roteiro entre os revisores (a triagem crítica é rara)
+MIX = ("variante_a", "variante_b_metodo", "d3_correcao", "variante_a", "variante_b_inadequado",
+       "variante_a", "variante_b_metodo", "d3_correcao", "variante_a", "triagem_critica")
+
+STEPS = ("abertura", "revisor", "triagem", "c4", "d1", "d2", "d3", "d4", "d5", "d6", "justificativa")
+# Número máximo de interações de uma sessão (proteção contra laços)
+MAX_INTERACTIONS = 80
+
+
+def _rss_bytes():
+    """RSS atual do processo (Linux); sem /proc, o pico (ru_maxrss)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _qid(widget_key):
+    # "qb1" -> "b1", "q1.1_B" -> "1.1"
+    return widget_key[1:].split("_")[0]
+
+
+def _step(qid):
+    return "triagem" if qid.startswith("b") else f"d{qid.split('.')[0]}"
+
+
+class Reviewer:
+    """Uma sessão do app preenchida por um roteiro."""
+
+    def __init__(self, index, scenario, seed, timeout):
+        self.index = index
+        self.scenario = scenario
+        self.script = SCENARIOS[scenario]
+        self.rng = random.Random(seed * 100003 + index)
+        self.timeout = timeout
+        self.app = None
+        self.timings = []  # (etapa, segundos)
+        self.answered = []
+        self.errors = []
+
+    def _run(self, step):
+        start = time.perf_counter()
+        self.app.run(timeout=self.timeout)
+        self.timings.append((step, time.perf_counter() - start))
+        self.errors += [e.value for e in self.app.exception]
+
+    def _answer(self, qid, options):
+        fixed = self.script["answers"].get(qid)
+        if fixed is not None:
+            return fixed
+        return self.rng.choice([o for o in options if o != SELECT])
+
+    def next_question(self):
+        """Primeira pergunta visível ainda sem resposta, na ordem da página."""
+        for sb in self.app.selectbox:
+            if sb.key and sb.key.startswith("q") and sb.value == SELECT:
+                return sb
+        return None
+
+    def interactions(self):
+        """Gerador: cada next() faz uma interação (um rerun) da sessão."""
+        from streamlit.testing.v1 import AppTest
+
+        self.app = AppTest.from_file(APP, default_timeout=self.timeout)
+        self._run("abertura")
+        yield
+        self.app.text_input(key="study_id").input(f"Carga {self.index:04d}")
+        self.app.text_input(key="reviewer").input(f"R{self.index:04d}")
+        self._run("revisor")
+        yield
+
+        c4_done = False
+        while len(self.timings) < MAX_INTERACTIONS and not self.errors:
+            sb = self.next_question()
+            qid = _qid(sb.key) if sb is not None else None
+            # C4 vem depois da triagem e antes do Domínio 1
+            if not c4_done and self.app.radio and (qid is None or not qid.startswith("b")):
+                c4_done = True
+                if self.app.radio(key="c4").value != self.script["c4"]:
+                    self.app.radio(key="c4").set_value(self.script["c4"])
+                    self._run("c4")
+                    yield
+                continue
+            if sb is None:
+                break
+            value = self._answer(qid, sb.options)
+            self.answered.append((qid, value))
+            sb.set_value(value)
+            self._run(_step(qid))
+            yield
+
+        if self.app.text_area and not self.errors:
+            self.app.text_area(key="manual_justification").input("Concordo com o algoritmo.")
+            self._run("justificativa")
+            yield
+
+    def play(self):
+        for _ in self.interactions():
+            pass
+        return self
+
+    def outcome(self):
+        """Resultado da sessão: se chegou ao fim do roteiro e o risco global."""
+        state = self.app.session_state
+        tally = state["risk_tally"] if "risk_tally" in state else None
+        overall = tally.overall if tally is not None else None
+        blocked = not self.app.radio
+        complete = not self.errors and (blocked or (overall not in (None, PENDING) and self.next_question() is None))
+        return {
+            "index": self.index,
+            "scenario": self.scenario,
+            "interactions": len(self.timings),
+            "block_c": any(qid in ("3.6", "3.7", "3.8") for qid, _ in self.answered),
+            "blocked": blocked,
+            "overall": overall,
+            "complete": complete,
+            "errors": self.errors,
+        }
+
+
+def run_worker(indices, seed=0, timeout=60):
+    """Executa as sessões `indices` neste processo, todas abertas ao mesmo tempo."""
+    import telemetry
+
+    # Sessão descartada: importações, caches do app e conexão com o banco
+    Reviewer(-1, "variante_a", seed, timeout).play()
+    gc.collect()
+    telemetry.REGISTRY.reset()
+    rss_before = _rss_bytes()
+    cpu_before = time.process_time()
+
+    reviewers = [Reviewer(i, MIX[i % len(MIX)], seed, timeout) for i in indices]
+    active = [r.interactions() for r in reviewers]
+    while active:
+        for it in list(active):
+            if next(it, StopIteration) is StopIteration:
+                active.remove(it)
+
+    cpu = time.process_time() - cpu_before
+    gc.collect()
+    rss_after = _rss_bytes()  # as sessões (reviewers) continuam abertas aqui
+    sections = {
+        row["seção"]: (row["execuções"], row["execuções"] * row["média (ms)"])
+        for row in telemetry.REGISTRY.snapshot()
+    }
+    return {
+        "sessions": len(reviewers),
+        "timings": [t for r in reviewers for t in r.timings],
+        "outcomes": [r.outcome() for r in reviewers],
+        "cpu_s": cpu,
+        "rss_before": rss_before,
+        "rss_after": rss_after,
+        "sections": sections,
+    }
+
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _latency(seconds):
+    ordered = sorted(seconds)
+    return {
+        "count": len(ordered),
+        "mean_ms": round(1000 * sum(ordered) / len(ordered), 2),
+        "p50_ms": round(1000 * _percentile(ordered, 0.50), 2),
+        "p95_ms": round(1000 * _percentile(ordered, 0.95), 2),
+        "p99_ms": round(1000 * _percentile(ordered, 0.99), 2),
+        "max_ms": round(1000 * ordered[-1], 2),
+    }
+
+
+def run(sessions, workers, seed=0, timeout=60):
+    """Distribui as sessões entre `workers` processos e agrega as medições."""
+    shards = [list(range(w, sessions, workers)) for w in range(workers)]
+    start = time.perf_counter()
+    results = []
+    # spawn: cada processo começa limpo, como uma réplica nova do servidor
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [pool.submit(run_worker, shard, seed, timeout) for shard in shards if shard]
+        for future in concurrent.futures.as_completed(futures):
+            results.append(future.result())
+            done = sum(r["sessions"] for r in results)
+            print(f"{done}/{sessions} sessões", file=sys.stderr)
+    elapsed = time.perf_counter() - start
+
+    interactions = [t for r in results for t in r["timings"]]
+    steps = {}
+    for step, seconds in interactions:
+        steps.setdefault(step, []).append(seconds)
+    cpu = sum(r["cpu_s"] for r in results)
+
+    outcomes = sorted((o for r in results for o in r["outcomes"]), key=lambda o: o["index"])
+    scenarios = {}
+    for o in outcomes:
+        scenarios.setdefault(o["scenario"], Counter()).update(
+            sessions=1, interactions=o["interactions"], complete=int(o["complete"]),
+            block_c=int(o["block_c"]), blocked=int(o["blocked"]), errors=len(o["errors"]),
+        )
+    sections = {}
+    for r in results:
+        for name, (count, total_ms) in r["sections"].items():
+            old = sections.get(name, (0, 0.0))
+            sections[name] = (old[0] + count, old[1] + total_ms)
+
+    return {
+        "sessions": sessions,
+        "workers": len(results),
+        "seed": seed,
+        "elapsed_s": round(elapsed, 2),
+        "interactions": len(interactions),
+        "throughput_per_s": round(len(interactions) / elapsed, 2),
+        "cpu": {
+            "total_s": round(cpu, 2),
+            "per_interaction_ms": round(1000 * cpu / len(interactions), 2),
+        },
+        "memory": {
+            "rss_before_mb": round(max(r["rss_before"] for r in results) / 2**20, 1),
+            "rss_after_mb": round(max(r["rss_after"] for r in results) / 2**20, 1),
+            "per_session_mb": round(
+                sum(r["rss_after"] - r["rss_before"] for r in results) / sessions / 2**20, 2
+            ),
+        },
+        "latency": {step: _latency(steps[step]) for step in STEPS if step in steps},
+        "latency_all": _latency([s for _, s in interactions]),
+        "scenarios": {name: dict(counts) for name, counts in sorted(scenarios.items())},
+        "sections": {
+            name: {"count": count, "mean_ms": round(total_ms / count, 2)}
+            for name, (count, total_ms) in sections.items()
+        },
+        "errors": [o for o in outcomes if o["errors"]],
+    }
+
+
+def compare(baseline, current, max_slowdown):
+    """Lista mudanças de comportamento e de desempenho entre duas execuções."""
+    behaviour, speed = [], []
+    for key in ("sessions", "workers", "seed"):
+        if baseline.get(key) != current[key]:
+            behaviour.append(f"parâmetro {key}: {baseline.get(key)} -> {current[key]}")
+    for name, cur in current["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(name, {})
+        for metric in ("sessions", "interactions", "complete", "block_c", "blocked", "errors"):
+            before, after = old.get(metric, 0), cur.get(metric, 0)
+            if before != after:
+                behaviour.append(f"{name}: {metric} {before} -> {after}")
+
+    def check(label, before, after, unit):
+        if before and after / before > max_slowdown:
+            speed.append(f"{label}: {before:.2f} -> {after:.2f} {unit} ({after / before:.1f}x)")
+
+    for step, cur in current["latency"].items():
+        old = baseline.get("latency", {}).get(step)
+        if old:
+            check(f"latência {step} p95", old["p95_ms"], cur["p95_ms"], "ms")
+    check("CPU por interação", baseline["cpu"]["per_interaction_ms"], current["cpu"]["per_interaction_ms"], "ms")
+    check("memória por sessão", baseline["memory"]["per_session_mb"], current["memory"]["per_session_mb"], "MB")
+    return behaviour, speed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga do app ROBINS-I com revisores simultâneos.")
+    parser.add_argument("-n", "--sessions", type=int, default=20, help="Revisores simulados (padrão: 20)")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Processos (padrão: número de CPUs, até o número de sessões)")
+    parser.add_argument("--seed", type=int, default=0, help="Semente das respostas sorteadas")
+    parser.add_argument("--timeout", type=float, default=60, help="Tempo máximo (s) de cada rerun")
+    parser.add_argument("-o", "--output", default="-", help="Arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparação")
+    parser.add_argument("--max-slowdown", type=float, default=1.5,
+                        help="Razão de tempo/memória acima da qual a comparação falha (padrão: 1.5)")
+    parser.add_argument("--db", help="Banco SQLite das avaliações (padrão: um arquivo temporário)")
+    args = parser.parse_args(argv)
+    workers = max(1, min(args.workers or os.cpu_count() or 1, args.sessions))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Herdado pelos processos: o store.py lê ROBINS_DB ao ser importado
+        os.environ["ROBINS_DB"] = args.db or os.path.join(tmp, "carga.sqlite3")
+        results = run(args.sessions, workers, args.seed, args.timeout)
+
+    report = {
+        "generated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        **results,
+    }
+    print(
+        f"{report['interactions']} interações em {report['elapsed_s']} s  "
+        f"p50 {report['latency_all']['p50_ms']} ms  p95 {report['latency_all']['p95_ms']} ms  "
+        f"CPU {report['cpu']['per_interaction_ms']} ms/interação  "
+        f"memória {report['memory']['per_session_mb']} MB/sessão",
+        file=sys.stderr,
+    )
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    status = 0
+    if report["errors"]:
+        print(f"ERRO: {len(report['errors'])} sessões com exceção no app.", file=sys.stderr)
+        status = 1
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            behaviour, speed = compare(json.load(f), report, args.max_slowdown)
+        for line in behaviour:
+            print(f"COMPORTAMENTO {line}", file=sys.stderr)
+        for line in speed:
+            print(f"DESEMPENHO {line}", file=sys.stderr)
+        if behaviour or speed:
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
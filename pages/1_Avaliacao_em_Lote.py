@@ -0,0 +1,70 @@
+import io
+
+import streamlit as st
+
+from batch import INPUT_COLUMNS, read_rows, score_rows, template_csv, write_csv
+
+# --- CONFIGURAÇÃO DA PÁGINA ---
+st.set_page_config(
+    page_title="ROBINS-I V2 - Avaliação em Lote",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+
+@st.cache_data(show_spinner="Pontuando avaliações...")
+def score_upload(data, name):
+    # Cache pelo conteúdo do arquivo: reruns da página não repontuam a planilha
+    fmt = "xlsx" if name.lower().endswith((".xlsx", ".xlsm")) else "csv"
+    out = io.StringIO()
+    preview = []
+
+    def keep_preview(results):
+        for result in results:
+            if len(preview) < 200:
+                preview.append(result)
+            yield result
+
+    count = write_csv(keep_preview(score_rows(read_rows(io.BytesIO(data), fmt))), out)
+    return count, preview, out.getvalue()
+
+
+st.title("Avaliação em Lote")
+st.markdown(
+    "Envie uma planilha com **uma linha por estudo/desfecho**. As respostas usam os mesmos "
+    "códigos do formulário (Y, PY, PN, N, NI, WN, SN, SY, WY, NA); células vazias contam como "
+    "não respondidas. Em `c4`, use **A** (Não / Intention-to-treat) ou **B** (Sim / Per-protocol)."
+)
+
+with st.expander("Colunas esperadas"):
+    st.code(", ".join(INPUT_COLUMNS))
+    st.download_button(
+        label="📥 Baixar modelo (.csv)",
+        data=template_csv().encode("utf-8-sig"),
+        file_name="ROBINS_I_modelo_lote.csv",
+        mime="text/csv"
+    )
+
+uploaded = st.file_uploader("Planilha de avaliações (.csv ou .xlsx)", type=["csv", "xlsx"])
+
+if uploaded is not None:
+    try:
+        count, preview, output = score_upload(uploaded.getvalue(), uploaded.name)
+    except Exception as e:
+        st.error(f"Erro ao processar a planilha: {e}")
+    else:
+        with_errors = sum(1 for r in preview if r.get("errors"))
+        st.success(f"{count} linhas pontuadas.")
+        if with_errors:
+            st.warning(f"{with_errors} das primeiras {len(preview)} linhas têm avisos de validação (coluna 'errors').")
+
+        st.dataframe(preview)
+        if count > len(preview):
+            st.caption(f"Exibindo as primeiras {len(preview)} linhas. O arquivo completo está no download.")
+
+        st.download_button(
+            label="📥 Baixar resultados (.csv)",
+            data=output.encode("utf-8-sig"),
+            file_name=f"ROBINS_I_lote_{uploaded.name.rsplit('.', 1)[0]}.csv",
+            mime="text/csv"
+        )
@@ -0,0 +1,215 @@
+import json
+import os
+import tempfile
+
+import streamlit as st
+
+import robvis
+from audit import KIND_NAMES, OVERALL, format_ts, replay
+from bulk_export import export
+from engine import RISK_LEVELS
+from store import default_store
+
+# --- CONFIGURAÇÃO DA PÁGINA ---
+st.set_page_config(
+    page_title="ROBINS-I V2 - Avaliações Salvas",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+store = default_store()
+
+st.title("Avaliações Salvas")
+st.markdown("As avaliações são salvas automaticamente a cada mudança, por **estudo, desfecho e revisor**.")
+
+ANY = "Todos"
+# Estudos por página do semáforo
+ROBVIS_ROWS = 50
+
+with st.sidebar:
+    st.header("Filtros")
+    study_id = st.selectbox("Estudo", [ANY] + store.distinct("study_id"))
+    outcome = st.selectbox("Desfecho", [ANY] + store.distinct("outcome"))
+    reviewer = st.selectbox("Revisor", [ANY] + store.distinct("reviewer"))
+    risk = st.selectbox("Risco final", [ANY] + list(RISK_LEVELS))
+
+rows = store.query(
+    study_id=None if study_id == ANY else study_id,
+    outcome=None if outcome == ANY else outcome,
+    reviewer=None if reviewer == ANY else reviewer,
+    risk=None if risk == ANY else risk,
+)
+
+st.caption(f"{len(rows)} de {len(store)} avaliações.")
+if not rows:
+    st.info("Nenhuma avaliação encontrada.")
+    st.stop()
+
+st.dataframe(rows, hide_index=True)
+
+# --- EXPORTAÇÃO EM LOTE ---
+with st.expander(f"📦 Exportar as {len(rows)} avaliações filtradas"):
+    export_formats = {
+        "Word consolidado (.docx)": "docx",
+        "PDF consolidado (.pdf)": "pdf",
+        "ZIP com um Word e um PDF por estudo (.zip)": "zip",
+        "Tabela para meta-análise (.parquet)": "parquet",
+        "Tabela para meta-análise, leitura mapeada (.arrow)": "arrow",
+    }
+    export_label = st.radio("Formato", list(export_formats))
+    fmt = export_formats[export_label]
+    if st.button("Gerar exportação"):
+        # Escrito direto em disco; só o arquivo final é lido para o download
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, f"ROBINS_I_lote.{fmt}")
+            with st.spinner("Gerando relatórios..."):
+                count = export(store, [r["id"] for r in rows], path)
+            with open(path, "rb") as f:
+                exported = f.read()
+        st.success(f"{count} avaliações exportadas.")
+        st.download_button(
+            label=f"📥 Baixar {export_label}",
+            data=exported,
+            file_name=f"ROBINS_I_lote.{fmt}",
+            mime={"docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                  "pdf": "application/pdf", "zip": "application/zip",
+                  "parquet": "application/vnd.apache.parquet",
+                  "arrow": "application/vnd.apache.arrow.file"}[fmt]
+        )
+
+# --- GRÁFICOS (ROBVIS) ---
+with st.expander("📊 Gráficos (robvis)"):
+    row_ids = tuple(r["id"] for r in rows)
+    if st.button("Gerar gráficos"):
+        st.session_state["robvis_matrix"] = (row_ids, *robvis.risk_matrix(store.iter_records(row_ids)))
+    # Gráficos de um filtro anterior não são mostrados
+    if st.session_state.get("robvis_matrix", (None,))[0] == row_ids:
+        _, matrix_labels, codes = st.session_state["robvis_matrix"]
+        summary = robvis.summary_plot(codes)
+        st.image(summary)
+        st.download_button("📥 Baixar resumo (.png)", summary, file_name="robvis_resumo.png", mime="image/png")
+
+        pages = max(1, -(-len(matrix_labels) // ROBVIS_ROWS))
+        page = st.number_input("Página do semáforo", 1, pages, 1) if pages > 1 else 1
+        start = (page - 1) * ROBVIS_ROWS
+        # Só a página escolhida é desenhada
+        traffic_light = next(robvis.traffic_light_pages(
+            matrix_labels[start:start + ROBVIS_ROWS], codes[start:start + ROBVIS_ROWS], rows_per_page=ROBVIS_ROWS
+        ))
+        st.image(traffic_light)
+        st.download_button(
+            f"📥 Baixar semáforo, página {page} (.png)", traffic_light,
+            file_name=f"robvis_semaforo_{page:03d}.png", mime="image/png"
+        )
+
+labels = {r["id"]: f"{r['study_id']} · {r['outcome']} · {r['reviewer'] or 'sem revisor'}" for r in rows}
+selected = st.selectbox("Abrir avaliação", list(labels), format_func=labels.get)
+record = store.get(selected)
+
+if record is not None:
+    col_a, col_b = st.columns([1, 2])
+    with col_a:
+        st.metric("Algoritmo", record["algo_risk"])
+        st.metric("Decisão do pesquisador", record["manual_risk"] or "—")
+        st.caption(f"Atualizada em {record['updated_at']} (UTC)")
+        st.download_button(
+            label="📥 Baixar avaliação (.json)",
+            data=json.dumps(record, ensure_ascii=False, indent=2).encode("utf-8"),
+            file_name=f"ROBINS_I_{record['study_id']}.json",
+            mime="application/json"
+        )
+        if st.button(
+            "✏️ Abrir no formulário",
+            help="Carrega as respostas desta avaliação na página principal; as alterações são salvas nela."
+        ):
+            st.session_state["load_assessment"] = record["id"]
+            st.switch_page("app.py")
+    with col_b:
+        st.markdown(f"**Justificativa:** {record['manual_justification'] or '—'}")
+        st.dataframe(
+            [
+                {"Domínio": name, "Risco": d["risk"], "Justificativa": d["reason"]}
+                for name, d in record["report_data"].get("domains", {}).items()
+            ],
+            hide_index=True,
+        )
+        with st.expander("Respostas"):
+            st.json(record["answers"])
+
+    # --- HISTÓRICO ---
+    with st.expander("🕘 Histórico de alterações"):
+        events = store.audit.history(record["study_id"], record["outcome"], record["reviewer"])
+        if not events:
+            st.info("Nenhuma alteração registrada para esta avaliação.")
+        else:
+            st.dataframe(
+                [
+                    {"Quando (UTC)": format_ts(e.ts), "Tipo": KIND_NAMES[e.kind], "Item": e.item,
+                     "Antes": e.old or "—", "Depois": e.new or "—"}
+                    for e in events
+                ],
+                hide_index=True,
+            )
+            # Estado depois do n-ésimo evento (eventos do mesmo segundo ficam separados)
+            step = st.select_slider(
+                "Reconstruir o estado depois de", range(1, len(events) + 1), value=len(events),
+                format_func=lambda n: f"{format_ts(events[n - 1].ts)} · {events[n - 1].item}",
+                key=f"history_step_{record['id']}",
+            )
+            past = replay(events[:step])
+            st.markdown(
+                f"**Global (algoritmo):** {past['risks'].get(OVERALL, '—')} · "
+                f"**Decisão do pesquisador:** {past['manual'].get('manual_risk') or '—'}"
+            )
+            st.dataframe(
+                [{"Domínio": d, "Risco": r} for d, r in past["risks"].items() if d != OVERALL], hide_index=True
+            )
+            st.caption("Respostas naquele momento")
+            st.json(past["answers"], expanded=False)
+
+# --- MODELOS ---
+with st.expander("📋 Modelos e clones"):
+    st.caption(
+        "Um modelo guarda as respostas de uma avaliação para estudos parecidos (mesmo registro ou "
+        "grupo de pesquisa). Cada clone guarda só o que difere do modelo; no formulário, use "
+        "**Modelos** na barra lateral para partir de um modelo."
+    )
+    if record is not None:
+        col_name, col_save = st.columns([3, 1])
+        template_name = col_name.text_input("Nome do modelo", value=f"{record['study_id']} · {record['outcome']}")
+        if col_save.button("Salvar como modelo"):
+            try:
+                store.save_template(
+                    template_name, record["report_data"], record["answers"], record["variant"], source_id=record["id"]
+                )
+                st.success(f"Modelo '{template_name.strip()}' criado.")
+            except ValueError as e:
+                st.warning(str(e))
+
+    templates = {t["id"]: t for t in store.templates()}
+    if templates:
+        st.dataframe(list(templates.values()), hide_index=True)
+        template_id = st.selectbox("Modelo", list(templates), format_func=lambda i: templates[i]["name"])
+        template = store.get_template(template_id)
+        new_ids = st.text_area("Novos estudos (um ID por linha)", placeholder="Silva 2021\nSouza 2022")
+        col_outcome, col_reviewer = st.columns(2)
+        clone_outcome = col_outcome.text_input("Desfecho", value=template["report_data"].get("outcome", ""))
+        clone_reviewer = col_reviewer.text_input("Revisor", value="")
+        col_clone, col_delete = st.columns(2)
+        if col_clone.button("Clonar"):
+            created, errors = 0, []
+            for new_id in dict.fromkeys(line.strip() for line in new_ids.splitlines() if line.strip()):
+                try:
+                    store.clone(template_id, new_id, clone_outcome, clone_reviewer)
+                    created += 1
+                except ValueError as e:
+                    errors.append(str(e))
+            if created:
+                st.success(f"{created} avaliações clonadas de '{templates[template_id]['name']}'.")
+            for error in errors:
+                st.warning(error)
+        if col_delete.button(
+            "Apagar modelo", help="Os clones continuam salvos, com o conteúdo completo."
+        ):
+            store.delete_template(template_id)
+            st.rerun()
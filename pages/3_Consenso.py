@@ -0,0 +1,99 @@
+import streamlit as st
+
+import catalog
+from consensus import compare
+from store import default_store
+
+# --- CONFIGURAÇÃO DA PÁGINA ---
+st.set_page_config(
+    page_title="ROBINS-I V2 - Consenso entre Revisores",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+store = default_store()
+
+ANY = "Todos"
+
+
+@st.cache_data(max_entries=8, show_spinner="Comparando avaliações...")
+def cached_comparison(reviewer_a, reviewer_b, outcome, version):
+    # `version` muda quando alguma avaliação dos dois revisores é salva
+    return compare(store, reviewer_a, reviewer_b, outcome)
+
+
+st.title("Consenso entre Revisores")
+st.markdown(
+    "Cada revisor preenche a avaliação **separadamente**, com o seu nome no campo *Revisor* da "
+    "avaliação. Aqui as avaliações de dois revisores são pareadas por **estudo e desfecho**, "
+    "com as divergências de resposta e de risco e a concordância (kappa de Cohen)."
+)
+
+reviewers = store.distinct("reviewer")
+if len(reviewers) < 2:
+    st.info("São necessárias avaliações salvas por pelo menos dois revisores.")
+    st.stop()
+
+with st.sidebar:
+    st.header("Revisores")
+    reviewer_a = st.selectbox("Revisor A", reviewers, format_func=lambda r: r or "sem revisor")
+    reviewer_b = st.selectbox(
+        "Revisor B", [r for r in reviewers if r != reviewer_a], format_func=lambda r: r or "sem revisor"
+    )
+    outcome = st.selectbox("Desfecho", [ANY] + store.distinct("outcome"))
+    outcome = None if outcome == ANY else outcome
+
+comparison = cached_comparison(reviewer_a, reviewer_b, outcome, store.version((reviewer_a, reviewer_b), outcome))
+only_a, only_b = comparison.only
+st.caption(
+    f"{len(comparison)} estudos/desfechos avaliados pelos dois revisores · "
+    f"{only_a} só por {reviewer_a or 'sem revisor'} · {only_b} só por {reviewer_b or 'sem revisor'}."
+)
+if not len(comparison):
+    st.info("Nenhum estudo/desfecho foi avaliado pelos dois revisores.")
+    st.stop()
+
+# --- CONCORDÂNCIA ---
+st.subheader("Concordância")
+agreement = comparison.agreement()
+totals = {row["item"]: row for row in agreement if row["item"].startswith("Tod")}
+col_q, col_d = st.columns(2)
+for col, label in ((col_q, "Todas as perguntas"), (col_d, "Todos os domínios")):
+    row = totals[label]
+    kappa = "—" if row["kappa"] is None else f"{row['kappa']:.2f}"
+    col.metric(label, f"κ {kappa}", f"{row['concordância (%)'] or 0:.1f}% de concordância", delta_color="off")
+with st.expander("Concordância por pergunta e por domínio"):
+    st.dataframe(agreement, hide_index=True)
+
+# --- DIVERGÊNCIAS ---
+st.subheader("Divergências")
+disagreeing = comparison.disagreeing()
+st.caption(f"{len(disagreeing)} de {len(comparison)} estudos/desfechos com alguma divergência.")
+if not len(disagreeing):
+    st.success("Os dois revisores concordam em todas as respostas e riscos.")
+    st.stop()
+
+summary = comparison.disagreements()
+st.dataframe([summary[i] for i in disagreeing], hide_index=True)
+
+labels = {int(i): f"{comparison.keys[i][0]} · {comparison.keys[i][1]}" for i in disagreeing}
+selected = st.selectbox("Reconciliar", list(labels), format_func=labels.get)
+questions = catalog.load()
+variant = comparison.variants[0][selected]
+st.dataframe(
+    [
+        {
+            "Tipo": kind,
+            "Item": item,
+            "Pergunta": questions[catalog.key(item, variant)].label if kind == "Pergunta" else "",
+            reviewer_a or "sem revisor": a,
+            reviewer_b or "sem revisor": b,
+        }
+        for kind, item, a, b in comparison.differences(selected)
+    ],
+    hide_index=True,
+)
+st.caption(
+    "Para registrar o consenso, preencha a avaliação com as respostas acordadas e o revisor "
+    "**Consenso**; ela é salva separadamente das avaliações dos dois revisores."
+)
@@ -0,0 +1,95 @@
+import streamlit as st
+
+from engine import CRITICAL, D1_LOW, DOMAIN_NAMES, DOMAINS, LOW, MODERATE, PENDING, SERIOUS
+from store import default_store
+
+# --- CONFIGURAÇÃO DA PÁGINA ---
+st.set_page_config(
+    page_title="ROBINS-I V2 - Painel da Revisão",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+store = default_store()
+
+ANY = "Todos"
+# Ordem das colunas de risco nas tabelas
+RISK_ORDER = (LOW, D1_LOW, MODERATE, SERIOUS, CRITICAL, PENDING, "N/A")
+# Linhas da lista de estudos (o total vem das contagens)
+DRILL_LIMIT = 500
+DIMENSION_LABELS = {"final": "Risco final", "algo": "Algoritmo", **DOMAIN_NAMES}
+
+
+def risk_order(risk):
+    return (RISK_ORDER.index(risk) if risk in RISK_ORDER else len(RISK_ORDER), risk)
+
+
+def pivot(rows, by, labels=None):
+    """Linhas {by, risk, n} -> uma linha por valor de `by`, uma coluna por risco."""
+    risks = sorted({r["risk"] for r in rows}, key=risk_order)
+    table = {}
+    for r in rows:
+        table.setdefault(r[by], dict.fromkeys(risks, 0))[r["risk"]] = r["n"]
+    out = []
+    for key, counts in table.items():
+        out.append({by: (labels or {}).get(key, key) or "—", **counts, "total": sum(counts.values())})
+    return out
+
+
+st.title("Painel da Revisão")
+st.markdown(
+    "Contagens de todas as avaliações salvas por **risco final**, **domínio** e **revisor**. "
+    "As contagens são atualizadas a cada gravação, sem percorrer as avaliações."
+)
+
+with st.sidebar:
+    st.header("Filtros")
+    reviewer = st.selectbox("Revisor", [ANY] + store.distinct("reviewer"))
+    outcome = st.selectbox("Desfecho", [ANY] + store.distinct("outcome"))
+filters = {
+    "reviewer": None if reviewer == ANY else reviewer,
+    "outcome": None if outcome == ANY else outcome,
+}
+
+by_dimension = store.counts(tuple(DIMENSION_LABELS), by="dimension", **filters)
+final = {r["risk"]: r["n"] for r in by_dimension if r["dimension"] == "final"}
+total = sum(final.values())
+if not total:
+    st.info("Nenhuma avaliação salva com esses filtros.")
+    st.stop()
+
+# --- RESUMO ---
+columns = st.columns(1 + len(final))
+columns[0].metric("Avaliações", total)
+for column, risk in zip(columns[1:], sorted(final, key=risk_order)):
+    column.metric(risk, final[risk], f"{100 * final[risk] / total:.0f}%", delta_color="off")
+
+# --- POR DOMÍNIO E POR REVISOR ---
+col_domains, col_reviewers = st.columns(2)
+with col_domains:
+    st.subheader("Risco por domínio")
+    domain_table = pivot(by_dimension, "dimension", DIMENSION_LABELS)
+    st.dataframe(domain_table, hide_index=True)
+    st.bar_chart(domain_table, x="dimension", y=[k for k in domain_table[0] if k not in ("dimension", "total")], horizontal=True)
+with col_reviewers:
+    st.subheader("Risco final por revisor")
+    reviewer_table = pivot(store.counts(("final",), by="reviewer", **filters), "reviewer")
+    st.dataframe(reviewer_table, hide_index=True)
+    st.bar_chart(reviewer_table, x="reviewer", y=[k for k in reviewer_table[0] if k not in ("reviewer", "total")], horizontal=True)
+
+# --- LISTA DE ESTUDOS (drill-down) ---
+st.subheader("Estudos por risco")
+col_dim, col_risk = st.columns(2)
+dimensions = {DIMENSION_LABELS["final"]: "final", **{f"{d} · {DOMAIN_NAMES[d]}": d for d in DOMAINS}}
+dimension = dimensions[col_dim.selectbox("Dimensão", list(dimensions))]
+available = {r["risk"]: r["n"] for r in by_dimension if r["dimension"] == dimension}
+risk = col_risk.selectbox("Risco", sorted(available, key=risk_order))
+
+if risk is not None:
+    if dimension == "final":
+        rows = store.query(risk=risk, limit=DRILL_LIMIT, **filters)
+    else:
+        rows = store.query(domain_risks={dimension: risk}, limit=DRILL_LIMIT, **filters)
+    shown = f"as primeiras {len(rows)} de " if available[risk] > len(rows) else ""
+    st.caption(f"Mostrando {shown}{available[risk]} avaliações. Abra uma delas na página Avaliações Salvas.")
+    st.dataframe(rows, hide_index=True)
@@ -0,0 +1,25 @@
+"""Cores dos níveis de risco, compartilhadas pela interface e pelos gráficos."""
+
+
+def get_risk_color(risk, domain_name=""):
+    r = str(risk).upper()
+    d = str(domain_name).upper()
+    
+    # 1. Checagem de Baixo Risco
+    if "LOW" in r or "BAIXO RISCO" in r:
+        # REGRA ESPECIAL: Domínio 1 é sempre Amarelo (exceto preocupações)
+        if "DOMÍNIO 1" in d:
+            return "#D4AC0D"  # Amarelo Escuro
+        # REGRA PADRÃO: Outros domínios (2, 3, etc) são Verdes
+        return "#27AE60"      # Verde Esmeralda
+        
+    # 2. Outros Níveis de Risco
+    elif "MODERATE" in r or "MODERADO" in r: 
+        return "#E67E22"  # Laranja
+    elif "SERIOUS" in r or "SÉRIO" in r or "SERIO" in r: 
+        return "#C0392B"  # Vermelho
+    elif "CRITICAL" in r or "CRÍTICO" in r or "CRITICO" in r: 
+        return "#000000"  # Preto
+        
+    # 3. Padrão (Pendente ou erro)
+    return "gray"
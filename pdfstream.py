@@ -0,0 +1,536 @@
+"""PDF escrito em fluxo, com fonte Unicode (TrueType) embutida.
+
+O FPDF (PyFPDF 1.7) monta o documento inteiro em memória e, com as fontes
+padrão, só aceita latin-1: "≥" e emojis viram "?". StreamPDF tem a mesma
+interface usada pelos relatórios (add_page, set_font, cell, multi_cell, ln,
+get_string_width, image, header), mas:
+
+- cada página é comprimida e gravada no destino (arquivo ou stream) assim
+  que a seguinte começa; em memória ficam só a página atual e os offsets
+  dos objetos já escritos;
+- o texto usa uma fonte TrueType (DejaVu Sans, Arial...) em Identity-H, e
+  qualquer caractere do plano básico que a fonte tenha sai como está; os que
+  ela não tem viram "�". As métricas de cada fonte são lidas uma vez por
+  processo; o subconjunto embutido (só os glifos usados) é montado no fim do
+  documento, uma vez por fonte, e guardado em cache pelo conjunto de
+  caracteres, então relatórios parecidos reaproveitam o mesmo subconjunto;
+- sem fonte TrueType disponível, cai para a Helvetica padrão do PDF
+  (cp1252), com as larguras do próprio FPDF.
+
+A fonte pode ser indicada por ROBINS_PDF_FONT e ROBINS_PDF_FONT_BOLD (ou
+copiada para fonts/ ao lado do app); senão é procurada nos diretórios usuais
+do sistema.
+
+    with StreamPDF("relatorio.pdf") as pdf:
+        pdf.add_page()
+        pdf.set_font("Arial", "B", 12)
+        pdf.multi_cell(0, 8, "Risco ≥ moderado")
+"""
+import datetime
+import functools
+import io
+import os
+import warnings
+import zlib
+
+from fpdf.fonts import fpdf_charwidths
+from fpdf.ttfonts import TTFontFile
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_WINDOWS_FONTS = os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts")
+
+# (regular, negrito), na ordem de preferência
+FONT_CANDIDATES = [
+    (os.path.join(_HERE, "fonts", "DejaVuSans.ttf"), os.path.join(_HERE, "fonts", "DejaVuSans-Bold.ttf")),
+    ("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"),
+    ("/usr/share/fonts/dejavu/DejaVuSans.ttf", "/usr/share/fonts/dejavu/DejaVuSans-Bold.ttf"),
+    ("/usr/share/fonts/TTF/DejaVuSans.ttf", "/usr/share/fonts/TTF/DejaVuSans-Bold.ttf"),
+    (os.path.join(_WINDOWS_FONTS, "arial.ttf"), os.path.join(_WINDOWS_FONTS, "arialbd.ttf")),
+    ("/System/Library/Fonts/Supplemental/Arial.ttf", "/System/Library/Fonts/Supplemental/Arial Bold.ttf"),
+    ("/Library/Fonts/Arial.ttf", "/Library/Fonts/Arial Bold.ttf"),
+]
+
+# A4 retrato, em mm, com as margens padrão do FPDF
+PAGE_WIDTH, PAGE_HEIGHT = 210.0, 297.0
+MARGIN = 10.0
+BOTTOM_MARGIN = 20.0
+K = 72 / 25.4  # pontos por mm
+
+REPLACEMENT = "\ufffd"
+
+
+def font_paths():
+    """(regular, negrito) da fonte TrueType a usar; (None, None) se nenhuma existir."""
+    regular = os.environ.get("ROBINS_PDF_FONT")
+    if regular and os.path.exists(regular):
+        bold = os.environ.get("ROBINS_PDF_FONT_BOLD")
+        return regular, bold if bold and os.path.exists(bold) else regular
+    for regular, bold in FONT_CANDIDATES:
+        if os.path.exists(regular):
+            return regular, bold if os.path.exists(bold) else regular
+    return None, None
+
+
+# --- FONTES ---
+class _Fallback(dict):
+    """Tabela de str.translate: caractere ausente da fonte -> substituto (memoizada)."""
+
+    def __init__(self, has, replacement):
+        super().__init__()
+        self.has = has
+        self.replacement = replacement
+
+    def __missing__(self, cp):
+        if cp in (9, 10, 13):
+            value = " "
+        elif cp < 32:
+            value = ""
+        else:
+            value = cp if self.has(cp) else self.replacement
+        self[cp] = value
+        return value
+
+
+class _TrueTypeFont:
+    """Métricas de uma fonte TrueType (lidas uma vez) e o texto em Identity-H."""
+    unicode = True
+
+    def __init__(self, path):
+        ttf = TTFontFile()
+        with warnings.catch_warnings():
+            # O leitor do FPDF avisa de entradas do cmap que ele mesmo ignora
+            warnings.simplefilter("ignore")
+            ttf.getMetrics(path)
+        self.path = path
+        self.name = "".join(c for c in ttf.fullName if c not in " ()")
+        # Largura (milésimos do corpo) por código; 0 = ausente, 65535 = largura zero
+        self.widths = [0 if w == 65535 else w for w in ttf.charWidths]
+        self.widths[0] = 0
+        self.present = bytearray(1 if w else 0 for w in ttf.charWidths)
+        self.present[0] = 0
+        self.descriptor = {
+            "Ascent": round(ttf.ascent),
+            "Descent": round(ttf.descent),
+            "CapHeight": round(ttf.capHeight),
+            # Não simbólica (32) e sim com caracteres latinos padrão (4)
+            "Flags": (ttf.flags | 4) & ~32,
+            "FontBBox": "[%d %d %d %d]" % tuple(round(v) for v in ttf.bbox),
+            "ItalicAngle": int(ttf.italicAngle),
+            "StemV": round(ttf.stemV),
+            "MissingWidth": round(ttf.defaultWidth),
+        }
+        replacement = REPLACEMENT if self.has(ord(REPLACEMENT)) else "?"
+        self.fallback = _Fallback(self.has, replacement)
+
+    def has(self, cp):
+        return cp < 0x10000 and self.present[cp]
+
+    def prepare(self, text):
+        return str(text).translate(self.fallback)
+
+    def string_width(self, text):
+        widths = self.widths
+        return sum(widths[ord(c)] for c in text)
+
+    def hex(self, text):
+        return text.encode("utf-16-be").hex().upper()
+
+
+class _CoreFont:
+    """Helvetica padrão do PDF (sem embutir), codificada em cp1252."""
+    unicode = False
+
+    def __init__(self, bold):
+        self.name = "Helvetica-Bold" if bold else "Helvetica"
+        table = fpdf_charwidths["helveticaB" if bold else "helvetica"]
+        self.widths = {}
+        for char, width in table.items():
+            try:
+                self.widths[char.encode("latin-1").decode("cp1252")] = width
+            except UnicodeDecodeError:
+                pass
+        self.fallback = _Fallback(lambda cp: chr(cp) in self.widths, "?")
+
+    def prepare(self, text):
+        return str(text).translate(self.fallback)
+
+    def string_width(self, text):
+        widths = self.widths
+        return sum(widths.get(c, 0) for c in text)
+
+    def hex(self, text):
+        return text.encode("cp1252", "replace").hex().upper()
+
+
+@functools.lru_cache(maxsize=None)
+def _load_font(path, bold):
+    return _TrueTypeFont(path) if path else _CoreFont(bold)
+
+
+@functools.lru_cache(maxsize=32)
+def _subset(path, chars):
+    """(programa TrueType comprimido, tamanho original, CIDToGIDMap comprimido)."""
+    ttf = TTFontFile()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        program = ttf.makeSubset(path, sorted(ord(c) for c in chars))
+    cid_to_gid = bytearray(2 * 0x10000)
+    for cp, glyph in ttf.codeToGlyph.items():
+        if cp < 0x10000:
+            cid_to_gid[2 * cp] = glyph >> 8
+            cid_to_gid[2 * cp + 1] = glyph & 0xFF
+    return zlib.compress(program), len(program), zlib.compress(bytes(cid_to_gid))
+
+
+# --- IMAGENS ---
+@functools.lru_cache(maxsize=8)
+def _load_image(path, mtime):
+    """(largura, altura, espaço de cor, dados comprimidos, máscara alfa comprimida ou None)."""
+    from PIL import Image
+
+    with Image.open(path) as im:
+        im.load()
+        alpha = None
+        if "A" in im.getbands() or "transparency" in im.info:
+            im = im.convert("RGBA")
+            alpha = zlib.compress(im.getchannel("A").tobytes())
+        im = im.convert("L" if im.mode in ("1", "L", "LA") else "RGB")
+        colorspace = "DeviceGray" if im.mode == "L" else "DeviceRGB"
+        return im.width, im.height, colorspace, zlib.compress(im.tobytes()), alpha
+
+
+def _date():
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return now.strftime("D:%Y%m%d%H%M%SZ")
+
+
+class StreamPDF:
+    """Escritor de PDF em fluxo com a interface de desenho do FPDF (unidades em mm).
+
+    `out` é um caminho ou um stream binário (BytesIO, arquivo, resposta
+    HTTP). O documento é finalizado por close() (ou ao sair do `with`).
+    """
+
+    def __init__(self, out=None):
+        self._own = isinstance(out, (str, os.PathLike))
+        self._out = open(out, "wb") if self._own else (out if out is not None else io.BytesIO())
+        self._pos = 0
+        self._offsets = [None]
+        self._pages = []
+        self._fonts = {}
+        self._images = {}
+        self._content = None
+        self._closed = False
+
+        self.page = 0
+        self.w, self.h = PAGE_WIDTH, PAGE_HEIGHT
+        self.l_margin = self.t_margin = self.r_margin = MARGIN
+        self.c_margin = MARGIN / 10
+        self.page_break_trigger = self.h - BOTTOM_MARGIN
+        self.x, self.y = self.l_margin, self.t_margin
+        self.lasth = 0
+        self.font_size_pt = 12
+        self.font_size = self.font_size_pt / K
+        self._font = None
+        self._font_key = None
+        self._in_header = False
+
+        self._regular_path, self._bold_path = font_paths()
+        self._pages_obj = self._reserve()
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    # --- ESTRUTURA DO ARQUIVO ---
+    def _write(self, data):
+        self._out.write(data)
+        self._pos += len(data)
+
+    def _reserve(self):
+        self._offsets.append(None)
+        return len(self._offsets) - 1
+
+    def _obj(self, num, body, stream=None):
+        self._offsets[num] = self._pos
+        data = f"{num} 0 obj\n{body}\n".encode("latin-1")
+        if stream is not None:
+            data += b"stream\n" + stream + b"\nendstream\n"
+        self._write(data + b"endobj\n")
+
+    def _new_obj(self, body, stream=None):
+        num = self._reserve()
+        self._obj(num, body, stream)
+        return num
+
+    def _emit(self, operators):
+        self._content.append(operators)
+
+    # --- PÁGINAS ---
+    def header(self):
+        """Chamado no início de cada página (sobrescrito pelos relatórios)."""
+
+    def footer(self):
+        """Chamado no fim de cada página."""
+
+    def add_page(self):
+        font_key, size = self._font_key, self.font_size_pt
+        if self._content is not None:
+            self._end_page()
+        self.page += 1
+        self._content = []
+        self.x, self.y = self.l_margin, self.t_margin
+        self._in_header = True
+        self.header()
+        self._in_header = False
+        # O cabeçalho não muda a fonte do corpo
+        if font_key is not None:
+            self.set_font("", font_key, size)
+
+    def _end_page(self):
+        self.footer()
+        stream = zlib.compress("\n".join(self._content).encode("latin-1"))
+        self._content = None
+        content = self._new_obj(f"<</Filter /FlateDecode /Length {len(stream)}>>", stream)
+        fonts = " ".join(f"/{name} {num} 0 R" for name, num, _ in self._fonts.values())
+        images = " ".join(f"/{name} {num} 0 R" for name, num, _, _ in self._images.values())
+        self._pages.append(self._new_obj(
+            f"<</Type /Page /Parent {self._pages_obj} 0 R "
+            f"/MediaBox [0 0 {self.w * K:.2f} {self.h * K:.2f}] "
+            f"/Resources <</ProcSet [/PDF /Text /ImageB /ImageC] /Font <<{fonts}>> /XObject <<{images}>>>> "
+            f"/Contents {content} 0 R>>"
+        ))
+
+    # --- TEXTO ---
+    def set_font(self, family, style="", size=0):
+        """`family` é ignorada: o texto usa sempre a fonte Unicode (ou a Helvetica)."""
+        bold = "B" in (style or "").upper()
+        path = self._bold_path if bold else self._regular_path
+        key = "B" if bold else ""
+        if key not in self._fonts:
+            self._fonts[key] = (f"F{len(self._fonts) + 1}", self._reserve(), set())
+        self._font = _load_font(path, bold)
+        self._font_key = key
+        if size:
+            self.font_size_pt = size
+            self.font_size = size / K
+
+    def get_string_width(self, text):
+        return self._font.string_width(self._font.prepare(text)) * self.font_size / 1000
+
+    def _text(self, x, y, text, spacing=0.0):
+        """Texto já preparado na posição (mm); `spacing` soma mm a cada espaço."""
+        font = self._font
+        self._fonts[self._font_key][2].update(text)
+        name = self._fonts[self._font_key][0]
+        if spacing and " " in text:
+            adjust = -spacing * K * 1000 / self.font_size_pt
+            words = text.split(" ")
+            parts = [f"<{font.hex(w + ' ')}> {adjust:.1f}" for w in words[:-1]]
+            body = f"[{' '.join(parts)} <{font.hex(words[-1])}>] TJ"
+        else:
+            body = f"<{font.hex(text)}> Tj"
+        self._emit(
+            f"BT /{name} {self.font_size_pt:.2f} Tf {x * K:.2f} {(self.h - y) * K:.2f} Td {body} ET"
+        )
+
+    def _border(self, x, y, w, h, border):
+        k = K
+        if border == 1:
+            self._emit(f"{x * k:.2f} {(self.h - y) * k:.2f} {w * k:.2f} {-h * k:.2f} re S")
+        elif isinstance(border, str):
+            top, bottom = (self.h - y) * k, (self.h - y - h) * k
+            left, right = x * k, (x + w) * k
+            lines = {"L": (left, top, left, bottom), "T": (left, top, right, top),
+                     "R": (right, top, right, bottom), "B": (left, bottom, right, bottom)}
+            for side in border:
+                if side in lines:
+                    self._emit("%.2f %.2f m %.2f %.2f l S" % lines[side])
+
+    def _break_page(self, h):
+        if self.y + h > self.page_break_trigger and not self._in_header:
+            x = self.x
+            self.add_page()
+            self.x = x
+
+    def cell(self, w, h=0, txt="", border=0, ln=0, align="", fill=0, _spacing=0.0):
+        self._break_page(h)
+        if w == 0:
+            w = self.w - self.r_margin - self.x
+        self._border(self.x, self.y, w, h, border)
+        text = self._font.prepare(txt)
+        if text:
+            if align == "R":
+                dx = w - self.c_margin - self.get_string_width(text)
+            elif align == "C":
+                dx = (w - self.get_string_width(text)) / 2
+            else:
+                dx = self.c_margin
+            self._text(self.x + dx, self.y + 0.5 * h + 0.3 * self.font_size, text, _spacing)
+        self.lasth = h
+        if ln > 0:
+            self.y += h
+            if ln == 1:
+                self.x = self.l_margin
+        else:
+            self.x += w
+
+    def _wrap(self, text, width):
+        """Linhas de um parágrafo: [(texto, é a última linha do parágrafo)]."""
+        font = self._font
+        limit = width * 1000 / self.font_size
+        lines = []
+        for paragraph in str(text).split("\n"):
+            paragraph = font.prepare(paragraph)
+            line, line_width = "", 0
+            for word in paragraph.split(" "):
+                word_width = font.string_width(word)
+                space = font.string_width(" ") if line else 0
+                if line and line_width + space + word_width <= limit:
+                    line, line_width = f"{line} {word}", line_width + space + word_width
+                    continue
+                if line:
+                    lines.append((line, False))
+                # Palavra maior que a linha: quebrada por caractere
+                while word and word_width > limit:
+                    cut, cut_width = 0, 0
+                    while cut < len(word) and cut_width + font.string_width(word[cut]) <= limit:
+                        cut_width += font.string_width(word[cut])
+                        cut += 1
+                    cut = max(cut, 1)
+                    lines.append((word[:cut], False))
+                    word = word[cut:]
+                    word_width = font.string_width(word)
+                line, line_width = word, word_width
+            lines.append((line, True))
+        return lines
+
+    def multi_cell(self, w, h, txt="", border=0, align="J", fill=0):
+        if w == 0:
+            w = self.w - self.r_margin - self.x
+        x = self.x
+        for line, last in self._wrap(txt, w - 2 * self.c_margin):
+            spacing = 0.0
+            if align == "J" and not last and line.count(" "):
+                free = w - 2 * self.c_margin - self.get_string_width(line)
+                spacing = max(free, 0) / line.count(" ")
+            self.x = x
+            self.cell(w, h, line, border, 2, "L" if align == "J" else align, fill, _spacing=spacing)
+        self.x = self.l_margin
+
+    def ln(self, h=None):
+        self.x = self.l_margin
+        self.y += self.lasth if h is None else h
+
+    # --- IMAGENS ---
+    def image(self, path, x=None, y=None, w=0, h=0):
+        width, height, colorspace, data, alpha = _load_image(path, os.path.getmtime(path))
+        if path not in self._images:
+            mask = ""
+            if alpha is not None:
+                smask = self._new_obj(
+                    f"<</Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                    f"/ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /FlateDecode /Length {len(alpha)}>>",
+                    alpha,
+                )
+                mask = f" /SMask {smask} 0 R"
+            num = self._new_obj(
+                f"<</Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                f"/ColorSpace /{colorspace} /BitsPerComponent 8 /Filter /FlateDecode{mask} /Length {len(data)}>>",
+                data,
+            )
+            self._images[path] = (f"I{len(self._images) + 1}", num, width, height)
+        name = self._images[path][0]
+        if not w and not h:
+            w = width * 25.4 / 96
+        w = w or h * width / height
+        h = h or w * height / width
+        x = self.x if x is None else x
+        if y is None:
+            self._break_page(h)
+            y = self.y
+            self.y += h
+        self._emit(f"q {w * K:.2f} 0 0 {h * K:.2f} {x * K:.2f} {(self.h - y - h) * K:.2f} cm /{name} Do Q")
+
+    # --- FINALIZAÇÃO ---
+    def _write_font(self, num, path, bold, chars):
+        font = _load_font(path, bold)
+        if not font.unicode:
+            self._obj(num, f"<</Type /Font /Subtype /Type1 /BaseFont /{font.name} /Encoding /WinAnsiEncoding>>")
+            return
+        chars = frozenset(chars) | {" "}
+        program, length, cid_to_gid = _subset(path, chars)
+        name = f"ROBINS+{font.name}"
+        widths, previous = [], None
+        for cp in sorted(ord(c) for c in chars):
+            if previous is not None and cp == previous + 1:
+                widths[-1].append(font.widths[cp])
+            else:
+                widths += [cp, [font.widths[cp]]]
+            previous = cp
+        w = " ".join(f"[{' '.join(map(str, v))}]" if isinstance(v, list) else str(v) for v in widths)
+        high_bytes = sorted({ord(c) >> 8 for c in chars})
+        cmap = (
+            "/CIDInit /ProcSet findresource begin\n12 dict begin\nbegincmap\n"
+            "/CIDSystemInfo <</Registry (Adobe) /Ordering (UCS) /Supplement 0>> def\n"
+            "/CMapName /Adobe-Identity-UCS def\n/CMapType 2 def\n"
+            "1 begincodespacerange\n<0000> <FFFF>\nendcodespacerange\n"
+            f"{len(high_bytes)} beginbfrange\n"
+            + "".join(f"<{b:02X}00> <{b:02X}FF> <{b:02X}00>\n" for b in high_bytes)
+            + "endbfrange\nendcmap\nCMapName currentdict /CMap defineresource pop\nend\nend"
+        ).encode("latin-1")
+
+        descendant, to_unicode, descriptor, file_obj, map_obj = (self._reserve() for _ in range(5))
+        self._obj(num, (
+            f"<</Type /Font /Subtype /Type0 /BaseFont /{name} /Encoding /Identity-H "
+            f"/DescendantFonts [{descendant} 0 R] /ToUnicode {to_unicode} 0 R>>"
+        ))
+        self._obj(descendant, (
+            f"<</Type /Font /Subtype /CIDFontType2 /BaseFont /{name} "
+            f"/CIDSystemInfo <</Registry (Adobe) /Ordering (UCS) /Supplement 0>> "
+            f"/FontDescriptor {descriptor} 0 R /DW {font.descriptor['MissingWidth']} /W [{w}] "
+            f"/CIDToGIDMap {map_obj} 0 R>>"
+        ))
+        cmap = zlib.compress(cmap)
+        self._obj(to_unicode, f"<</Filter /FlateDecode /Length {len(cmap)}>>", cmap)
+        fields = " ".join(f"/{k} {v}" for k, v in font.descriptor.items())
+        self._obj(descriptor, f"<</Type /FontDescriptor /FontName /{name} {fields} /FontFile2 {file_obj} 0 R>>")
+        self._obj(file_obj, f"<</Filter /FlateDecode /Length {len(program)} /Length1 {length}>>", program)
+        self._obj(map_obj, f"<</Filter /FlateDecode /Length {len(cid_to_gid)}>>", cid_to_gid)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._content is None:
+            self.add_page()
+        self._end_page()
+        for key, (_, num, chars) in self._fonts.items():
+            bold = key == "B"
+            self._write_font(num, self._bold_path if bold else self._regular_path, bold, chars)
+        kids = " ".join(f"{p} 0 R" for p in self._pages)
+        self._obj(self._pages_obj, f"<</Type /Pages /Kids [{kids}] /Count {len(self._pages)}>>")
+        catalog = self._new_obj(f"<</Type /Catalog /Pages {self._pages_obj} 0 R>>")
+        info = self._new_obj(f"<</Producer (ROBINS-I V2) /CreationDate ({_date()})>>")
+
+        xref = self._pos
+        lines = [f"xref\n0 {len(self._offsets)}\n", "0000000000 65535 f \n"]
+        lines += [f"{offset:010d} 00000 n \n" for offset in self._offsets[1:]]
+        lines.append(
+            f"trailer\n<</Size {len(self._offsets)} /Root {catalog} 0 R /Info {info} 0 R>>\n"
+            f"startxref\n{xref}\n%%EOF\n"
+        )
+        self._write("".join(lines).encode("latin-1"))
+        if self._own:
+            self._out.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._own:
+            self._out.close()
+
+    def getvalue(self):
+        """Bytes do documento, quando o destino é o BytesIO interno."""
+        self.close()
+        return self._out.getvalue()
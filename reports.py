@@ -0,0 +1,196 @@
+"""Geração dos relatórios (Word e PDF) fora do ciclo de execução do Streamlit.
+
+Os relatórios são gerados num pool de threads e guardados num cache LRU
+endereçado pelo hash do `report_data`: pedir de novo o relatório de uma
+avaliação que não mudou devolve o mesmo resultado sem gerar nada, e a página
+não fica parada enquanto um relatório grande é montado.
+"""
+import collections
+import hashlib
+import io
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from docx import Document
+from docx.shared import Cm, Pt, RGBColor
+import assets
+import telemetry
+from pdfstream import StreamPDF
+
+MAX_CACHED_REPORTS = 32
+WORKERS = 2
+
+# Larguras (mm) das colunas da tabela de respostas no PDF
+PDF_ANSWER_WIDTHS = [30, 60]
+
+
+# --- FUNÇÕES DE RELATÓRIO (PDF e WORD) ---
+# Cada formato tem um "novo documento" e um "escreve um estudo", para que o
+# relatório individual e a exportação em lote (bulk_export.py) usem o mesmo layout.
+def new_docx():
+    doc = Document()
+    style = doc.styles['Normal']
+    style.font.name = 'Arial'
+    style.font.size = Pt(11)
+
+    # Logo no cabeçalho (variante pequena, já redimensionada)
+    logo_png = assets.logo("report")
+    if logo_png:
+        doc.sections[0].header.paragraphs[0].add_run().add_picture(io.BytesIO(logo_png), width=Cm(2))
+    return doc
+
+def write_docx_study(doc, data):
+    # add_heading/add_paragraph(style=...) varrem todos os estilos do documento a
+    # cada chamada; resolvemos os ids uma vez (faz diferença na exportação em lote)
+    style_ids = {name: doc.styles[name].style_id for name in ("Title", "Heading 1", "Heading 2", "List Bullet")}
+
+    def add(text, style):
+        p = doc.add_paragraph(text)
+        p._p.style = style_ids[style]
+        return p
+
+    add(f"Relatório ROBINS-I V2: {data['study_id']}", "Title")
+    doc.add_paragraph(f"Desfecho: {data['outcome']}")
+    doc.add_paragraph(f"Resultado Numérico: {data['numeric_result']}")
+    
+    # Risco Geral
+    add("Julgamento Geral de Risco", "Heading 1")
+    p = doc.add_paragraph()
+    runner = p.add_run(f"Sugestão do Algoritmo: {data['algo_risk']}")
+    runner.bold = True
+    
+    doc.add_paragraph(f"Decisão Final do Pesquisador: {data['manual_risk'] or '—'}")
+    doc.add_paragraph(f"Justificativa Final: {data['manual_justification']}")
+
+    # Detalhes por Domínio
+    add("Detalhamento por Domínio", "Heading 1")
+    
+    for domain, details in data['domains'].items():
+        add(domain, "Heading 2")
+        doc.add_paragraph(f"Risco Calculado: {details['risk']}")
+        doc.add_paragraph(f"Justificativa do Algoritmo: {details['reason']}")
+        doc.add_paragraph("Respostas Selecionadas:")
+        for q, a in details['answers'].items():
+            add(f"  - {q}: {a}", "List Bullet")
+
+def generate_docx(data):
+    doc = new_docx()
+    write_docx_study(doc, data)
+
+    # Salvar em memória
+    bio = io.BytesIO()
+    doc.save(bio)
+    return bio
+
+class ReportPDF(StreamPDF):
+    # Título do cabeçalho; muda a cada estudo na exportação em lote
+    title_text = ""
+
+    def header(self):
+        logo_file = assets.logo_path("report")
+        if logo_file:
+            self.image(logo_file, 10, 8, 15)
+        self.set_font('Arial', 'B', 15)
+        self.cell(0, 10, self.title_text, 0, 1, 'C')
+        self.ln(10)
+
+def write_pdf_study(pdf, data):
+    pdf.title_text = f"Relatório ROBINS-I V2: {data['study_id']}"
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+
+    # Cabeçalho Info
+    pdf.set_font("Arial", 'B', 12)
+    pdf.cell(0, 10, f"Desfecho: {data['outcome']}", 0, 1)
+    pdf.cell(0, 10, f"Resultado: {data['numeric_result']}", 0, 1)
+    pdf.ln(5)
+
+    # Risco Geral
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(0, 10, "Julgamento Geral", 0, 1)
+    pdf.set_font("Arial", '', 12)
+    pdf.multi_cell(0, 10, f"Algoritmo: {data['algo_risk']}")
+    pdf.multi_cell(0, 10, f"Decisão do Pesquisador: {data['manual_risk'] or '—'}")
+    pdf.multi_cell(0, 10, f"Justificativa: {data['manual_justification']}")
+    pdf.ln(5)
+
+    # Domínios
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(0, 10, "Detalhamento por Domínio", 0, 1)
+    
+    pdf.set_font("Arial", '', 11)
+    for domain, details in data['domains'].items():
+        pdf.set_font("Arial", 'B', 12)
+        pdf.cell(0, 10, domain, 0, 1)
+        pdf.set_font("Arial", '', 11)
+        pdf.cell(0, 8, f"Risco: {details['risk']}", 0, 1)
+        pdf.multi_cell(0, 8, f"Motivo: {details['reason']}")
+
+        # Respostas Selecionadas (as mesmas do Word)
+        if details.get('answers'):
+            pdf.set_font("Arial", 'B', 10)
+            pdf.cell(PDF_ANSWER_WIDTHS[0], 7, "Pergunta", 1, 0)
+            pdf.cell(PDF_ANSWER_WIDTHS[1], 7, "Resposta", 1, 1)
+            pdf.set_font("Arial", '', 10)
+            for q, a in details['answers'].items():
+                pdf.cell(PDF_ANSWER_WIDTHS[0], 6, q, 1, 0)
+                pdf.cell(PDF_ANSWER_WIDTHS[1], 6, a, 1, 1)
+        pdf.ln(2)
+
+def generate_pdf(data, out=None):
+    """PDF do relatório; escrito em `out` (caminho ou stream) ou devolvido em bytes."""
+    pdf = ReportPDF(out)
+    write_pdf_study(pdf, data)
+    if out is None:
+        return pdf.getvalue()
+    pdf.close()
+
+
+# --- GERAÇÃO ASSÍNCRONA COM CACHE ---
+def report_key(report_data):
+    """Hash do conteúdo do relatório (mesmos dados, mesma chave)."""
+    text = json.dumps(report_data, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _render(data):
+    with telemetry.section("report_docx"):
+        docx = generate_docx(data).getvalue()
+    with telemetry.section("report_pdf"):
+        pdf = generate_pdf(data)
+    return docx, pdf
+
+
+_executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="robins-report")
+_cache = collections.OrderedDict()
+_lock = threading.Lock()
+
+
+def cached(key):
+    """Future do relatório já pedido com esta chave, ou None."""
+    with _lock:
+        future = _cache.get(key)
+        if future is not None:
+            _cache.move_to_end(key)
+        return future
+
+
+def submit(report_data):
+    """Agenda a geração de (docx, pdf) e devolve a Future.
+
+    Se o mesmo conteúdo já foi pedido, devolve a Future existente. Falhas não
+    ficam no cache, para que um novo pedido tente de novo.
+    """
+    key = report_key(report_data)
+    with _lock:
+        future = _cache.get(key)
+        if future is not None and not (future.done() and future.exception()):
+            _cache.move_to_end(key)
+            return future
+        # Cópia dos dados: a sessão pode alterar o dict enquanto o worker gera
+        snapshot = json.loads(json.dumps(report_data, default=str))
+        future = _cache[key] = _executor.submit(_render, snapshot)
+        while len(_cache) > MAX_CACHED_REPORTS:
+            _cache.popitem(last=False)
+    return future
@@ -0,0 +1,439 @@
+"""Gráficos no estilo robvis para uma revisão inteira.
+
+- Semáforo (traffic-light): uma linha por estudo, uma coluna por domínio e o
+  julgamento global;
+- Resumo: barras empilhadas com a proporção (opcionalmente ponderada) de cada
+  nível de risco por domínio.
+
+As cores vêm de palette.get_risk_color. O semáforo é montado com numpy: cada
+célula é um disco de cor com o símbolo do nível, e a página inteira sai de
+uma única operação sobre a matriz estudos x domínios. Revisões grandes são
+divididas em páginas (`rows_per_page` estudos cada), geradas uma de cada vez.
+
+    python robvis.py -o figuras/ --format svg
+"""
+import argparse
+import functools
+import io
+import os
+import sys
+import time
+import unicodedata
+from xml.sax.saxutils import escape
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from engine import CRITICAL, D1_LOW, DOMAIN_NAMES, DOMAINS, LOW, MODERATE, PENDING, SERIOUS
+from palette import get_risk_color
+
+LEVELS = (LOW, MODERATE, SERIOUS, CRITICAL, PENDING)
+LEVEL_LABELS = ("Baixo", "Moderado", "Sério", "Crítico", "Pendente")
+SYMBOLS = ("+", "-", "X", "!", "?")
+COLUMNS = DOMAINS + ("Overall",)
+
+# Qualquer valor fora da tabela (ex.: "N/A") conta como pendente
+_LEVEL_CODES = {LOW: 0, D1_LOW: 0, MODERATE: 1, SERIOUS: 2, CRITICAL: 3}
+
+WHITE = (255, 255, 255)
+GRAY = "#808080"
+
+
+def _rgb(color):
+    color = GRAY if color == "gray" else color
+    return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+
+
+def _hex(rgb):
+    return "#%02X%02X%02X" % tuple(rgb)
+
+
+# Cor de cada (coluna, nível): o Baixo do Domínio 1 é amarelo, como nos cards
+PALETTE = np.array(
+    [[_rgb(get_risk_color(level, DOMAIN_NAMES.get(col, ""))) for level in LEVELS] for col in COLUMNS],
+    dtype=np.uint8,
+)
+
+# PNG do semáforo em modo paleta ("P", 1 byte por pixel): GRAYS tons de cinza,
+# do branco ao preto (texto antisserrilhado sobre fundo branco), seguidos das
+# cores de PALETTE. Codificar 1 canal em vez de 3 é a maior parte do ganho.
+GRAYS = 64
+_COLOR_INDEX = (GRAYS + np.arange(PALETTE[..., 0].size, dtype=np.uint8)).reshape(PALETTE.shape[:2])
+_PNG_PALETTE = np.concatenate([
+    np.repeat(np.linspace(255, 0, GRAYS).round().astype(np.uint8)[:, None], 3, axis=1),
+    PALETTE.reshape(-1, 3),
+]).tobytes()
+_PNG_INDEX = {tuple(PALETTE[j, k]): _COLOR_INDEX[j, k] for j in range(len(COLUMNS)) for k in range(len(LEVELS))}
+
+
+# --- DADOS ---
+def risk_matrix(assessments):
+    """(rótulos, códigos) de uma coleção de avaliações.
+
+    Aceita registros do store.py ou dicts no formato `report_data`. `códigos`
+    é um array (estudos x 7) com o índice em LEVELS de cada domínio e do
+    julgamento global (decisão do pesquisador, ou do algoritmo).
+    """
+    labels, rows = [], []
+    for a in assessments:
+        data = a.get("report_data", a)
+        domains = data.get("domains", {})
+        label = f"{data.get('study_id', '')} · {data.get('outcome', '')}".strip(" ·")
+        if a.get("reviewer"):
+            label += f" ({a['reviewer']})"
+        labels.append(label)
+        risks = [domains.get(DOMAIN_NAMES[d], {}).get("risk") for d in DOMAINS]
+        risks.append(data.get("manual_risk") or data.get("algo_risk"))
+        rows.append([_LEVEL_CODES.get(r, 4) for r in risks])
+    return labels, np.array(rows, dtype=np.int8).reshape(-1, len(COLUMNS))
+
+
+def proportions(codes, weights=None):
+    """Proporção (ponderada) de cada nível por coluna: array (7 x 5)."""
+    n = codes.shape[0]
+    weights = np.ones(n) if weights is None else np.asarray(weights, dtype=float)
+    counts = np.zeros((len(COLUMNS), len(LEVELS)))
+    cols = np.broadcast_to(np.arange(len(COLUMNS)), codes.shape)
+    np.add.at(counts, (cols.ravel(), codes.ravel()), np.repeat(weights, len(COLUMNS)))
+    totals = counts.sum(axis=1, keepdims=True)
+    return np.divide(counts, totals, out=np.zeros_like(counts), where=totals > 0)
+
+
+# --- PNG ---
+# O texto é composto a partir de um atlas de glifos (cada caractere é
+# renderizado uma vez por tamanho), em vez de uma chamada ao FreeType por
+# rótulo, que dominava o tempo em revisões com milhares de estudos.
+FONT_FILES = ("DejaVuSans.ttf", "Arial.ttf", "arial.ttf", "LiberationSans-Regular.ttf")
+
+
+@functools.lru_cache(maxsize=None)
+def _font_file():
+    """Primeira fonte TrueType do sistema com acentos, ou None."""
+    for name in FONT_FILES:
+        try:
+            ImageFont.truetype(name, 10)
+        except OSError:
+            continue
+        return name
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def _font(size):
+    name = _font_file()
+    return ImageFont.truetype(name, size) if name else ImageFont.load_default(size=size)
+
+
+class _Atlas:
+    __slots__ = ("font", "height", "glyphs")
+
+    def __init__(self, size):
+        self.font = _font(size)
+        ascent, descent = self.font.getmetrics()
+        self.height = ascent + descent
+        self.glyphs = {}
+
+    def glyph(self, ch):
+        g = self.glyphs.get(ch)
+        if g is None:
+            # A fonte embutida do Pillow não tem acentos: "é" vira "e"
+            drawn = ch if _font_file() else unicodedata.normalize("NFKD", ch)[0]
+            width = max(1, round(self.font.getlength(drawn)))
+            im = Image.new("L", (width, self.height), 0)
+            ImageDraw.Draw(im).text((0, 0), drawn, fill=255, font=self.font, anchor="la")
+            g = self.glyphs[ch] = np.asarray(im, dtype=np.float32) / 255
+        return g
+
+    def width(self, text):
+        return sum(self.glyph(ch).shape[1] for ch in text)
+
+    def mask(self, text):
+        return np.concatenate([self.glyph(ch) for ch in text], axis=1)
+
+
+@functools.lru_cache(maxsize=None)
+def _atlas(size):
+    return _Atlas(size)
+
+
+def _blend(canvas, x, y, alpha, color):
+    """Pinta `color` em `canvas` com a opacidade `alpha`, a partir de (x, y).
+
+    Num canvas de índices (2D, o PNG do semáforo), o preto vira os tons de
+    cinza da paleta e as cores de PALETTE o seu índice, sem mistura.
+    """
+    h, w = alpha.shape
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w, canvas.shape[1]), min(y + h, canvas.shape[0])
+    if x0 >= x1 or y0 >= y1:
+        return
+    a = alpha[y0 - y:y1 - y, x0 - x:x1 - x]
+    region = canvas[y0:y1, x0:x1]
+    if canvas.ndim == 2:
+        color = tuple(int(c) for c in color)
+        if color == (0, 0, 0):
+            np.maximum(region, np.rint(a * (GRAYS - 1)).astype(np.uint8), out=region)
+        else:
+            region[a > 0.5] = _PNG_INDEX[color]
+        return
+    a = a[:, :, None]
+    region[:] = (region * (1 - a) + np.asarray(color, dtype=np.float32) * a).astype(np.uint8)
+
+
+def _text(canvas, x, y, text, size, color=(0, 0, 0), align="left"):
+    """Escreve `text` centrado verticalmente em y; `align` se refere a x."""
+    if not text:
+        return
+    atlas = _atlas(size)
+    alpha = atlas.mask(text)
+    if align == "right":
+        x -= alpha.shape[1]
+    elif align == "center":
+        x -= alpha.shape[1] // 2
+    _blend(canvas, int(x), int(y - atlas.height / 2), alpha, color)
+
+
+@functools.lru_cache(maxsize=None)
+def _disc(size):
+    yy, xx = np.mgrid[:size, :size]
+    center, radius = (size - 1) / 2, size * 0.42
+    return (yy - center) ** 2 + (xx - center) ** 2 <= radius ** 2
+
+
+@functools.lru_cache(maxsize=None)
+def _cell_masks(cell):
+    """Máscara do disco e dos símbolos de cada nível para células de `cell` px."""
+    disc = _disc(cell)
+    atlas = _atlas(int(cell * 0.6))
+    glyphs = np.zeros((len(SYMBOLS), cell, cell), dtype=bool)
+    for i, symbol in enumerate(SYMBOLS):
+        g = atlas.mask(symbol) > 0.5
+        h, w = g.shape
+        y, x = (cell - h) // 2, (cell - w) // 2
+        glyphs[i, max(y, 0):y + h, max(x, 0):x + w] = g[max(-y, 0):cell - y, max(-x, 0):cell - x]
+    return disc, glyphs & disc
+
+
+def _legend_entries():
+    return [(LEVEL_LABELS[i], PALETTE[1, i]) for i in range(len(LEVELS))] + [("Baixo (D1)", PALETTE[0, 0])]
+
+
+def _legend_width_png(cell):
+    atlas = _atlas(max(10, cell // 2))
+    return int(sum(cell * 1.8 + atlas.width(label) for label, _ in _legend_entries()))
+
+
+def _legend_png(canvas, x, y, cell):
+    size = max(10, cell // 2)
+    dot = max(4, int(cell * 0.6))
+    for label, color in _legend_entries():
+        _blend(canvas, int(x), int(y), _disc(dot).astype(np.float32), color)
+        _text(canvas, x + cell * 0.8, y + dot / 2, label, size)
+        x += cell * 1.8 + _atlas(size).width(label)
+
+
+def _column_offsets(cell):
+    """Posição (px) de cada coluna; o julgamento global fica um pouco afastado."""
+    offsets = np.arange(len(COLUMNS)) * cell
+    offsets[-1] += cell // 2
+    return offsets
+
+
+def _traffic_light_png(labels, codes, cell):
+    n = codes.shape[0]
+    size = max(10, cell // 2)
+    atlas = _atlas(size)
+    label_w = min(400, max((atlas.width(l) for l in labels), default=0)) + cell // 2
+    header_h, legend_h = cell + 8, cell + 8
+    offsets = _column_offsets(cell)
+    grid_w = offsets[-1] + cell
+    width = max(label_w + grid_w + cell // 2, _legend_width_png(cell) + cell // 2)
+    height = header_h + n * cell + legend_h
+
+    # Matriz estudos x colunas -> blocos cell x cell de índices da paleta, de uma vez
+    disc, glyphs = _cell_masks(cell)
+    colors = _COLOR_INDEX[np.arange(len(COLUMNS)), codes]                  # (n, 7)
+    tiles = np.where(disc[None, None], colors[:, :, None, None], np.uint8(0))
+    tiles[glyphs[codes]] = 0                                                 # símbolo em branco
+    block = tiles.transpose(0, 2, 1, 3).reshape(n * cell, len(COLUMNS) * cell)
+
+    canvas = np.zeros((height, width), dtype=np.uint8)                       # índice 0: branco
+    rows = slice(header_h, header_h + n * cell)
+    domains_w = len(DOMAINS) * cell
+    canvas[rows, label_w:label_w + domains_w] = block[:, :domains_w]
+    canvas[rows, label_w + offsets[-1]:label_w + grid_w] = block[:, domains_w:]
+    for col, x in zip(COLUMNS, offsets):
+        _text(canvas, label_w + x + cell / 2, header_h / 2, col, size, align="center")
+    for i, label in enumerate(labels):
+        _text(canvas, label_w - cell // 4, header_h + i * cell + cell / 2, label, size, align="right")
+    _legend_png(canvas, cell // 4, header_h + n * cell + 4, cell)
+
+    image = Image.fromarray(canvas, "P")
+    image.putpalette(_PNG_PALETTE)
+    out = io.BytesIO()
+    image.save(out, "PNG", compress_level=1)
+    return out.getvalue()
+
+
+def _summary_png(props, width, bar):
+    size = max(10, bar // 2)
+    label_w = bar * 3
+    bar_w = width - label_w - bar
+    height = (len(COLUMNS) + 1) * bar + bar + 8
+
+    canvas = np.full((height, width, 3), 255, dtype=np.uint8)
+    # Limites de cada segmento em px (acumulado das proporções)
+    edges = np.rint(np.concatenate([np.zeros((len(COLUMNS), 1)), props.cumsum(axis=1)], axis=1) * bar_w).astype(int)
+    for j, col in enumerate(COLUMNS):
+        y0 = bar // 2 + j * bar
+        _text(canvas, label_w - bar // 4, y0 + bar / 2, col, size, align="right")
+        for k in range(len(LEVELS)):
+            x0, x1 = label_w + edges[j, k], label_w + edges[j, k + 1]
+            canvas[y0 + bar // 8:y0 + bar // 8 + bar * 3 // 4, x0:x1] = PALETTE[j, k]
+            text = f"{props[j, k]:.0%}"
+            if x1 - x0 > _atlas(size).width(text) + 4:
+                fill = (0, 0, 0) if k == 1 or (j == 0 and k == 0) else (255, 255, 255)
+                _text(canvas, (x0 + x1) / 2, y0 + bar / 2, text, size, fill, align="center")
+    _legend_png(canvas, bar // 4, (len(COLUMNS) + 1) * bar, bar)
+
+    out = io.BytesIO()
+    Image.fromarray(canvas).save(out, "PNG")
+    return out.getvalue()
+
+
+# --- SVG ---
+def _svg(width, height, body):
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="Arial, sans-serif">'
+        f'<rect width="100%" height="100%" fill="white"/>{"".join(body)}</svg>'
+    ).encode("utf-8")
+
+
+def _legend_width_svg(cell):
+    # Largura aproximada do texto: 0,3 da célula por caractere
+    return int(sum(cell * 1.8 + len(label) * cell * 0.3 for label, _ in _legend_entries()))
+
+
+def _legend_svg(x, y, cell):
+    body = []
+    for label, color in _legend_entries():
+        body.append(f'<circle cx="{x + cell * 0.3:.1f}" cy="{y + cell * 0.3:.1f}" r="{cell * 0.3:.1f}" fill="{_hex(color)}"/>')
+        body.append(f'<text x="{x + cell * 0.8:.1f}" y="{y + cell * 0.3:.1f}" font-size="{cell // 2}" '
+                    f'dominant-baseline="middle">{label}</text>')
+        x += cell * 1.8 + len(label) * cell * 0.3
+    return body
+
+
+def _traffic_light_svg(labels, codes, cell):
+    n = codes.shape[0]
+    label_w = min(400, max((len(l) for l in labels), default=0) * cell * 0.3) + cell // 2
+    header_h, legend_h = cell + 8, cell + 8
+    offsets = _column_offsets(cell)
+    width = max(label_w + offsets[-1] + cell + cell // 2, _legend_width_svg(cell) + cell // 2)
+    height = header_h + n * cell + legend_h
+
+    body = [
+        f'<text x="{label_w + x + cell / 2:.1f}" y="{header_h / 2:.1f}" font-size="{cell // 2}" '
+        f'text-anchor="middle" dominant-baseline="middle">{col}</text>'
+        for col, x in zip(COLUMNS, offsets)
+    ]
+    body += [
+        f'<text x="{label_w - cell / 4:.1f}" y="{header_h + i * cell + cell / 2:.1f}" font-size="{cell // 2}" '
+        f'text-anchor="end" dominant-baseline="middle">{escape(label)}</text>'
+        for i, label in enumerate(labels)
+    ]
+    # Coordenadas e cores de todas as células calculadas de uma vez
+    cx = label_w + offsets + cell / 2
+    cy = header_h + (np.arange(n) + 0.5) * cell
+    hexes = np.array([[_hex(c) for c in row] for row in PALETTE])[np.arange(len(COLUMNS)), codes]
+    symbols = np.array(SYMBOLS)[codes]
+    r, size = cell * 0.42, int(cell * 0.6)
+    body += [
+        f'<circle cx="{x:.1f}" cy="{y:.1f}" r="{r:.1f}" fill="{fill}"/>'
+        f'<text x="{x:.1f}" y="{y:.1f}" font-size="{size}" fill="white" text-anchor="middle" '
+        f'dominant-baseline="central">{sym}</text>'
+        for y, fills, syms in zip(cy, hexes, symbols)
+        for x, fill, sym in zip(cx, fills, syms)
+    ]
+    body += _legend_svg(cell / 4, header_h + n * cell + 4, cell)
+    return _svg(width, height, body)
+
+
+def _summary_svg(props, width, bar):
+    label_w = bar * 3
+    bar_w = width - label_w - bar
+    height = (len(COLUMNS) + 1) * bar + bar + 8
+    edges = np.concatenate([np.zeros((len(COLUMNS), 1)), props.cumsum(axis=1)], axis=1) * bar_w
+    body = []
+    for j, col in enumerate(COLUMNS):
+        y = bar // 2 + j * bar
+        body.append(f'<text x="{label_w - bar / 4:.1f}" y="{y + bar / 2:.1f}" font-size="{bar // 2}" '
+                    f'text-anchor="end" dominant-baseline="middle">{col}</text>')
+        for k in range(len(LEVELS)):
+            seg = edges[j, k + 1] - edges[j, k]
+            if seg <= 0:
+                continue
+            body.append(f'<rect x="{label_w + edges[j, k]:.1f}" y="{y + bar / 8:.1f}" width="{seg:.1f}" '
+                        f'height="{bar * 0.75:.1f}" fill="{_hex(PALETTE[j, k])}"/>')
+            if seg > bar * 1.5:
+                fill = "black" if k == 1 or (j == 0 and k == 0) else "white"
+                body.append(f'<text x="{label_w + edges[j, k] + seg / 2:.1f}" y="{y + bar / 2:.1f}" '
+                            f'font-size="{bar // 2}" fill="{fill}" text-anchor="middle" '
+                            f'dominant-baseline="middle">{props[j, k]:.0%}</text>')
+    body += _legend_svg(bar / 4, (len(COLUMNS) + 1) * bar, bar)
+    return _svg(width, height, body)
+
+
+# --- API ---
+def traffic_light_pages(labels, codes, fmt="png", rows_per_page=50, cell=28):
+    """Gera as páginas do semáforo (bytes PNG ou SVG), uma de cada vez."""
+    render = _traffic_light_png if fmt == "png" else _traffic_light_svg
+    for start in range(0, max(len(labels), 1), rows_per_page):
+        yield render(labels[start:start + rows_per_page], codes[start:start + rows_per_page], cell)
+
+
+def summary_plot(codes, fmt="png", weights=None, width=800, bar=32):
+    """Gráfico de barras-resumo (bytes PNG ou SVG)."""
+    props = proportions(codes, weights)
+    return (_summary_png if fmt == "png" else _summary_svg)(props, width, bar)
+
+
+def render(assessments, out_dir, fmt="png", rows_per_page=50, weights=None):
+    """Escreve summary.<fmt> e traffic_light_NNN.<fmt> em `out_dir`; retorna os caminhos."""
+    if fmt not in ("png", "svg"):
+        raise ValueError(f"Formato não suportado: {fmt} (use png ou svg)")
+    labels, codes = risk_matrix(assessments)
+    os.makedirs(out_dir, exist_ok=True)
+    paths = [os.path.join(out_dir, f"summary.{fmt}")]
+    with open(paths[0], "wb") as f:
+        f.write(summary_plot(codes, fmt, weights))
+    for page, data in enumerate(traffic_light_pages(labels, codes, fmt, rows_per_page), 1):
+        paths.append(os.path.join(out_dir, f"traffic_light_{page:03d}.{fmt}"))
+        with open(paths[-1], "wb") as f:
+            f.write(data)
+    return paths
+
+
+def main(argv=None):
+    from store import DEFAULT_PATH, AssessmentStore
+
+    parser = argparse.ArgumentParser(description="Gráficos robvis (semáforo e resumo) das avaliações salvas.")
+    parser.add_argument("-o", "--output", required=True, help="Pasta de saída")
+    parser.add_argument("--format", choices=("png", "svg"), default="png")
+    parser.add_argument("--rows-per-page", type=int, default=50, help="Estudos por página do semáforo")
+    parser.add_argument("--db", default=DEFAULT_PATH, help="Banco SQLite das avaliações")
+    parser.add_argument("--reviewer", help="Filtra por revisor")
+    parser.add_argument("--outcome", help="Filtra por desfecho")
+    args = parser.parse_args(argv)
+
+    store = AssessmentStore(args.db)
+    ids = [r["id"] for r in store.query(outcome=args.outcome, reviewer=args.reviewer)]
+    start = time.perf_counter()
+    paths = render(store.iter_records(ids), args.output, args.format, args.rows_per_page)
+    print(f"{len(ids)} avaliações, {len(paths)} arquivos em {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+"""Codificação compacta e validação das respostas de uma avaliação.
+
+O esquema das perguntas é o de engine.py: ordem e valor de ocultação
+(QUESTIONS), opções de cada pergunta por variante (OPTIONS) e condições de
+exibição (VISIBILITY). As tabelas de decisão (decision_table.py) enumeram, a
+partir dele, todas as combinações de respostas que o formulário consegue
+produzir em cada domínio. Aqui cada combinação recebe um número denso (sua
+posição na enumeração), então:
+
+- as respostas de um domínio viram um inteiro pequeno (17 bits no Domínio 4,
+  o maior);
+- validar é conferir se o inteiro existe: respostas fora das opções ou dadas
+  a perguntas que ficariam ocultas são rejeitadas;
+- uma avaliação inteira (variante, triagem e seis domínios) cabe em 10 bytes
+  (AssessmentAnswers.to_bytes) e é pontuada sem montar dicionários.
+
+    record = AssessmentAnswers.encode("A", {"b1": "N", "1.1": "Y", ...})
+    record.score()
+    AssessmentAnswers.from_bytes(record.to_bytes()) == record
+
+`python schema.py` confere ida e volta de todas as combinações.
+"""
+import functools
+import operator
+import sys
+import time
+
+import engine
+from decision_table import table
+from engine import DOMAINS, OPTIONS, QUESTIONS, SELECT, TRIAGE_OPTIONS, VISIBILITY, score_overall
+
+VARIANTS = ("A", "B")
+TRIAGE = ("b1", "b2", "b3")
+
+_BLANK = (None, "", SELECT)
+
+
+class InvalidAnswers(ValueError):
+    """Respostas impossíveis no formulário; `errors` lista os problemas."""
+
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+class _Codebook:
+    """Numeração densa das combinações alcançáveis de um domínio (e variante)."""
+    __slots__ = ("table", "questions", "ranks", "order", "results", "bits")
+
+    def __init__(self, domain, variant):
+        t = table(domain, variant)
+        self.table = t
+        self.questions = t.questions
+        # Índice da tabela (base mista) -> posição na enumeração, e o inverso
+        self.order = list(t.index)
+        self.ranks = {idx: rank for rank, idx in enumerate(self.order)}
+        self.results = [t.results[t.index[idx]] for idx in self.order]
+        self.bits = (len(self.order) - 1).bit_length()
+
+    def lookup(self, answers):
+        """Código de respostas completas e válidas; KeyError em qualquer outro caso.
+
+        `answers` pode ter chaves de outros domínios, que são ignoradas.
+        """
+        return self.ranks[sum(map(operator.getitem, self.table.terms, map(answers.__getitem__, self.questions)))]
+
+    def encode(self, answers):
+        # Caminho rápido: todas as perguntas presentes e com valores conhecidos
+        if len(answers) == len(self.questions):
+            try:
+                return self.lookup(answers)
+            except KeyError:
+                pass
+        a = self.normalize(answers)
+        rank = self.ranks.get(self.table.pack(a))
+        # Respostas omitidas ou iguais às normalizadas; qualquer outra foi
+        # descartada pela normalização (pergunta oculta ou inexistente)
+        if rank is not None and all(v in _BLANK or a.get(q) == v for q, v in answers.items()):
+            return rank
+        raise InvalidAnswers(self.errors(answers))
+
+    def normalize(self, answers):
+        key = self.table.key
+        return engine.normalize_answers(*(key if isinstance(key, tuple) else (key, None)), answers)
+
+    def errors(self, answers):
+        """Problemas das respostas, na ordem das perguntas."""
+        key = self.table.key
+        a = self.normalize(answers)
+        rules = VISIBILITY[key]
+        errors = [f"{q}: pergunta inexistente" for q in answers if q not in a]
+        for q in self.questions:
+            value = answers.get(q) or SELECT
+            rule = rules.get(q)
+            if rule is None or rule(a):
+                if value != SELECT and value not in OPTIONS[key][q]:
+                    errors.append(f"{q}: valor inválido '{value}'")
+            elif value not in (SELECT, QUESTIONS[key][q]):
+                errors.append(f"{q}: pergunta não se aplica (resposta '{value}')")
+        return errors
+
+    def decode(self, rank):
+        return self.table.unpack(self.order[rank])
+
+
+_CODEBOOKS = {}
+
+
+def codebook(domain, variant="A"):
+    key = (domain, variant) if domain == "D1" else domain
+    book = _CODEBOOKS.get(key)
+    if book is None:
+        book = _CODEBOOKS[key] = _Codebook(domain, variant)
+    return book
+
+
+def encode_domain(domain, variant, answers):
+    """Código inteiro das respostas de um domínio; levanta InvalidAnswers."""
+    return codebook(domain, variant).encode(answers)
+
+
+def decode_domain(domain, variant, code):
+    """Respostas normalizadas ({"1.1": "Y", ...}) de um código de domínio."""
+    return codebook(domain, variant).decode(code)
+
+
+def validate(variant, answers):
+    """Lista de problemas de uma avaliação (vazia se for possível no formulário)."""
+    try:
+        AssessmentAnswers.encode(variant, answers)
+    except InvalidAnswers as e:
+        return e.errors
+    return []
+
+
+# --- TRIAGEM ---
+_TRIAGE_ALPHABETS = [(SELECT,) + TRIAGE_OPTIONS[k.upper()] for k in TRIAGE]
+_TRIAGE_CODES = [{v: i for i, v in enumerate(alphabet)} for alphabet in _TRIAGE_ALPHABETS]
+_TRIAGE_RADIX = len(_TRIAGE_ALPHABETS[0])
+_TRIAGE_BITS = (_TRIAGE_RADIX ** len(TRIAGE) - 1).bit_length()
+
+
+def _encode_triage(answers, errors):
+    code = 0
+    for k, codes in zip(TRIAGE, _TRIAGE_CODES):
+        value = answers.get(k) or SELECT
+        if value not in codes:
+            errors.append(f"{k}: valor inválido '{value}'")
+            value = SELECT
+        code = code * _TRIAGE_RADIX + codes[value]
+    return code
+
+
+def _decode_triage(code):
+    values = []
+    for alphabet in reversed(_TRIAGE_ALPHABETS):
+        code, c = divmod(code, _TRIAGE_RADIX)
+        values.append(alphabet[c])
+    return dict(zip(TRIAGE, reversed(values)))
+
+
+@functools.lru_cache(maxsize=None)
+def _codebooks(variant):
+    return tuple(codebook(d, variant) for d in DOMAINS)
+
+
+@functools.lru_cache(maxsize=None)
+def _known(variant):
+    # Chaves aceitas numa avaliação: triagem, C4 e as perguntas da variante
+    return frozenset(TRIAGE + ("c4",) + tuple(q for book in _codebooks(variant) for q in book.questions))
+
+
+@functools.lru_cache(maxsize=None)
+def _field_widths():
+    # D1 usa a largura da maior variante, para o formato não depender dela
+    return (_TRIAGE_BITS,) + tuple(max(codebook(d, v).bits for v in VARIANTS) for d in DOMAINS)
+
+
+class AssessmentAnswers:
+    """Respostas de uma avaliação inteira em inteiros.
+
+    `variant` é "A" ou "B", `triage` o código de B1-B3 e `domains` a tupla
+    com o código de cada domínio (ver encode_domain).
+    """
+    __slots__ = ("variant", "triage", "domains")
+
+    def __init__(self, variant, triage, domains):
+        self.variant = variant
+        self.triage = triage
+        self.domains = tuple(domains)
+
+    @classmethod
+    def encode(cls, variant, answers):
+        """Valida e codifica respostas no formato salvo pelo app ({"b1": ..., "1.1": ...}).
+
+        Levanta InvalidAnswers com todos os problemas encontrados.
+        """
+        if variant not in VARIANTS:
+            raise InvalidAnswers([f"variante inválida '{variant}' (use A ou B)"])
+        errors = [f"{k}: pergunta inexistente" for k in sorted(answers.keys() - _known(variant))]
+        triage = _encode_triage(answers, errors)
+        domains = []
+        for book in _codebooks(variant):
+            try:
+                domains.append(book.lookup(answers))
+                continue
+            except KeyError:
+                pass
+            try:
+                domains.append(book.encode({q: answers[q] for q in book.questions if q in answers}))
+            except InvalidAnswers as e:
+                errors += e.errors
+        if errors:
+            raise InvalidAnswers(errors)
+        return cls(variant, triage, domains)
+
+    def decode(self):
+        """Respostas normalizadas, no mesmo formato aceito por encode()."""
+        answers = _decode_triage(self.triage)
+        for d, code in zip(DOMAINS, self.domains):
+            answers.update(decode_domain(d, self.variant, code))
+        return answers
+
+    def score(self):
+        """(riscos por domínio {"D1": (risco, justificativa), ...}, julgamento global).
+
+        Não considera a triagem: a parada em B2/B3 é decidida por quem chama
+        (engine.triage_blocks), como na interface.
+        """
+        domains = {
+            d: book.results[code] for d, book, code in zip(DOMAINS, _codebooks(self.variant), self.domains)
+        }
+        return domains, score_overall(risk for risk, _ in domains.values())
+
+    # --- FORMATO BINÁRIO ---
+    # variante (1 bit) | triagem | D1 | ... | D6, cada campo com largura fixa
+    def to_int(self):
+        value = VARIANTS.index(self.variant)
+        for width, code in zip(_field_widths(), (self.triage, *self.domains)):
+            value = (value << width) | code
+        return value
+
+    @classmethod
+    def from_int(cls, value):
+        fields = []
+        for width in reversed(_field_widths()):
+            fields.append(value & ((1 << width) - 1))
+            value >>= width
+        triage, *domains = reversed(fields)
+        return cls(VARIANTS[value], triage, domains)
+
+    @classmethod
+    def size(cls):
+        """Bytes ocupados por to_bytes()."""
+        return (1 + sum(_field_widths()) + 7) // 8
+
+    def to_bytes(self):
+        return self.to_int().to_bytes(self.size(), "big")
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls.from_int(int.from_bytes(data, "big"))
+
+    def __eq__(self, other):
+        if not isinstance(other, AssessmentAnswers):
+            return NotImplemented
+        return (self.variant, self.triage, self.domains) == (other.variant, other.triage, other.domains)
+
+    def __hash__(self):
+        return hash((self.variant, self.triage, self.domains))
+
+    def __repr__(self):
+        return f"AssessmentAnswers({self.variant!r}, {self.triage}, {self.domains})"
+
+
+def main():
+    failures = 0
+    for d in DOMAINS:
+        for v in (VARIANTS if d == "D1" else ("A",)):
+            book = codebook(d, v)
+            for rank in range(len(book.order)):
+                a = book.decode(rank)
+                if book.encode(a) != rank or book.results[rank] != engine.score_normalized(d, v, a):
+                    failures += 1
+            label = f"{d}{v}" if d == "D1" else d
+            print(f"{label:4} {len(book.order):7d} combinações  {book.bits:2d} bits")
+
+    sample = {"b1": "N", "b2": "N", "b3": "PN", "1.1": "Y", "1.2": "Y", "1.3": "N", "1.4": "N"}
+    record = AssessmentAnswers.encode("A", sample)
+    assert AssessmentAnswers.from_bytes(record.to_bytes()) == record
+    # Respostas completas (como o app salva) e parciais (como uma planilha)
+    for label, answers in (("completas", record.decode()), ("parciais", sample)):
+        n = 20000
+        start = time.perf_counter()
+        for _ in range(n):
+            AssessmentAnswers.encode("A", answers)
+        elapsed = (time.perf_counter() - start) / n * 1e6
+        print(f"Validação e codificação, respostas {label}: {elapsed:.1f} µs")
+    print(f"Avaliação em {AssessmentAnswers.size()} bytes.")
+    print("OK: ida e volta confere em todas as combinações." if not failures else f"{failures} falhas.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Análise de sensibilidade ("e se?") das respostas de uma avaliação.
+
+Para cada pergunta respondida de um domínio (visível e diferente de
+"Selecione..."), troca a resposta por cada uma das outras opções e pontua o
+domínio com a troca. As trocas de um domínio são pontuadas de uma vez pela
+tabela de decisão (decision_table.py): cada uma vira um índice inteiro e a
+pontuação é uma consulta, sem rodar o algoritmo. Uma troca que revela uma
+pergunta nova deixa essa pergunta em "Selecione...", como na interface: o
+domínio fica PENDENTE, e effects() não a conta como mudança de resultado.
+
+O resultado de um domínio é memorizado pelo conteúdo das respostas, então um
+rerun só recalcula os domínios cujas respostas mudaram.
+
+    effects("D1", "A", answers, {"D1": "SERIOUS", "D2": "LOW", ...})
+    # -> [(Alternative(question="1.2", current="PY", option="WN", risk=..., reason=...), global com a troca)]
+
+`python sensitivity.py` mede o tempo por avaliação completa (todas as trocas
+dos seis domínios).
+"""
+import collections
+import functools
+import random
+import sys
+import time
+
+import decision_table
+from engine import DOMAINS, PENDING, SELECT, normalize_answers, question_options, score_overall, visible_questions
+
+Alternative = collections.namedtuple("Alternative", "question current option risk reason")
+
+
+@functools.lru_cache(maxsize=1024)
+def _alternatives(domain, variant, items):
+    a = normalize_answers(domain, variant, dict(items))
+    answered = {q: a[q] for q in visible_questions(domain, variant, a) if a[q] != SELECT}
+    options = question_options(domain, variant)
+    swaps = [(q, current, option) for q, current in answered.items() for option in options[q] if option != current]
+
+    # Lote: normaliza as trocas, empacota os índices e consulta a tabela
+    t = decision_table.table(domain, variant)
+    states = [normalize_answers(domain, variant, {**answered, q: option}) for q, _, option in swaps]
+    results = [t.index.get(t.pack(s)) for s in states]
+    out = []
+    for (q, current, option), s, result in zip(swaps, states, results):
+        # Fora da tabela (combinação inválida): pontuação de referência
+        risk, reason = t.results[result] if result is not None else decision_table.score_normalized(domain, variant, s)
+        out.append(Alternative(q, current, option, risk, reason))
+    return tuple(out)
+
+
+def alternatives(domain, variant, answers):
+    """Cada troca de uma resposta respondida do domínio, com o risco resultante."""
+    if domain != "D1":
+        variant = None
+    return _alternatives(domain, variant, tuple(sorted(answers.items())))
+
+
+def effects(domain, variant, answers, risks):
+    """Trocas que mudam o risco do domínio, com o global resultante.
+
+    `risks` são os riscos atuais de todos os domínios ({"D1": ..., ...}).
+    Trocas que deixam o domínio pendente (revelam perguntas sem resposta)
+    ficam de fora. Retorna [(Alternative, global com a troca)].
+    """
+    current = risks.get(domain)
+    out = []
+    for alt in alternatives(domain, variant, answers):
+        if alt.risk not in (current, PENDING):
+            out.append((alt, score_overall({**risks, domain: alt.risk}.values())))
+    return out
+
+
+def explore(variant, answers_by_domain):
+    """Todas as trocas de uma resposta da avaliação, de todos os domínios.
+
+    Retorna (riscos atuais, global atual, {domínio: effects(...)}).
+    """
+    risks = {}
+    for domain in DOMAINS:
+        result = decision_table.score_domain(domain, variant, answers_by_domain.get(domain, {}))
+        risks[domain] = result[0]
+    return (
+        risks,
+        score_overall(risks.values()),
+        {d: effects(d, variant, answers_by_domain.get(d, {}), risks) for d in DOMAINS},
+    )
+
+
+def _random_assessment(rng, variant):
+    answers = {}
+    for domain in DOMAINS:
+        options = question_options(domain, variant)
+        a = {}
+        # Responde na ordem da interface: só as perguntas visíveis até o momento
+        for q in options:
+            if q in visible_questions(domain, variant, normalize_answers(domain, variant, a)):
+                a[q] = rng.choice(options[q])
+        answers[domain] = a
+    return answers
+
+
+def main(argv=None):
+    rng = random.Random(0)
+    decision_table.build_all()
+    samples = [(v, _random_assessment(rng, v)) for v in ("A", "B") for _ in range(100)]
+    _alternatives.cache_clear()
+    swaps = 0
+    start = time.perf_counter()
+    for variant, answers in samples:
+        explore(variant, answers)
+    elapsed = time.perf_counter() - start
+    for variant, answers in samples:
+        swaps += sum(len(alternatives(d, variant, answers[d])) for d in DOMAINS)
+    print(f"{len(samples)} avaliações, {swaps / len(samples):.0f} trocas por avaliação")
+    print(f"{1000 * elapsed / len(samples):.2f} ms por avaliação (sem cache), "
+          f"{1e6 * elapsed / swaps:.1f} µs por troca")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
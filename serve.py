@@ -0,0 +1,24 @@
+"""Interface Streamlit e API de pontuação (api.py) num único servidor.
+
+    streamlit run serve.py
+
+A interface continua em "/" e a API em "/api/v1/...". Requer uma versão do
+Streamlit com st.App (servidor ASGI); para escalar a API separadamente, use
+`python api.py --workers N`.
+
+GET /metrics devolve, no formato do Prometheus, o tempo de cada seção da
+interface e dos relatórios (telemetry.py) medido neste processo.
+"""
+import streamlit as st
+from starlette.responses import Response
+from starlette.routing import Route
+
+import api
+import telemetry
+
+
+async def metrics(request):
+    return Response(telemetry.REGISTRY.prometheus(), media_type=telemetry.CONTENT_TYPE)
+
+
+app = st.App("app.py", routes=api.routes + [Route("/metrics", metrics, methods=["GET"])], lifespan=api.lifespan)
@@ -0,0 +1,600 @@
+"""Armazenamento local das avaliações (SQLite).
+
+Cada avaliação é identificada por estudo, desfecho e revisor. Guardamos o
+`report_data` completo (JSON), as respostas, o risco do algoritmo e a decisão
+do pesquisador; as colunas usadas em filtros têm índice, então carregar uma
+avaliação ou consultar uma revisão com milhares de estudos não exige
+percorrer os JSONs.
+
+    store = AssessmentStore("robins.sqlite3")
+    store.save(report_data, answers, reviewer="AB")
+    store.load("Estudo Exemplo", "Mortalidade", "AB")
+    store.query(risk="SERIOUS")
+
+Toda gravação que muda uma avaliação registra as respostas, riscos e decisão
+do pesquisador alterados no histórico somente-acréscimo (`store.audit`, ver
+audit.py).
+
+Contagens para o painel da revisão (`risk_counts`): número de avaliações por
+revisor, desfecho, dimensão (risco final, do algoritmo e de cada domínio) e
+risco, mantido por triggers a cada INSERT/UPDATE/DELETE, na mesma transação
+da gravação; o painel soma essas linhas em vez de percorrer as avaliações. O
+risco final (decisão do pesquisador, ou do algoritmo) e o de cada domínio
+também ficam em colunas indexadas (final_risk, d1_risk ... d6_risk), para
+listas como "todos os estudos com D3 CRITICAL".
+
+    store.counts(("final",), by="reviewer")
+    store.query(domain_risks={"D3": "CRITICAL"})
+
+A tabela `checkpoints` guarda o estado da interface de cada sessão (ver
+app.py), para que uma aba reconectada retome as respostas.
+
+Modelos (`templates`): qualquer avaliação pode virar um modelo, imutável, e
+ser clonada para novos estudos. Um clone guarda só as diferenças (answers e
+report_data) em relação ao modelo, e é remontado na leitura; os resultados
+dos domínios com as mesmas respostas do modelo não são gravados de novo nem
+recalculados. Apagar um modelo grava antes o conteúdo completo dos clones.
+
+    template_id = store.save_template("Coorte registro X", record["report_data"], record["answers"])
+    store.clone(template_id, "Silva 2021", "Mortalidade")
+"""
+import datetime
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+from audit import AuditLog, changes
+from engine import DOMAIN_NAMES, DOMAINS
+
+DEFAULT_PATH = os.environ.get(
+    "ROBINS_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "robins.sqlite3")
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assessments (
+    id INTEGER PRIMARY KEY,
+    study_id TEXT NOT NULL,
+    outcome TEXT NOT NULL DEFAULT '',
+    reviewer TEXT NOT NULL DEFAULT '',
+    numeric_result TEXT NOT NULL DEFAULT '',
+    variant TEXT NOT NULL DEFAULT '',
+    algo_risk TEXT NOT NULL DEFAULT '',
+    manual_risk TEXT NOT NULL DEFAULT '',
+    manual_justification TEXT NOT NULL DEFAULT '',
+    answers TEXT NOT NULL DEFAULT '{}',
+    report_data TEXT NOT NULL DEFAULT '{}',
+    digest TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    UNIQUE (study_id, outcome, reviewer)
+);
+-- study_id já é o prefixo do índice da restrição UNIQUE
+CREATE INDEX IF NOT EXISTS idx_assessments_outcome ON assessments (outcome);
+CREATE INDEX IF NOT EXISTS idx_assessments_reviewer ON assessments (reviewer);
+CREATE INDEX IF NOT EXISTS idx_assessments_algo_risk ON assessments (algo_risk);
+CREATE INDEX IF NOT EXISTS idx_assessments_manual_risk ON assessments (manual_risk);
+-- Modelos (imutáveis) para clonar avaliações; ver AssessmentStore.clone
+CREATE TABLE IF NOT EXISTS templates (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    variant TEXT NOT NULL DEFAULT '',
+    answers TEXT NOT NULL DEFAULT '{}',
+    report_data TEXT NOT NULL DEFAULT '{}',
+    source_id INTEGER,
+    created_at TEXT NOT NULL
+);
+-- Estado das sessões da interface, pelo token da URL (retomada após reconexão)
+CREATE TABLE IF NOT EXISTS checkpoints (
+    token TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+"""
+
+# Checkpoints sem atualização há mais tempo que isso são apagados na abertura
+CHECKPOINT_MAX_AGE = datetime.timedelta(days=30)
+
+SUMMARY_COLUMNS = (
+    "id", "study_id", "outcome", "reviewer", "numeric_result", "variant",
+    "algo_risk", "manual_risk", "final_risk", "template_id", "updated_at",
+)
+# Risco de cada domínio, desnormalizado do report_data (filtros do painel)
+DOMAIN_RISK_COLUMNS = {d: f"{d.lower()}_risk" for d in DOMAINS}
+# Colunas acrescentadas depois da primeira versão do esquema
+MIGRATIONS = {
+    "template_id": "ALTER TABLE assessments ADD COLUMN template_id INTEGER REFERENCES templates (id)",
+    **{c: f"ALTER TABLE assessments ADD COLUMN {c} TEXT NOT NULL DEFAULT ''" for c in DOMAIN_RISK_COLUMNS.values()},
+    "final_risk": "ALTER TABLE assessments ADD COLUMN final_risk TEXT NOT NULL DEFAULT ''",
+}
+# Risco final: a decisão do pesquisador, ou a do algoritmo quando não há decisão
+FINAL_RISK_SQL = "CASE WHEN manual_risk != '' THEN manual_risk ELSE algo_risk END"
+
+# Dimensões das contagens materializadas: expressão do risco de uma linha ({row} = NEW/OLD)
+COUNT_DIMENSIONS = {
+    "final": "{row}.final_risk",
+    "algo": "{row}.algo_risk",
+    **{d: "{row}.%s" % c for d, c in DOMAIN_RISK_COLUMNS.items()},
+}
+
+
+def _count_sql(row, sign):
+    values = ", ".join(
+        f"({row}.reviewer, {row}.outcome, '{dimension}', {expr.format(row=row)}, {sign})"
+        for dimension, expr in COUNT_DIMENSIONS.items()
+    )
+    return (
+        f"INSERT INTO risk_counts (reviewer, outcome, dimension, risk, n) VALUES {values} "
+        "ON CONFLICT (reviewer, outcome, dimension, risk) DO UPDATE SET n = n + excluded.n;"
+    )
+
+
+_PRUNE = "DELETE FROM risk_counts WHERE n = 0;"
+# Depois das migrações: os triggers usam as colunas final_risk e d1_risk ... d6_risk. Os índices
+# já estão na ordem de query(), então uma lista com LIMIT não precisa ordenar tudo
+AGGREGATES = f"""
+{chr(10).join(
+    f"CREATE INDEX IF NOT EXISTS idx_assessments_{c} ON assessments ({c}, study_id, outcome, reviewer);"
+    for c in ("final_risk", *DOMAIN_RISK_COLUMNS.values())
+)}
+CREATE TABLE IF NOT EXISTS risk_counts (
+    reviewer TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    risk TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (reviewer, outcome, dimension, risk)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS risk_counts_insert AFTER INSERT ON assessments
+BEGIN {_count_sql("NEW", 1)} END;
+CREATE TRIGGER IF NOT EXISTS risk_counts_delete AFTER DELETE ON assessments
+BEGIN {_count_sql("OLD", -1)} {_PRUNE} END;
+CREATE TRIGGER IF NOT EXISTS risk_counts_update
+AFTER UPDATE OF reviewer, outcome, algo_risk, final_risk, {", ".join(DOMAIN_RISK_COLUMNS.values())} ON assessments
+BEGIN {_count_sql("OLD", -1)} {_count_sql("NEW", 1)} {_PRUNE} END;
+"""
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+
+def _delta(base, value):
+    """Diferença de `value` em relação a `base` (dicts aninhados); None marca chave removida."""
+    out = {}
+    for key, v in value.items():
+        if key not in base:
+            out[key] = v
+        elif base[key] != v:
+            both = isinstance(v, dict) and isinstance(base[key], dict)
+            out[key] = _delta(base[key], v) if both else v
+    for key in base.keys() - value.keys():
+        out[key] = None
+    return out
+
+
+def _merge(base, delta):
+    """Inverso de _delta: `base` com as diferenças aplicadas (base não é alterado)."""
+    out = dict(base)
+    for key, v in delta.items():
+        if v is None:
+            out.pop(key, None)
+        elif isinstance(v, dict) and isinstance(base.get(key), dict):
+            out[key] = _merge(base[key], v)
+        else:
+            out[key] = v
+    return out
+
+
+def _domain_risks(report_data):
+    domains = report_data.get("domains", {})
+    return {c: domains.get(DOMAIN_NAMES[d], {}).get("risk") or "" for d, c in DOMAIN_RISK_COLUMNS.items()}
+
+
+def digest(report_data, answers):
+    """Hash do conteúdo salvo; igual ao anterior quer dizer que nada mudou."""
+    return hashlib.sha256(_dumps([report_data, answers]).encode("utf-8")).hexdigest()
+
+
+class AssessmentStore:
+    """Conexão única, compartilhada entre threads (sessões do Streamlit)."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        # Reentrante: a leitura de um clone busca o modelo com o lock já adquirido
+        self._lock = threading.RLock()
+        self._templates = {}  # id -> modelo decodificado (modelos não mudam)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            columns = {r["name"] for r in self._conn.execute("PRAGMA table_info(assessments)")}
+            for column, sql in MIGRATIONS.items():
+                if column not in columns:
+                    self._conn.execute(sql)
+            if not columns.issuperset(DOMAIN_RISK_COLUMNS.values()):
+                self._backfill_domain_risks()
+            if "final_risk" not in columns:
+                # Triggers de antes da coluna: recriados pelo AGGREGATES abaixo
+                for trigger in ("risk_counts_insert", "risk_counts_delete", "risk_counts_update"):
+                    self._conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+                self._conn.execute(f"UPDATE assessments SET final_risk = {FINAL_RISK_SQL}")
+            fresh = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'risk_counts'"
+            ).fetchone() is None
+            self._conn.executescript(AGGREGATES)
+            if fresh:
+                self.rebuild_counts()
+            expired = datetime.datetime.now(datetime.timezone.utc) - CHECKPOINT_MAX_AGE
+            self._conn.execute(
+                "DELETE FROM checkpoints WHERE updated_at < ?", (expired.isoformat(timespec="seconds"),)
+            )
+        self.audit = AuditLog(self._conn, self._lock)
+
+    def close(self):
+        self.audit.close()
+        with self._lock:
+            self._conn.close()
+
+    def save(self, report_data, answers, reviewer="", variant="", template_id=None):
+        """Insere ou atualiza a avaliação; não escreve se o conteúdo não mudou.
+
+        Com `template_id` (ou se a avaliação já é um clone), só as diferenças
+        em relação ao modelo são gravadas. Retorna o id da avaliação.
+        """
+        key = (
+            str(report_data.get("study_id") or ""),
+            str(report_data.get("outcome") or ""),
+            str(reviewer or ""),
+        )
+        content = digest(report_data, answers)
+        now = _now()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT id, digest, template_id FROM assessments WHERE study_id = ? AND outcome = ? AND reviewer = ?",
+                key,
+            ).fetchone()
+            if template_id is None and row is not None:
+                template_id = row["template_id"]
+            try:
+                template = None if template_id is None else self._template(template_id)
+            except KeyError:
+                # Modelo apagado (os clones já foram gravados completos)
+                template_id = template = None
+            if row is not None and row["digest"] == content and row["template_id"] == template_id:
+                return row["id"]
+            stored_answers, stored_report = answers, report_data
+            if template is not None:
+                stored_answers = _delta(template["answers"], answers)
+                stored_report = _delta(template["report_data"], report_data)
+            values = {
+                "numeric_result": str(report_data.get("numeric_result") or ""),
+                "variant": variant or "",
+                "algo_risk": report_data.get("algo_risk") or "",
+                "manual_risk": report_data.get("manual_risk") or "",
+                "final_risk": report_data.get("manual_risk") or report_data.get("algo_risk") or "",
+                "manual_justification": report_data.get("manual_justification") or "",
+                "answers": _dumps(stored_answers),
+                "report_data": _dumps(stored_report),
+                "digest": content,
+                "template_id": template_id,
+                "updated_at": now,
+                **_domain_risks(report_data),
+            }
+            if row is not None:
+                previous = self._full(
+                    self._conn.execute("SELECT * FROM assessments WHERE id = ?", (row["id"],)).fetchone()
+                )
+                self._conn.execute(
+                    f"UPDATE assessments SET {', '.join(f'{c} = :{c}' for c in values)} WHERE id = :id",
+                    {**values, "id": row["id"]},
+                )
+                assessment_id = row["id"]
+            else:
+                previous = None
+                assessment_id = self._conn.execute(
+                    "INSERT INTO assessments (study_id, outcome, reviewer, created_at, "
+                    f"{', '.join(values)}) VALUES (?, ?, ?, ?, {', '.join('?' * len(values))})",
+                    (*key, now, *values.values()),
+                ).lastrowid
+        # Depois do commit: só o que foi gravado entra no histórico
+        self.audit.record(*key, changes(previous, report_data, answers))
+        return assessment_id
+
+    def move(self, key, new_key):
+        """Muda a chave (estudo, desfecho, revisor) de uma avaliação salva.
+
+        Usado quando o estudo ou o desfecho aberto é renomeado. Não move se
+        não há avaliação em `key` ou se já há uma em `new_key`. Retorna o id
+        da avaliação movida, ou None.
+        """
+        key, new_key = tuple(str(k or "") for k in key), tuple(str(k or "") for k in new_key)
+        select = "SELECT * FROM assessments WHERE study_id = ? AND outcome = ? AND reviewer = ?"
+        with self._lock, self._conn:
+            row = self._conn.execute(select, key).fetchone()
+            if row is None or key == new_key or self._conn.execute(select, new_key).fetchone() is not None:
+                return None
+            record = self._full(row)
+            report_data = {**record["report_data"], "study_id": new_key[0], "outcome": new_key[1]}
+            stored_report = report_data
+            if record["template_id"] is not None:
+                stored_report = _delta(self._template(record["template_id"])["report_data"], report_data)
+            self._conn.execute(
+                "UPDATE assessments SET study_id = ?, outcome = ?, reviewer = ?, report_data = ?, "
+                "digest = ?, updated_at = ? WHERE id = ?",
+                (*new_key, _dumps(stored_report), digest(report_data, record["answers"]), _now(), row["id"]),
+            )
+        # O histórico da nova chave começa com o estado completo da avaliação
+        self.audit.record(*new_key, changes(None, report_data, record["answers"]))
+        return row["id"]
+
+    def _full(self, row):
+        if row is None:
+            return None
+        record = dict(row)
+        record["answers"] = json.loads(record["answers"])
+        record["report_data"] = json.loads(record["report_data"])
+        if record.get("template_id") is not None:
+            template = self._template(record["template_id"])
+            record["answers"] = _merge(template["answers"], record["answers"])
+            record["report_data"] = _merge(template["report_data"], record["report_data"])
+        return record
+
+    def get(self, assessment_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM assessments WHERE id = ?", (assessment_id,)).fetchone()
+        return self._full(row)
+
+    def load(self, study_id, outcome="", reviewer=""):
+        """Avaliação completa (com answers e report_data decodificados), ou None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM assessments WHERE study_id = ? AND outcome = ? AND reviewer = ?",
+                (study_id, outcome or "", reviewer or ""),
+            ).fetchone()
+        return self._full(row)
+
+    def iter_records(self, ids):
+        """Avaliações completas, uma de cada vez, na ordem de `ids`."""
+        for assessment_id in ids:
+            record = self.get(assessment_id)
+            if record is not None:
+                yield record
+
+    def records(self, study_id=None, outcome=None, reviewer=None):
+        """Avaliações completas que atendem aos filtros, numa única consulta."""
+        where, params = self._where(study_id=study_id, outcome=outcome, reviewer=reviewer)
+        sql = "SELECT * FROM assessments"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY study_id, outcome, reviewer", params).fetchall()
+        for row in rows:
+            yield self._full(row)
+
+    def _where(self, study_id=None, outcome=None, reviewer=None, risk=None, ids=None, domain_risks=None):
+        where, params = [], []
+        for domain, value in (domain_risks or {}).items():
+            if domain not in DOMAIN_RISK_COLUMNS:
+                raise ValueError(f"Domínio desconhecido: {domain}")
+            where.append(f"{DOMAIN_RISK_COLUMNS[domain]} = ?")
+            params.append(value)
+        if ids is not None:
+            ids = [int(i) for i in ids]
+            where.append(f"id IN ({', '.join('?' * len(ids))})" if ids else "0")
+            params += ids
+        for column, value in (("study_id", study_id), ("outcome", outcome), ("reviewer", reviewer)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if risk is not None:
+            where.append("final_risk = ?")
+            params.append(risk)
+        return where, params
+
+    def query(self, study_id=None, outcome=None, reviewer=None, risk=None, limit=None, ids=None, domain_risks=None):
+        """Resumo das avaliações que atendem aos filtros (sem os JSONs).
+
+        `risk` filtra pelo risco final (decisão do pesquisador, ou do
+        algoritmo quando não há decisão); `domain_risks` pelo risco de
+        domínios ({"D3": "CRITICAL"}).
+        """
+        where, params = self._where(
+            study_id=study_id, outcome=outcome, reviewer=reviewer, risk=risk, ids=ids, domain_risks=domain_risks
+        )
+        sql = f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM assessments"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY study_id, outcome, reviewer"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            return [dict(r) for r in self._conn.execute(sql, params)]
+
+    def version(self, reviewers=(), outcome=None):
+        """(quantidade, última gravação) das avaliações dos revisores, numa consulta.
+
+        Muda sempre que uma dessas avaliações é salva ou apagada (chave de cache).
+        """
+        reviewers = list(reviewers)
+        where = [f"reviewer IN ({', '.join('?' * len(reviewers))})" if reviewers else "0"]
+        params = reviewers
+        if outcome is not None:
+            where.append("outcome = ?")
+            params.append(outcome)
+        with self._lock:
+            n, updated_at = self._conn.execute(
+                f"SELECT COUNT(*), MAX(updated_at) FROM assessments WHERE {' AND '.join(where)}", params
+            ).fetchone()
+        return n, updated_at or ""
+
+    def distinct(self, column):
+        """Valores distintos de uma coluna indexada (para filtros)."""
+        if column not in ("study_id", "outcome", "reviewer", "algo_risk", "manual_risk", "final_risk"):
+            raise ValueError(f"Coluna não indexada: {column}")
+        with self._lock:
+            return [r[0] for r in self._conn.execute(
+                f"SELECT DISTINCT {column} FROM assessments ORDER BY {column}"
+            )]
+
+    # --- CONTAGENS (painel) ---
+    def counts(self, dimensions=("final",), by=None, reviewer=None, outcome=None):
+        """Avaliações por risco, somadas das contagens materializadas.
+
+        `dimensions`: "final", "algo" e/ou "D1".."D6"; `by`: None, "reviewer",
+        "outcome" ou "dimension" (uma linha por valor). Retorna
+        [{by: ..., "risk": ..., "n": ...}].
+        """
+        if by not in (None, "reviewer", "outcome", "dimension"):
+            raise ValueError(f"Agrupamento desconhecido: {by}")
+        unknown = set(dimensions) - COUNT_DIMENSIONS.keys()
+        if unknown:
+            raise ValueError(f"Dimensão desconhecida: {', '.join(sorted(unknown))}")
+        where = [f"dimension IN ({', '.join('?' * len(dimensions))})"]
+        params = list(dimensions)
+        for column, value in (("reviewer", reviewer), ("outcome", outcome)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        group = f"{by}, risk" if by else "risk"
+        with self._lock:
+            return [dict(r) for r in self._conn.execute(
+                f"SELECT {group}, SUM(n) AS n FROM risk_counts WHERE {' AND '.join(where)} "
+                f"GROUP BY {group} HAVING SUM(n) > 0 ORDER BY {group}",
+                params,
+            )]
+
+    def rebuild_counts(self):
+        """Recalcula as contagens do zero (normalmente mantidas pelos triggers)."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM risk_counts")
+            for dimension, expr in COUNT_DIMENSIONS.items():
+                self._conn.execute(
+                    "INSERT INTO risk_counts (reviewer, outcome, dimension, risk, n) "
+                    f"SELECT reviewer, outcome, ?, {expr.format(row='assessments')}, COUNT(*) "
+                    "FROM assessments GROUP BY 1, 2, 4",
+                    (dimension,),
+                )
+
+    def _backfill_domain_risks(self):
+        # Migração: preenche d1_risk ... d6_risk das avaliações já salvas
+        for row in self._conn.execute("SELECT * FROM assessments").fetchall():
+            values = _domain_risks(self._full(row)["report_data"])
+            self._conn.execute(
+                f"UPDATE assessments SET {', '.join(f'{c} = :{c}' for c in values)} WHERE id = :id",
+                {**values, "id": row["id"]},
+            )
+
+    def delete(self, assessment_id):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM assessments WHERE id = ?", (assessment_id,))
+
+    # --- MODELOS ---
+    def _template(self, template_id):
+        template = self._templates.get(template_id)
+        if template is None:
+            with self._lock:
+                row = self._conn.execute("SELECT * FROM templates WHERE id = ?", (template_id,)).fetchone()
+            if row is None:
+                raise KeyError(f"Modelo inexistente: {template_id}")
+            template = dict(row)
+            template["answers"] = json.loads(template["answers"])
+            template["report_data"] = json.loads(template["report_data"])
+            self._templates[template_id] = template
+        return template
+
+    def get_template(self, template_id):
+        """Modelo com answers e report_data decodificados (não altere o dict)."""
+        return self._template(template_id)
+
+    def save_template(self, name, report_data, answers, variant="", source_id=None):
+        """Cria um modelo (imutável) com o conteúdo de uma avaliação; retorna o id."""
+        name = str(name or "").strip()
+        if not name:
+            raise ValueError("Informe o nome do modelo.")
+        try:
+            with self._lock, self._conn:
+                cur = self._conn.execute(
+                    "INSERT INTO templates (name, variant, answers, report_data, source_id, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (name, variant or "", _dumps(answers), _dumps(report_data), source_id, _now()),
+                )
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Já existe um modelo chamado '{name}'.") from None
+        return cur.lastrowid
+
+    def templates(self):
+        """Resumo dos modelos, com o número de clones de cada um."""
+        with self._lock:
+            return [dict(r) for r in self._conn.execute(
+                "SELECT t.id, t.name, t.variant, t.source_id, t.created_at, "
+                "(SELECT COUNT(*) FROM assessments a WHERE a.template_id = t.id) AS clones "
+                "FROM templates t ORDER BY t.name"
+            )]
+
+    def clone(self, template_id, study_id, outcome="", reviewer=""):
+        """Nova avaliação de `study_id` com o conteúdo do modelo; retorna o id.
+
+        Os resultados dos domínios vêm do modelo, sem nova pontuação. O
+        resultado numérico é de cada estudo e começa em branco.
+        """
+        template = self._template(template_id)
+        report_data = _merge(template["report_data"], {
+            "study_id": study_id, "outcome": outcome or "", "numeric_result": "",
+        })
+        key = (str(study_id or ""), str(outcome or ""), str(reviewer or ""))
+        with self._lock:
+            exists = self._conn.execute(
+                "SELECT 1 FROM assessments WHERE study_id = ? AND outcome = ? AND reviewer = ?", key
+            ).fetchone()
+        if exists:
+            raise ValueError(f"Já existe uma avaliação de {key[0]} · {key[1]} · {key[2] or 'sem revisor'}.")
+        return self.save(report_data, template["answers"], reviewer, template["variant"], template_id)
+
+    def delete_template(self, template_id):
+        """Apaga o modelo; os clones passam a guardar o conteúdo completo."""
+        with self._lock, self._conn:
+            rows = self._conn.execute("SELECT * FROM assessments WHERE template_id = ?", (template_id,)).fetchall()
+            for row in rows:
+                record = self._full(row)
+                self._conn.execute(
+                    "UPDATE assessments SET answers = ?, report_data = ?, template_id = NULL WHERE id = ?",
+                    (_dumps(record["answers"]), _dumps(record["report_data"]), row["id"]),
+                )
+            self._conn.execute("DELETE FROM templates WHERE id = ?", (template_id,))
+            self._templates.pop(template_id, None)
+
+    def save_checkpoint(self, token, state):
+        """Grava o estado (dict serializável em JSON) da sessão identificada por `token`."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO checkpoints (token, state, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (token) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+                (token, _dumps(state), _now()),
+            )
+
+    def load_checkpoint(self, token):
+        """Estado salvo da sessão `token`, ou None."""
+        with self._lock:
+            row = self._conn.execute("SELECT state FROM checkpoints WHERE token = ?", (token,)).fetchone()
+        return None if row is None else json.loads(row["state"])
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM assessments").fetchone()[0]
+
+
+@functools.lru_cache(maxsize=None)
+def default_store():
+    """Store do caminho padrão, um por processo (compartilhado pelas páginas)."""
+    return AssessmentStore()
@@ -0,0 +1,180 @@
+"""Tempo de execução por seção da interface e dos relatórios.
+
+Cada seção do app.py (triagem, C4, cada domínio, julgamento global,
+exportação...) roda dentro de `section("nome")`, e os fragmentos dos domínios
+são decorados com `timed("d1")`, então um rerun só do fragmento também é
+medido. Por seção ficam, para o processo inteiro (todas as sessões):
+
+- um histograma de duração com baldes fixos, no formato do Prometheus (os
+  p50/p99 em produção saem de histogram_quantile sobre ele);
+- as últimas RECENT durações, para p50/p99 no painel do desenvolvedor;
+- um contador das exceções que interromperam a seção, por tipo (inclui o
+  st.rerun e o st.stop do Streamlit, que também são exceções).
+
+    with telemetry.section("triage"):
+        ...
+    telemetry.REGISTRY.prometheus()  # texto para GET /metrics (serve.py)
+"""
+import bisect
+import collections
+import contextlib
+import functools
+import os
+import threading
+import time
+
+# Limites superiores (segundos) dos baldes do histograma
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Durações recentes guardadas por seção (para os percentis do painel)
+RECENT = 1000
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Section:
+    __slots__ = ("count", "total", "buckets", "recent", "exceptions")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.recent = collections.deque(maxlen=RECENT)
+        self.exceptions = collections.Counter()
+
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Registry:
+    """Medições de todas as seções; compartilhado entre as threads das sessões."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sections = {}
+
+    def observe(self, name, seconds, exception=None):
+        with self._lock:
+            s = self._sections.get(name)
+            if s is None:
+                s = self._sections[name] = _Section()
+            s.count += 1
+            s.total += seconds
+            s.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+            s.recent.append(seconds)
+            if exception is not None:
+                s.exceptions[exception] += 1
+
+    def reset(self):
+        with self._lock:
+            self._sections.clear()
+
+    def mark(self):
+        """Estado atual dos contadores, para snapshot(since=...).
+
+        Não zera nada: os contadores do Prometheus têm de ser monotônicos, e
+        o registro é compartilhado por todas as sessões do processo.
+        """
+        with self._lock:
+            return {name: (s.count, s.total, dict(s.exceptions)) for name, s in self._sections.items()}
+
+    def snapshot(self, since=None):
+        """Uma linha por seção, na ordem em que apareceram (tempos em ms).
+
+        Com `since` (de mark()), só as execuções posteriores à marca; os
+        percentis usam as durações recentes posteriores a ela.
+        """
+        with self._lock:
+            items = [(name, s.count, s.total, list(s.recent), dict(s.exceptions)) for name, s in self._sections.items()]
+        rows = []
+        for name, count, total, recent, exceptions in items:
+            count_0, total_0, exceptions_0 = (since or {}).get(name, (0, 0.0, {}))
+            count, total = count - count_0, total - total_0
+            if count <= 0:
+                continue
+            recent = recent[-count:]
+            exceptions = {k: v - exceptions_0.get(k, 0) for k, v in exceptions.items() if v > exceptions_0.get(k, 0)}
+            ordered = sorted(recent)
+            rows.append({
+                "seção": name,
+                "execuções": count,
+                "média (ms)": round(1000 * total / count, 2),
+                "p50 (ms)": round(1000 * _percentile(ordered, 0.50), 2),
+                "p99 (ms)": round(1000 * _percentile(ordered, 0.99), 2),
+                "última (ms)": round(1000 * recent[-1], 2),
+                "interrupções": ", ".join(f"{k}: {v}" for k, v in sorted(exceptions.items())),
+            })
+        return rows
+
+    def prometheus(self):
+        """Métricas no formato de texto do Prometheus."""
+        with self._lock:
+            items = [(name, s.count, s.total, list(s.buckets), dict(s.exceptions)) for name, s in self._sections.items()]
+        lines = [
+            "# HELP robins_section_duration_seconds Duração de cada seção da interface e dos relatórios.",
+            "# TYPE robins_section_duration_seconds histogram",
+        ]
+        for name, count, total, buckets, _ in items:
+            cumulative = 0
+            for bound, n in zip(BUCKETS + (float("inf"),), buckets):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'robins_section_duration_seconds_bucket{{section="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'robins_section_duration_seconds_sum{{section="{name}"}} {total!r}')
+            lines.append(f'robins_section_duration_seconds_count{{section="{name}"}} {count}')
+        lines += [
+            "# HELP robins_section_exceptions_total Seções interrompidas por exceção (inclui st.rerun e st.stop).",
+            "# TYPE robins_section_exceptions_total counter",
+        ]
+        for name, _, _, _, exceptions in items:
+            for exception, n in sorted(exceptions.items()):
+                lines.append(f'robins_section_exceptions_total{{section="{name}",exception="{exception}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+@contextlib.contextmanager
+def section(name, registry=REGISTRY):
+    """Mede o bloco `with` como a seção `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        registry.observe(name, time.perf_counter() - start, type(e).__name__)
+        raise
+    registry.observe(name, time.perf_counter() - start)
+
+
+def timed(name):
+    """Decorador: cada chamada da função é medida como a seção `name`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with section(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class Timer:
+    """Medição iniciada e encerrada em pontos diferentes do script."""
+
+    def __init__(self, name, registry=REGISTRY):
+        self.name = name
+        self.registry = registry
+        self.start = time.perf_counter()
+        self.stopped = False
+
+    def stop(self):
+        if not self.stopped:
+            self.stopped = True
+            self.registry.observe(self.name, time.perf_counter() - self.start)
+
+
+def dev_panel_enabled(query_params=None):
+    """Painel do desenvolvedor: ROBINS_DEV_PANEL=1 no ambiente ou ?dev=1 na URL."""
+    if os.environ.get("ROBINS_DEV_PANEL", "") not in ("", "0"):
+        return True
+    return bool(query_params) and query_params.get("dev") not in (None, "", "0")
@@ -0,0 +1,189 @@
+"""Estudo com vários desfechos: respostas herdadas do estudo e próprias do desfecho.
+
+No ROBINS-I o mesmo estudo costuma ser avaliado para vários desfechos
+(mortalidade, readmissão, eventos adversos). A triagem, a C4 e os domínios de
+confusão, classificação das intervenções e seleção dos participantes (D1-D3)
+normalmente valem para o estudo inteiro; dados faltantes, mensuração do
+desfecho e seleção do resultado relatado (D4-D6) são de cada desfecho.
+
+StudyWorkspace guarda as respostas em dois níveis:
+
+- do estudo: os domínios de STUDY_DOMAINS, herdados por todos os desfechos;
+- de cada desfecho: os domínios de OUTCOME_DOMAINS e os domínios do estudo
+  que o desfecho sobrescreve (override), com uma cópia própria das respostas.
+
+A pontuação de um domínio é memorizada pelo conteúdo das respostas
+(score_cached): um domínio herdado é pontuado uma vez para todos os
+desfechos, e uma mudança só pontua de novo os domínios cujas respostas
+mudaram. Os desfechos afetados por uma mudança ficam marcados (pop_dirty)
+para serem salvos.
+
+    ws = StudyWorkspace(["Mortalidade"])
+    ws.add_outcome("Readmissão")
+    ws.set_domain("Mortalidade", "D1", "A", answers)   # vale para os dois
+    ws.set_override("Readmissão", "D1", True)           # cópia própria
+    ws.score("Readmissão", "A")                          # {"D1": (risco, justificativa), ...}
+"""
+import functools
+
+from engine import DOMAINS, score_domain, score_overall
+
+STUDY_DOMAINS = ("D1", "D2", "D3")
+OUTCOME_DOMAINS = ("D4", "D5", "D6")
+
+
+@functools.lru_cache(maxsize=4096)
+def _score(domain, variant, items):
+    return score_domain(domain, variant, dict(items))
+
+
+def score_cached(domain, variant, answers):
+    """score_domain memorizado pelo conteúdo das respostas."""
+    return _score(domain, variant if domain == "D1" else None, tuple(sorted(answers.items())))
+
+
+def _slot(domain, variant):
+    # As respostas do Domínio 1 dependem da variante (C4)
+    return f"D1{variant}" if domain == "D1" else domain
+
+
+class StudyWorkspace:
+    """Desfechos de um estudo e as respostas de cada nível."""
+
+    def __init__(self, outcomes=(), context=None, shared=None, own=None, overrides=None, details=None):
+        self.outcomes = list(outcomes)
+        self.context = dict(context or {})  # estudo, revisor, triagem e C4
+        self.shared = {slot: dict(a) for slot, a in (shared or {}).items()}
+        self.own = {o: {slot: dict(a) for slot, a in (own or {}).get(o, {}).items()} for o in self.outcomes}
+        self.overrides = {o: set((overrides or {}).get(o, ())) for o in self.outcomes}
+        self.details = {o: dict((details or {}).get(o, {})) for o in self.outcomes}
+        self.dirty = set()
+
+    # --- DESFECHOS ---
+    def add_outcome(self, outcome):
+        outcome = str(outcome or "").strip()
+        if not outcome:
+            raise ValueError("Informe o nome do desfecho.")
+        if outcome in self.outcomes:
+            raise ValueError(f"O desfecho '{outcome}' já existe neste estudo.")
+        self.outcomes.append(outcome)
+        self.own[outcome] = {}
+        self.overrides[outcome] = set()
+        self.details[outcome] = {}
+        self.dirty.add(outcome)
+        return outcome
+
+    def rename_outcome(self, outcome, new_name):
+        new_name = str(new_name or "").strip()
+        if not new_name:
+            raise ValueError("Informe o nome do desfecho.")
+        if new_name in self.outcomes:
+            raise ValueError(f"O desfecho '{new_name}' já existe neste estudo.")
+        self.outcomes[self.outcomes.index(outcome)] = new_name
+        for level in (self.own, self.overrides, self.details):
+            level[new_name] = level.pop(outcome)
+        self.dirty.discard(outcome)
+        self.dirty.add(new_name)
+        return new_name
+
+    def remove_outcome(self, outcome):
+        if len(self.outcomes) < 2:
+            raise ValueError("O estudo precisa de pelo menos um desfecho.")
+        self.outcomes.remove(outcome)
+        for level in (self.own, self.overrides, self.details):
+            level.pop(outcome, None)
+        self.dirty.discard(outcome)
+
+    # --- RESPOSTAS ---
+    def inherits(self, outcome, domain):
+        """O desfecho usa as respostas do estudo neste domínio?"""
+        return domain in STUDY_DOMAINS and domain not in self.overrides.get(outcome, ())
+
+    def inheritors(self, domain):
+        return [o for o in self.outcomes if self.inherits(o, domain)]
+
+    def domain_answers(self, outcome, domain, variant):
+        level = self.shared if self.inherits(outcome, domain) else self.own.get(outcome, {})
+        return dict(level.get(_slot(domain, variant), {}))
+
+    def set_domain(self, outcome, domain, variant, answers):
+        """Grava as respostas do domínio no nível certo; retorna True se mudaram."""
+        shared = self.inherits(outcome, domain)
+        level = self.shared if shared else self.own.setdefault(outcome, {})
+        slot = _slot(domain, variant)
+        answers = dict(answers)
+        if level.get(slot) == answers:
+            return False
+        level[slot] = answers
+        self.dirty.update(self.inheritors(domain) if shared else (outcome,))
+        return True
+
+    def set_override(self, outcome, domain, enabled):
+        """Liga (cópia das respostas do estudo) ou desliga as respostas próprias do domínio."""
+        if domain not in STUDY_DOMAINS or enabled == (domain in self.overrides[outcome]):
+            return
+        own = self.own.setdefault(outcome, {})
+        slots = [s for s in self.shared if s.startswith(domain)]
+        if enabled:
+            self.overrides[outcome].add(domain)
+            for slot in slots:
+                own[slot] = dict(self.shared[slot])
+        else:
+            self.overrides[outcome].discard(domain)
+            for slot in [s for s in own if s.startswith(domain)]:
+                del own[slot]
+        self.dirty.add(outcome)
+
+    def set_context(self, **values):
+        """Dados do estudo (id, revisor, triagem, C4): valem para todos os desfechos."""
+        if any(self.context.get(k) != v for k, v in values.items()):
+            self.context.update(values)
+            self.dirty.update(self.outcomes)
+
+    def set_details(self, outcome, **values):
+        """Dados próprios do desfecho (resultado numérico, decisão do pesquisador)."""
+        details = self.details.setdefault(outcome, {})
+        if any(details.get(k) != v for k, v in values.items()):
+            details.update(values)
+            self.dirty.add(outcome)
+
+    def pop_dirty(self):
+        """Desfechos alterados desde a última chamada, na ordem do estudo."""
+        dirty = [o for o in self.outcomes if o in self.dirty]
+        self.dirty.clear()
+        return dirty
+
+    # --- PONTUAÇÃO ---
+    def score(self, outcome, variant):
+        """{domínio: (risco, justificativa)} do desfecho."""
+        return {d: score_cached(d, variant, self.domain_answers(outcome, d, variant)) for d in DOMAINS}
+
+    def summary(self, variant):
+        """Uma linha por desfecho: risco de cada domínio e o global do algoritmo."""
+        rows = []
+        for outcome in self.outcomes:
+            scores = self.score(outcome, variant)
+            row = {"desfecho": outcome}
+            row.update({d: risk for d, (risk, _) in scores.items()})
+            row["global"] = score_overall(risk for risk, _ in scores.values())
+            row["respostas próprias"] = ", ".join(sorted(self.overrides[outcome]))
+            rows.append(row)
+        return rows
+
+    # --- SERIALIZAÇÃO (checkpoint) ---
+    def to_dict(self):
+        return {
+            "outcomes": self.outcomes,
+            "context": self.context,
+            "shared": self.shared,
+            "own": self.own,
+            "overrides": {o: sorted(d) for o, d in self.overrides.items()},
+            "details": self.details,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data.get("outcomes") or (), data.get("context"), data.get("shared"),
+            data.get("own"), data.get("overrides"), data.get("details"),
+        )